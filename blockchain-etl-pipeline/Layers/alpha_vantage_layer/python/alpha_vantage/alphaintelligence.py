@@ -6,7 +6,7 @@ class AlphaIntelligence(av):
     """This class implements all the api calls to advanced market intelligence
     """
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_news_sentiment(self, tickers=None, topics=None, time_from=None, time_to=None,
                            sort='LATEST', limit=50):
         """ Return live and historical market news & sentiment data 
@@ -28,7 +28,7 @@ class AlphaIntelligence(av):
         return _FUNCTION_KEY, 'feed', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_top_gainers(self):
         """ Returns the top 20 gainers in the US market.
         It raises ValueError when problems arise.
@@ -37,7 +37,7 @@ class AlphaIntelligence(av):
         return _FUNCTION_KEY, 'top_gainers', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_top_losers(self):
         """ Returns the top 20 losers in the US market.
         It raises ValueError when problems arise.
@@ -46,7 +46,7 @@ class AlphaIntelligence(av):
         return _FUNCTION_KEY, 'top_losers', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_most_active(self):
         """ Returns the top 20  most actively traded tickers in the US market.
         It raises ValueError when problems arise.
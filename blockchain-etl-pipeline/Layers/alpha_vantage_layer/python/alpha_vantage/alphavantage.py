@@ -1,16 +1,158 @@
-import requests
+import functools
 import os
 from functools import wraps
 import inspect
-import sys
-import re
+from urllib.parse import quote
 # Pandas became an optional dependency, but we still want to track it
 try:
+    import numpy
     import pandas
     _PANDAS_FOUND = True
 except ImportError:
     _PANDAS_FOUND = False
 import csv
+from . import columnar
+from .instrumentation import ApiCall
+from .transport import HttpTransport
+
+
+@functools.lru_cache(maxsize=4096)
+def _quote(text):
+    """ Percent encode a parameter value, commas separating list values,
+    colons of tickers and times and slashes are kept. Values repeat a lot
+    across calls (intervals, series types, symbols), so they are cached.
+    """
+    return quote(text, safe=',:/')
+
+
+class _RequestBuilder(object):
+    """ Request builder of one api method, prepared once when the method is
+    decorated. It knows the parameters and defaults of the method and, when
+    the method is declared with constant keys, keeps its function name and
+    data keys after the first call, so a call only has to collect the
+    argument values and encode them.
+    """
+    # Encoded parameters kept per method before the cache starts over
+    _FRAGMENT_CACHE_SIZE = 4096
+
+    def __init__(self, func, constant_keys=False):
+        """ Initialize the builder
+
+        Keyword Arguments:
+            func:  The decorated function, returning the function name, the
+                data key and the meta data key of the call
+            constant_keys:  True when the keys returned by func do not depend
+                on its arguments (default False)
+        """
+        argspec = inspect.getfullargspec(func)
+        self.func = func
+        # The first argument is self
+        self.names = tuple(argspec.args[1:])
+        defaults = argspec.defaults or ()
+        self.defaults = dict(zip(self.names[len(self.names) - len(defaults):],
+                                 defaults))
+        self.required = len(self.names) - len(defaults)
+        # Parameters in signature order, with their defaults
+        self.template = dict.fromkeys(self.names)
+        self.template.update(self.defaults)
+        self.matype_names = frozenset(name for name in self.names
+                                      if 'matype' in name)
+        self._fragments = {}
+        self.constant_keys = constant_keys
+        self.keys = None
+
+    def call_keys(self, client, args, kwargs):
+        """ Return the function name, data key and meta data key of a call.
+        Constant keys are taken from the first call, the later ones check
+        their arguments like python would and do not call the function.
+        """
+        if self.keys is None:
+            keys = self.func(client, *args, **kwargs)
+            if self.constant_keys:
+                self.keys = keys
+            return keys
+        if len(args) > len(self.names):
+            raise TypeError('{}() takes {} positional arguments but {} were '
+                            'given'.format(self.func.__name__,
+                                           len(self.names) + 1, len(args) + 1))
+        for name in kwargs:
+            if name not in self.defaults and name not in self.names:
+                raise TypeError("{}() got an unexpected keyword argument "
+                                "'{}'".format(self.func.__name__, name))
+        return self.keys
+
+    def params(self, args, kwargs):
+        """ Return the dictionary of argument values of a call, in the order
+        of the function parameters
+        """
+        params = self.template.copy()
+        params.update(zip(self.names, args))
+        params.update(kwargs)
+        if len(args) < self.required:
+            for name in self.names[len(args):self.required]:
+                if name not in kwargs:
+                    raise TypeError("{}() missing required argument: "
+                                    "'{}'".format(self.func.__name__, name))
+        return params
+
+    def _fragment(self, client, name, value):
+        """ Encode one 'name=value' parameter, '' when it is left out """
+        if name in self.matype_names and value:
+            # If the argument name has matype, we gotta map the string
+            # or the integer
+            value = client.map_to_matype(value)
+        if not value:
+            # Discard argument in the url formation if it was set to None (in
+            # other words, this will call the api with its internal defined
+            # parameter)
+            return ''
+        if isinstance(value, (tuple, list)):
+            value = ','.join(value)
+        return '&' + name + '=' + _quote(str(value))
+
+    def url(self, client, function_name, params):
+        """ Encode the url of a call in one pass. Encoded parameters are
+        cached per (name, type, value), so repeated values cost a dictionary
+        lookup.
+
+        Keyword Arguments:
+            client:  The AlphaVantage instance doing the call
+            function_name:  The function name of the alpha vantage api
+            params:  Dictionary with the argument values of the call
+        """
+        output_format = client.output_format.lower()
+        # Allow the output format to be json or csv (supported by
+        # alphavantage api). Pandas is simply json converted.
+        if 'json' in output_format or 'csv' in output_format:
+            oformat = output_format
+        elif 'pandas' in output_format or 'columnar' in output_format:
+            oformat = 'json'
+        else:
+            raise ValueError("Output format: {} not recognized, only json,"
+                             "pandas, columnar and csv are supported".format(
+                                 output_format))
+        base_url = AlphaVantage._RAPIDAPI_URL if client.rapidapi else \
+            AlphaVantage._ALPHA_VANTAGE_API_URL
+        parts = [base_url, 'function=', _quote(function_name)]
+        fragments = self._fragments
+        for name, value in params.items():
+            # True and 1 are equal keys but are encoded differently
+            key = (name, type(value), value)
+            try:
+                fragment = fragments[key]
+            except KeyError:
+                if len(fragments) >= self._FRAGMENT_CACHE_SIZE:
+                    fragments.clear()
+                fragment = fragments[key] = self._fragment(client, name, value)
+            except TypeError:
+                # Unhashable values, like lists of tickers
+                fragment = self._fragment(client, name, value)
+            parts.append(fragment)
+        if not client.rapidapi:
+            parts.append('&apikey=' + _quote(client.key))
+        if client._append_type:
+            parts.append('&datatype=' + oformat)
+        return ''.join(parts)
 
 
 class AlphaVantage(object):
@@ -20,13 +162,44 @@ class AlphaVantage(object):
     _ALPHA_VANTAGE_API_URL = "https://www.alphavantage.co/query?"
     _ALPHA_VANTAGE_MATH_MAP = ['SMA', 'EMA', 'WMA', 'DEMA', 'TEMA', 'TRIMA',
                                'T3', 'KAMA', 'MAMA']
+    _ALPHA_VANTAGE_MATH_INDEX = {name: value for value, name
+                                 in enumerate(_ALPHA_VANTAGE_MATH_MAP)}
     _ALPHA_VANTAGE_DIGITAL_CURRENCY_LIST = \
         "https://www.alphavantage.co/digital_currency_list/"
+    _ALPHA_VANTAGE_PHYSICAL_CURRENCY_LIST = \
+        "https://www.alphavantage.co/physical_currency_list/"
 
     _RAPIDAPI_URL = "https://alpha-vantage.p.rapidapi.com/query?"
+    # Largest number of symbols accepted by one REALTIME_BULK_QUOTES call
+    _BULK_QUOTES_LIMIT = 100
+    # Date label formats of the api, by label length
+    _DATE_FORMATS = {10: '%Y-%m-%d', 16: '%Y-%m-%d %H:%M',
+                     19: '%Y-%m-%d %H:%M:%S'}
+    # Seconds between two points of the series a SeriesStore can keep,
+    # intraday series take it from their interval argument
+    _STORE_INTERVALS = {'TIME_SERIES_INTRADAY': None,
+                        'TIME_SERIES_DAILY': 86400,
+                        'TIME_SERIES_DAILY_ADJUSTED': 86400,
+                        'FX_INTRADAY': None, 'FX_DAILY': 86400,
+                        'FX_WEEKLY': 604800, 'FX_MONTHLY': 2678400,
+                        'CRYPTO_INTRADAY': None}
+    # Kind of symbol expected by the arguments of the currency calls,
+    # checked against the SymbolIndex before any request
+    _FX_PAIR = {'from_symbol': 'physical', 'to_symbol': 'physical'}
+    _CRYPTO_PAIR = {'symbol': 'digital', 'market': 'physical'}
+    _SYMBOL_KINDS = {'CURRENCY_EXCHANGE_RATE': {'from_currency': 'currency',
+                                                'to_currency': 'currency'},
+                     'FX_INTRADAY': _FX_PAIR, 'FX_DAILY': _FX_PAIR,
+                     'FX_WEEKLY': _FX_PAIR, 'FX_MONTHLY': _FX_PAIR,
+                     'DIGITAL_CURRENCY_DAILY': _CRYPTO_PAIR,
+                     'DIGITAL_CURRENCY_WEEKLY': _CRYPTO_PAIR,
+                     'DIGITAL_CURRENCY_MONTHLY': _CRYPTO_PAIR,
+                     'CRYPTO_INTRADAY': _CRYPTO_PAIR}
 
     def __init__(self, key=None, output_format='json',
-                 treat_info_as_error=True, indexing_type='date', proxy=None, rapidapi=False):
+                 treat_info_as_error=True, indexing_type='date', proxy=None, rapidapi=False,
+                 float_dtype='float64', store=None, hooks=None,
+                 transport=None, symbols=None, snapshots=None):
         """ Initialize the class
 
         Keyword Arguments:
@@ -34,7 +207,9 @@ class AlphaVantage(object):
             retries:  Maximum amount of retries in case of faulty connection or
                 server not able to answer the call.
             treat_info_as_error: Treat information from the api as errors
-            output_format:  Either 'json', 'pandas' os 'csv'
+            output_format:  Either 'json', 'pandas', 'columnar' or 'csv'.
+            'columnar' returns a ColumnarFrame (float64 columns and an
+            int64 epoch index) without needing pandas
             indexing_type: Either 'date' to use the default date string given
             by the alpha vantage api call or 'integer' if you just want an
             integer indexing on your dataframe. Only valid, when the
@@ -43,6 +218,25 @@ class AlphaVantage(object):
             the URL of the proxy.
             rapidapi: Boolean describing whether or not the API key is
             through the RapidAPI platform or not
+            float_dtype: dtype of the numeric columns of pandas data frames,
+            'float32' halves their memory at the cost of precision. Only
+            valid, when the output_format is 'pandas' (default 'float64')
+            store: SeriesStore keeping the daily, weekly, monthly and intraday
+            series between calls. A 'full' call is served from the store and
+            only the last 'compact' points are downloaded when the stored
+            history is recent enough (default None, no store)
+            hooks: List of instrumentation Hooks (e.g. a MetricsCollector)
+            notified before every request, after its response and on errors
+            (default None)
+            transport: Transport sending the requests, a RecordingTransport or
+            ReplayTransport records or replays the calls without network
+            (default None, HttpTransport)
+            symbols: SymbolIndex the currencies of the ForeignExchange and
+            CryptoCurrencies calls are checked against, unknown ones raise a
+            ValueError before any request (default None, no check)
+            snapshots: SnapshotStore answering the fundamentals, commodities
+            and economic indicators calls until their next reporting period
+            is expected (default None, no snapshots)
         """
         if key is None:
             key = os.getenv('ALPHAVANTAGE_API_KEY')
@@ -71,93 +265,52 @@ class AlphaVantage(object):
         # variable will be overridden by those functions not needing it.
         self._append_type = True
         self.indexing_type = indexing_type
+        self.float_dtype = float_dtype
+        self.store = store
+        self.hooks = list(hooks or [])
+        self.transport = transport or HttpTransport()
+        self.symbols = symbols
+        self.snapshots = snapshots
         self.proxy = proxy or {}
 
     @classmethod
-    def _call_api_on_func(cls, func):
+    def _call_api_on_func(cls, func=None, constant_keys=False):
         """ Decorator for forming the api call with the arguments of the
         function, it works by taking the arguments given to the function
         and building the url to call the api on it
 
         Keyword Arguments:
             func:  The function to be decorated
+            constant_keys:  Declare that the function returns the same keys
+                whatever its arguments, they are then only asked once. Used
+                as @_call_api_on_func(constant_keys=True) (default False)
         """
-
-        # Argument Handling
-        if sys.version_info[0] < 3:
-            # Deprecated since version 3.0
-            argspec = inspect.getargspec(func)
-        else:
-            argspec = inspect.getfullargspec(func)
-        try:
-            # Assume most of the cases have a mixed between args and named
-            # args
-            positional_count = len(argspec.args) - len(argspec.defaults)
-            defaults = dict(
-                zip(argspec.args[positional_count:], argspec.defaults))
-        except TypeError:
-            if argspec.args:
-                # No defaults
-                positional_count = len(argspec.args)
-                defaults = {}
-            elif argspec.defaults:
-                # Only defaults
-                positional_count = 0
-                defaults = argspec.defaults
-        # Actual decorating
+        if func is None:
+            return functools.partial(cls._call_api_on_func,
+                                     constant_keys=constant_keys)
+        builder = _RequestBuilder(func, constant_keys)
 
         @wraps(func)
         def _call_wrapper(self, *args, **kwargs):
-            used_kwargs = kwargs.copy()
-            # Get the used positional arguments given to the function
-            used_kwargs.update(zip(argspec.args[positional_count:],
-                                   args[positional_count:]))
-            # Update the dictionary to include the default parameters from the
-            # function
-            used_kwargs.update({k: used_kwargs.get(k, d)
-                                for k, d in defaults.items()})
-            # Form the base url, the original function called must return
-            # the function name defined in the alpha vantage api and the data
-            # key for it and for its meta data.
-            function_name, data_key, meta_data_key = func(
-                self, *args, **kwargs)
-            base_url = AlphaVantage._RAPIDAPI_URL if self.rapidapi else AlphaVantage._ALPHA_VANTAGE_API_URL
-            url = "{}function={}".format(base_url, function_name)
-            for idx, arg_name in enumerate(argspec.args[1:]):
-                try:
-                    arg_value = args[idx]
-                except IndexError:
-                    arg_value = used_kwargs[arg_name]
-                if 'matype' in arg_name and arg_value:
-                    # If the argument name has matype, we gotta map the string
-                    # or the integer
-                    arg_value = self.map_to_matype(arg_value)
-                if arg_value:
-                    # Discard argument in the url formation if it was set to
-                    # None (in other words, this will call the api with its
-                    # internal defined parameter)
-                    if isinstance(arg_value, tuple) or isinstance(arg_value, list):
-                        # If the argument is given as list, then we have to
-                        # format it, you gotta format it nicely
-                        arg_value = ','.join(arg_value)
-                    url = '{}&{}={}'.format(url, arg_name, arg_value)
-            # Allow the output format to be json or csv (supported by
-            # alphavantage api). Pandas is simply json converted.
-            if 'json' in self.output_format.lower() or 'csv' in self.output_format.lower():
-                oformat = self.output_format.lower()
-            elif 'pandas' in self.output_format.lower():
-                oformat = 'json'
-            else:
-                raise ValueError("Output format: {} not recognized, only json,"
-                                 "pandas and csv are supported".format(
-                                     self.output_format.lower()))
-            apikey_parameter = "" if self.rapidapi else "&apikey={}".format(
-                self.key)
-            if self._append_type:
-                url = '{}{}&datatype={}'.format(url, apikey_parameter, oformat)
-            else:
-                url = '{}{}'.format(url, apikey_parameter)
-            return self._handle_api_call(url), data_key, meta_data_key
+            # The original function must return the function name defined in
+            # the alpha vantage api and the data key for it and for its meta
+            # data, constant ones are only asked once.
+            function_name, data_key, meta_data_key = builder.call_keys(
+                self, args, kwargs)
+            params = builder.params(args, kwargs)
+            self._check_symbols(function_name, params)
+            # Calls kept in the series store may ask for less data
+            store_plan = self._store_plan(function_name, params)
+            url = builder.url(self, function_name, params)
+            call_response = self._snapshot(function_name, url)
+            if call_response is None:
+                call_response = self._handle_api_call(url, function_name)
+                self._keep_snapshot(function_name, url, call_response)
+            if store_plan is not None:
+                call_response = self._store_merge(store_plan, call_response,
+                                                  data_key, meta_data_key)
+            return call_response, data_key, meta_data_key
+        _call_wrapper.request_builder = builder
         return _call_wrapper
 
     @classmethod
@@ -195,7 +348,7 @@ class AlphaVantage(object):
                 data_pandas = pandas.DataFrame.from_dict(data,
                                                          orient='columns')
                 # Rename columns to have a nicer name
-                col_names = [re.sub(r'\d+.', '', name).strip(' ')
+                col_names = [columnar.clean_column_name(name)
                              for name in list(data_pandas)]
                 data_pandas.columns = col_names
                 return data_pandas, meta_data
@@ -218,6 +371,7 @@ class AlphaVantage(object):
             call_response, data_key, meta_data_key = func(
                 self, *args, **kwargs)
             if 'json' in self.output_format.lower() or 'pandas' \
+                    in self.output_format.lower() or 'columnar' \
                     in self.output_format.lower():
                 if data_key is not None:
                     data = call_response[data_key]
@@ -241,15 +395,7 @@ class AlphaVantage(object):
                         # in the resulting data frame. If in the future
                         # alphavantage decides to do more with returning arrays
                         # this might become buggy. For now will do the trick.
-                        if not data:
-                            data_pandas = pandas.DataFrame()
-                        else:
-                            data_array = []
-                            for val in data:
-                                data_array.append([v for _, v in val.items()])
-                            data_pandas = pandas.DataFrame(data_array, columns=[
-                                k for k, _ in data[0].items()])
-                        return data_pandas, meta_data
+                        return self._records_to_pandas(data), meta_data
                     else:
                         return data, meta_data
                 elif output_format == 'pandas':
@@ -258,19 +404,10 @@ class AlphaVantage(object):
                         # in the resulting data frame. If in the future
                         # alphavantage decides to do more with returning arrays
                         # this might become buggy. For now will do the trick.
-                        if not data:
-                            data_pandas = pandas.DataFrame()
-                        else:
-                            data_array = []
-                            for val in data:
-                                data_array.append([v for _, v in val.items()])
-                            data_pandas = pandas.DataFrame(data_array, columns=[
-                                k for k, _ in data[0].items()])
+                        data_pandas = self._records_to_pandas(data)
                     else:
                         try:
-                            data_pandas = pandas.DataFrame.from_dict(data,
-                                                                     orient='index',
-                                                                     dtype='float')
+                            data_pandas = self._series_to_pandas(data)
                         # This is for Global quotes or any other new Alpha Vantage
                         # data that is added.
                         # It will have to be updated so that we can get exactly
@@ -290,9 +427,16 @@ class AlphaVantage(object):
                     else:
                         data_pandas.index.name = 'date'
                         # convert to pandas._libs.tslibs.timestamps.Timestamp
-                        data_pandas.index = pandas.to_datetime(
+                        data_pandas.index = self._parse_dates(
                             data_pandas.index)
                     return data_pandas, meta_data
+                elif output_format == 'columnar':
+                    # Series that can not be laid out as columns (single
+                    # quotes, exchange rates) are returned as plain json
+                    data_columnar = columnar.from_json(data)
+                    if data_columnar is None:
+                        return data, meta_data
+                    return data_columnar, meta_data
             elif 'csv' in self.output_format.lower():
                 return call_response, None
             else:
@@ -300,6 +444,226 @@ class AlphaVantage(object):
                     self.output_format))
         return _format_wrapper
 
+    @staticmethod
+    def _records_to_pandas(data):
+        """ Build a data frame out of a list of records, columns follow the
+        keys of the first record
+
+        Keyword Arguments:
+            data:  List of dictionaries as returned by the api
+        """
+        if not data:
+            return pandas.DataFrame()
+        return pandas.DataFrame.from_records(data, columns=list(data[0]))
+
+    def _series_to_pandas(self, data):
+        """ Build a float data frame indexed by date label out of a time
+        series. Every column is converted in one go from the parsed json
+        instead of going through DataFrame.from_dict. It raises ValueError
+        when a value is not numeric.
+
+        Keyword Arguments:
+            data:  Dictionary mapping a date label to its row of values
+        """
+        rows = list(data.values())
+        if not rows:
+            return pandas.DataFrame.from_dict(data, orient='index',
+                                              dtype=self.float_dtype)
+        fields = list(rows[0])
+        if any(len(row) != len(fields) for row in rows):
+            # Ragged series, let pandas align the fields and fill the gaps
+            return pandas.DataFrame.from_dict(data, orient='index',
+                                              dtype=self.float_dtype)
+        try:
+            columns = {field: numpy.array([row[field] for row in rows],
+                                          dtype=self.float_dtype)
+                       for field in fields}
+        except (KeyError, TypeError):
+            return pandas.DataFrame.from_dict(data, orient='index',
+                                              dtype=self.float_dtype)
+        return pandas.DataFrame(columns, index=pandas.Index(list(data)),
+                                columns=fields)
+
+    def _parse_dates(self, index):
+        """ Convert an index of date labels into timestamps, with an explicit
+        format whenever the labels have a known, uniform length
+
+        Keyword Arguments:
+            index:  The index of the data frame
+        """
+        if len(index) and isinstance(index[0], str):
+            date_format = self._DATE_FORMATS.get(len(index[0]))
+            if date_format and len(index[-1]) == len(index[0]):
+                try:
+                    return pandas.to_datetime(index, format=date_format)
+                except ValueError:
+                    pass
+        return pandas.to_datetime(index)
+
+    def _bulk_chunks(self, symbols):
+        """ Split a list of symbols, without duplicates, into the chunks of
+        one REALTIME_BULK_QUOTES call each. It raises ValueError for csv
+        output, whose results can not be merged.
+
+        Keyword Arguments:
+            symbols:  List of symbols, or a comma separated string
+        """
+        if 'csv' in self.output_format.lower():
+            raise ValueError('Bulk quotes are not supported with the {} '
+                             'output format'.format(self.output_format))
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        symbols = list(dict.fromkeys(symbol.strip() for symbol in symbols
+                                     if symbol.strip()))
+        size = self._BULK_QUOTES_LIMIT
+        return symbols, [symbols[start:start + size]
+                         for start in range(0, len(symbols), size)]
+
+    def _merge_bulk_quotes(self, symbols, responses):
+        """ Merge the quotes of every chunk into one result keyed by symbol,
+        following the output format: a dictionary of quotes for json, a data
+        frame indexed by symbol for pandas and a ColumnarFrame with a symbol
+        column for columnar. The meta data lists the symbols without quote.
+
+        Keyword Arguments:
+            symbols:  The requested symbols
+            responses:  The json responses of the chunks
+        """
+        quotes = {}
+        for response in responses:
+            for quote in response.get('data') or []:
+                quotes[quote['symbol']] = quote
+        meta_data = {'requests': len(responses),
+                     'missing': [symbol for symbol in symbols
+                                 if symbol not in quotes]}
+        # Keep the order in which the symbols were asked
+        records = [quotes[symbol] for symbol in symbols if symbol in quotes]
+        records += [quote for symbol, quote in quotes.items()
+                    if symbol not in symbols]
+        output_format = self.output_format.lower()
+        if output_format == 'pandas':
+            data_pandas = self._records_to_pandas(records)
+            if records:
+                data_pandas = data_pandas.set_index('symbol')
+            return data_pandas, meta_data
+        elif output_format == 'columnar':
+            return columnar.from_json(records), meta_data
+        return {quote['symbol']: quote for quote in records}, meta_data
+
+    def _check_symbols(self, function_name, params):
+        """ Raise a ValueError when a currency of the call is unknown to the
+        symbol index, sparing the api call that would fail
+
+        Keyword Arguments:
+            function_name:  The function name of the alpha vantage api
+            params:  Dictionary with the arguments of the call
+        """
+        kinds = self._SYMBOL_KINDS.get(function_name)
+        if self.symbols is None or kinds is None:
+            return
+        for name, kind in kinds.items():
+            value = params.get(name)
+            if value and not self.symbols.is_known(value, kind):
+                raise ValueError('Unknown symbol {}={} for {}, expected a {} '
+                                 'symbol'.format(name, value, function_name,
+                                                 kind))
+
+    def _snapshot(self, function_name, url):
+        """ Return the response of a call kept by the snapshot store, None
+        when the call has to be made
+        """
+        if self.snapshots is None or 'csv' in self.output_format.lower():
+            return None
+        return self.snapshots.get(function_name, url)
+
+    def _keep_snapshot(self, function_name, url, call_response):
+        if self.snapshots is not None and \
+                'csv' not in self.output_format.lower():
+            self.snapshots.put(function_name, url, call_response)
+
+    # Arguments that do not change the points of a stored series
+    _STORE_IGNORED_PARAMS = ('symbol', 'from_symbol', 'to_symbol', 'market',
+                             'interval', 'outputsize', 'month', 'entitlement',
+                             'extended_hours', 'adjusted', 'datatype')
+
+    def _store_key(self, function_name, params):
+        """ Return the (function, symbol, interval) key of a series in the
+        series store. Arguments changing the points of the series, like the
+        time period of an indicator, are appended to the interval.
+
+        Keyword Arguments:
+            function_name:  The function name of the alpha vantage api
+            params:  Dictionary with the arguments of the call
+        """
+        interval = params.get('interval')
+        if params.get('adjusted') == 'false':
+            interval = '{}-raw'.format(interval)
+        if params.get('extended_hours') == 'false':
+            interval = '{}-regular'.format(interval)
+        variant = ['{}={}'.format(name, value) for name, value in params.items()
+                   if value and name not in self._STORE_IGNORED_PARAMS]
+        if variant:
+            interval = ','.join([str(interval)] + variant)
+        if 'from_symbol' in params:
+            symbol = params['from_symbol'] + params['to_symbol']
+        else:
+            symbol = params['symbol'] + (params.get('market') or '')
+        return function_name, symbol, interval
+
+    def _store_plan(self, function_name, params):
+        """ Decide how a call goes through the series store. It returns None
+        for calls the store does not keep, otherwise the store key and whether
+        the response has to be rebuilt from the store. A 'full' call is
+        lowered to 'compact' in params when the store holds the complete
+        history up to the last 'compact' points.
+
+        Keyword Arguments:
+            function_name:  The function name of the alpha vantage api
+            params:  Dictionary with the arguments of the call
+        """
+        if self.store is None or function_name not in self._STORE_INTERVALS \
+                or 'csv' in self.output_format.lower():
+            return None
+        key = self._store_key(function_name, params)
+        if params.get('month') or params.get('outputsize') != 'full':
+            return key, False
+        seconds = self._STORE_INTERVALS[function_name] or \
+            60 * int(params['interval'].rstrip('min'))
+        meta = self.store.meta(key)
+        if meta and meta.get('complete') and \
+                self.store.is_fresh(key, seconds):
+            params['outputsize'] = 'compact'
+            return key, True
+        return key, False
+
+    def _store_merge(self, store_plan, call_response, data_key,
+                     meta_data_key):
+        """ Merge the data of a call into the series store and, when the
+        call was lowered to 'compact', rebuild the full series from the store
+
+        Keyword Arguments:
+            store_plan:  The store key and rebuild flag from _store_plan
+            call_response:  The decoded json response of the call
+            data_key:  The key of the data in the json response
+            meta_data_key:  The key of the meta data in the json response
+        """
+        key, rebuild = store_plan
+        data = call_response.get(data_key)
+        if not isinstance(data, dict) or not data:
+            return call_response
+        meta_data = call_response.get(meta_data_key)
+        complete = isinstance(meta_data, dict) and any(
+            str(value).lower().startswith('full size')
+            for value in meta_data.values())
+        self.store.merge(key, data, meta_data, complete=complete)
+        if not rebuild:
+            return call_response
+        call_response = dict(call_response)
+        date_format = self._DATE_FORMATS[len(next(iter(data)))]
+        call_response[data_key] = self.store.to_json(key,
+                                                     date_format=date_format)
+        return call_response
+
     def set_proxy(self, proxy=None):
         """ Set a new proxy configuration
 
@@ -329,6 +693,8 @@ class AlphaVantage(object):
                 * 7 = Kaufman Adaptive Moving Average (KAMA),
                 * 8 = MESA Adaptive Moving Average (MAMA)
         """
+        if matype in AlphaVantage._ALPHA_VANTAGE_MATH_INDEX:
+            return AlphaVantage._ALPHA_VANTAGE_MATH_INDEX[matype]
         # Check if it is an integer or a string
         try:
             value = int(matype)
@@ -338,33 +704,86 @@ class AlphaVantage(object):
             value = AlphaVantage._ALPHA_VANTAGE_MATH_MAP.index(matype)
         return value
 
-    def _handle_api_call(self, url):
+    def _start_call(self, url, function_name):
+        """ Create the ApiCall of a request and notify the hooks before it is
+        sent, None when there are no hooks
+
+        Keyword Arguments:
+            url:  The url of the service
+            function_name:  The function name of the alpha vantage api
+        """
+        if not self.hooks:
+            return None
+        call = ApiCall(function_name, url)
+        for hook in self.hooks:
+            hook.before_request(call)
+        return call
+
+    def _finish_call(self, call, status, nbytes, json_response=None):
+        """ Complete the ApiCall once the response arrived and notify the
+        hooks. Limit messages of the api are recorded on the call.
+
+        Keyword Arguments:
+            call:  The ApiCall from _start_call
+            status:  The http status code
+            nbytes:  The size of the response body
+            json_response:  The decoded json response (default None)
+        """
+        if call is None:
+            return
+        call.finish(status, nbytes)
+        if isinstance(json_response, dict):
+            if "Note" in json_response:
+                call.rate_limit = "Note"
+            elif "Information" in json_response:
+                call.rate_limit = "Information"
+        for hook in self.hooks:
+            hook.after_response(call)
+
+    def _fail_call(self, call, error):
+        """ Notify the hooks that a call raised """
+        if call is None:
+            return
+        for hook in self.hooks:
+            hook.on_error(call, error)
+
+    def _handle_api_call(self, url, function_name=None):
         """ Handle the return call from the  api and return a data and meta_data
         object. It raises a ValueError on problems
 
         Keyword Arguments:
             url:  The url of the service
-            data_key:  The key for getting the data from the jso object
-            meta_data_key:  The key for getting the meta data information out
-            of the json object
+            function_name:  The function name of the alpha vantage api, given
+                to the instrumentation hooks (default None)
         """
-        response = requests.get(url, proxies=self.proxy, headers=self.headers)
-        if 'json' in self.output_format.lower() or 'pandas' in \
-                self.output_format.lower():
-            json_response = response.json()
-            if not json_response:
-                raise ValueError(
-                    'Error getting data from the api, no return was given.')
-            elif "Error Message" in json_response:
-                raise ValueError(json_response["Error Message"])
-            elif "Information" in json_response and self.treat_info_as_error:
-                raise ValueError(json_response["Information"])
-            elif "Note" in json_response and self.treat_info_as_error:
-                raise ValueError(json_response["Note"])
-            return json_response
-        else:
-            csv_response = csv.reader(response.text.splitlines())
-            if not csv_response:
-                raise ValueError(
-                    'Error getting data from the api, no return was given.')
-            return csv_response
+        call = self._start_call(url, function_name)
+        try:
+            response = self.transport.get(url, headers=self.headers,
+                                          proxy=self.proxy)
+            if 'json' in self.output_format.lower() or 'pandas' in \
+                    self.output_format.lower() or 'columnar' in \
+                    self.output_format.lower():
+                json_response = response.json()
+                self._finish_call(call, response.status_code,
+                                  len(response.content), json_response)
+                if not json_response:
+                    raise ValueError(
+                        'Error getting data from the api, no return was given.')
+                elif "Error Message" in json_response:
+                    raise ValueError(json_response["Error Message"])
+                elif "Information" in json_response and self.treat_info_as_error:
+                    raise ValueError(json_response["Information"])
+                elif "Note" in json_response and self.treat_info_as_error:
+                    raise ValueError(json_response["Note"])
+                return json_response
+            else:
+                self._finish_call(call, response.status_code,
+                                  len(response.content))
+                csv_response = csv.reader(response.text.splitlines())
+                if not csv_response:
+                    raise ValueError(
+                        'Error getting data from the api, no return was given.')
+                return csv_response
+        except Exception as error:
+            self._fail_call(call, error)
+            raise
@@ -1,7 +1,5 @@
-import aiohttp
+import functools
 from functools import wraps
-import inspect
-import re
 # Pandas became an optional dependency, but we still want to track it
 try:
     import pandas
@@ -9,7 +7,9 @@ try:
 except ImportError:
     _PANDAS_FOUND = False
 import csv
-from ..alphavantage import AlphaVantage as AlphaVantageBase
+from .. import columnar
+from ..alphavantage import AlphaVantage as AlphaVantageBase, _RequestBuilder
+from .transport import HttpTransport
 
 
 class AlphaVantage(AlphaVantageBase):
@@ -18,92 +18,49 @@ class AlphaVantage(AlphaVantageBase):
     the other classes of this python wrapper will inherit from.
     """
 
-    def __init__(self, *args, proxy=None, **kwargs):
-        super(AlphaVantage, self).__init__(*args, **kwargs)
-        self.session = None
+    def __init__(self, *args, proxy=None, transport=None, **kwargs):
+        super(AlphaVantage, self).__init__(
+            *args, transport=transport or HttpTransport(), **kwargs)
         self.proxy = proxy or ''
 
     @classmethod
-    def _call_api_on_func(cls, func):
+    def _call_api_on_func(cls, func=None, constant_keys=False):
         """ Decorator for forming the api call with the arguments of the
         function, it works by taking the arguments given to the function
         and building the url to call the api on it
 
         Keyword Arguments:
             func:  The function to be decorated
+            constant_keys:  Declare that the function returns the same keys
+                whatever its arguments, they are then only asked once. Used
+                as @_call_api_on_func(constant_keys=True) (default False)
         """
-
-        # Argument Handling
-        argspec = inspect.getfullargspec(func)
-        try:
-            # Asumme most of the cases have a mixed between args and named
-            # args
-            positional_count = len(argspec.args) - len(argspec.defaults)
-            defaults = dict(
-                zip(argspec.args[positional_count:], argspec.defaults))
-        except TypeError:
-            if argspec.args:
-                # No defaults
-                positional_count = len(argspec.args)
-                defaults = {}
-            elif argspec.defaults:
-                # Only defaults
-                positional_count = 0
-                defaults = argspec.defaults
-        # Actual decorating
+        if func is None:
+            return functools.partial(cls._call_api_on_func,
+                                     constant_keys=constant_keys)
+        builder = _RequestBuilder(func, constant_keys)
 
         @wraps(func)
         async def _call_wrapper(self, *args, **kwargs):
-            used_kwargs = kwargs.copy()
-            # Get the used positional arguments given to the function
-            used_kwargs.update(zip(argspec.args[positional_count:],
-                                   args[positional_count:]))
-            # Update the dictionary to include the default parameters from the
-            # function
-            used_kwargs.update({k: used_kwargs.get(k, d)
-                                for k, d in defaults.items()})
-            # Form the base url, the original function called must return
-            # the function name defined in the alpha vantage api and the data
-            # key for it and for its meta data.
-            function_name, data_key, meta_data_key = func(
-                self, *args, **kwargs)
-            base_url = AlphaVantage._RAPIDAPI_URL if self.rapidapi else AlphaVantage._ALPHA_VANTAGE_API_URL
-            url = "{}function={}".format(base_url, function_name)
-            for idx, arg_name in enumerate(argspec.args[1:]):
-                try:
-                    arg_value = args[idx]
-                except IndexError:
-                    arg_value = used_kwargs[arg_name]
-                if 'matype' in arg_name and arg_value:
-                    # If the argument name has matype, we gotta map the string
-                    # or the integer
-                    arg_value = self.map_to_matype(arg_value)
-                if arg_value:
-                    # Discard argument in the url formation if it was set to
-                    # None (in other words, this will call the api with its
-                    # internal defined parameter)
-                    if isinstance(arg_value, tuple) or isinstance(arg_value, list):
-                        # If the argument is given as list, then we have to
-                        # format it, you gotta format it nicely
-                        arg_value = ','.join(arg_value)
-                    url = '{}&{}={}'.format(url, arg_name, arg_value)
-            # Allow the output format to be json or csv (supported by
-            # alphavantage api). Pandas is simply json converted.
-            if 'json' in self.output_format.lower() or 'csv' in self.output_format.lower():
-                oformat = self.output_format.lower()
-            elif 'pandas' in self.output_format.lower():
-                oformat = 'json'
-            else:
-                raise ValueError("Output format: {} not recognized, only json,"
-                                 "pandas and csv are supported".format(
-                                     self.output_format.lower()))
-            apikey_parameter = "" if self.rapidapi else "&apikey={}".format(
-                self.key)
-            if self._append_type:
-                url = '{}{}&datatype={}'.format(url, apikey_parameter, oformat)
-            else:
-                url = '{}{}'.format(url, apikey_parameter)
-            return await self._handle_api_call(url), data_key, meta_data_key
+            # The original function must return the function name defined in
+            # the alpha vantage api and the data key for it and for its meta
+            # data, constant ones are only asked once.
+            function_name, data_key, meta_data_key = builder.call_keys(
+                self, args, kwargs)
+            params = builder.params(args, kwargs)
+            self._check_symbols(function_name, params)
+            # Calls kept in the series store may ask for less data
+            store_plan = self._store_plan(function_name, params)
+            url = builder.url(self, function_name, params)
+            call_response = self._snapshot(function_name, url)
+            if call_response is None:
+                call_response = await self._handle_api_call(url, function_name)
+                self._keep_snapshot(function_name, url, call_response)
+            if store_plan is not None:
+                call_response = self._store_merge(store_plan, call_response,
+                                                  data_key, meta_data_key)
+            return call_response, data_key, meta_data_key
+        _call_wrapper.request_builder = builder
         return _call_wrapper
 
     @classmethod
@@ -141,7 +98,7 @@ class AlphaVantage(AlphaVantageBase):
                 data_pandas = pandas.DataFrame.from_dict(data,
                                                          orient='columns')
                 # Rename columns to have a nicer name
-                col_names = [re.sub(r'\d+.', '', name).strip(' ')
+                col_names = [columnar.clean_column_name(name)
                              for name in list(data_pandas)]
                 data_pandas.columns = col_names
                 return data_pandas, meta_data
@@ -164,6 +121,7 @@ class AlphaVantage(AlphaVantageBase):
             call_response, data_key, meta_data_key = await func(
                 self, *args, **kwargs)
             if 'json' in self.output_format.lower() or 'pandas' \
+                    in self.output_format.lower() or 'columnar' \
                     in self.output_format.lower():
                 data = call_response[data_key]
 
@@ -185,16 +143,10 @@ class AlphaVantage(AlphaVantageBase):
                         # in the resulting data frame. If in the future
                         # alphavantage decides to do more with returning arrays
                         # this might become buggy. For now will do the trick.
-                        data_array = []
-                        for val in data:
-                            data_array.append([v for _, v in val.items()])
-                        data_pandas = pandas.DataFrame(data_array, columns=[
-                            k for k, _ in data[0].items()])
+                        data_pandas = self._records_to_pandas(data)
                     else:
                         try:
-                            data_pandas = pandas.DataFrame.from_dict(data,
-                                                                     orient='index',
-                                                                     dtype='float')
+                            data_pandas = self._series_to_pandas(data)
                         # This is for Global quotes or any other new Alpha Vantage
                         # data that is added.
                         # It will have to be updated so that we can get exactly
@@ -214,9 +166,16 @@ class AlphaVantage(AlphaVantageBase):
                     else:
                         data_pandas.index.name = 'date'
                         # convert to pandas._libs.tslibs.timestamps.Timestamp
-                        data_pandas.index = pandas.to_datetime(
+                        data_pandas.index = self._parse_dates(
                             data_pandas.index)
                     return data_pandas, meta_data
+                elif output_format == 'columnar':
+                    # Series that can not be laid out as columns (single
+                    # quotes, exchange rates) are returned as plain json
+                    data_columnar = columnar.from_json(data)
+                    if data_columnar is None:
+                        return data, meta_data
+                    return data_columnar, meta_data
             elif 'csv' in self.output_format.lower():
                 return call_response, None
             else:
@@ -233,40 +192,50 @@ class AlphaVantage(AlphaVantageBase):
         """
         self.proxy = proxy or ''
 
-    async def _handle_api_call(self, url):
+    async def _handle_api_call(self, url, function_name=None):
         """
         Handle the return call from the  api and return a data and meta_data
         object. It raises a ValueError on problems
 
         Keyword Arguments:
             url:  The url of the service
+            function_name:  The function name of the alpha vantage api, given
+                to the instrumentation hooks (default None)
         """
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-        response = await self.session.get(url, proxy=self.proxy, headers=self.headers)
-        if 'json' in self.output_format.lower() or 'pandas' in \
-                self.output_format.lower():
-            json_response = await response.json()
-            if not json_response:
-                raise ValueError(
-                    'Error getting data from the api, no return was given.')
-            elif "Error Message" in json_response:
-                raise ValueError(json_response["Error Message"])
-            elif "Information" in json_response and self.treat_info_as_error:
-                raise ValueError(json_response["Information"])
-            elif "Note" in json_response and self.treat_info_as_error:
-                raise ValueError(json_response["Note"])
-            return json_response
-        else:
-            csv_response = csv.reader(response.text.splitlines())
-            if not csv_response:
-                raise ValueError(
-                    'Error getting data from the api, no return was given.')
-            return csv_response
+        call = self._start_call(url, function_name)
+        try:
+            response = await self.transport.get(url, headers=self.headers,
+                                                proxy=self.proxy)
+            if 'json' in self.output_format.lower() or 'pandas' in \
+                    self.output_format.lower() or 'columnar' in \
+                    self.output_format.lower():
+                json_response = response.json()
+                self._finish_call(call, response.status_code,
+                                  len(response.content), json_response)
+                if not json_response:
+                    raise ValueError(
+                        'Error getting data from the api, no return was given.')
+                elif "Error Message" in json_response:
+                    raise ValueError(json_response["Error Message"])
+                elif "Information" in json_response and self.treat_info_as_error:
+                    raise ValueError(json_response["Information"])
+                elif "Note" in json_response and self.treat_info_as_error:
+                    raise ValueError(json_response["Note"])
+                return json_response
+            else:
+                self._finish_call(call, response.status_code,
+                                  len(response.content))
+                csv_response = csv.reader(response.text.splitlines())
+                if not csv_response:
+                    raise ValueError(
+                        'Error getting data from the api, no return was given.')
+                return csv_response
+        except Exception as error:
+            self._fail_call(call, error)
+            raise
 
     async def close(self):
         """
-        Close the underlying aiohttp session
+        Close the transport and its underlying aiohttp session
         """
-        if self.session and not self.session.closed:
-            await self.session.close()
+        await self.transport.close()
@@ -6,7 +6,7 @@ class CryptoCurrencies(av):
     """
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_digital_currency_daily(self, symbol, market):
         """ Returns  the daily historical time series for a digital currency
         (e.g., BTC) traded on a specific market (e.g., CNY/Chinese Yuan),
@@ -24,7 +24,7 @@ class CryptoCurrencies(av):
         return _FUNCTION_KEY, 'Time Series (Digital Currency Daily)', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_digital_currency_weekly(self, symbol, market):
         """ Returns  the weekly historical time series for a digital currency
         (e.g., BTC) traded on a specific market (e.g., CNY/Chinese Yuan),
@@ -42,7 +42,7 @@ class CryptoCurrencies(av):
         return _FUNCTION_KEY, 'Time Series (Digital Currency Weekly)', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_digital_currency_monthly(self, symbol, market):
         """ Returns  the monthly historical time series for a digital currency
         (e.g., BTC) traded on a specific market (e.g., CNY/Chinese Yuan),
@@ -60,7 +60,7 @@ class CryptoCurrencies(av):
         return _FUNCTION_KEY, 'Time Series (Digital Currency Monthly)', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_digital_currency_exchange_rate(self, from_currency, to_currency):
         """ Returns the realtime exchange rate for any pair of digital
         currency (e.g., BTC) or physical currency (e.g., USD).
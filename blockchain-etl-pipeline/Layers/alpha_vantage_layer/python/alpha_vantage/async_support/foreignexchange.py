@@ -16,7 +16,7 @@ class ForeignExchange(av):
                 self.output_format.lower()))
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_currency_exchange_rate(self, from_currency, to_currency):
         """ Returns the realtime exchange rate for any pair of physical
         currency (e.g., EUR) or physical currency (e.g., USD).
@@ -56,7 +56,7 @@ class ForeignExchange(av):
         return _FUNCTION_KEY, "Time Series FX ({})".format(interval), 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_currency_exchange_daily(self, from_symbol, to_symbol, outputsize='compact'):
         """ Returns the daily exchange rate for any pair of physical
         currency (e.g., EUR) or physical currency (e.g., USD).
@@ -76,7 +76,7 @@ class ForeignExchange(av):
         return _FUNCTION_KEY, "Time Series FX (Daily)", 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_currency_exchange_weekly(self, from_symbol, to_symbol, outputsize='compact'):
         """ Returns the weekly exchange rate for any pair of physical
         currency (e.g., EUR) or physical currency (e.g., USD).
@@ -96,7 +96,7 @@ class ForeignExchange(av):
         return _FUNCTION_KEY, "Time Series FX (Weekly)", 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_currency_exchange_monthly(self, from_symbol, to_symbol, outputsize='compact'):
         """ Returns the monthly exchange rate for any pair of physical
         currency (e.g., EUR) or physical currency (e.g., USD).
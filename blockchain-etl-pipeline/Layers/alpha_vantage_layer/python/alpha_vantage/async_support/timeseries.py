@@ -1,3 +1,4 @@
+import asyncio
 from .alphavantage import AlphaVantage as av
 
 
@@ -39,7 +40,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, "Time Series ({})".format(interval), 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_daily(self, symbol, outputsize='compact'):
         """ Return daily time series in two json objects as data and
         meta_data. It raises ValueError when problems arise
@@ -55,7 +56,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, 'Time Series (Daily)', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_daily_adjusted(self, symbol, outputsize='compact', entitlement=None):
         """ Return daily adjusted (date, daily open, daily high, daily low,
         daily close, daily split/dividend-adjusted close, daily volume)
@@ -75,7 +76,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, 'Time Series (Daily)', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_weekly(self, symbol):
         """ Return weekly time series in two json objects as data and
         meta_data. It raises ValueError when problems arise
@@ -88,7 +89,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, 'Weekly Time Series', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_weekly_adjusted(self, symbol):
         """  weekly adjusted time series (last trading day of each week,
         weekly open, weekly high, weekly low, weekly close, weekly adjusted
@@ -102,7 +103,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, 'Weekly Adjusted Time Series', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_monthly(self, symbol):
         """ Return monthly time series in two json objects as data and
         meta_data. It raises ValueError when problems arise
@@ -115,7 +116,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, 'Monthly Time Series', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_monthly_adjusted(self, symbol):
         """ Return monthly time series in two json objects as data and
         meta_data. It raises ValueError when problems arise
@@ -128,7 +129,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, 'Monthly Adjusted Time Series', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_quote_endpoint(self, symbol, entitlement=None):
         """ Return the latest price and volume information for a
          security of your choice
@@ -141,8 +142,42 @@ class TimeSeries(av):
         _FUNCTION_KEY = "GLOBAL_QUOTE"
         return _FUNCTION_KEY, 'Global Quote', None
 
+    async def get_bulk_quotes(self, symbols, entitlement=None, max_workers=8):
+        """ Return the latest quotes of any number of symbols, asked by
+        chunks of 100 symbols to REALTIME_BULK_QUOTES and merged into one
+        result keyed by symbol. The chunks are requested concurrently. It
+        raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbols:  List of symbols, or a comma separated string
+            entitlement:  Supported values are 'realtime' for realtime US stock market data
+                or 'delayed' for 15-minute delayed US stock market data
+            max_workers:  Largest number of chunks requested at the same
+                time (default 8)
+        """
+        symbols, chunks = self._bulk_chunks(symbols)
+        semaphore = asyncio.Semaphore(max(max_workers, 1))
+
+        async def fetch(chunk):
+            async with semaphore:
+                response, _, _ = await self._get_bulk_quotes_chunk(chunk, entitlement)
+                return response
+        responses = await asyncio.gather(*[fetch(chunk) for chunk in chunks])
+        return self._merge_bulk_quotes(symbols, responses)
+
+    @av._call_api_on_func(constant_keys=True)
+    def _get_bulk_quotes_chunk(self, symbol, entitlement=None):
+        """ Return the json response of one REALTIME_BULK_QUOTES call
+
+        Keyword Arguments:
+            symbol:  List of up to 100 symbols
+            entitlement:  'realtime' or 'delayed' (default None)
+        """
+        _FUNCTION_KEY = "REALTIME_BULK_QUOTES"
+        return _FUNCTION_KEY, 'data', None
+
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_symbol_search(self, keywords):
         """ Return best matching symbols and market information
         based on keywords. It raises ValueError when problems arise
@@ -155,7 +190,7 @@ class TimeSeries(av):
         return _FUNCTION_KEY, 'bestMatches', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_market_status(self):
         """ Return current market status (open vs. closed) of major trading venues. 
         It raises ValueError when problems arise
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import aiohttp
+from ..transport import (ReplayTransport as ReplayTransportBase,
+                         TransportResponse, write_cassette)
+
+
+class HttpTransport(object):
+    """ Live transport going through an aiohttp session, the default of the
+    async clients. The session is created on the first call unless given.
+    """
+
+    def __init__(self, session=None):
+        """ Initialize the transport
+
+        Keyword Arguments:
+            session:  aiohttp.ClientSession used for the calls (default None)
+        """
+        self.session = session
+
+    async def get(self, url, headers=None, proxy=None):
+        """ Send a GET request and return the TransportResponse
+
+        Keyword Arguments:
+            url:  The url of the service
+            headers:  Dictionary of request headers (default None)
+            proxy:  String URL of the proxy (default None)
+        """
+        if not self.session:
+            self.session = aiohttp.ClientSession()
+        async with self.session.get(url, proxy=proxy or None,
+                                    headers=headers) as response:
+            content = await response.read()
+            return TransportResponse(response.status, content,
+                                     response.headers)
+
+    async def close(self):
+        """ Close the underlying aiohttp session """
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+
+class RecordingTransport(object):
+    """ Transport writing every response it gets from another transport to a
+    cassette directory, one json file per url
+    """
+
+    def __init__(self, directory, transport=None):
+        """ Initialize the transport
+
+        Keyword Arguments:
+            directory:  The cassette directory, created if missing
+            transport:  The async transport doing the calls (default None, a
+                HttpTransport)
+        """
+        self.directory = directory
+        self.transport = transport or HttpTransport()
+        os.makedirs(directory, exist_ok=True)
+
+    async def get(self, url, headers=None, proxy=None):
+        response = await self.transport.get(url, headers=headers, proxy=proxy)
+        write_cassette(self.directory, url, response)
+        return response
+
+    async def close(self):
+        await self.transport.close()
+
+
+class ReplayTransport(ReplayTransportBase):
+    """ Async version of the transport answering from a cassette directory,
+    the injected latency does not block the event loop
+    """
+
+    async def get(self, url, headers=None, proxy=None):
+        delay, error = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(url, error)
+
+    async def close(self):
+        pass
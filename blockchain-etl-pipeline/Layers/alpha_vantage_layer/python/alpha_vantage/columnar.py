@@ -0,0 +1,196 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import calendar
+import functools
+import re
+# NumPy is optional, the plain array module is used when it is missing
+try:
+    import numpy
+    _NUMPY_FOUND = True
+except ImportError:
+    _NUMPY_FOUND = False
+
+
+@functools.lru_cache(maxsize=1024)
+def clean_column_name(name):
+    """ Strip the alpha vantage enumeration from a field name, e.g.
+    '1. open' becomes 'open'. Results are cached since the same handful of
+    names is seen on every row of every call.
+
+    Keyword Arguments:
+        name:  The field name as returned by the api
+    """
+    return re.sub(r'\d+.', '', name).strip(' ')
+
+
+def to_epoch(label):
+    """ Convert an alpha vantage date label ('YYYY-MM-DD',
+    'YYYY-MM-DD HH:MM' or 'YYYY-MM-DD HH:MM:SS') into epoch seconds. The
+    label is interpreted as UTC, the actual time zone of the series is
+    given in its meta data. It raises ValueError on unknown labels.
+
+    Keyword Arguments:
+        label:  The date label of a data point
+    """
+    size = len(label)
+    if size not in (10, 16, 19):
+        raise ValueError('Date label {} is not supported'.format(label))
+    hour = int(label[11:13]) if size > 10 else 0
+    minute = int(label[14:16]) if size > 10 else 0
+    second = int(label[17:19]) if size > 16 else 0
+    return calendar.timegm((int(label[0:4]), int(label[5:7]),
+                            int(label[8:10]), hour, minute, second, 0, 0, 0))
+
+
+class ColumnarFrame(object):
+    """ Compact column store for time series returned with
+    output_format='columnar'. It holds one float64 column per numeric field
+    (a NumPy array when NumPy is installed, an array('d') otherwise), plain
+    lists for non numeric fields and an int64 epoch index sorted in
+    ascending order.
+    """
+
+    def __init__(self, index, columns):
+        """ Initialize the frame
+
+        Keyword Arguments:
+            index:  int64 sequence (array('q') or NumPy) with the epoch
+                seconds of every row, in ascending order
+            columns:  Dictionary mapping the field name to its column
+        """
+        self.index = index
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __repr__(self):
+        return 'ColumnarFrame(rows={}, columns={})'.format(
+            len(self), list(self.columns))
+
+    @property
+    def column_names(self):
+        return list(self.columns)
+
+    @property
+    def nbytes(self):
+        """ Number of bytes held by the index and the numeric columns """
+        total = _nbytes(self.index)
+        for column in self.columns.values():
+            if not isinstance(column, list):
+                total += _nbytes(column)
+        return total
+
+    def view(self, name=None):
+        """ Return a zero-copy memoryview over a numeric column, or over the
+        epoch index when no name is given. It raises ValueError for non
+        numeric columns.
+
+        Keyword Arguments:
+            name:  The column name (default None, the index)
+        """
+        column = self.index if name is None else self.columns[name]
+        if isinstance(column, list):
+            raise ValueError('Column {} is not numeric'.format(name))
+        return memoryview(column)
+
+    def between(self, start=None, end=None):
+        """ Return a new frame restricted to start <= epoch <= end. Numeric
+        columns share memory with this frame.
+
+        Keyword Arguments:
+            start:  First epoch second to include (default None, no bound)
+            end:  Last epoch second to include (default None, no bound)
+        """
+        index = self.view()
+        lo = 0 if start is None else bisect_left(index, start)
+        hi = len(index) if end is None else bisect_right(index, end)
+        return ColumnarFrame(_column_slice(self.index, lo, hi),
+                             {name: _column_slice(column, lo, hi)
+                              for name, column in self.columns.items()})
+
+    def to_dict(self):
+        """ Return the data as a dictionary of plain python lists, handy for
+        json serialization
+        """
+        return {'index': list(self.index),
+                'columns': {name: list(column)
+                            for name, column in self.columns.items()}}
+
+
+def _nbytes(column):
+    if isinstance(column, array):
+        return column.itemsize * len(column)
+    return column.nbytes
+
+
+def _column_slice(column, lo, hi):
+    if isinstance(column, array):
+        # memoryview slices keep pointing into the original buffer, NumPy
+        # slices are views already
+        return memoryview(column)[lo:hi]
+    return column[lo:hi]
+
+
+def _float_column(values):
+    """ Build a float64 column out of api strings, None if any of them is not
+    numeric
+    """
+    try:
+        column = array('d', [float(v) for v in values])
+    except (TypeError, ValueError):
+        return None
+    if _NUMPY_FOUND:
+        return numpy.frombuffer(column, dtype=numpy.float64)
+    return column
+
+
+def _int_column(values):
+    column = array('q', values)
+    if _NUMPY_FOUND:
+        return numpy.frombuffer(column, dtype=numpy.int64)
+    return column
+
+
+def from_json(data):
+    """ Build a ColumnarFrame from the decoded json data of a call. Time
+    series (dictionaries keyed by date) get an epoch index, lists of records
+    get their position as index. Anything else, like a single quote, can not
+    be represented as columns and None is returned, as for lists of other
+    items than records.
+
+    Keyword Arguments:
+        data:  The data part of the json response
+    """
+    if isinstance(data, list):
+        if not data:
+            return ColumnarFrame(_int_column([]), {})
+        if not all(isinstance(row, dict) for row in data):
+            return None
+        rows = data
+        index = _int_column(range(len(rows)))
+    elif isinstance(data, dict) and data and \
+            all(isinstance(v, dict) for v in data.values()):
+        try:
+            points = sorted(((to_epoch(label), row)
+                             for label, row in data.items()),
+                            key=lambda point: point[0])
+        except ValueError:
+            return None
+        index = _int_column([epoch for epoch, _ in points])
+        rows = [row for _, row in points]
+    else:
+        return None
+    columns = {}
+    for field in rows[0]:
+        values = [row.get(field) for row in rows]
+        column = _float_column(values)
+        columns[clean_column_name(field)] = values if column is None \
+            else column
+    return ColumnarFrame(index, columns)
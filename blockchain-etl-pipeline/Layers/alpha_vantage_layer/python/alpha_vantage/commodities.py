@@ -5,7 +5,7 @@ class Commodities(av):
     """This class implements all the commodities api calls
     """
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_wti(self, interval='monthly'):
         """ Returns the West Texas Intermediate (WTI) crude oil prices.
 
@@ -16,7 +16,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_brent(self, interval='monthly'):
         """ Returns the Brent (Europe) crude oil prices.
 
@@ -27,7 +27,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_natural_gas(self, interval='monthly'):
         """ Returns the Henry Hub natural gas spot prices.
 
@@ -38,7 +38,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_copper(self, interval='monthly'):
         """ Returns the global price of copper.
 
@@ -49,7 +49,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_aluminum(self, interval='monthly'):
         """ Returns the global price of aluminum.
 
@@ -60,7 +60,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_wheat(self, interval='monthly'):
         """ Returns the global price of wheat.
 
@@ -71,7 +71,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_corn(self, interval='monthly'):
         """ Returns the global price of corn.
 
@@ -82,7 +82,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_cotton(self, interval='monthly'):
         """ Returns the global price of cotton.
 
@@ -93,7 +93,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_sugar(self, interval='monthly'):
         """ Returns the global price of sugar.
 
@@ -104,7 +104,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_coffee(self, interval='monthly'):
         """ Returns the global price of coffee.
 
@@ -115,7 +115,7 @@ class Commodities(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_price_index(self, interval='monthly'):
         """ Returns the global price index of all commodities.
 
@@ -0,0 +1,208 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import os
+import threading
+import time
+
+
+def month_slices(start, end):
+    """ Return the 'YYYY-MM' months from start to end, both included
+
+    Keyword Arguments:
+        start:  First month, as 'YYYY-MM' or a date
+        end:  Last month, as 'YYYY-MM' or a date
+    """
+    def year_month(value):
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.year, value.month
+        year, month = str(value)[:7].split('-')
+        return int(year), int(month)
+    year, month = year_month(start)
+    last = year_month(end)
+    if (year, month) > last:
+        raise ValueError('The start month {} is after the end month {}'.format(
+            start, end))
+    months = []
+    while (year, month) <= last:
+        months.append('{:04d}-{:02d}'.format(year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class QuotaLimiter(object):
+    """ Thread safe token bucket keeping the calls under the api quota, e.g.
+    QuotaLimiter(75) for 75 calls per minute
+    """
+
+    def __init__(self, calls, period=60.0, burst=None):
+        """ Initialize the limiter
+
+        Keyword Arguments:
+            calls:  Number of calls allowed per period
+            period:  Length of the period in seconds (default 60.0)
+            burst:  Number of calls that can be made at once after an idle
+                time (default None, one)
+        """
+        self.rate = calls / float(period)
+        self.capacity = float(burst or 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ Block until a call is allowed, return the seconds waited """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens +
+                                   (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class DownloadReport(object):
+    """ Outcome of a HistoryDownloader.download run """
+
+    def __init__(self, key, months):
+        self.key = key
+        self.months = months
+        self.skipped = []
+        self.completed = []
+        self.failed = {}
+        self.points = 0
+        self.seconds = 0.0
+
+    @property
+    def points_per_second(self):
+        return self.points / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return ('DownloadReport(key={}, months={}, completed={}, skipped={}, '
+                'failed={}, points={}, points/s={:.0f})'.format(
+                    self.key, len(self.months), len(self.completed),
+                    len(self.skipped), len(self.failed), self.points,
+                    self.points_per_second))
+
+
+class HistoryDownloader(object):
+    """ Download years of history of the calls accepting month='YYYY-MM'
+    (TimeSeries.get_intraday and most TechIndicators methods) month by
+    month. Months are fetched with bounded concurrency under a quota
+    limiter, each one is merged into a SeriesStore in one commit and
+    recorded in a checkpoint file, so an interrupted run resumes where it
+    stopped.
+    """
+
+    def __init__(self, client, store, checkpoint=None, limiter=None,
+                 max_workers=4):
+        """ Initialize the downloader
+
+        Keyword Arguments:
+            client:  The TimeSeries, TechIndicators, ... instance doing the
+                calls
+            store:  The SeriesStore the months are written to
+            checkpoint:  Path of the json file recording the completed months
+                (default None, the checkpoint.json file of the store root)
+            limiter:  QuotaLimiter shared by the calls (default None, no
+                limit)
+            max_workers:  Largest number of months fetched at the same time
+                (default 4)
+        """
+        self.client = client
+        self.store = store
+        self.checkpoint = checkpoint or os.path.join(store.root,
+                                                     'checkpoint.json')
+        self.limiter = limiter
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint) as checkpoint:
+                return json.load(checkpoint)
+        except FileNotFoundError:
+            return {}
+
+    def _record(self, job, month, points):
+        """ Add a completed month to the checkpoint, written atomically """
+        with self._lock:
+            state = self._load_checkpoint()
+            done = state.setdefault(job, {})
+            done[month] = points
+            with open(self.checkpoint + '.tmp', 'w') as checkpoint:
+                json.dump(state, checkpoint, sort_keys=True)
+            os.replace(self.checkpoint + '.tmp', self.checkpoint)
+
+    def completed(self, job):
+        """ Return the months of a job already downloaded, with their
+        number of points
+        """
+        return self._load_checkpoint().get(job, {})
+
+    def download(self, method, symbol, start, end, progress=None, **kwargs):
+        """ Download the months from start to end of a client method and
+        return a DownloadReport. Months that fail are reported and left out
+        of the checkpoint, running the download again retries them.
+
+        Keyword Arguments:
+            method:  Name of the client method, e.g. 'get_intraday'
+            symbol:  The symbol of the series
+            start:  First month, as 'YYYY-MM' or a date
+            end:  Last month, as 'YYYY-MM' or a date
+            progress:  Callable getting (month, points) after every
+                completed month (default None)
+            kwargs:  Other arguments of the method, like interval
+        """
+        if 'csv' in self.client.output_format.lower():
+            raise ValueError('The downloader needs a json based output format')
+        call_api = getattr(type(self.client), method).__wrapped__
+        builder = call_api.request_builder
+        args = (symbol,)
+        if 'outputsize' in builder.names:
+            # A month slice is only complete with the full output size
+            kwargs.setdefault('outputsize', 'full')
+        function_name = builder.call_keys(self.client, args, kwargs)[0]
+        key = self.client._store_key(
+            function_name, builder.params(args, dict(kwargs, month=None)))
+        job = '/'.join(str(part) for part in key)
+        months = month_slices(start, end)
+        report = DownloadReport(key, months)
+        done = self.completed(job)
+        report.skipped = [month for month in months if month in done]
+        pending = [month for month in months if month not in done]
+
+        def fetch(month):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            call_response, data_key, meta_data_key = call_api(
+                self.client, *args, month=month, **kwargs)
+            data = call_response.get(data_key) or {}
+            self.store.merge(key, data, call_response.get(meta_data_key))
+            self._record(job, month, len(data))
+            if progress is not None:
+                progress(month, len(data))
+            return len(data)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max(self.max_workers, 1)) as executor:
+            futures = [(month, executor.submit(fetch, month))
+                       for month in pending]
+            for month, future in futures:
+                try:
+                    report.points += future.result()
+                    report.completed.append(month)
+                except Exception as error:
+                    report.failed[month] = str(error)
+        # Months merged out of order are sorted once at the end
+        meta = self.store.meta(key)
+        if meta and not meta['sorted']:
+            self.store.compact(key)
+        report.seconds = time.perf_counter() - started
+        return report
@@ -6,7 +6,7 @@ class EconIndicators(av):
     """
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_real_gdp(self, interval='annual'):
         """ Returns the annual and quarterly Real GDP of the United States
 
@@ -17,7 +17,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_real_gdp_per_capita(self):
         """ Returns the quarterly Real GDP per Capita data of the United States
         """
@@ -25,7 +25,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_treasury_yield(self, interval='monthly', maturity='10year'):
         """ Returns the US treasury yield of a given maturity timeline
 
@@ -38,7 +38,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ffr(self, interval='monthly'):
         """ Returns the federal funds rate (interest rate) of the United States
 
@@ -49,7 +49,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_cpi(self, interval='monthly'):
         """ Returns the consumer price index of the United States
 
@@ -60,7 +60,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_inflation(self):
         """ Returns the annual inflation rates (consumer prices) of the United States
         """
@@ -68,7 +68,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_retail_sales(self):
         """ Returns the monthly Advance Retail Sales: Retail Trade data of the United States
         """
@@ -76,7 +76,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_durables(self):
         """ Returns the monthly manufacturers' new orders of durable goods in the United States
         """
@@ -84,7 +84,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_unemployment(self):
         """ Returns the monthly unemployment data of the United States
         """
@@ -92,7 +92,7 @@ class EconIndicators(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_nonfarm(self):
         """ Returns the monthly US All Employees: Total Nonfarm
         """
@@ -18,7 +18,7 @@ class FundamentalData(av):
                 self.output_format.lower()))
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_company_overview(self, symbol):
         """
         Returns the company information, financial ratios, 
@@ -33,7 +33,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, None, None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_dividends(self, symbol):
         """
         Returns historical and future (declared) dividend distributions.
@@ -45,7 +45,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'data', 'symbol'
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_splits(self, symbol):
         """
         Returns historical split events.
@@ -57,7 +57,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'data', 'symbol'
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_income_statement_annual(self, symbol):
         """
         Returns the annual and quarterly income statements for the company of interest. 
@@ -71,7 +71,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'annualReports', 'symbol'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_income_statement_quarterly(self, symbol):
         """
         Returns the annual and quarterly income statements for the company of interest. 
@@ -85,7 +85,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'quarterlyReports', 'symbol'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_balance_sheet_annual(self, symbol):
         """
         Returns the annual and quarterly balance sheets for the company of interest.
@@ -99,7 +99,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'annualReports', 'symbol'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_balance_sheet_quarterly(self, symbol):
         """
         Returns the annual and quarterly balance sheets for the company of interest.
@@ -113,7 +113,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'quarterlyReports', 'symbol'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_cash_flow_annual(self, symbol):
         """
         Returns the annual and quarterly cash flows for the company of interest.
@@ -127,7 +127,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'annualReports', 'symbol'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_cash_flow_quarterly(self, symbol):
         """
         Returns the annual and quarterly cash flows for the company of interest.
@@ -141,7 +141,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'quarterlyReports', 'symbol'
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_earnings_annual(self, symbol):
         """
         Returns the annual and quarterly earnings (EPS) for the company of interest. 
@@ -154,7 +154,7 @@ class FundamentalData(av):
         return _FUNCTION_KEY, 'annualEarnings', 'symbol'
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_earnings_quarterly(self, symbol):
         """
         Returns the annual and quarterly earnings (EPS) for the company of interest. 
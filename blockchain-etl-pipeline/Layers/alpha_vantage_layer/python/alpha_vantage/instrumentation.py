@@ -0,0 +1,207 @@
+from bisect import bisect_left
+import copy
+import json
+import re
+import sys
+import threading
+import time
+
+
+class ApiCall(object):
+    """ What is known about one api call, handed to the hooks. Response
+    fields stay None until the response arrives.
+    """
+    __slots__ = ('function', 'url', 'started', 'elapsed', 'status', 'nbytes',
+                 'rate_limit')
+
+    def __init__(self, function, url):
+        """ Initialize the call
+
+        Keyword Arguments:
+            function:  The function name of the alpha vantage api
+            url:  The called url, with the api key redacted
+        """
+        self.function = function
+        self.url = re.sub(r'apikey=[^&]*', 'apikey=***', url)
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.status = None
+        self.nbytes = None
+        # 'Note' or 'Information' when the api answered with a limit message
+        self.rate_limit = None
+
+    def finish(self, status, nbytes):
+        self.elapsed = time.perf_counter() - self.started
+        self.status = status
+        self.nbytes = nbytes
+
+
+class Hooks(object):
+    """ Base class of the per call instrumentation hooks given to the
+    clients with hooks=[...]. Every method does nothing, override the ones
+    needed. before_request is called before the request is sent,
+    after_response once it arrived (even if the call fails afterwards on an
+    api error message) and on_error whenever the call raises.
+    """
+
+    def before_request(self, call):
+        pass
+
+    def after_response(self, call):
+        pass
+
+    def on_error(self, call, error):
+        pass
+
+
+class MetricsCollector(Hooks):
+    """ Hooks aggregating per api function the latency histogram, payload
+    sizes, status codes, rate limit messages and errors. It is thread safe,
+    so a collector can be shared by clients used from several threads.
+    """
+    # Upper bounds of the latency buckets, in milliseconds
+    BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+    def __init__(self, buckets=None):
+        """ Initialize the collector
+
+        Keyword Arguments:
+            buckets:  Ascending upper bounds of the latency buckets in
+                milliseconds, the last one should be infinite (default None,
+                MetricsCollector.BUCKETS)
+        """
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._lock = threading.Lock()
+        self._functions = {}
+
+    def _stats(self, function):
+        stats = self._functions.get(function)
+        if stats is None:
+            stats = self._functions[function] = {
+                'calls': 0, 'errors': 0, 'bytes': 0, 'max_bytes': 0,
+                'latency_counts': [0] * len(self.buckets),
+                'latency_sums': [0.0] * len(self.buckets),
+                'status_codes': {}, 'rate_limits': {}}
+        return stats
+
+    def after_response(self, call):
+        latency = call.elapsed * 1000.0
+        bucket = min(bisect_left(self.buckets, latency),
+                     len(self.buckets) - 1)
+        with self._lock:
+            stats = self._stats(call.function)
+            stats['calls'] += 1
+            stats['bytes'] += call.nbytes
+            stats['max_bytes'] = max(stats['max_bytes'], call.nbytes)
+            stats['latency_counts'][bucket] += 1
+            stats['latency_sums'][bucket] += latency
+            codes = stats['status_codes']
+            codes[call.status] = codes.get(call.status, 0) + 1
+            if call.rate_limit:
+                limits = stats['rate_limits']
+                limits[call.rate_limit] = limits.get(call.rate_limit, 0) + 1
+
+    def on_error(self, call, error):
+        with self._lock:
+            self._stats(call.function)['errors'] += 1
+
+    def snapshot(self, reset=False):
+        """ Return a copy of the collected metrics, keyed by api function
+
+        Keyword Arguments:
+            reset:  Clear the metrics after copying them (default False)
+        """
+        with self._lock:
+            functions = self._functions
+            if reset:
+                self._functions = {}
+            else:
+                functions = copy.deepcopy(functions)
+        return functions
+
+
+class EmfExporter(object):
+    """ Write the metrics of a MetricsCollector as CloudWatch Embedded Metric
+    Format lines, one per api function. In a Lambda function the lines
+    printed to stdout become metrics without any api call.
+    """
+
+    def __init__(self, namespace='AlphaVantage', stream=None, dimensions=None):
+        """ Initialize the exporter
+
+        Keyword Arguments:
+            namespace:  CloudWatch namespace of the metrics
+            stream:  File object the lines are written to (default None,
+                sys.stdout at export time)
+            dimensions:  Dictionary of extra dimensions added to every line,
+                besides Function (default None)
+        """
+        self.namespace = namespace
+        self.stream = stream
+        self.dimensions = dict(dimensions or {})
+
+    def lines(self, collector, reset=True):
+        """ Return the EMF documents of the collected metrics
+
+        Keyword Arguments:
+            collector:  The MetricsCollector to export
+            reset:  Clear the collector once exported (default True)
+        """
+        timestamp = int(time.time() * 1000)
+        documents = []
+        for function, stats in collector.snapshot(reset=reset).items():
+            # Every non empty bucket is reported with the mean of its samples
+            latencies = [(total / count, count) for total, count
+                         in zip(stats['latency_sums'],
+                                stats['latency_counts']) if count]
+            document = dict(self.dimensions)
+            document.update({
+                '_aws': {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': self.namespace,
+                        'Dimensions': [['Function'] + list(self.dimensions)],
+                        'Metrics': [
+                            {'Name': 'Calls', 'Unit': 'Count'},
+                            {'Name': 'Errors', 'Unit': 'Count'},
+                            {'Name': 'RateLimited', 'Unit': 'Count'},
+                            {'Name': 'Latency', 'Unit': 'Milliseconds'},
+                            {'Name': 'Bytes', 'Unit': 'Bytes'},
+                        ]}]},
+                'Function': function,
+                'Calls': stats['calls'],
+                'Errors': stats['errors'],
+                'RateLimited': sum(stats['rate_limits'].values()),
+                'Bytes': stats['bytes'],
+                'MaxBytes': stats['max_bytes'],
+                'StatusCodes': {str(code): count for code, count
+                                in stats['status_codes'].items()},
+                'RateLimits': stats['rate_limits'],
+            })
+            if latencies:
+                document['Latency'] = {
+                    'Values': [round(value, 3) for value, _ in latencies],
+                    'Counts': [count for _, count in latencies]}
+            else:
+                # Only failed calls, EMF needs a value for every metric
+                document['_aws']['CloudWatchMetrics'][0]['Metrics'] = [
+                    metric for metric in
+                    document['_aws']['CloudWatchMetrics'][0]['Metrics']
+                    if metric['Name'] != 'Latency']
+            documents.append(document)
+        return documents
+
+    def export(self, collector, reset=True):
+        """ Write the EMF lines of the collected metrics to the stream and
+        return how many were written
+
+        Keyword Arguments:
+            collector:  The MetricsCollector to export
+            reset:  Clear the collector once exported (default True)
+        """
+        stream = self.stream or sys.stdout
+        documents = self.lines(collector, reset=reset)
+        for document in documents:
+            stream.write(json.dumps(document, separators=(',', ':')) + '\n')
+        stream.flush()
+        return len(documents)
@@ -0,0 +1,736 @@
+from functools import wraps
+import inspect
+# NumPy is needed for the local computations, without it every indicator is
+# asked to the api instead
+try:
+    import numpy
+    from numpy.lib.stride_tricks import sliding_window_view
+    _NUMPY_FOUND = True
+except ImportError:
+    _NUMPY_FOUND = False
+from .alphavantage import AlphaVantage as av
+from .cryptocurrencies import CryptoCurrencies
+from .techindicators import TechIndicators
+from .timeseries import TimeSeries
+
+
+def _local_call(func):
+    """ Decorator playing the role of AlphaVantage._call_api_on_func for the
+    locally computed indicators. The decorated function returns the function
+    key, the data key and the computed output columns together with the
+    price series they were computed on, which are turned into a response
+    shaped like the one of the api.
+
+    Keyword Arguments:
+        func:  The function to be decorated
+    """
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def _call_wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        parameters = dict(bound.arguments)
+        parameters.pop('self')
+        if not _NUMPY_FOUND:
+            # Ask the api with the same arguments, digital currencies as a
+            # symbol and market pair, the response is formatted by
+            # _output_format like a local one
+            if self.market:
+                parameters['symbol'] += self.market
+            return getattr(TechIndicators, func.__name__).__wrapped__(
+                self._api, **parameters)
+        function_key, data_key, outputs, prices = func(self, *args, **kwargs)
+        response = {
+            'Meta Data': self._meta_data(function_key, parameters, prices),
+            data_key: self._indicator_data(outputs, prices,
+                                           parameters['interval']),
+        }
+        return response, data_key, 'Meta Data'
+    return _call_wrapper
+
+
+class LocalTechIndicators(av):
+    """ Computes the most used technical indicators locally with NumPy out of
+    a single cached OHLCV series fetched through TimeSeries (or
+    CryptoCurrencies when a market is given), instead of spending one api
+    call per indicator. Methods keep the TechIndicators signatures and
+    response layout. The indicators not computed locally, and every one of
+    them when NumPy is missing, are asked to the api through TechIndicators.
+    """
+    _INTRADAY_INTERVALS = ('1min', '5min', '15min', '30min', '60min')
+
+    def __init__(self, *args, market=None, **kwargs):
+        """
+        Inherit AlphaVantage base class with its default arguments
+
+        Keyword Arguments:
+            market:  If given, symbols are digital currencies quoted in this
+                market (e.g. 'USD') and prices come from CryptoCurrencies
+                (default None, equities through TimeSeries)
+        """
+        super(LocalTechIndicators, self).__init__(*args, **kwargs)
+        self._append_type = False
+        if self.output_format.lower() == 'csv':
+            raise ValueError("Output format {} is not compatible with the LocalTechIndicators class".format(
+                self.output_format.lower()))
+        self.market = market
+        self._series_cache = {}
+        # Client of the indicators asked to the api, one call each
+        self._api = TechIndicators(
+            key=self.key, output_format=self.output_format,
+            treat_info_as_error=self.treat_info_as_error,
+            proxy=self.proxy, rapidapi=self.rapidapi, hooks=self.hooks,
+            transport=self.transport)
+        if not _NUMPY_FOUND:
+            return
+        source = CryptoCurrencies if market else TimeSeries
+        self._source = source(key=self.key, output_format='columnar',
+                              treat_info_as_error=self.treat_info_as_error,
+                              proxy=self.proxy, rapidapi=self.rapidapi,
+                              hooks=self.hooks, transport=self.transport)
+
+    def __getattr__(self, name):
+        """ Hand the TechIndicators methods without a local computation over
+        to the api client, digital currencies asked as a symbol and market
+        pair
+        """
+        api = self.__dict__.get('_api')
+        if api is None or not name.startswith('get_') or \
+                not hasattr(TechIndicators, name):
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                type(self).__name__, name))
+        method = getattr(api, name)
+        if not self.market:
+            return method
+
+        @wraps(method)
+        def _with_market(symbol, *args, **kwargs):
+            return method(symbol + self.market, *args, **kwargs)
+        return _with_market
+
+    def clear_cache(self):
+        """ Forget the cached price series, the next call fetches them again
+        """
+        self._series_cache = {}
+
+    def _prices(self, symbol, interval, month=None, entitlement=None):
+        """ Return the OHLCV ColumnarFrame for symbol and interval, fetching
+        it with a single api call the first time
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity or digital currency
+            interval:  '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly' or 'monthly'
+            month:  year and month (YYYY-MM) of intraday data (default None)
+            entitlement:  'realtime' or 'delayed' (default None)
+        """
+        cache_key = (symbol, interval, month, entitlement)
+        if cache_key not in self._series_cache:
+            if self.market:
+                if interval in self._INTRADAY_INTERVALS:
+                    frame, _ = self._source.get_crypto_intraday(
+                        symbol, self.market, interval, outputsize='full')
+                else:
+                    frame, _ = getattr(self._source, 'get_digital_currency_{}'.format(
+                        interval))(symbol, self.market)
+            elif interval in self._INTRADAY_INTERVALS:
+                frame, _ = self._source.get_intraday(
+                    symbol, interval=interval, outputsize='full', month=month,
+                    entitlement=entitlement)
+            elif interval == 'daily':
+                frame, _ = self._source.get_daily(symbol, outputsize='full')
+            elif interval in ('weekly', 'monthly'):
+                frame, _ = getattr(self._source, 'get_{}'.format(interval))(
+                    symbol)
+            else:
+                raise ValueError('Interval {} is not supported'.format(
+                    interval))
+            self._series_cache[cache_key] = frame
+        return self._series_cache[cache_key]
+
+    def _meta_data(self, function_key, parameters, prices):
+        meta_data = {
+            '1: Symbol': parameters['symbol'],
+            '2: Indicator': function_key,
+            '3: Last Refreshed': str(self._labels(
+                prices.index[-1:], parameters['interval'])[0])
+            if len(prices) else None,
+        }
+        position = len(meta_data)
+        for name, value in parameters.items():
+            if name != 'symbol' and value is not None:
+                position += 1
+                meta_data['{}: {}'.format(position, name)] = value
+        meta_data['{}: Source'.format(position + 1)] = 'local'
+        return meta_data
+
+    def _labels(self, index, interval):
+        """ Date labels of an epoch index, in the format used by the api """
+        unit = 'm' if interval in self._INTRADAY_INTERVALS else 'D'
+        if not len(index):
+            return numpy.array([], dtype=str)
+        labels = numpy.datetime_as_string(
+            numpy.asarray(index, dtype='datetime64[s]'), unit=unit)
+        return numpy.char.replace(labels, 'T', ' ')
+
+    def _indicator_data(self, outputs, prices, interval):
+        """ Lay the computed output columns out like the api does: newest
+        first, keyed by date label, values as strings with four decimals and
+        the warm up period left out
+        """
+        valid = numpy.ones(len(prices), dtype=bool)
+        for values in outputs.values():
+            valid &= ~numpy.isnan(values)
+        labels = self._labels(prices.index[valid], interval)[::-1]
+        columns = [numpy.char.mod('%.4f', values[valid][::-1])
+                   for values in outputs.values()]
+        names = list(outputs)
+        return {label: dict(zip(names, row))
+                for label, row in zip(labels.tolist(),
+                                      zip(*[c.tolist() for c in columns]))}
+
+    def _moving_average(self, values, time_period, matype):
+        matype = self.map_to_matype(matype) if matype else 0
+        if matype not in _MOVING_AVERAGES:
+            raise ValueError('Moving average type {} can not be computed '
+                             'locally'.format(matype))
+        return _MOVING_AVERAGES[matype](values, int(time_period))
+
+    @av._output_format
+    @_local_call
+    def get_sma(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return simple moving average time series in two json objects as data and
+        meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "SMA"
+        prices = self._prices(symbol, interval, month, entitlement)
+        return _FUNCTION_KEY, 'Technical Analysis: SMA', {
+            'SMA': _sma(prices[series_type], int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_ema(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return exponential moving average time series in two json objects
+        as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "EMA"
+        prices = self._prices(symbol, interval, month, entitlement)
+        return _FUNCTION_KEY, 'Technical Analysis: EMA', {
+            'EMA': _ema(prices[series_type], int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_wma(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return weighted moving average time series in two json objects
+        as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "WMA"
+        prices = self._prices(symbol, interval, month, entitlement)
+        return _FUNCTION_KEY, 'Technical Analysis: WMA', {
+            'WMA': _wma(prices[series_type], int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_dema(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return double exponential moving average time series in two json
+        objects as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "DEMA"
+        prices = self._prices(symbol, interval, month, entitlement)
+        return _FUNCTION_KEY, 'Technical Analysis: DEMA', {
+            'DEMA': _dema(prices[series_type], int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_tema(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return triple exponential moving average time series in two json
+        objects as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "TEMA"
+        prices = self._prices(symbol, interval, month, entitlement)
+        return _FUNCTION_KEY, 'Technical Analysis: TEMA', {
+            'TEMA': _tema(prices[series_type], int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_trima(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return triangular moving average time series in two json
+        objects as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "TRIMA"
+        prices = self._prices(symbol, interval, month, entitlement)
+        return _FUNCTION_KEY, 'Technical Analysis: TRIMA', {
+            'TRIMA': _trima(prices[series_type], int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_macd(self, symbol, interval='daily', series_type='close',
+                 fastperiod=None, slowperiod=None, signalperiod=None, month=None, entitlement=None):
+        """ Return the moving average convergence/divergence time series in two
+        json objects as data and meta_data. It raises ValueError when problems
+        arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            fastperiod:  Positive integers are accepted (default=12)
+            slowperiod:  Positive integers are accepted (default=26)
+            signalperiod:  Positive integers are accepted (default=9)
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "MACD"
+        prices = self._prices(symbol, interval, month, entitlement)
+        values = prices[series_type]
+        macd = _ema(values, int(fastperiod or 12)) - \
+            _ema(values, int(slowperiod or 26))
+        signal = _ema(macd, int(signalperiod or 9))
+        return _FUNCTION_KEY, 'Technical Analysis: MACD', {
+            'MACD': macd, 'MACD_Hist': macd - signal, 'MACD_Signal': signal
+        }, prices
+
+    @av._output_format
+    @_local_call
+    def get_stoch(self, symbol, interval='daily', fastkperiod=None,
+                  slowkperiod=None, slowdperiod=None, slowkmatype=None, slowdmatype=None, month=None, entitlement=None):
+        """ Return the stochatic oscillator values in two
+        json objects as data and meta_data. It raises ValueError when problems
+        arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            fastkperiod:  The time period of the fastk moving average (default=5)
+            slowkperiod:  The time period of the slowk moving average (default=3)
+            slowdperiod: The time period of the slowd moving average (default=3)
+            slowkmatype:  Moving average type for the slowk moving average,
+                integers 0 - 5 or their names (default=0)
+            slowdmatype:  Moving average type for the slowd moving average,
+                integers 0 - 5 or their names (default=0)
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "STOCH"
+        prices = self._prices(symbol, interval, month, entitlement)
+        highest, lowest = _rolling_extremes(prices['high'], prices['low'],
+                                            int(fastkperiod or 5))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            fastk = 100.0 * (prices['close'] - lowest) / (highest - lowest)
+        slowk = self._moving_average(fastk, slowkperiod or 3, slowkmatype)
+        slowd = self._moving_average(slowk, slowdperiod or 3, slowdmatype)
+        return _FUNCTION_KEY, 'Technical Analysis: STOCH', {
+            'SlowK': slowk, 'SlowD': slowd}, prices
+
+    @av._output_format
+    @_local_call
+    def get_rsi(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return the relative strength index time series in two json
+        objects as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "RSI"
+        prices = self._prices(symbol, interval, month, entitlement)
+        return _FUNCTION_KEY, 'Technical Analysis: RSI', {
+            'RSI': _rsi(prices[series_type], int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_willr(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
+        """ Return the Williams' %R (WILLR) values in two json objects as data
+        and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "WILLR"
+        prices = self._prices(symbol, interval, month, entitlement)
+        highest, lowest = _rolling_extremes(prices['high'], prices['low'],
+                                            int(time_period))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            willr = -100.0 * (highest - prices['close']) / (highest - lowest)
+        return _FUNCTION_KEY, 'Technical Analysis: WILLR', {
+            'WILLR': willr}, prices
+
+    @av._output_format
+    @_local_call
+    def get_mom(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return the momentum (MOM) values in two json objects as data and
+        meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "MOM"
+        prices = self._prices(symbol, interval, month, entitlement)
+        values = prices[series_type]
+        return _FUNCTION_KEY, 'Technical Analysis: MOM', {
+            'MOM': values - _shift(values, int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_cci(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
+        """ Return the commodity channel index (CCI) values in two json objects
+        as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "CCI"
+        prices = self._prices(symbol, interval, month, entitlement)
+        time_period = int(time_period)
+        typical = (prices['high'] + prices['low'] + prices['close']) / 3.0
+        average = _sma(typical, time_period)
+        deviation = numpy.full(len(typical), numpy.nan)
+        if len(typical) >= time_period:
+            windows = sliding_window_view(typical, time_period)
+            deviation[time_period - 1:] = numpy.abs(
+                windows - average[time_period - 1:, None]).mean(axis=1)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            cci = (typical - average) / (0.015 * deviation)
+        return _FUNCTION_KEY, 'Technical Analysis: CCI', {'CCI': cci}, prices
+
+    @av._output_format
+    @_local_call
+    def get_roc(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
+        """ Return the rate of change (ROC) values in two json objects as data
+        and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "ROC"
+        prices = self._prices(symbol, interval, month, entitlement)
+        values = prices[series_type]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            roc = 100.0 * (values / _shift(values, int(time_period)) - 1.0)
+        return _FUNCTION_KEY, 'Technical Analysis: ROC', {'ROC': roc}, prices
+
+    @av._output_format
+    @_local_call
+    def get_bbands(self, symbol, interval='daily', time_period=20,  series_type='close',
+                   nbdevup=None, nbdevdn=None, matype=None, month=None, entitlement=None):
+        """ Return the bollinger bands values in two
+        json objects as data and meta_data. It raises ValueError when problems
+        arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  Number of data points used to calculate each BBANDS value.
+                (default=20)
+            series_type:  The desired price type in the time series. Four types
+                are supported: 'close', 'open', 'high', 'low' (default 'close')
+            nbdevup:  The standard deviation multiplier of the upper band
+                (default=2)
+            nbdevdn:  The standard deviation multiplier of the lower band
+                (default=2)
+            matype :  Moving average type of the middle band, integers 0 - 5
+                or their names (default=0)
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "BBANDS"
+        prices = self._prices(symbol, interval, month, entitlement)
+        values = prices[series_type]
+        time_period = int(time_period)
+        middle = self._moving_average(values, time_period, matype)
+        mean = _sma(values, time_period)
+        deviation = numpy.sqrt(numpy.maximum(
+            _sma(values * values, time_period) - mean * mean, 0.0))
+        return _FUNCTION_KEY, 'Technical Analysis: BBANDS', {
+            'Real Upper Band': middle + float(nbdevup or 2) * deviation,
+            'Real Middle Band': middle,
+            'Real Lower Band': middle - float(nbdevdn or 2) * deviation,
+        }, prices
+
+    @av._output_format
+    @_local_call
+    def get_atr(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
+        """ Return the average true range values in two json objects as
+        data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            time_period:  How many data points to average (default 20)
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "ATR"
+        prices = self._prices(symbol, interval, month, entitlement)
+        previous_close = _shift(prices['close'], 1)
+        true_range = numpy.fmax(
+            prices['high'] - prices['low'],
+            numpy.maximum(numpy.abs(prices['high'] - previous_close),
+                          numpy.abs(prices['low'] - previous_close)))
+        true_range[0] = numpy.nan
+        return _FUNCTION_KEY, 'Technical Analysis: ATR', {
+            'ATR': _ema(true_range, int(time_period),
+                        alpha=1.0 / int(time_period))}, prices
+
+    @av._output_format
+    @_local_call
+    def get_ad(self, symbol, interval='daily', month=None, entitlement=None):
+        """ Return the Chaikin A/D line values in two json
+        objects as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "AD"
+        prices = self._prices(symbol, interval, month, entitlement)
+        high, low, close = prices['high'], prices['low'], prices['close']
+        spread = high - low
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            multiplier = numpy.where(
+                spread > 0, ((close - low) - (high - close)) / spread, 0.0)
+        return _FUNCTION_KEY, 'Technical Analysis: Chaikin A/D', {
+            'Chaikin A/D': numpy.cumsum(multiplier * prices['volume'])}, prices
+
+    @av._output_format
+    @_local_call
+    def get_obv(self, symbol, interval='daily', month=None, entitlement=None):
+        """ Return the on balance volume (OBV) values in two json
+        objects as data and meta_data. It raises ValueError when problems arise
+
+        Keyword Arguments:
+            symbol:  the symbol for the equity we want to get its data
+            interval:  time interval between two conscutive values,
+                supported values are '1min', '5min', '15min', '30min', '60min', 'daily',
+                'weekly', 'monthly' (default 'daily')
+            month:  ONLY applicable to intraday intervals.
+            entitlement:  'realtime' or 'delayed' US stock market data
+        """
+        _FUNCTION_KEY = "OBV"
+        prices = self._prices(symbol, interval, month, entitlement)
+        volume = prices['volume']
+        direction = numpy.sign(numpy.diff(prices['close'], prepend=numpy.nan))
+        direction[0] = 1.0
+        return _FUNCTION_KEY, 'Technical Analysis: OBV', {
+            'OBV': numpy.cumsum(direction * volume)}, prices
+
+
+def _shift(values, periods):
+    shifted = numpy.full(len(values), numpy.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def _leading_nan(func):
+    """ Let an indicator run on series starting with a NaN warm up period,
+    like the output of another indicator
+    """
+    @wraps(func)
+    def _wrapper(values, period):
+        valid = numpy.flatnonzero(~numpy.isnan(values))
+        if not len(valid) or valid[0] == 0:
+            return func(values, period)
+        out = numpy.full(len(values), numpy.nan)
+        out[valid[0]:] = func(values[valid[0]:], period)
+        return out
+    return _wrapper
+
+
+@_leading_nan
+def _sma(values, period):
+    out = numpy.full(len(values), numpy.nan)
+    if period <= len(values):
+        sums = numpy.cumsum(numpy.insert(values, 0, 0.0))
+        out[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+
+def _ema(values, period, alpha=None):
+    """ Exponential moving average seeded with the simple average of the
+    first period values, leading NaNs are skipped. The recursion itself is
+    inherently sequential and runs over a plain list.
+    """
+    out = numpy.full(len(values), numpy.nan)
+    valid = numpy.flatnonzero(~numpy.isnan(values))
+    if len(valid) < period:
+        return out
+    seed = valid[0] + period - 1
+    alpha = 2.0 / (period + 1) if alpha is None else alpha
+    current = float(values[valid[0]:seed + 1].mean())
+    out[seed] = current
+    smoothed = []
+    for value in values[seed + 1:].tolist():
+        current += alpha * (value - current)
+        smoothed.append(current)
+    out[seed + 1:] = smoothed
+    return out
+
+
+@_leading_nan
+def _wma(values, period):
+    out = numpy.full(len(values), numpy.nan)
+    if period <= len(values):
+        weights = numpy.arange(period, 0, -1, dtype=float)
+        out[period - 1:] = numpy.convolve(values, weights, 'valid') / \
+            weights.sum()
+    return out
+
+
+def _dema(values, period):
+    first = _ema(values, period)
+    return 2.0 * first - _ema(first, period)
+
+
+def _tema(values, period):
+    first = _ema(values, period)
+    second = _ema(first, period)
+    return 3.0 * first - 3.0 * second + _ema(second, period)
+
+
+def _trima(values, period):
+    head = (period + 1) // 2
+    tail = period // 2 + 1 if period % 2 == 0 else head
+    smoothed = _sma(values, head)
+    out = numpy.full(len(values), numpy.nan)
+    if head - 1 < len(values):
+        out[head - 1:] = _sma(smoothed[head - 1:], tail)
+    return out
+
+
+def _rsi(values, period):
+    # Wilder smoothing of the gains and losses, clip keeps the leading NaN
+    change = numpy.diff(values, prepend=numpy.nan)
+    gains = _ema(numpy.clip(change, 0.0, None), period, alpha=1.0 / period)
+    losses = _ema(numpy.clip(-change, 0.0, None), period, alpha=1.0 / period)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + gains / losses)
+    return numpy.where((losses == 0) & ~numpy.isnan(gains), 100.0, rsi)
+
+
+def _rolling_extremes(high, low, period):
+    highest = numpy.full(len(high), numpy.nan)
+    lowest = numpy.full(len(low), numpy.nan)
+    if period <= len(high):
+        highest[period - 1:] = sliding_window_view(high, period).max(axis=1)
+        lowest[period - 1:] = sliding_window_view(low, period).min(axis=1)
+    return highest, lowest
+
+
+# Moving averages by alpha vantage math type, see AlphaVantage.map_to_matype
+_MOVING_AVERAGES = {0: _sma, 1: _ema, 2: _wma, 3: _dema, 4: _tema, 5: _trima}
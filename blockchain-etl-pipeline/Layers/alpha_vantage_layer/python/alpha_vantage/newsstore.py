@@ -0,0 +1,286 @@
+from bisect import bisect_left, bisect_right, insort
+import datetime
+import hashlib
+import json
+import os
+import threading
+from .transport import loads
+
+# Format of the time_from and time_to arguments of NEWS_SENTIMENT
+_TIME_FORMAT = '%Y%m%dT%H%M'
+
+
+def url_hash(url):
+    """ Identifier of an article: the first 16 hex digits of the sha1 of its
+    url, the same article found by several windows or queries has one entry
+
+    Keyword Arguments:
+        url:  The url of the article
+    """
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+
+class NewsStore(object):
+    """ Local corpus of NEWS_SENTIMENT articles. Articles are appended once,
+    deduplicated by url hash, to an articles.jsonl file. An index.json file
+    keeps their offsets, a time ordered list of articles per ticker,
+    per-ticker sentiment aggregates and the time each query was synced up
+    to. Writing the index commits the appended articles, lines past the
+    indexed end are left by an interrupted write and dropped.
+    """
+    _ARTICLES = 'articles.jsonl'
+    _INDEX = 'index.json'
+
+    def __init__(self, root):
+        """ Initialize the store
+
+        Keyword Arguments:
+            root:  Directory holding the articles and their index, created if
+                missing
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._index = self._read_index()
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.root, self._INDEX)) as index:
+                return json.load(index)
+        except FileNotFoundError:
+            return {'end': 0, 'articles': {}, 'times': [], 'tickers': {},
+                    'aggregates': {}, 'syncs': {}}
+
+    def _write_index(self):
+        path = os.path.join(self.root, self._INDEX)
+        with open(path + '.tmp', 'w') as temporary:
+            json.dump(self._index, temporary, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def __len__(self):
+        return len(self._index['articles'])
+
+    def __contains__(self, url):
+        return url_hash(url) in self._index['articles']
+
+    def add(self, articles):
+        """ Append the articles not stored yet and return how many were new
+
+        Keyword Arguments:
+            articles:  The feed of a NEWS_SENTIMENT response
+        """
+        with self._lock:
+            index = self._index
+            stored = index['articles']
+            lines = []
+            end = index['end']
+            for article in articles:
+                key = url_hash(article['url'])
+                if key in stored:
+                    continue
+                line = json.dumps(article, separators=(',', ':')).encode(
+                    'utf-8') + b'\n'
+                published = article.get('time_published', '')
+                stored[key] = [end, len(line), published]
+                end += len(line)
+                lines.append(line)
+                insort(index['times'], [published, key])
+                for sentiment in article.get('ticker_sentiment') or []:
+                    self._aggregate(sentiment, published)
+                    insort(index['tickers'].setdefault(sentiment['ticker'], []),
+                           [published, key])
+            if not lines:
+                return 0
+            path = os.path.join(self.root, self._ARTICLES)
+            with open(path, 'ab') as stream:
+                # Drop what an interrupted write left after the indexed end
+                stream.truncate(index['end'])
+                stream.writelines(lines)
+            index['end'] = end
+            self._write_index()
+            return len(lines)
+
+    def _aggregate(self, sentiment, published):
+        """ Add the sentiment of an article about a ticker to its aggregates
+        """
+        aggregate = self._index['aggregates'].setdefault(
+            sentiment['ticker'], {'articles': 0, 'relevance': 0.0,
+                                  'score': 0.0, 'weighted_score': 0.0,
+                                  'labels': {}, 'first': published,
+                                  'last': published})
+        relevance = float(sentiment.get('relevance_score') or 0.0)
+        score = float(sentiment.get('ticker_sentiment_score') or 0.0)
+        label = sentiment.get('ticker_sentiment_label') or 'Unknown'
+        aggregate['articles'] += 1
+        aggregate['relevance'] += relevance
+        aggregate['score'] += score
+        aggregate['weighted_score'] += relevance * score
+        aggregate['labels'][label] = aggregate['labels'].get(label, 0) + 1
+        aggregate['first'] = min(aggregate['first'], published)
+        aggregate['last'] = max(aggregate['last'], published)
+
+    def tickers(self):
+        """ List of the tickers mentioned by the stored articles """
+        return sorted(self._index['tickers'])
+
+    def sentiment(self, ticker=None):
+        """ Return the sentiment aggregates of a ticker, or a dictionary of
+        the aggregates of every ticker: the number of articles, their
+        mean sentiment score, their mean score weighted by relevance, the
+        count of every sentiment label and the first and last publication
+        times. They are kept up to date by add, not computed on demand.
+
+        Keyword Arguments:
+            ticker:  The ticker, e.g. 'AAPL' or 'CRYPTO:BTC' (default None,
+                all of them)
+        """
+        if ticker is None:
+            return {name: self.sentiment(name)
+                    for name in self._index['aggregates']}
+        aggregate = self._index['aggregates'].get(ticker)
+        if aggregate is None:
+            return None
+        return {'articles': aggregate['articles'],
+                'mean_score': aggregate['score'] / aggregate['articles'],
+                'weighted_score': aggregate['weighted_score'] /
+                aggregate['relevance'] if aggregate['relevance'] else 0.0,
+                'mean_relevance': aggregate['relevance'] /
+                aggregate['articles'],
+                'labels': dict(aggregate['labels']),
+                'first': aggregate['first'], 'last': aggregate['last']}
+
+    def articles(self, ticker=None, start=None, end=None):
+        """ Iterate over the stored articles from the oldest to the newest,
+        reading them one by one from disk
+
+        Keyword Arguments:
+            ticker:  Only the articles about this ticker (default None, all
+                of them)
+            start:  First publication time, as 'YYYYMMDDTHHMM[SS]' or a
+                datetime (default None)
+            end:  Last publication time, included (default None)
+        """
+        entries = self._index['tickers'].get(ticker, []) if ticker else \
+            self._index['times']
+        first = 0 if start is None else bisect_left(
+            entries, [self._stamp(start)])
+        # '~' sorts after the digits, the seconds of the end minute match
+        last = len(entries) if end is None else bisect_right(
+            entries, [self._stamp(end) + '~'])
+        stored = self._index['articles']
+        with open(os.path.join(self.root, self._ARTICLES), 'rb') as stream:
+            for _, key in entries[first:last]:
+                offset, length, _ = stored[key]
+                stream.seek(offset)
+                yield loads(stream.read(length))
+
+    @staticmethod
+    def _stamp(value):
+        if isinstance(value, datetime.datetime):
+            return value.strftime('%Y%m%dT%H%M%S')
+        return str(value)
+
+    def synced_until(self, query):
+        """ Time a query was synced up to, None if it never was
+
+        Keyword Arguments:
+            query:  The query key of a NewsSync
+        """
+        synced = self._index['syncs'].get(query)
+        return datetime.datetime.strptime(synced, _TIME_FORMAT) \
+            if synced else None
+
+    def mark_synced(self, query, until):
+        with self._lock:
+            self._index['syncs'][query] = until.strftime(_TIME_FORMAT)
+            self._write_index()
+
+
+class NewsSync(object):
+    """ Incremental sync of the NEWS_SENTIMENT articles of a tickers/topics
+    query into a NewsStore. The time since the last sync is walked in
+    time_from/time_to windows, a window whose page reaches the limit is split
+    in two until every article fits, and the sync point moves after every
+    window, so an interrupted sync resumes where it stopped.
+    """
+
+    def __init__(self, client, store, window=datetime.timedelta(days=1),
+                 limit=1000, overlap=datetime.timedelta(0)):
+        """ Initialize the sync
+
+        Keyword Arguments:
+            client:  The AlphaIntelligence instance doing the calls
+            store:  The NewsStore the articles are written to
+            window:  Largest time span asked in one call (default one day)
+            limit:  Number of articles asked per call, 50 or 1000 (default
+                1000)
+            overlap:  Time asked again before the last sync point, for the
+                articles published late (default none)
+        """
+        self.client = client
+        self.store = store
+        self.window = window
+        self.limit = limit
+        self.overlap = overlap
+        self.calls = 0
+
+    @staticmethod
+    def query_key(tickers=None, topics=None):
+        """ Key of a query in the store, independent of the argument order
+        """
+        def names(values):
+            if isinstance(values, str):
+                values = values.split(',')
+            return ','.join(sorted(values or []))
+        return 'tickers={}&topics={}'.format(names(tickers), names(topics))
+
+    def _fetch(self, tickers, topics, start, end):
+        """ Return the articles published between start and end, splitting
+        the span while the page is full
+        """
+        call_api = type(self.client).get_news_sentiment.__wrapped__
+        call_response, data_key, _ = call_api(
+            self.client, tickers=tickers, topics=topics,
+            time_from=start.strftime(_TIME_FORMAT),
+            time_to=end.strftime(_TIME_FORMAT), sort='EARLIEST',
+            limit=self.limit)
+        self.calls += 1
+        feed = call_response.get(data_key) or []
+        middle = start + (end - start) // 2
+        # The api has a minute resolution, a full minute cannot be split
+        if len(feed) >= self.limit and \
+                middle.replace(second=0, microsecond=0) > start:
+            middle = middle.replace(second=0, microsecond=0)
+            return self._fetch(tickers, topics, start, middle) + \
+                self._fetch(tickers, topics, middle, end)
+        return feed
+
+    def sync(self, tickers=None, topics=None, since=None, until=None):
+        """ Download the articles published since the last sync of the query
+        and return the number of new articles
+
+        Keyword Arguments:
+            tickers:  Tickers of the query (default None)
+            topics:  Topics of the query (default None)
+            since:  Start of the first sync of the query, a datetime (default
+                None, required when the query was never synced)
+            until:  End of the sync, a datetime in UTC (default None, now)
+        """
+        query = self.query_key(tickers, topics)
+        start = self.store.synced_until(query)
+        if start is None:
+            if since is None:
+                raise ValueError('The first sync of {} needs a since '
+                                 'time'.format(query))
+            start = since
+        else:
+            start -= self.overlap
+        until = (until or datetime.datetime.utcnow()).replace(
+            second=0, microsecond=0)
+        added = 0
+        while start < until:
+            end = min(start + self.window, until)
+            added += self.store.add(self._fetch(tickers, topics, start, end))
+            self.store.mark_synced(query, end)
+            start = end
+        return added
@@ -6,7 +6,7 @@ class Options(av):
     """This class implements all the api calls to US options data
     """
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_realtime_options(self, symbol, contract=None):
         """ Return realtime US options data.
         It raises ValueError when problems arise
@@ -20,7 +20,7 @@ class Options(av):
         return _FUNCTION_KEY, 'data', None
     
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_historical_options(self, symbol, date=None):
         """ Return historical US options data.
         It raises ValueError when problems arise
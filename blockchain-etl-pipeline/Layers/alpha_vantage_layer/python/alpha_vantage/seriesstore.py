@@ -0,0 +1,368 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+# NumPy is optional, memoryviews are returned when it is missing
+try:
+    import numpy
+    _NUMPY_FOUND = True
+except ImportError:
+    _NUMPY_FOUND = False
+from .columnar import ColumnarFrame, clean_column_name, to_epoch
+
+
+class SeriesStore(object):
+    """ Append-only, memory-mapped columnar store of time series keyed by
+    (function, symbol, interval). Every series lives in its own directory
+    with an int64 epoch index file, one float64 file per field and a
+    meta.json that commits the number of rows, so an interrupted append is
+    simply ignored. A revised last point is committed by the meta too, and
+    written in place afterwards. Range reads map the files and return
+    zero-copy views.
+    """
+    _META = 'meta.json'
+    _INDEX = 'index.i8'
+
+    def __init__(self, root):
+        """ Initialize the store
+
+        Keyword Arguments:
+            root:  Directory holding the stored series, created if missing
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.RLock()
+
+    def _path(self, key):
+        return os.path.join(self.root, *[str(part or '-').replace(os.sep, '_')
+                                         for part in key])
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._path(key), self._META)) as stored:
+                meta = json.load(stored)
+        except FileNotFoundError:
+            return None
+        if 'revision' in meta:
+            # A committed revision whose write was interrupted
+            with self._lock:
+                self._apply_revision(key, meta)
+        return meta
+
+    def _write_meta(self, key, meta):
+        # Writing the meta last and atomically is what commits an append
+        path = os.path.join(self._path(key), self._META)
+        with open(path + '.tmp', 'w') as temporary:
+            json.dump(meta, temporary)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _column_file(position):
+        return 'column{}.f8'.format(position)
+
+    def _map(self, key, name, typecode, rows, maps=None):
+        """ Return a memoryview of the first rows items of a series file. The
+        map is added to maps when given, to be closed by the caller, else it
+        is released with the last view over it.
+        """
+        if not rows:
+            return memoryview(array(typecode))
+        with open(os.path.join(self._path(key), name), 'rb') as stored:
+            mapped = mmap.mmap(stored.fileno(), 0, access=mmap.ACCESS_READ)
+        if maps is not None:
+            maps.append(mapped)
+        return memoryview(mapped)[:rows * 8].cast(typecode)
+
+    @contextmanager
+    def _mapped(self, key, fields, rows):
+        """ Map the index and the columns of a series for the time of a with
+        block, the maps are closed when it ends
+        """
+        maps = []
+        index = self._map(key, self._INDEX, 'q', rows, maps)
+        columns = [self._map(key, self._column_file(position), 'd', rows, maps)
+                   for position in range(len(fields))]
+        try:
+            yield index, columns
+        finally:
+            for view in [index] + columns:
+                view.release()
+            for mapped in maps:
+                mapped.close()
+
+    def meta(self, key):
+        """ Return the meta information of a stored series, None if the store
+        does not have it
+
+        Keyword Arguments:
+            key:  (function, symbol, interval) tuple
+        """
+        return self._read_meta(key)
+
+    def last_timestamp(self, key):
+        """ Epoch of the newest stored point, None for an empty series """
+        meta = self._read_meta(key)
+        if not meta or not meta['rows']:
+            return None
+        return meta['last']
+
+    def is_fresh(self, key, interval_seconds, points=100, now=None):
+        """ Tell whether the newest stored point is recent enough for a
+        'compact' call (the last points of the series) to close the gap.
+
+        Keyword Arguments:
+            key:  (function, symbol, interval) tuple
+            interval_seconds:  Length of one interval of the series
+            points:  Number of points returned by a compact call (default 100)
+            now:  Current epoch (default None, the current time)
+        """
+        last = self.last_timestamp(key)
+        if last is None:
+            return False
+        now = time.time() if now is None else now
+        # Keep a margin for the closed market days in the compact window
+        return now - last < interval_seconds * points * 0.5
+
+    def merge(self, key, data, meta_data=None, complete=False):
+        """ Merge the points of a json time series into the store. New points
+        are appended, points already stored with the same values are
+        skipped, so merging the same data twice is a no-op. A revised last
+        point is overwritten in place once the meta commits it, anything else
+        out of order is appended and sorted out by the next compact(). The
+        number of decimals of every field is kept, for to_json. Returns the
+        number of points written.
+
+        Keyword Arguments:
+            key:  (function, symbol, interval) tuple
+            data:  Dictionary mapping date labels to their row of values
+            meta_data:  The meta data of the call, kept with the series
+            complete:  Whether data is the whole history of the series, as
+                given by an outputsize='full' call (default False)
+        """
+        with self._lock:
+            meta = self._read_meta(key)
+            if meta is None:
+                first = next(iter(data.values()), None)
+                if first is None:
+                    return 0
+                os.makedirs(self._path(key), exist_ok=True)
+                meta = {'fields': list(first), 'rows': 0, 'last': None,
+                        'sorted': True, 'decimals': [0] * len(first)}
+            fields = meta['fields']
+            rows = meta['rows']
+            points = sorted((to_epoch(label), [float(row[field])
+                                                for field in fields])
+                            for label, row in data.items())
+            appended = []
+            revised_last = None
+            with self._mapped(key, fields, rows) as (index, columns):
+                for epoch, values in points:
+                    if meta['last'] is not None and epoch <= meta['last']:
+                        position = self._find(index, epoch, meta['sorted'])
+                        if position is not None and all(
+                                columns[c][position] == values[c]
+                                for c in range(len(fields))):
+                            continue
+                        if epoch == meta['last'] and position == rows - 1:
+                            revised_last = values
+                            continue
+                        meta['sorted'] = False
+                    appended.append((epoch, values))
+                    if meta['last'] is None or epoch > meta['last']:
+                        meta['last'] = epoch
+            if 'decimals' in meta:
+                meta['decimals'] = _merge_decimals(meta['decimals'], fields,
+                                                   data.values())
+            if appended:
+                self._append(key, fields, rows, appended)
+            if revised_last is not None:
+                meta['revision'] = [rows - 1, revised_last]
+            meta['rows'] = rows + len(appended)
+            meta['fetched_at'] = time.time()
+            meta['complete'] = meta.get('complete', False) or complete
+            if meta_data is not None:
+                meta['meta_data'] = meta_data
+            self._write_meta(key, meta)
+            if revised_last is not None:
+                self._apply_revision(key, meta)
+            return len(appended) + (revised_last is not None)
+
+    @staticmethod
+    def _find(index, epoch, is_sorted):
+        if is_sorted:
+            position = bisect_left(index, epoch)
+            if position < len(index) and index[position] == epoch:
+                return position
+            return None
+        # Out of order rows, the newest write of a timestamp wins
+        for position in range(len(index) - 1, -1, -1):
+            if index[position] == epoch:
+                return position
+        return None
+
+    def _append(self, key, fields, rows, points):
+        path = self._path(key)
+        # Drop the bytes of an append that was interrupted before committing
+        names = [self._INDEX] + [self._column_file(position)
+                                 for position in range(len(fields))]
+        for position, name in enumerate(names):
+            if position == 0:
+                values = array('q', [epoch for epoch, _ in points])
+            else:
+                values = array('d', [row[position - 1] for _, row in points])
+            with open(os.path.join(path, name), 'ab') as stored:
+                stored.truncate(rows * 8)
+                values.tofile(stored)
+
+    def _apply_revision(self, key, meta):
+        """ Write the row revision committed by the meta in place, then drop
+        it from the meta. Writing it again is harmless, so a revision left by
+        an interrupted write is finished by the next read of the meta.
+        """
+        row, values = meta.pop('revision')
+        for position in range(len(meta['fields'])):
+            name = os.path.join(self._path(key), self._column_file(position))
+            with open(name, 'r+b') as stored:
+                stored.seek(row * 8)
+                array('d', [values[position]]).tofile(stored)
+        self._write_meta(key, meta)
+
+    def compact(self, key):
+        """ Rewrite a series sorted by time, keeping the newest write of every
+        timestamp. The rewritten files replace the old ones in one rename.
+
+        Keyword Arguments:
+            key:  (function, symbol, interval) tuple
+        """
+        with self._lock:
+            meta = self._read_meta(key)
+            if meta is None:
+                return
+            fields, rows = meta['fields'], meta['rows']
+            path = self._path(key)
+            staging = path + '.compact'
+            with self._mapped(key, fields, rows) as (index, columns):
+                latest = {}
+                for position in range(rows):
+                    latest[index[position]] = position
+                order = sorted(latest)
+                shutil.rmtree(staging, ignore_errors=True)
+                os.makedirs(staging)
+                with open(os.path.join(staging, self._INDEX), 'wb') as stored:
+                    array('q', order).tofile(stored)
+                for position, column in enumerate(columns):
+                    with open(os.path.join(staging,
+                                           self._column_file(position)),
+                              'wb') as stored:
+                        array('d', [column[latest[epoch]]
+                                    for epoch in order]).tofile(stored)
+            meta.update(rows=len(order), sorted=True,
+                        last=order[-1] if order else None)
+            with open(os.path.join(staging, self._META), 'w') as stored:
+                json.dump(meta, stored)
+            retired = path + '.old'
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(path, retired)
+            os.replace(staging, path)
+            shutil.rmtree(retired, ignore_errors=True)
+
+    def read(self, key, start=None, end=None):
+        """ Return the points with start <= epoch <= end as a ColumnarFrame
+        whose columns are zero-copy views over the mapped files (NumPy arrays
+        when NumPy is installed, memoryviews otherwise), named like the
+        columns of output_format='columnar'. The files stay mapped as long
+        as a view over them is alive. None is returned for unknown series.
+
+        Keyword Arguments:
+            key:  (function, symbol, interval) tuple
+            start:  First epoch second to include (default None, no bound)
+            end:  Last epoch second to include (default None, no bound)
+        """
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        if not meta['sorted']:
+            self.compact(key)
+            meta = self._read_meta(key)
+        rows = meta['rows']
+        index = self._map(key, self._INDEX, 'q', rows)
+        lo = 0 if start is None else bisect_left(index, start)
+        hi = rows if end is None else bisect_right(index, end)
+        columns = {clean_column_name(field):
+                   self._map(key, self._column_file(position), 'd', rows)[lo:hi]
+                   for position, field in enumerate(meta['fields'])}
+        index = index[lo:hi]
+        if _NUMPY_FOUND:
+            index = numpy.frombuffer(index, dtype=numpy.int64)
+            columns = {field: numpy.frombuffer(column, dtype=numpy.float64)
+                       for field, column in columns.items()}
+        return ColumnarFrame(index, columns)
+
+    def to_json(self, key, last=None, date_format='%Y-%m-%d'):
+        """ Return a stored series laid out like the api data, newest first,
+        optionally limited to its last points. Values are written with the
+        number of decimals their field has in the api responses, which gives
+        back the api strings of fields with a fixed number of decimals, like
+        '230.5800' or '3918000'. A field whose decimals vary gets the largest
+        number of them, and one written with an exponent (or stored before
+        the decimals were kept) the shortest repr of its float.
+
+        Keyword Arguments:
+            key:  (function, symbol, interval) tuple
+            last:  Number of newest points to return (default None, all)
+            date_format:  strftime format of the date labels
+        """
+        frame = self.read(key)
+        if frame is None:
+            return {}
+        rows = len(frame)
+        first = 0 if last is None else max(rows - last, 0)
+        meta = self._read_meta(key)
+        # Columns keep the order of the api fields
+        columns = list(zip(meta['fields'],
+                           meta.get('decimals') or [None] * len(meta['fields']),
+                           frame.columns.values()))
+        data = {}
+        for position in range(rows - 1, first - 1, -1):
+            label = time.strftime(date_format,
+                                  time.gmtime(int(frame.index[position])))
+            data[label] = {field: _format_value(float(column[position]),
+                                                decimals)
+                           for field, decimals, column in columns}
+        return data
+
+
+def _decimals(text):
+    """ Number of decimals of an api value, None when it is not written in
+    plain decimal notation
+    """
+    text = str(text)
+    if 'e' in text.lower():
+        return None
+    return len(text.partition('.')[2])
+
+
+def _merge_decimals(decimals, fields, rows):
+    """ Largest number of decimals of every field over the stored and the
+    merged rows, None for the fields written with an exponent
+    """
+    merged = list(decimals)
+    for row in rows:
+        for position, field in enumerate(fields):
+            if merged[position] is None:
+                continue
+            count = _decimals(row[field])
+            merged[position] = None if count is None else \
+                max(merged[position], count)
+    return merged
+
+
+def _format_value(value, decimals=None):
+    if decimals is not None:
+        return '{:.{}f}'.format(value, decimals)
+    return '{:d}'.format(int(value)) if value.is_integer() else repr(value)
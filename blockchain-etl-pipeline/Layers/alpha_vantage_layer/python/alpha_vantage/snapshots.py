@@ -0,0 +1,210 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+# boto3 is only needed by the S3 backend, it is part of the Lambda runtime
+try:
+    import boto3
+    _BOTO3_FOUND = True
+except ImportError:
+    _BOTO3_FOUND = False
+from .transport import cassette_key, loads
+
+
+class LocalBackend(object):
+    """ Snapshot backend writing one file per snapshot under a directory """
+
+    def __init__(self, root):
+        """ Initialize the backend
+
+        Keyword Arguments:
+            root:  Directory holding the snapshots, created if missing
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def get(self, name):
+        """ Return the bytes of a snapshot, None if there is none """
+        try:
+            with open(os.path.join(self.root, name), 'rb') as snapshot:
+                return snapshot.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as snapshot:
+            snapshot.write(content)
+        os.replace(path + '.tmp', path)
+
+
+class S3Backend(object):
+    """ Snapshot backend keeping one object per snapshot in a S3 bucket,
+    shared by every Lambda container of a function
+    """
+
+    def __init__(self, bucket, prefix='alpha_vantage/snapshots', client=None):
+        """ Initialize the backend
+
+        Keyword Arguments:
+            bucket:  Name of the bucket
+            prefix:  Prefix of the snapshot keys (default
+                'alpha_vantage/snapshots')
+            client:  boto3 S3 client (default None, a new one)
+        """
+        if client is None and not _BOTO3_FOUND:
+            raise ValueError("The boto3 library was not found, therefore the "
+                             "S3 backend can not be used, please install "
+                             "manually")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = client or boto3.client('s3')
+
+    def _key(self, name):
+        return '{}/{}'.format(self.prefix, name) if self.prefix else name
+
+    def get(self, name):
+        try:
+            response = self.client.get_object(Bucket=self.bucket,
+                                              Key=self._key(name))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response['Body'].read()
+
+    def put(self, name, content):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(name),
+                               Body=content,
+                               ContentType='application/json')
+
+
+class SnapshotStore(object):
+    """ Cache of the responses of the calls whose data changes at most daily:
+    company fundamentals, commodities and economic indicators. A response is
+    kept per url, so the annual and quarterly views of a report share one
+    call. Instead of a fixed ttl, a snapshot expires when the next reporting
+    period is expected: the period is read from the two latest dates of the
+    response, a publication lag is added and, once that time is passed, the
+    call is checked again every min_ttl until the new period shows up.
+    Snapshots are kept in memory and in a LocalBackend or S3Backend.
+    """
+    _DAY = 86400
+    # How the expiry of the snapshots of a function is computed
+    _OVERVIEW = ('OVERVIEW',)
+    _REPORTS = ('INCOME_STATEMENT', 'BALANCE_SHEET', 'CASH_FLOW', 'EARNINGS')
+    _SERIES = ('WTI', 'BRENT', 'NATURAL_GAS', 'COPPER', 'ALUMINUM', 'WHEAT',
+               'CORN', 'COTTON', 'SUGAR', 'COFFEE', 'ALL_COMMODITIES',
+               'REAL_GDP', 'REAL_GDP_PER_CAPITA', 'TREASURY_YIELD',
+               'FEDERAL_FUNDS_RATE', 'CPI', 'INFLATION', 'RETAIL_SALES',
+               'DURABLES', 'UNEMPLOYMENT', 'NONFARM_PAYROLL')
+    FUNCTIONS = frozenset(_OVERVIEW + _REPORTS + _SERIES)
+    # Keys of the api answers that carry a message instead of data, like the
+    # rate limit notes given when treat_info_as_error is False
+    _MESSAGES = ('Note', 'Information', 'Error Message')
+
+    def __init__(self, backend, min_ttl=_DAY, report_lag=30 * _DAY):
+        """ Initialize the store
+
+        Keyword Arguments:
+            backend:  LocalBackend or S3Backend persisting the snapshots, or
+                the path of a local directory
+            min_ttl:  Seconds a snapshot is kept at least, and between two
+                checks for an overdue period (default one day)
+            report_lag:  Seconds between the end of a fiscal quarter and the
+                publication of its reports (default 30 days)
+        """
+        if isinstance(backend, str):
+            backend = LocalBackend(backend)
+        self.backend = backend
+        self.min_ttl = min_ttl
+        self.report_lag = report_lag
+        self._lock = threading.Lock()
+        self._memory = {}
+
+    @staticmethod
+    def _name(function_name, url):
+        return '{}/{}.json'.format(function_name, cassette_key(url))
+
+    def get(self, function_name, url, now=None):
+        """ Return the stored response of a call, None when it is missing or
+        expired
+
+        Keyword Arguments:
+            function_name:  The function name of the alpha vantage api
+            url:  The url of the call
+            now:  Epoch to check the expiry against (default None, now)
+        """
+        if function_name not in self.FUNCTIONS:
+            return None
+        name = self._name(function_name, url)
+        with self._lock:
+            snapshot = self._memory.get(name)
+        if snapshot is None:
+            content = self.backend.get(name)
+            if content is None:
+                return None
+            snapshot = loads(content)
+            with self._lock:
+                self._memory[name] = snapshot
+        if snapshot['expires_at'] <= (time.time() if now is None else now):
+            return None
+        return snapshot['response']
+
+    def put(self, function_name, url, response, now=None):
+        """ Store the response of a call and return the epoch it expires at,
+        None when the response is not kept
+
+        Keyword Arguments:
+            function_name:  The function name of the alpha vantage api
+            url:  The url of the call
+            response:  The decoded json response
+            now:  Epoch of the call (default None, now)
+        """
+        if function_name not in self.FUNCTIONS or \
+                not isinstance(response, dict) or \
+                any(key in response for key in self._MESSAGES):
+            return None
+        now = time.time() if now is None else now
+        snapshot = {'function': function_name,
+                    'url': re.sub(r'apikey=[^&]*', 'apikey=***', url),
+                    'fetched_at': now,
+                    'expires_at': self.expires_at(function_name, response,
+                                                  now),
+                    'response': response}
+        name = self._name(function_name, url)
+        self.backend.put(name, json.dumps(snapshot).encode('utf-8'))
+        with self._lock:
+            self._memory[name] = snapshot
+        return snapshot['expires_at']
+
+    def expires_at(self, function_name, response, now):
+        """ Epoch at which the next period of a response is expected, at
+        least min_ttl after now
+        """
+        if function_name in self._REPORTS:
+            reports = response.get('quarterlyReports') or \
+                response.get('quarterlyEarnings') or []
+            dates = [report.get('fiscalDateEnding') for report in reports]
+            lag = self.report_lag
+        elif function_name in self._SERIES:
+            dates = [point.get('date') for point in response.get('data') or []]
+            # A point is dated by the start of its period and published
+            # once the period is over
+            lag = None
+        else:
+            dates = []
+            lag = 0
+        dates = sorted((self._epoch(date) for date in dates if date),
+                       reverse=True)
+        if len(dates) < 2:
+            return now + self.min_ttl
+        period = max(dates[0] - dates[1], self._DAY)
+        expected = dates[0] + period + (period if lag is None else lag)
+        return max(expected, now + self.min_ttl)
+
+    @staticmethod
+    def _epoch(date):
+        return (datetime.datetime.strptime(date[:10], '%Y-%m-%d') -
+                datetime.datetime(1970, 1, 1)).total_seconds()
@@ -0,0 +1,210 @@
+from bisect import bisect_left
+import csv
+import os
+import tempfile
+import threading
+import time
+from .alphavantage import AlphaVantage
+from .transport import HttpTransport
+
+
+def _trigrams(text):
+    """ Set of the trigrams of the lower cased words of text, every word
+    padded with a leading and a trailing space
+    """
+    grams = set()
+    for word in text.lower().split():
+        padded = ' {} '.format(word)
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SymbolIndex(object):
+    """ Locally cached universe of the symbols known by the api: the equity
+    listing (LISTING_STATUS) and the physical and digital currency lists.
+    Every list is downloaded on first use, cached on disk and downloaded
+    again once older than the ttl. Searches go through a sorted symbol list
+    (prefixes) and a trigram index of the names, validation through sets.
+    """
+    _LISTING_STATUS_URL = AlphaVantage._ALPHA_VANTAGE_API_URL + \
+        'function=LISTING_STATUS&apikey={}'
+
+    def __init__(self, key=None, cache_dir=None, ttl=7 * 86400,
+                 transport=None):
+        """ Initialize the index
+
+        Keyword Arguments:
+            key:  Alpha Vantage api key, only needed for the equity listing
+                (default None, the ALPHAVANTAGE_API_KEY environment variable)
+            cache_dir:  Directory of the cached lists (default None, an
+                alpha_vantage directory in the temporary directory)
+            ttl:  Seconds after which a cached list is downloaded again
+                (default one week)
+            transport:  Transport used for the downloads (default None,
+                HttpTransport)
+        """
+        self.key = key or os.getenv('ALPHAVANTAGE_API_KEY')
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(),
+                                                   'alpha_vantage')
+        self.ttl = ttl
+        self.transport = transport or HttpTransport()
+        self._lock = threading.Lock()
+        self._lists = {}
+        self._listing = None
+
+    def _rows(self, name, url):
+        """ Return the csv rows of a list, without its header, from the
+        cache when it is fresh. A stale cache is used when the download
+        fails.
+        """
+        with self._lock:
+            rows = self._lists.get(name)
+            if rows is not None:
+                return rows
+            path = os.path.join(self.cache_dir, name + '.csv')
+            try:
+                age = time.time() - os.path.getmtime(path)
+            except OSError:
+                age = None
+            if age is None or age > self.ttl:
+                try:
+                    response = self.transport.get(url)
+                    if response.status_code != 200 or \
+                            not response.content.strip():
+                        raise ValueError('Error getting the {} list, status '
+                                         '{}'.format(name, response.status_code))
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    with open(path + '.tmp', 'wb') as cached:
+                        cached.write(response.content)
+                    os.replace(path + '.tmp', path)
+                except Exception:
+                    if age is None:
+                        raise
+            with open(path, newline='') as cached:
+                rows = list(csv.reader(cached))[1:]
+            self._lists[name] = rows
+            return rows
+
+    def refresh(self):
+        """ Forget the loaded lists, the next lookups read them again from
+        the cache or the api
+        """
+        with self._lock:
+            self._lists = {}
+            self._listing = None
+
+    def _codes(self, name, url):
+        codes = self._lists.get(name + '_codes')
+        if codes is None:
+            codes = frozenset(row[0].upper() for row in self._rows(name, url)
+                              if row)
+            self._lists[name + '_codes'] = codes
+        return codes
+
+    def physical_currencies(self):
+        """ Set of the physical currency codes """
+        return self._codes('physical_currency_list',
+                           AlphaVantage._ALPHA_VANTAGE_PHYSICAL_CURRENCY_LIST)
+
+    def digital_currencies(self):
+        """ Set of the digital currency codes """
+        return self._codes('digital_currency_list',
+                           AlphaVantage._ALPHA_VANTAGE_DIGITAL_CURRENCY_LIST)
+
+    def is_physical_currency(self, code):
+        return str(code).upper() in self.physical_currencies()
+
+    def is_digital_currency(self, code):
+        return str(code).upper() in self.digital_currencies()
+
+    def is_currency(self, code):
+        return self.is_physical_currency(code) or self.is_digital_currency(code)
+
+    def is_known(self, code, kind):
+        """ Tell whether code is a known symbol of a kind
+
+        Keyword Arguments:
+            code:  The symbol or currency code
+            kind:  Either 'physical', 'digital', 'currency' (physical or
+                digital) or 'equity'
+        """
+        if kind == 'physical':
+            return self.is_physical_currency(code)
+        elif kind == 'digital':
+            return self.is_digital_currency(code)
+        elif kind == 'currency':
+            return self.is_currency(code)
+        elif kind == 'equity':
+            return self.is_symbol(code)
+        raise ValueError('Unknown symbol kind {}'.format(kind))
+
+    def _load_listing(self):
+        """ Build the symbol and trigram indexes of the equity listing """
+        if self._listing is not None:
+            return self._listing
+        if not self.key:
+            raise ValueError('The equity listing needs an Alpha Vantage api '
+                             'key')
+        rows = [row for row in self._rows('listing_status',
+                                          self._LISTING_STATUS_URL.format(self.key))
+                if len(row) >= 4]
+        symbols = sorted((row[0].upper(), position)
+                         for position, row in enumerate(rows))
+        trigrams = {}
+        sizes = []
+        for position, row in enumerate(rows):
+            grams = _trigrams(row[1])
+            sizes.append(len(grams))
+            for gram in grams:
+                trigrams.setdefault(gram, []).append(position)
+        self._listing = (rows, [symbol for symbol, _ in symbols],
+                         [position for _, position in symbols], trigrams,
+                         sizes)
+        return self._listing
+
+    def is_symbol(self, symbol):
+        """ Tell whether an equity or etf symbol is listed """
+        _, symbols, _, _, _ = self._load_listing()
+        symbol = str(symbol).upper()
+        position = bisect_left(symbols, symbol)
+        return position < len(symbols) and symbols[position] == symbol
+
+    def search(self, keywords, limit=10):
+        """ Return the best matches of keywords among the listed symbols and
+        names, like the bestMatches of SYMBOL_SEARCH: a list of dictionaries
+        with symbol, name, exchange, assetType and matchScore, best first.
+        Symbols starting with the keywords score by how much of the symbol
+        they cover, names by the trigram similarity with the keywords.
+
+        Keyword Arguments:
+            keywords:  The text to look for
+            limit:  Largest number of matches (default 10)
+        """
+        rows, symbols, positions, trigrams, sizes = self._load_listing()
+        query = keywords.strip()
+        if not query:
+            return []
+        scores = {}
+        prefix = query.upper()
+        start = bisect_left(symbols, prefix)
+        for index in range(start, min(start + 10 * limit, len(symbols))):
+            if not symbols[index].startswith(prefix):
+                break
+            scores[positions[index]] = len(prefix) / float(len(symbols[index]))
+        grams = _trigrams(query)
+        if grams:
+            hits = {}
+            for gram in grams:
+                for position in trigrams.get(gram, ()):
+                    hits[position] = hits.get(position, 0) + 1
+            for position, shared in hits.items():
+                similarity = shared / float(len(grams) + sizes[position] -
+                                            shared)
+                if similarity > scores.get(position, 0.0):
+                    scores[position] = similarity
+        best = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [{'symbol': rows[position][0], 'name': rows[position][1],
+                 'exchange': rows[position][2],
+                 'assetType': rows[position][3],
+                 'matchScore': '{:.4f}'.format(score)}
+                for position, score in best]
@@ -16,7 +16,7 @@ class TechIndicators(av):
                 self.output_format.lower()))
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_sma(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return simple moving average time series in two json objects as data and
         meta_data. It raises ValueError when problems arise
@@ -39,7 +39,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: SMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ema(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return exponential moving average time series in two json objects
         as data and meta_data. It raises ValueError when problems arise
@@ -62,7 +62,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: EMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_wma(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return weighted moving average time series in two json objects
         as data and meta_data. It raises ValueError when problems arise
@@ -85,7 +85,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: WMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_dema(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return double exponential moving average time series in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -108,7 +108,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: DEMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_tema(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return triple exponential moving average time series in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -131,7 +131,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: TEMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_trima(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return triangular moving average time series in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -154,7 +154,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: TRIMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_kama(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return Kaufman adaptative moving average time series in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -177,7 +177,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: KAMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_mama(self, symbol, interval='daily', series_type='close',
                  fastlimit=None, slowlimit=None, month=None, entitlement=None):
         """ Return MESA adaptative moving average time series in two json
@@ -204,7 +204,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MAMA', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_vwap(self, symbol, interval='5min', month=None, entitlement=None):
         """ Returns the volume weighted average price (VWAP) for intraday time series.
 
@@ -223,7 +223,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: VWAP', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_t3(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return triple exponential moving average time series in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -246,7 +246,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: T3', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_macd(self, symbol, interval='daily', series_type='close',
                  fastperiod=None, slowperiod=None, signalperiod=None, month=None, entitlement=None):
         """ Return the moving average convergence/divergence time series in two
@@ -273,7 +273,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MACD', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_macdext(self, symbol, interval='daily', series_type='close',
                     fastperiod=None, slowperiod=None, signalperiod=None, fastmatype=None,
                     slowmatype=None, signalmatype=None, month=None, entitlement=None):
@@ -323,7 +323,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MACDEXT', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_stoch(self, symbol, interval='daily', fastkperiod=None,
                   slowkperiod=None, slowdperiod=None, slowkmatype=None, slowdmatype=None, month=None, entitlement=None):
         """ Return the stochatic oscillator values in two
@@ -369,7 +369,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: STOCH', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_stochf(self, symbol, interval='daily', fastkperiod=None,
                    fastdperiod=None, fastdmatype=None, month=None, entitlement=None):
         """ Return the stochatic oscillator values in two
@@ -409,7 +409,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: STOCHF', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_rsi(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the relative strength index time series in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -432,7 +432,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: RSI', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_stochrsi(self, symbol, interval='daily', time_period=20,
                      series_type='close', fastkperiod=None, fastdperiod=None,
                      fastdmatype=None, month=None, entitlement=None):
@@ -476,7 +476,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: STOCHRSI', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_willr(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the Williams' %R (WILLR) values in two json objects as data
         and meta_data. It raises ValueError when problems arise
@@ -497,7 +497,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: WILLR', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_adx(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return  the average directional movement index values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -518,7 +518,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: ADX', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_adxr(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return  the average directional movement index  rating in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -539,7 +539,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: ADXR', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_apo(self, symbol, interval='daily', series_type='close',
                 fastperiod=None, slowperiod=None, matype=None, month=None, entitlement=None):
         """ Return the absolute price oscillator values in two
@@ -578,7 +578,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: APO', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ppo(self, symbol, interval='daily', series_type='close',
                 fastperiod=None, slowperiod=None, matype=None, month=None, entitlement=None):
         """ Return the percentage price oscillator values in two
@@ -617,7 +617,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: PPO', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_mom(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the momentum values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -640,7 +640,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MOM', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_bop(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the balance of power values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -661,7 +661,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: BOP', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_cci(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the commodity channel index values  in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -682,7 +682,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: CCI', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_cmo(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the Chande momentum oscillator in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -705,7 +705,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: CMO', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_roc(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the rate of change values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -728,7 +728,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: ROC', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_rocr(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the rate of change ratio values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -751,7 +751,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: ROCR', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_aroon(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the aroon values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -774,7 +774,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: AROON', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_aroonosc(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the aroon oscillator values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -797,7 +797,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: AROONOSC', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_mfi(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the money flow index values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -820,7 +820,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MFI', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_trix(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the1-day rate of change of a triple smooth exponential
         moving average in two json objects as data and meta_data.
@@ -844,7 +844,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: TRIX', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ultosc(self, symbol, interval='daily', timeperiod1=None,
                    timeperiod2=None, timeperiod3=None, month=None, entitlement=None):
         """ Return the ultimate oscillaror values in two json objects as
@@ -871,7 +871,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: ULTOSC', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_dx(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the directional movement index values in two json objects as
         data and meta_data. It raises ValueError when problems arise
@@ -894,7 +894,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: DX', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_minus_di(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the minus directional indicator values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -915,7 +915,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MINUS_DI', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_plus_di(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the plus directional indicator values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -936,7 +936,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: PLUS_DI', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_minus_dm(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the minus directional movement values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -956,7 +956,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MINUS_DM', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_plus_dm(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the plus directional movement values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -976,7 +976,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: PLUS_DM', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_bbands(self, symbol, interval='daily', time_period=20,  series_type='close',
                    nbdevup=None, nbdevdn=None, matype=None, month=None, entitlement=None):
         """ Return the bollinger bands values in two
@@ -1020,7 +1020,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: BBANDS', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_midpoint(self, symbol, interval='daily', time_period=20, series_type='close', month=None, entitlement=None):
         """ Return the midpoint values in two json objects as
         data and meta_data. It raises ValueError when problems arise
@@ -1043,7 +1043,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MIDPOINT', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_midprice(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the midprice values in two json objects as
         data and meta_data. It raises ValueError when problems arise
@@ -1064,7 +1064,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: MIDPRICE', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_sar(self, symbol, interval='daily', acceleration=None, maximum=None, month=None, entitlement=None):
         """ Return the midprice values in two json objects as
         data and meta_data. It raises ValueError when problems arise
@@ -1088,7 +1088,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: SAR', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_trange(self, symbol, interval='daily', month=None, entitlement=None):
         """ Return the true range values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -1108,7 +1108,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: TRANGE', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_atr(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the average true range values in two json objects as
         data and meta_data. It raises ValueError when problems arise
@@ -1129,7 +1129,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: ATR', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_natr(self, symbol, interval='daily', time_period=20, month=None, entitlement=None):
         """ Return the normalized average true range values in two json objects
         as data and meta_data. It raises ValueError when problems arise
@@ -1150,7 +1150,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: NATR', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ad(self, symbol, interval='daily', month=None, entitlement=None):
         """ Return the Chaikin A/D line values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -1170,7 +1170,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: Chaikin A/D', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_adosc(self, symbol, interval='daily', fastperiod=None,
                   slowperiod=None, month=None, entitlement=None):
         """ Return the Chaikin A/D oscillator values in two
@@ -1194,7 +1194,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: ADOSC', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_obv(self, symbol, interval='daily', month=None, entitlement=None):
         """ Return the on balance volume values in two json
         objects as data and meta_data. It raises ValueError when problems arise
@@ -1214,7 +1214,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: OBV', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ht_trendline(self, symbol, interval='daily', series_type='close', month=None, entitlement=None):
         """ Return the Hilbert transform, instantaneous trendline values in two
         json objects as data and meta_data. It raises ValueError when problems arise
@@ -1236,7 +1236,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: HT_TRENDLINE', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ht_sine(self, symbol, interval='daily', series_type='close', month=None, entitlement=None):
         """ Return the Hilbert transform, sine wave values in two
         json objects as data and meta_data. It raises ValueError when problems arise
@@ -1258,7 +1258,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: HT_SINE', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ht_trendmode(self, symbol, interval='daily', series_type='close', month=None, entitlement=None):
         """ Return the Hilbert transform, trend vs cycle mode in two
         json objects as data and meta_data. It raises ValueError when problems arise
@@ -1280,7 +1280,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: HT_TRENDMODE', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ht_dcperiod(self, symbol, interval='daily', series_type='close', month=None, entitlement=None):
         """ Return the Hilbert transform, dominant cycle period in two
         json objects as data and meta_data. It raises ValueError when problems arise
@@ -1302,7 +1302,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: HT_DCPERIOD', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ht_dcphase(self, symbol, interval='daily', series_type='close', month=None, entitlement=None):
         """ Return the Hilbert transform, dominant cycle phase in two
         json objects as data and meta_data. It raises ValueError when problems arise
@@ -1324,7 +1324,7 @@ class TechIndicators(av):
         return _FUNCTION_KEY, 'Technical Analysis: HT_DCPHASE', 'Meta Data'
 
     @av._output_format
-    @av._call_api_on_func
+    @av._call_api_on_func(constant_keys=True)
     def get_ht_phasor(self, symbol, interval='daily', series_type='close', month=None, entitlement=None):
         """ Return the Hilbert transform, phasor components in two
         json objects as data and meta_data. It raises ValueError when problems arise
@@ -0,0 +1,227 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import requests
+# orjson parses json bytes faster than the standard library, it stays
+# optional
+try:
+    import orjson
+    _ORJSON_FOUND = True
+except ImportError:
+    _ORJSON_FOUND = False
+
+
+def loads(content):
+    """ Decode a json body. orjson parses the bytes when installed, the
+    standard library parses the utf-8 text otherwise or for the documents
+    orjson rejects (like NaN values), so both accept the same input.
+
+    Keyword Arguments:
+        content:  The body as bytes
+    """
+    if _ORJSON_FOUND:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content.decode('utf-8'))
+
+
+class TransportResponse(object):
+    """ A fully read http response, the common currency of the transports """
+
+    def __init__(self, status_code, content, headers=None):
+        """ Initialize the response
+
+        Keyword Arguments:
+            status_code:  The http status code
+            content:  The body as bytes
+            headers:  Dictionary of response headers (default None)
+        """
+        self.status_code = status_code
+        self.content = content
+        self.headers = dict(headers or {})
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return loads(self.content)
+
+
+def cassette_key(url):
+    """ Name of the recording of a url: the sha1 of the url without its api
+    key, so cassettes can be shared and replayed with any key
+
+    Keyword Arguments:
+        url:  The url of the service
+    """
+    url = re.sub(r'&?apikey=[^&]*', '', url)
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def write_cassette(directory, url, response):
+    """ Record a response in directory, replacing any previous recording of
+    the same url
+
+    Keyword Arguments:
+        directory:  The cassette directory
+        url:  The url of the service
+        response:  The TransportResponse to record
+    """
+    record = {'url': re.sub(r'apikey=[^&]*', 'apikey=***', url),
+              'status_code': response.status_code,
+              'headers': {name: value for name, value
+                          in response.headers.items()
+                          if name.lower() == 'content-type'}}
+    try:
+        record['body'] = response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        record['body_base64'] = base64.b64encode(
+            response.content).decode('ascii')
+    path = os.path.join(directory, cassette_key(url) + '.json')
+    with open(path + '.tmp', 'w') as cassette:
+        json.dump(record, cassette)
+    os.replace(path + '.tmp', path)
+
+
+def read_cassette(directory, url):
+    """ Return the recorded TransportResponse of a url. It raises ValueError
+    when the url was never recorded.
+
+    Keyword Arguments:
+        directory:  The cassette directory
+        url:  The url of the service
+    """
+    path = os.path.join(directory, cassette_key(url) + '.json')
+    try:
+        with open(path) as cassette:
+            record = json.load(cassette)
+    except FileNotFoundError:
+        raise ValueError('No recording for {} in {}'.format(
+            re.sub(r'apikey=[^&]*', 'apikey=***', url), directory))
+    if 'body_base64' in record:
+        content = base64.b64decode(record['body_base64'])
+    else:
+        content = record['body'].encode('utf-8')
+    return TransportResponse(record['status_code'], content,
+                             record['headers'])
+
+
+class HttpTransport(object):
+    """ Live transport going through requests, the default of the clients.
+    A requests.Session can be given to reuse connections.
+    """
+
+    def __init__(self, session=None):
+        """ Initialize the transport
+
+        Keyword Arguments:
+            session:  requests.Session used for the calls (default None,
+                requests.get)
+        """
+        self.session = session
+
+    def get(self, url, headers=None, proxy=None):
+        """ Send a GET request and return the TransportResponse
+
+        Keyword Arguments:
+            url:  The url of the service
+            headers:  Dictionary of request headers (default None)
+            proxy:  Dictionary mapping protocol or protocol and hostname to
+                the URL of the proxy (default None)
+        """
+        getter = self.session.get if self.session else requests.get
+        response = getter(url, proxies=proxy, headers=headers)
+        return TransportResponse(response.status_code, response.content,
+                                 response.headers)
+
+
+class RecordingTransport(object):
+    """ Transport writing every response it gets from another transport to a
+    cassette directory, one json file per url
+    """
+
+    def __init__(self, directory, transport=None):
+        """ Initialize the transport
+
+        Keyword Arguments:
+            directory:  The cassette directory, created if missing
+            transport:  The transport doing the calls (default None, a
+                HttpTransport)
+        """
+        self.directory = directory
+        self.transport = transport or HttpTransport()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, url, headers=None, proxy=None):
+        response = self.transport.get(url, headers=headers, proxy=proxy)
+        write_cassette(self.directory, url, response)
+        return response
+
+
+class ReplayTransport(object):
+    """ Transport answering from a cassette directory without any network.
+    Latency and errors can be injected to load test the code around the
+    clients deterministically.
+    """
+
+    def __init__(self, directory, latency=0.0, jitter=0.0, error_rate=0.0,
+                 errors=None, seed=None):
+        """ Initialize the transport
+
+        Keyword Arguments:
+            directory:  The cassette directory
+            latency:  Seconds waited before every response (default 0.0)
+            jitter:  Up to that many random seconds added to the latency
+                (default 0.0)
+            error_rate:  Probability of replacing a response with one of the
+                errors (default 0.0)
+            errors:  List of exceptions (classes or instances) to raise or
+                TransportResponse to return instead of the recording
+                (default None, ConnectionError)
+            seed:  Seed of the random generator, for reproducible runs
+                (default None)
+        """
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.errors = list(errors or [ConnectionError])
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _delay(self):
+        """ Draw the latency of a response and the error replacing it, if any
+        """
+        with self._lock:
+            delay = self.latency + self._random.uniform(0.0, self.jitter)
+            error = None
+            if self.error_rate and self._random.random() < self.error_rate:
+                error = self._random.choice(self.errors)
+        return delay, error
+
+    def _respond(self, url, error):
+        if isinstance(error, TransportResponse):
+            return error
+        if isinstance(error, type):
+            raise error('Error injected by ReplayTransport')
+        if error is not None:
+            raise error.with_traceback(None)
+        response = self._cache.get(url)
+        if response is None:
+            response = self._cache[url] = read_cassette(self.directory, url)
+        return response
+
+    def get(self, url, headers=None, proxy=None):
+        delay, error = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self._respond(url, error)
@@ -0,0 +1,118 @@
+"""Benchmark of get_bulk_quotes against one GLOBAL_QUOTE call per symbol.
+
+A local http server stands in for the api: it answers GLOBAL_QUOTE and
+REALTIME_BULK_QUOTES with deterministic quotes after an artificial latency,
+and leaves out the symbols starting with 'X' to exercise missing quotes.
+The quotes of both paths are checked to be identical.
+
+    python benchmarks/bench_bulk_quotes.py [--symbols N] [--latency SECONDS]
+"""
+import argparse
+import asyncio
+import http.server
+import json
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import fixtures  # noqa: F401, puts the alpha_vantage layer on the path
+
+from alpha_vantage.alphavantage import AlphaVantage
+from alpha_vantage.async_support.timeseries import TimeSeries as AsyncTimeSeries
+from alpha_vantage.timeseries import TimeSeries
+
+
+def quote(symbol):
+    rng = random.Random(symbol)
+    close = rng.uniform(5, 500)
+    previous = close * (1 + rng.gauss(0, 0.02))
+    return {
+        "symbol": symbol,
+        "timestamp": "2024-12-31 16:00:00.000",
+        "open": "{:.4f}".format(previous),
+        "high": "{:.4f}".format(max(close, previous) * 1.01),
+        "low": "{:.4f}".format(min(close, previous) * 0.99),
+        "close": "{:.4f}".format(close),
+        "volume": str(rng.randint(1000, 10 ** 7)),
+        "previous_close": "{:.4f}".format(previous),
+        "change": "{:.4f}".format(close - previous),
+        "change_percent": "{:.4f}".format((close / previous - 1) * 100),
+    }
+
+
+def serve(latency):
+    calls = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            function = query["function"][0]
+            symbols = [symbol for symbol in query["symbol"][0].split(",") if not symbol.startswith("X")]
+            calls.append(function)
+            time.sleep(latency)
+            if function == "REALTIME_BULK_QUOTES":
+                payload = {"endpoint": "Realtime Bulk Quotes", "data": [quote(symbol) for symbol in symbols]}
+            else:
+                payload = {"Global Quote": quote(symbols[0]) if symbols else {}}
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=450)
+    parser.add_argument("--latency", type=float, default=0.02, help="server latency per request")
+    args = parser.parse_args()
+
+    server, calls = serve(args.latency)
+    AlphaVantage._ALPHA_VANTAGE_API_URL = "http://127.0.0.1:{}/query?".format(server.server_port)
+    symbols = ["S{:04d}".format(number) for number in range(args.symbols)] + ["XMISSING"]
+    client = TimeSeries(key="benchmark")
+    try:
+        start = time.perf_counter()
+        single = {}
+        for symbol in symbols[:-1]:
+            single[symbol], _ = client.get_quote_endpoint(symbol)
+        single_seconds, single_calls = time.perf_counter() - start, len(calls)
+
+        del calls[:]
+        start = time.perf_counter()
+        bulk, meta_data = client.get_bulk_quotes(symbols)
+        bulk_seconds, bulk_calls = time.perf_counter() - start, len(calls)
+        assert bulk == single and meta_data["missing"] == ["XMISSING"], meta_data
+
+        async def run_async():
+            async_client = AsyncTimeSeries(key="benchmark")
+            try:
+                return await async_client.get_bulk_quotes(symbols)
+            finally:
+                await async_client.close()
+
+        start = time.perf_counter()
+        async_bulk, _ = asyncio.run(run_async())
+        async_seconds = time.perf_counter() - start
+        assert async_bulk == single
+
+        frame, _ = TimeSeries(key="benchmark", output_format="columnar").get_bulk_quotes(symbols)
+        assert list(frame["symbol"]) == symbols[:-1]
+    finally:
+        server.shutdown()
+    print("symbols={:<5} single={:8.1f} ms ({} calls)  bulk={:7.1f} ms ({} calls)  "
+          "async bulk={:7.1f} ms".format(len(symbols) - 1, single_seconds * 1e3, single_calls,
+                                          bulk_seconds * 1e3, bulk_calls, async_seconds * 1e3))
+
+
+if __name__ == "__main__":
+    main()
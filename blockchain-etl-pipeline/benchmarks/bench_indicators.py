@@ -0,0 +1,84 @@
+"""Throughput and accuracy of the local technical indicator engine.
+
+Times every LocalTechIndicators method on a 10k point daily series and,
+when a directory of recorded api responses is given, compares the local
+values with the api ones. The directory holds the recorded
+TIME_SERIES_DAILY outputsize=full response as ``prices.json`` and one
+``<FUNCTION>.json`` (e.g. ``SMA.json``) per indicator recorded with the
+default parameters.
+
+    python benchmarks/bench_indicators.py [--recorded DIR] [--tolerance 1e-3]
+"""
+import argparse
+import json
+import os
+import time
+
+import fixtures
+
+from alpha_vantage.localindicators import LocalTechIndicators
+
+INDICATORS = ["sma", "ema", "wma", "dema", "tema", "trima", "macd", "stoch", "rsi",
+              "willr", "mom", "cci", "roc", "bbands", "atr", "ad", "obv"]
+# Values close to the start depend on how the recursion is seeded, they are
+# left out of the comparison with the api
+WARM_UP = 250
+
+
+def engine(payload):
+    indicators = LocalTechIndicators(key="benchmark")
+    indicators._source._handle_api_call = lambda url, function_name=None: payload
+    return indicators
+
+
+def throughput(points):
+    payload = fixtures.daily_full(points=points)
+    indicators = engine(payload)
+    indicators.get_sma("IBM")  # load and cache the price series
+    print("{:<8} {:>10} {:>14}".format("method", "ms", "points/s"))
+    for name in INDICATORS:
+        started = time.perf_counter()
+        getattr(indicators, "get_" + name)("IBM")
+        elapsed = time.perf_counter() - started
+        print("{:<8} {:>10.2f} {:>14,.0f}".format(name, elapsed * 1e3, points / elapsed))
+
+
+def validate(directory, tolerance):
+    with open(os.path.join(directory, "prices.json")) as prices:
+        indicators = engine(json.load(prices))
+    failures = 0
+    for name in INDICATORS:
+        path = os.path.join(directory, name.upper() + ".json")
+        if not os.path.exists(path):
+            continue
+        with open(path) as recorded:
+            response = json.load(recorded)
+        data_key = next(key for key in response if key != "Meta Data")
+        local, _ = getattr(indicators, "get_" + name)("IBM")
+        labels = sorted(set(local) & set(response[data_key]))[WARM_UP:]
+        worst = 0.0
+        for label in labels:
+            for field, value in response[data_key][label].items():
+                expected = float(value)
+                error = abs(float(local[label][field]) - expected) / max(abs(expected), 1.0)
+                worst = max(worst, error)
+        status = "ok" if worst <= tolerance else "FAIL"
+        failures += status == "FAIL"
+        print("{:<8} compared={:<6} max_relative_error={:.2e} {}".format(
+            name, len(labels), worst, status))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--recorded", help="directory with recorded api responses")
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    args = parser.parse_args()
+    throughput(args.points)
+    if args.recorded:
+        raise SystemExit(validate(args.recorded, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
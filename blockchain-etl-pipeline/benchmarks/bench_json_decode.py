@@ -0,0 +1,60 @@
+"""Benchmark of the json decoding of large 'full' responses.
+
+Compares requests.Response.json(), which decodes the body to text first
+(after guessing its charset when the server does not declare one), with the
+transport decoder. The decoder only parses faster when orjson is installed,
+without it the standard library runs at the requests declared speed. All of
+them must produce the same document.
+
+    python benchmarks/bench_json_decode.py [--fixtures DIR] [--repeat N]
+"""
+import argparse
+import json
+import timeit
+
+import fixtures
+
+import requests
+
+from alpha_vantage import transport
+
+FIXTURES = ["daily_full", "intraday_full", "fx_daily_full", "sma_daily", "news_sentiment"]
+
+
+def response(body, content_type):
+    """A requests.Response as read from the network, with body and headers"""
+    result = requests.Response()
+    result.status_code = 200
+    result._content = body
+    if content_type:
+        result.headers["Content-Type"] = content_type
+    result.encoding = requests.utils.get_encoding_from_headers(result.headers)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", help="directory with recorded <name>.json responses")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("transport decoder: {}".format("orjson" if transport._ORJSON_FOUND else "json"))
+    for name in FIXTURES:
+        payload, _ = fixtures.load(name, args.fixtures)
+        body = json.dumps(payload, indent=4).encode("utf-8")
+        megabytes = len(body) / 1e6
+        decoders = [
+            ("requests declared", lambda: response(body, "application/json").json()),
+            ("requests undeclared", lambda: response(body, None).json()),
+            ("transport", lambda: transport.loads(body)),
+        ]
+        results = []
+        for label, decode in decoders:
+            assert decode() == payload, label
+            seconds = min(timeit.repeat(decode, number=1, repeat=args.repeat))
+            results.append("{}={:7.1f} MB/s".format(label, megabytes / seconds))
+        print("{:<16} {:>7.2f} MB  {}".format(name, megabytes, "  ".join(results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark of the pandas conversion done by AlphaVantage._output_format.
+
+Compares the previous DataFrame.from_dict + pandas.to_datetime conversion
+with the column wise path on 'full' fixtures and checks both produce
+identical frames.
+
+    python benchmarks/bench_output_format.py [--fixtures DIR] [--repeat N]
+"""
+import argparse
+import timeit
+
+import fixtures
+
+import pandas
+from alpha_vantage.timeseries import TimeSeries
+
+
+def previous_conversion(data):
+    frame = pandas.DataFrame.from_dict(data, orient="index", dtype="float")
+    frame.index.name = "date"
+    frame.index = pandas.to_datetime(frame.index)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", help="directory with recorded <name>.json responses")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name in ("daily_full", "intraday_full"):
+        payload, data_key = fixtures.load(name, args.fixtures)
+        client = TimeSeries(key="benchmark", output_format="pandas")
+        client_f32 = TimeSeries(key="benchmark", output_format="pandas", float_dtype="float32")
+        wrapped = TimeSeries._output_format(lambda self: (payload, data_key, "Meta Data"))
+        data = payload[data_key]
+
+        current, _ = wrapped(client)
+        pandas.testing.assert_frame_equal(previous_conversion(data), current)
+
+        before = min(timeit.repeat(lambda: previous_conversion(data), number=1, repeat=args.repeat))
+        after = min(timeit.repeat(lambda: wrapped(client), number=1, repeat=args.repeat))
+        after_f32 = min(timeit.repeat(lambda: wrapped(client_f32), number=1, repeat=args.repeat))
+        print("{:<14} rows={:<6} from_dict={:8.2f} ms  columns={:8.2f} ms  "
+              "float32={:8.2f} ms  speedup={:.1f}x".format(
+                  name, len(data), before * 1e3, after * 1e3, after_f32 * 1e3, before / after))
+
+
+if __name__ == "__main__":
+    main()
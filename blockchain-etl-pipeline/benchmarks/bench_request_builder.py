@@ -0,0 +1,100 @@
+"""Benchmark of the per call overhead of _call_api_on_func.
+
+Runs an indicator heavy workload (a batch of TechIndicators calls per
+symbol) through the previous decorator, which walked the argspec and
+concatenated the url on every call, and through the precompiled request
+builder. The api call is replaced by an empty response, so only argument
+handling and url building are measured. Both must produce the same
+parameters.
+
+    python benchmarks/bench_request_builder.py [--repeat N] [--symbols N]
+"""
+import argparse
+import inspect
+import timeit
+from functools import wraps
+from urllib.parse import parse_qsl, urlsplit
+
+import fixtures  # noqa: F401, puts the alpha_vantage layer on the path
+
+from alpha_vantage.alphavantage import AlphaVantage
+from alpha_vantage.techindicators import TechIndicators
+
+WORKLOAD = [
+    ("get_sma", {"interval": "daily", "time_period": 20}),
+    ("get_ema", {"interval": "daily", "time_period": 50}),
+    ("get_rsi", {"interval": "60min", "time_period": 14}),
+    ("get_macd", {"interval": "daily", "fastperiod": 12, "slowperiod": 26}),
+    ("get_bbands", {"interval": "daily", "time_period": 20, "nbdevup": 2, "matype": "EMA"}),
+    ("get_stoch", {"interval": "daily", "slowkmatype": "SMA", "slowdmatype": 1}),
+    ("get_adx", {"interval": "weekly", "time_period": 14}),
+    ("get_atr", {"interval": "daily", "time_period": 14}),
+]
+
+
+def previous_call_api_on_func(func):
+    """The decorator before the request builder, without the network call"""
+    argspec = inspect.getfullargspec(func)
+    positional_count = len(argspec.args) - len(argspec.defaults)
+    defaults = dict(zip(argspec.args[positional_count:], argspec.defaults))
+
+    @wraps(func)
+    def _call_wrapper(self, *args, **kwargs):
+        used_kwargs = kwargs.copy()
+        used_kwargs.update(zip(argspec.args[positional_count:], args[positional_count:]))
+        used_kwargs.update({k: used_kwargs.get(k, d) for k, d in defaults.items()})
+        function_name, data_key, meta_data_key = func(self, *args, **kwargs)
+        base_url = AlphaVantage._RAPIDAPI_URL if self.rapidapi else AlphaVantage._ALPHA_VANTAGE_API_URL
+        url = "{}function={}".format(base_url, function_name)
+        for idx, arg_name in enumerate(argspec.args[1:]):
+            try:
+                arg_value = args[idx]
+            except IndexError:
+                arg_value = used_kwargs[arg_name]
+            if 'matype' in arg_name and arg_value:
+                arg_value = self.map_to_matype(arg_value)
+            if arg_value:
+                if isinstance(arg_value, tuple) or isinstance(arg_value, list):
+                    arg_value = ','.join(arg_value)
+                url = '{}&{}={}'.format(url, arg_name, arg_value)
+        oformat = self.output_format.lower()
+        url = '{}&apikey={}'.format(url, self.key)
+        if self._append_type:
+            url = '{}&datatype={}'.format(url, oformat)
+        return self._handle_api_call(url), data_key, meta_data_key
+    return _call_wrapper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--symbols", type=int, default=50)
+    args = parser.parse_args()
+
+    client = TechIndicators(key="benchmark")
+    urls = []
+    client._handle_api_call = lambda url, function_name=None: urls.append(url) or {}
+    symbols = ["SYM{}".format(number) for number in range(args.symbols)]
+    current = [(getattr(TechIndicators, name).__wrapped__, kwargs) for name, kwargs in WORKLOAD]
+    previous = [(previous_call_api_on_func(call.__wrapped__), kwargs) for call, kwargs in current]
+
+    def run(calls):
+        for symbol in symbols:
+            for call, kwargs in calls:
+                call(client, symbol, **kwargs)
+
+    run(previous)
+    run(current)
+    half = len(urls) // 2
+    for before, after in zip(urls[:half], urls[half:]):
+        assert parse_qsl(urlsplit(before).query) == parse_qsl(urlsplit(after).query), (before, after)
+
+    count = len(symbols) * len(WORKLOAD)
+    before = min(timeit.repeat(lambda: run(previous), number=1, repeat=args.repeat)) / count
+    after = min(timeit.repeat(lambda: run(current), number=1, repeat=args.repeat)) / count
+    print("indicator calls={:<6} argspec walk={:8.0f} ns/call  request builder={:8.0f} ns/call  "
+          "speedup={:.1f}x".format(count, before * 1e9, after * 1e9, before / after))
+
+
+if __name__ == "__main__":
+    main()
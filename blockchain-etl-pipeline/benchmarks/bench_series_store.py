@@ -0,0 +1,86 @@
+"""Benchmark of SeriesStore range reads against re-fetching the series.
+
+A local http server plays the api and serves the 'full' fixtures. The
+re-fetch goes through TimeSeries with output_format='columnar' and slices
+the range out of the response, the store maps its files and bisects the
+range. Both results are checked to be identical.
+
+    python benchmarks/bench_series_store.py [--fixtures DIR] [--repeat N] [--points N]
+"""
+import argparse
+import http.server
+import json
+import shutil
+import tempfile
+import threading
+import timeit
+
+import fixtures
+
+from alpha_vantage.alphavantage import AlphaVantage
+from alpha_vantage.seriesstore import SeriesStore
+from alpha_vantage.timeseries import TimeSeries
+
+
+def serve(body):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", help="directory with recorded <name>.json responses")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--points", type=int, default=250, help="points in the range read")
+    args = parser.parse_args()
+
+    payload, data_key = fixtures.load("daily_full", args.fixtures)
+    server = serve(json.dumps(payload).encode("utf-8"))
+    AlphaVantage._ALPHA_VANTAGE_API_URL = "http://127.0.0.1:{}/query?".format(server.server_port)
+    root = tempfile.mkdtemp()
+    try:
+        client = TimeSeries(key="benchmark", output_format="columnar")
+        store = SeriesStore(root)
+        key = ("TIME_SERIES_DAILY", "IBM", None)
+        store.merge(key, payload[data_key], payload["Meta Data"], complete=True)
+
+        everything = store.read(key)
+        start = int(everything.index[len(everything) // 2])
+        end = int(everything.index[len(everything) // 2 + args.points - 1])
+
+        def refetch():
+            frame, _ = client.get_daily("IBM", outputsize="full")
+            return frame.between(start, end)
+
+        def range_read():
+            return store.read(key, start, end)
+
+        fetched, stored = refetch(), range_read()
+        assert list(fetched.index) == list(stored.index)
+        for name in fetched.column_names:
+            assert list(fetched[name]) == list(stored[name]), name
+
+        before = min(timeit.repeat(refetch, number=1, repeat=args.repeat))
+        after = min(timeit.repeat(range_read, number=1, repeat=args.repeat))
+        print("daily_full     rows={:<6} range={:<5} re-fetch={:8.2f} ms  "
+              "store={:8.3f} ms  speedup={:.0f}x".format(
+                  len(everything), len(stored), before * 1e3, after * 1e3, before / after))
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
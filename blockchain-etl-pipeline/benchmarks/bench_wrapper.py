@@ -0,0 +1,190 @@
+"""Benchmark suite of the alpha_vantage wrapper internals.
+
+For every endpoint family (time series, FX, crypto, indicators,
+fundamentals, news sentiment) it measures over the fixtures:
+
+* url_ns: ns per call of _call_api_on_func (argument merging, url building,
+  matype mapping), with the api call itself replaced by the decoded fixture
+* decode_mb_s: json decoding throughput of the response body
+* format_json_us: us per call of _output_format in json mode, which picks
+  the data out of the decoded response without going through its bytes
+* format_pandas_mb_s: _output_format throughput in pandas mode
+* call_alloc_blocks: number of memory blocks allocated by one whole call
+  (transport, decoding and json formatting) and held by its result, counted
+  with tracemalloc
+* call_ms: duration of one whole call
+
+Results can be saved as JSON and compared with a previous run, the exit
+status is 1 when a metric regressed by more than the threshold.
+
+    python benchmarks/bench_wrapper.py [--fixtures DIR] [--repeat N]
+        [--output results.json] [--compare baseline.json] [--threshold 0.1]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+import fixtures
+
+from alpha_vantage.alphaintelligence import AlphaIntelligence
+from alpha_vantage.cryptocurrencies import CryptoCurrencies
+from alpha_vantage.foreignexchange import ForeignExchange
+from alpha_vantage.fundamentaldata import FundamentalData
+from alpha_vantage.techindicators import TechIndicators
+from alpha_vantage.timeseries import TimeSeries
+from alpha_vantage.transport import TransportResponse
+
+try:
+    import pandas
+    _PANDAS_FOUND = True
+except ImportError:
+    _PANDAS_FOUND = False
+
+# family, fixture, client class, method, positional and keyword arguments
+ENDPOINTS = [
+    ("time_series", "daily_full", TimeSeries, "get_daily", ("IBM",), {"outputsize": "full"}),
+    ("time_series", "intraday_full", TimeSeries, "get_intraday", ("IBM",),
+     {"interval": "1min", "outputsize": "full", "month": "2024-12"}),
+    ("fx", "fx_daily_full", ForeignExchange, "get_currency_exchange_daily", ("EUR", "USD"),
+     {"outputsize": "full"}),
+    ("crypto", "crypto_daily", CryptoCurrencies, "get_digital_currency_daily", ("BTC", "EUR"), {}),
+    ("indicators", "sma_daily", TechIndicators, "get_sma", ("IBM",), {"time_period": 20}),
+    ("indicators", "bbands_daily", TechIndicators, "get_bbands", ("IBM",),
+     {"time_period": 20, "nbdevup": 2, "nbdevdn": 2, "matype": "EMA"}),
+    ("fundamentals", "income_statement", FundamentalData, "get_income_statement_quarterly",
+     ("IBM",), {}),
+    ("news", "news_sentiment", AlphaIntelligence, "get_news_sentiment", (),
+     {"tickers": ["IBM", "AAPL"], "limit": 1000}),
+]
+
+# Metrics where a smaller value is better, the others are throughputs
+LOWER_IS_BETTER = {"url_ns", "format_json_us", "call_alloc_blocks", "call_ms"}
+
+
+class CannedTransport(object):
+    """Transport answering every request with the same body"""
+
+    def __init__(self, body):
+        self.response = TransportResponse(200, body, {"Content-Type": "application/json"})
+
+    def get(self, url, headers=None, proxy=None):
+        return self.response
+
+
+def best(function, repeat, number=1):
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def measure(fixture, cls, method, args, kwargs, payload, repeat):
+    body = json.dumps(payload).encode("utf-8")
+    megabytes = len(body) / 1e6
+    result = {"bytes": len(body)}
+
+    # Argument handling and url building only, the decorated call is the
+    # function wrapped by _output_format
+    client = cls(key="benchmark")
+    client._handle_api_call = lambda url, function_name=None: payload
+    call_api = getattr(cls, method).__wrapped__
+    result["url_ns"] = best(lambda: call_api(client, *args, **kwargs), repeat, 2000) * 1e9
+
+    result["decode_mb_s"] = megabytes / best(lambda: json.loads(body), repeat)
+
+    _, data_key, meta_data_key = call_api(client, *args, **kwargs)
+    wrapped = cls._output_format(lambda self: (payload, data_key, meta_data_key))
+    json_formatter = cls(key="benchmark", output_format="json")
+    result["format_json_us"] = best(lambda: wrapped(json_formatter), repeat, 100) * 1e6
+    if _PANDAS_FOUND:
+        pandas_formatter = cls(key="benchmark", output_format="pandas")
+        result["format_pandas_mb_s"] = megabytes / best(lambda: wrapped(pandas_formatter), repeat)
+
+    # One whole call through a transport answering from memory
+    caller = cls(key="benchmark", transport=CannedTransport(body))
+    bound = getattr(caller, method)
+    result["call_ms"] = best(lambda: bound(*args, **kwargs), repeat) * 1e3
+    # The call is warm, so the blocks still allocated when it returns are the
+    # ones of its result
+    tracemalloc.start()
+    try:
+        response = bound(*args, **kwargs)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    result["call_alloc_blocks"] = sum(stat.count for stat in snapshot.statistics("filename"))
+    del response
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Print the change of every metric against the baseline and return the
+    regressions beyond threshold"""
+    regressions = []
+    for name, metrics in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, value in metrics.items():
+            before = previous.get(metric)
+            if metric == "bytes" or not before:
+                continue
+            change = value / before - 1
+            worse = change > threshold if metric in LOWER_IS_BETTER else change < -threshold
+            print("{:<18} {:<20} {:>12.2f} -> {:>12.2f}  {:+7.1%}{}".format(
+                name, metric, before, value, change, "  REGRESSION" if worse else ""))
+            if worse:
+                regressions.append((name, metric))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="directory with recorded <name>.json responses")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", help="endpoint family to run, repeatable")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change reported as regression (default 0.1)")
+    args = parser.parse_args()
+
+    results = {}
+    for family, fixture, cls, method, call_args, call_kwargs in ENDPOINTS:
+        if args.only and family not in args.only:
+            continue
+        payload, _ = fixtures.load(fixture, args.fixtures)
+        result = measure(fixture, cls, method, call_args, call_kwargs, payload, args.repeat)
+        results[fixture] = dict(result, family=family)
+        print("{:<12} {:<18} {:>7.0f} KiB  url={:>8.0f} ns  decode={:>7.1f} MB/s  "
+              "json={:>9.2f} us  pandas={:>7} MB/s  call={:>7.2f} ms  alloc={:>8} blocks".format(
+                  family, fixture, result["bytes"] / 1024, result["url_ns"], result["decode_mb_s"],
+                  result["format_json_us"],
+                  "{:.1f}".format(result["format_pandas_mb_s"]) if "format_pandas_mb_s" in result
+                  else "-", result["call_ms"], result["call_alloc_blocks"]))
+
+    document = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pandas.__version__ if _PANDAS_FOUND else None,
+            "timestamp": int(time.time()),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(document, output, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as previous:
+            baseline = json.load(previous)["results"]
+        metrics = {name: {metric: value for metric, value in result.items() if metric != "family"}
+                   for name, result in results.items()}
+        if compare(metrics, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
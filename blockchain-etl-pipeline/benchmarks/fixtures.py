@@ -0,0 +1,255 @@
+"""Alpha Vantage payload fixtures for the benchmarks.
+
+Recorded responses are read from a directory of ``<name>.json`` files when
+one is given (``--fixtures``), otherwise deterministic synthetic payloads
+with the same shape as the api 'full' responses are generated.
+"""
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+LAYER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "Layers", "alpha_vantage_layer", "python")
+if LAYER_PATH not in sys.path:
+    sys.path.insert(0, LAYER_PATH)
+
+
+def _ohlcv(rng, price):
+    open_ = price * (1 + rng.uniform(-0.01, 0.01))
+    high = max(open_, price) * (1 + rng.uniform(0, 0.01))
+    low = min(open_, price) * (1 - rng.uniform(0, 0.01))
+    return {
+        "1. open": "{:.4f}".format(open_),
+        "2. high": "{:.4f}".format(high),
+        "3. low": "{:.4f}".format(low),
+        "4. close": "{:.4f}".format(price),
+        "5. volume": str(rng.randint(1000, 5000000)),
+    }
+
+
+def daily_full(symbol="IBM", points=6000, seed=1):
+    """TIME_SERIES_DAILY outputsize=full, roughly 24 years of data"""
+    rng = random.Random(seed)
+    day = datetime(2024, 12, 31)
+    price = 100.0
+    series = {}
+    while len(series) < points:
+        if day.weekday() < 5:
+            price *= 1 + rng.gauss(0, 0.01)
+            series[day.strftime("%Y-%m-%d")] = _ohlcv(rng, price)
+        day -= timedelta(days=1)
+    return {
+        "Meta Data": {
+            "1. Information": "Daily Prices (open, high, low, close) and Volumes",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": next(iter(series)),
+            "4. Output Size": "Full size",
+            "5. Time Zone": "US/Eastern",
+        },
+        "Time Series (Daily)": series,
+    }
+
+
+def intraday_full(symbol="IBM", interval="1min", points=20000, seed=2):
+    """TIME_SERIES_INTRADAY outputsize=full for one month slice"""
+    rng = random.Random(seed)
+    step = timedelta(minutes=int(interval.replace("min", "")))
+    stamp = datetime(2024, 12, 31, 20, 0)
+    price = 100.0
+    series = {}
+    for _ in range(points):
+        price *= 1 + rng.gauss(0, 0.001)
+        series[stamp.strftime("%Y-%m-%d %H:%M:%S")] = _ohlcv(rng, price)
+        stamp -= step
+    return {
+        "Meta Data": {
+            "1. Information": "Intraday ({}) open, high, low, close prices and volume".format(interval),
+            "2. Symbol": symbol,
+            "3. Last Refreshed": next(iter(series)),
+            "4. Interval": interval,
+            "5. Output Size": "Full size",
+            "6. Time Zone": "US/Eastern",
+        },
+        "Time Series ({})".format(interval): series,
+    }
+
+
+def _business_days(points, day=datetime(2024, 12, 31)):
+    while points:
+        if day.weekday() < 5:
+            yield day
+            points -= 1
+        day -= timedelta(days=1)
+
+
+def fx_daily_full(from_symbol="EUR", to_symbol="USD", points=5000, seed=3):
+    """FX_DAILY outputsize=full"""
+    rng = random.Random(seed)
+    price = 1.1
+    series = {}
+    for day in _business_days(points):
+        price *= 1 + rng.gauss(0, 0.004)
+        bar = _ohlcv(rng, price)
+        del bar["5. volume"]
+        series[day.strftime("%Y-%m-%d")] = {name: "{:.5f}".format(float(value))
+                                            for name, value in bar.items()}
+    return {
+        "Meta Data": {
+            "1. Information": "Forex Daily Prices (open, high, low, close)",
+            "2. From Symbol": from_symbol,
+            "3. To Symbol": to_symbol,
+            "4. Output Size": "Full size",
+            "5. Last Refreshed": next(iter(series)),
+            "6. Time Zone": "UTC",
+        },
+        "Time Series FX (Daily)": series,
+    }
+
+
+def crypto_daily(symbol="BTC", market="EUR", points=1000, seed=4):
+    """DIGITAL_CURRENCY_DAILY, its whole history is always returned"""
+    rng = random.Random(seed)
+    day = datetime(2024, 12, 31)
+    price = 40000.0
+    series = {}
+    for _ in range(points):
+        price *= 1 + rng.gauss(0, 0.03)
+        bar = _ohlcv(rng, price)
+        bar["5. volume"] = "{:.8f}".format(rng.uniform(100, 5000))
+        series[day.strftime("%Y-%m-%d")] = bar
+        day -= timedelta(days=1)
+    return {
+        "Meta Data": {
+            "1. Information": "Daily Prices and Volumes for Digital Currency",
+            "2. Digital Currency Code": symbol,
+            "3. Digital Currency Name": "Bitcoin",
+            "4. Market Code": market,
+            "5. Market Name": "Euro",
+            "6. Last Refreshed": next(iter(series)),
+            "7. Time Zone": "UTC",
+        },
+        "Time Series (Digital Currency Daily)": series,
+    }
+
+
+def _indicator(function, outputs, points, seed, **parameters):
+    rng = random.Random(seed)
+    value = 100.0
+    series = {}
+    for day in _business_days(points):
+        value *= 1 + rng.gauss(0, 0.005)
+        series[day.strftime("%Y-%m-%d")] = {
+            name: "{:.4f}".format(value * (1 + offset))
+            for name, offset in outputs}
+    meta = {"1: Symbol": "IBM", "2: Indicator": function,
+            "3: Last Refreshed": next(iter(series)), "4: Interval": "daily"}
+    for position, (name, value) in enumerate(parameters.items(), 5):
+        meta["{}: {}".format(position, name)] = value
+    meta["{}: Time Zone".format(len(meta) + 1)] = "US/Eastern"
+    return {"Meta Data": meta, "Technical Analysis: " + function: series}
+
+
+def sma_daily(points=6000, seed=5):
+    """SMA on daily closes, time_period=20"""
+    return _indicator("SMA", [("SMA", 0.0)], points, seed,
+                      **{"Time Period": 20, "Series Type": "close"})
+
+
+def bbands_daily(points=6000, seed=6):
+    """BBANDS on daily closes, three bands per point"""
+    return _indicator("BBANDS", [("Real Upper Band", 0.04), ("Real Middle Band", 0.0),
+                                 ("Real Lower Band", -0.04)], points, seed,
+                      **{"Time Period": 20, "Deviation multiplier for upper band": 2,
+                         "Deviation multiplier for lower band": 2, "MA Type": 1,
+                         "Series Type": "close"})
+
+
+def income_statement(symbol="IBM", quarters=80, seed=7):
+    """INCOME_STATEMENT, 20 years of quarterly and annual reports"""
+    rng = random.Random(seed)
+    fields = ["grossProfit", "totalRevenue", "costOfRevenue", "costofGoodsAndServicesSold",
+              "operatingIncome", "sellingGeneralAndAdministrative", "researchAndDevelopment",
+              "operatingExpenses", "investmentIncomeNet", "netInterestIncome", "interestIncome",
+              "interestExpense", "nonInterestIncome", "otherNonOperatingIncome", "depreciation",
+              "depreciationAndAmortization", "incomeBeforeTax", "incomeTaxExpense",
+              "interestAndDebtExpense", "netIncomeFromContinuingOperations",
+              "comprehensiveIncomeNetOfTax", "ebit", "ebitda", "netIncome"]
+
+    def report(day):
+        row = {"fiscalDateEnding": day.strftime("%Y-%m-%d"), "reportedCurrency": "USD"}
+        for field in fields:
+            row[field] = "None" if rng.random() < 0.03 else str(rng.randint(10 ** 7, 10 ** 10))
+        return row
+
+    quarter_ends = [datetime(2024 - q // 4, 12 - 3 * (q % 4), 30 if q % 4 in (1, 2) else 31)
+                    for q in range(quarters)]
+    return {
+        "symbol": symbol,
+        "annualReports": [report(day) for day in quarter_ends[::4]],
+        "quarterlyReports": [report(day) for day in quarter_ends],
+    }
+
+
+def news_sentiment(articles=1000, seed=8):
+    """NEWS_SENTIMENT with limit=1000"""
+    rng = random.Random(seed)
+    tickers = ["IBM", "AAPL", "MSFT", "CRYPTO:BTC", "FOREX:EUR", "NVDA", "AMZN"]
+    stamp = datetime(2024, 12, 31, 20, 0)
+    feed = []
+    for number in range(articles):
+        stamp -= timedelta(minutes=rng.randint(1, 30))
+        score = rng.uniform(-1, 1)
+        feed.append({
+            "title": "Market update number {}".format(number),
+            "url": "https://news.example.com/articles/{}".format(number),
+            "time_published": stamp.strftime("%Y%m%dT%H%M%S"),
+            "authors": ["Author {}".format(rng.randint(1, 50))],
+            "summary": "Synthetic summary of the article. " * rng.randint(2, 8),
+            "banner_image": "https://news.example.com/images/{}.jpg".format(number),
+            "source": "Example News",
+            "category_within_source": "n/a",
+            "source_domain": "news.example.com",
+            "topics": [{"topic": "Technology", "relevance_score": "{:.6f}".format(rng.random())}],
+            "overall_sentiment_score": round(score, 6),
+            "overall_sentiment_label": "Bullish" if score > 0.35 else "Bearish" if score < -0.35 else "Neutral",
+            "ticker_sentiment": [{
+                "ticker": ticker,
+                "relevance_score": "{:.6f}".format(rng.random()),
+                "ticker_sentiment_score": "{:.6f}".format(rng.uniform(-1, 1)),
+                "ticker_sentiment_label": "Neutral",
+            } for ticker in rng.sample(tickers, rng.randint(1, 4))],
+        })
+    return {
+        "items": str(len(feed)),
+        "sentiment_score_definition": "x <= -0.35: Bearish; -0.35 < x <= -0.15: Somewhat-Bearish; "
+                                      "-0.15 < x < 0.15: Neutral; 0.15 <= x < 0.35: Somewhat_Bullish; "
+                                      "x >= 0.35: Bullish",
+        "relevance_score_definition": "0 < x <= 1, with a higher score indicating higher relevance.",
+        "feed": feed,
+    }
+
+
+GENERATORS = {
+    "daily_full": (daily_full, "Time Series (Daily)"),
+    "intraday_full": (intraday_full, "Time Series (1min)"),
+    "fx_daily_full": (fx_daily_full, "Time Series FX (Daily)"),
+    "crypto_daily": (crypto_daily, "Time Series (Digital Currency Daily)"),
+    "sma_daily": (sma_daily, "Technical Analysis: SMA"),
+    "bbands_daily": (bbands_daily, "Technical Analysis: BBANDS"),
+    "income_statement": (income_statement, "quarterlyReports"),
+    "news_sentiment": (news_sentiment, "feed"),
+}
+
+
+def load(name, fixtures_dir=None):
+    """Return the (payload, data_key) fixture called name"""
+    generator, data_key = GENERATORS[name]
+    if fixtures_dir:
+        path = os.path.join(fixtures_dir, name + ".json")
+        if os.path.exists(path):
+            with open(path, "rb") as fixture:
+                return json.load(fixture), data_key
+    return generator(), data_key
@@ -19,6 +19,7 @@ from decouple import config
 LAMBDA_RUNTIME = config("LAMBDA_RUNTIME", default="python3.9")
 LAMBDA_CONSUMER_NAME = config("LAMBDA_CONSUMER_NAME")
 DYNAMODB_TABLE_NAME = config("DYNAMODB_TABLE_NAME" , default="crypto-table-blockchain")
+INDICATOR_TABLE_NAME = config("INDICATOR_TABLE_NAME", default="crypto-indicator-state")
 INTRADAY_STREAM_NAME = config("INTRADAY_STREAM_NAME")
 #STREAM_ARN = config("STREAM_ARN")
 STREAM_ARN="arn:aws:kinesis:eu-central-1:327625635979:stream/" + INTRADAY_STREAM_NAME
@@ -26,6 +27,7 @@ STREAM_ARN="arn:aws:kinesis:eu-central-1:327625635979:stream/" + INTRADAY_STREAM
 
 ENVIRONMENT = {
     "DYNAMODB_TABLE_NAME": DYNAMODB_TABLE_NAME,
+    "INDICATOR_TABLE_NAME": INDICATOR_TABLE_NAME,
 }
 
 #  DataConsumerStack is a CDK stack that deploys a Lambda function to consume data from a Kinesis stream
@@ -48,6 +50,17 @@ class DataConsumerStack(Stack):
             
         )
 
+        # The live indicator state of every ticker, one item per ticker, kept
+        # apart from the ticks so queries on a ticker only return ticks
+        indicator_table = dynamodb_.Table(
+            self,
+            "DynamoDBIndicatorStateTable",
+            table_name=INDICATOR_TABLE_NAME,
+            partition_key=dynamodb_.Attribute(
+                name="ticker",
+                type=dynamodb_.AttributeType.STRING),
+        )
+
   # Now we need IAM role for the Lambda consumer function after we create the DynamoDB table
         lambda_consumer_role = iam.Role(
             self,
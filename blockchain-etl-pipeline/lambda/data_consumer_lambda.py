@@ -5,17 +5,64 @@ import logging
 import base64
 from decimal import Decimal
 from datetime import datetime
+from streaming_indicators import IndicatorSet, EMA, SMA, RSI, MACD, BollingerBands
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Get the DynamoDB table name from environment variables
+# Get the DynamoDB table names from environment variables
 TABLE_NAME = os.environ["DYNAMODB_TABLE_NAME"]
+INDICATOR_TABLE_NAME = os.environ["INDICATOR_TABLE_NAME"]
 
-# Initialize DynamoDB resource and connect to the specified table
+# Initialize DynamoDB resource and connect to the specified tables
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(TABLE_NAME)
+# Live indicator state is stored per ticker in its own table, so queries on
+# the ticks never return it
+indicator_table = dynamodb.Table(INDICATOR_TABLE_NAME)
+
+def new_indicator_set():
+    return IndicatorSet({
+        "ema_12": EMA(12),
+        "ema_26": EMA(26),
+        "sma_20": SMA(20),
+        "rsi_14": RSI(14),
+        "macd": MACD(),
+        "bbands_20": BollingerBands(20),
+    })
+
+# Restore the indicator state of a ticker, with the last tick it has seen
+def load_indicator_state(ticker):
+    response = indicator_table.get_item(
+        Key={"ticker": ticker},
+        ConsistentRead=True,
+    )
+    item = response.get("Item")
+    if not item:
+        return new_indicator_set(), ""
+    return IndicatorSet.from_bytes(item["state"].value), item.get("last_refreshed", "")
+
+def save_indicator_state(ticker, indicators, last_refreshed):
+    indicator_table.put_item(Item={
+        "ticker": ticker,
+        "state": indicators.to_bytes(),
+        "last_refreshed": last_refreshed,
+    })
+
+# Feed a tick to the ticker indicators and return their values, ready for DynamoDB.
+# Ticks that are not newer than the last one seen (re-fetched quotes, Kinesis
+# retries) leave the state untouched. A quote has no high and low of a bar
+# (bid and ask only give the spread), so only close based indicators are kept.
+def update_indicators(states, data):
+    ticker = data["ticker"]
+    if ticker not in states:
+        states[ticker] = load_indicator_state(ticker)
+    indicators, last_refreshed = states[ticker]
+    if data.get("last_refreshed", "") > last_refreshed:
+        indicators.update(float(data["exchange_rate"]))
+        states[ticker] = (indicators, data["last_refreshed"])
+    return {name: Decimal(str(round(value, 8))) for name, value in indicators.values().items()}
 
 def handler(event, context):
     logger.info("Lambda function triggered")
@@ -29,6 +76,9 @@ def handler(event, context):
     except Exception as e:
         logger.error("Failed to get table info: %s", str(e))
     
+    # Indicator state of the tickers seen in this batch
+    indicator_states = {}
+
     # Process each record from the Kinesis stream
     for i, record in enumerate(event["Records"]):
         try:
@@ -50,6 +100,12 @@ def handler(event, context):
             data["ticker"] = data["from_currency_code"] + data["to_currency_code"]
             data["timestamp"] = datetime.utcnow().isoformat()
             
+            # Attach live indicator values computed from the ticks seen so far
+            try:
+                data["indicators"] = update_indicators(indicator_states, data)
+            except Exception as e:
+                logger.error("Failed to update indicators for %s: %s", data["ticker"], str(e))
+            
             # DEBUG: Log the final data structure before insertion
             logger.info("Final data prepared for DynamoDB: %s", data)
             logger.info("Final data keys: %s", list(data.keys()))
@@ -95,6 +151,13 @@ def handler(event, context):
             import traceback
             logger.error("Full traceback: %s", traceback.format_exc())
     
+    # Persist the indicator state so the next batch continues where this one stopped
+    for ticker, (indicators, last_refreshed) in indicator_states.items():
+        try:
+            save_indicator_state(ticker, indicators, last_refreshed)
+        except Exception as e:
+            logger.error("Failed to save indicator state for %s: %s", ticker, str(e))
+    
     return {
         'statusCode': 200,
         'body': json.dumps('Processing completed')
@@ -1,5 +1,7 @@
 import os 
 from alpha_vantage.foreignexchange import ForeignExchange
+from alpha_vantage.instrumentation import EmfExporter, MetricsCollector
+from alpha_vantage.transport import ReplayTransport
 from datetime import datetime
 import boto3
 import json
@@ -9,6 +11,21 @@ import math
 API_KEY = os.environ["API_KEY"]
 INTRADAY_STREAM_NAME = os.environ["INTRADAY_STREAM_NAME"]
 BATCH_LIMIT = 500  
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "BlockchainEtl/AlphaVantage")
+
+# Alpha Vantage call metrics, printed and reset at the end of every invocation
+# as CloudWatch Embedded Metric Format lines
+METRICS = MetricsCollector()
+EMF_EXPORTER = EmfExporter(namespace=METRICS_NAMESPACE,
+                           dimensions={"Service": "data-producer"})
+
+# Load tests replay recorded Alpha Vantage responses instead of calling the api
+CASSETTE_DIR = os.environ.get("ALPHAVANTAGE_CASSETTE_DIR")
+TRANSPORT = ReplayTransport(
+    CASSETTE_DIR,
+    latency=float(os.environ.get("ALPHAVANTAGE_REPLAY_LATENCY", "0")),
+    error_rate=float(os.environ.get("ALPHAVANTAGE_REPLAY_ERROR_RATE", "0")),
+) if CASSETTE_DIR else None
 
 # mapping is needed for enviroment variables
 
@@ -57,7 +74,7 @@ def cleanup_data(dct: dict) -> None:
 
 # Get crypto data using Alpha Vantage API
 def get_crypto_data(from_currency, to_currency):
-    cc = ForeignExchange(API_KEY)
+    cc = ForeignExchange(API_KEY, hooks=[METRICS], transport=TRANSPORT)
     data, _ = cc.get_currency_exchange_rate(
         from_currency=from_currency, 
         to_currency=to_currency
@@ -88,7 +105,11 @@ def handler(event, context):
     assert "to_currency" in event.keys(), "Event must include key 'to_currency'"
     from_currency = event["from_currency"]
     to_currency = event["to_currency"]
-    response = handle_intraday_request(from_currency, to_currency)
+    try:
+        response = handle_intraday_request(from_currency, to_currency)
+    finally:
+        # stdout goes to CloudWatch Logs, which turns EMF lines into metrics
+        EMF_EXPORTER.export(METRICS)
     return response
 
 
@@ -0,0 +1,433 @@
+import math
+import struct
+from array import array
+
+# Streaming technical indicators: every update is O(1) in time and memory,
+# and the whole state packs into a compact byte blob so it can be stored in
+# DynamoDB between Lambda invocations.
+
+_HEADER = struct.Struct("<BB")  # indicator tag, state format version
+_VERSION = 1
+
+# tag -> indicator class, filled by the register decorator
+_REGISTRY = {}
+
+
+def register(cls):
+    _REGISTRY[cls.TAG] = cls
+    return cls
+
+
+def _optional(value):
+    # NaN marks a value that is not available yet in the packed state
+    return None if math.isnan(value) else value
+
+
+def _packed(value):
+    return float("nan") if value is None else value
+
+
+class Indicator:
+    """Base class: update() consumes one tick, values() returns the current
+    outputs (empty while warming up), to_bytes()/from_bytes() (de)serialize
+    the state."""
+
+    TAG = None
+
+    def update(self, close, high=None, low=None, volume=None):
+        raise NotImplementedError
+
+    def values(self):
+        raise NotImplementedError
+
+    def _state(self):
+        raise NotImplementedError
+
+    @classmethod
+    def _from_state(cls, payload):
+        raise NotImplementedError
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.TAG, _VERSION) + self._state()
+
+    @staticmethod
+    def from_bytes(blob: bytes) -> "Indicator":
+        tag, version = _HEADER.unpack_from(blob)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported indicator state version {version}")
+        return _REGISTRY[tag]._from_state(bytes(blob[_HEADER.size:]))
+
+
+@register
+class EMA(Indicator):
+    """Exponential moving average seeded with the simple average of the first
+    `period` values. `alpha` defaults to 2 / (period + 1), Wilder smoothing
+    uses 1 / period."""
+
+    TAG = 1
+    _STATE = struct.Struct("<IIddd")
+
+    def __init__(self, period, alpha=None):
+        self.period = period
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.count = 0
+        self.total = 0.0
+        self.value = None
+
+    def update(self, close, high=None, low=None, volume=None):
+        if self.value is None:
+            self.count += 1
+            self.total += close
+            if self.count == self.period:
+                self.value = self.total / self.period
+        else:
+            self.value += self.alpha * (close - self.value)
+        return self.value
+
+    def values(self):
+        return {} if self.value is None else {"": self.value}
+
+    def _state(self):
+        return self._STATE.pack(self.period, self.count, self.alpha, self.total, _packed(self.value))
+
+    @classmethod
+    def _from_state(cls, payload):
+        period, count, alpha, total, value = cls._STATE.unpack(payload)
+        ema = cls(period, alpha)
+        ema.count, ema.total, ema.value = count, total, _optional(value)
+        return ema
+
+
+class _Window:
+    """Ring buffer of the last `period` values with their running sum and sum
+    of squares. The sums are rebuilt from the buffer once per lap, which keeps
+    updates amortized O(1) while stopping floating point drift."""
+
+    _STATE = struct.Struct("<IIIdd")
+
+    def __init__(self, period):
+        self.period = period
+        self.buffer = array("d", [0.0] * period)
+        self.position = 0
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+    def push(self, value):
+        oldest = self.buffer[self.position]
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.period
+        if self.count < self.period:
+            self.count += 1
+            self.total += value
+            self.squares += value * value
+        elif self.position == 0:
+            self.total = math.fsum(self.buffer)
+            self.squares = math.fsum(v * v for v in self.buffer)
+        else:
+            self.total += value - oldest
+            self.squares += value * value - oldest * oldest
+
+    @property
+    def full(self):
+        return self.count == self.period
+
+    def to_bytes(self):
+        return self._STATE.pack(self.period, self.position, self.count, self.total,
+                                self.squares) + self.buffer.tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        period, position, count, total, squares = cls._STATE.unpack_from(payload)
+        window = cls(period)
+        window.buffer = array("d")
+        window.buffer.frombytes(payload[cls._STATE.size:cls._STATE.size + 8 * period])
+        window.position, window.count, window.total, window.squares = position, count, total, squares
+        return window
+
+
+@register
+class SMA(Indicator):
+    """Simple moving average over a ring buffer."""
+
+    TAG = 2
+
+    def __init__(self, period):
+        self.window = _Window(period)
+
+    def update(self, close, high=None, low=None, volume=None):
+        self.window.push(close)
+        return self.values().get("")
+
+    def values(self):
+        window = self.window
+        return {"": window.total / window.period} if window.full else {}
+
+    def _state(self):
+        return self.window.to_bytes()
+
+    @classmethod
+    def _from_state(cls, payload):
+        sma = cls.__new__(cls)
+        sma.window = _Window.from_bytes(payload)
+        return sma
+
+
+@register
+class RSI(Indicator):
+    """Relative strength index with Wilder smoothing of gains and losses."""
+
+    TAG = 3
+    _STATE = struct.Struct("<d")
+
+    def __init__(self, period=14):
+        self.previous = None
+        self.gains = EMA(period, alpha=1.0 / period)
+        self.losses = EMA(period, alpha=1.0 / period)
+
+    def update(self, close, high=None, low=None, volume=None):
+        if self.previous is not None:
+            change = close - self.previous
+            self.gains.update(max(change, 0.0))
+            self.losses.update(max(-change, 0.0))
+        self.previous = close
+        return self.values().get("")
+
+    def values(self):
+        gain, loss = self.gains.value, self.losses.value
+        if gain is None:
+            return {}
+        return {"": 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)}
+
+    def _state(self):
+        return _pack_parts(self._STATE.pack(_packed(self.previous)),
+                           self.gains.to_bytes(), self.losses.to_bytes())
+
+    @classmethod
+    def _from_state(cls, payload):
+        head, gains, losses = _unpack_parts(payload)
+        rsi = cls.__new__(cls)
+        rsi.previous = _optional(cls._STATE.unpack(head)[0])
+        rsi.gains, rsi.losses = Indicator.from_bytes(gains), Indicator.from_bytes(losses)
+        return rsi
+
+
+@register
+class MACD(Indicator):
+    """Moving average convergence/divergence with its signal line and
+    histogram."""
+
+    TAG = 4
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def update(self, close, high=None, low=None, volume=None):
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if fast is not None and slow is not None:
+            self.signal.update(fast - slow)
+        return self.values().get("")
+
+    def values(self):
+        if self.signal.value is None:
+            return {}
+        macd = self.fast.value - self.slow.value
+        return {"": macd, "_signal": self.signal.value, "_hist": macd - self.signal.value}
+
+    def _state(self):
+        return _pack_parts(self.fast.to_bytes(), self.slow.to_bytes(), self.signal.to_bytes())
+
+    @classmethod
+    def _from_state(cls, payload):
+        macd = cls.__new__(cls)
+        macd.fast, macd.slow, macd.signal = (Indicator.from_bytes(part) for part in _unpack_parts(payload))
+        return macd
+
+
+@register
+class BollingerBands(Indicator):
+    """Simple moving average with bands `deviations` population standard
+    deviations above and below."""
+
+    TAG = 5
+    _STATE = struct.Struct("<d")
+
+    def __init__(self, period=20, deviations=2.0):
+        self.deviations = deviations
+        self.window = _Window(period)
+
+    def update(self, close, high=None, low=None, volume=None):
+        self.window.push(close)
+        return self.values().get("_middle")
+
+    def values(self):
+        window = self.window
+        if not window.full:
+            return {}
+        mean = window.total / window.period
+        spread = self.deviations * math.sqrt(max(window.squares / window.period - mean * mean, 0.0))
+        return {"_upper": mean + spread, "_middle": mean, "_lower": mean - spread}
+
+    def _state(self):
+        return _pack_parts(self._STATE.pack(self.deviations), self.window.to_bytes())
+
+    @classmethod
+    def _from_state(cls, payload):
+        head, window = _unpack_parts(payload)
+        bands = cls.__new__(cls)
+        bands.deviations = cls._STATE.unpack(head)[0]
+        bands.window = _Window.from_bytes(window)
+        return bands
+
+
+@register
+class ATR(Indicator):
+    """Average true range with Wilder smoothing. Without high/low the close
+    is used for both."""
+
+    TAG = 6
+    _STATE = struct.Struct("<d")
+
+    def __init__(self, period=14):
+        self.previous_close = None
+        self.average = EMA(period, alpha=1.0 / period)
+
+    def update(self, close, high=None, low=None, volume=None):
+        high = close if high is None else high
+        low = close if low is None else low
+        if self.previous_close is not None:
+            self.average.update(max(high - low, abs(high - self.previous_close),
+                                    abs(low - self.previous_close)))
+        self.previous_close = close
+        return self.average.value
+
+    def values(self):
+        return self.average.values()
+
+    def _state(self):
+        return _pack_parts(self._STATE.pack(_packed(self.previous_close)), self.average.to_bytes())
+
+    @classmethod
+    def _from_state(cls, payload):
+        head, average = _unpack_parts(payload)
+        atr = cls.__new__(cls)
+        atr.previous_close = _optional(cls._STATE.unpack(head)[0])
+        atr.average = Indicator.from_bytes(average)
+        return atr
+
+
+@register
+class VWAP(Indicator):
+    """Volume weighted average price since the last reset(). Ticks without
+    volume are ignored."""
+
+    TAG = 7
+    _STATE = struct.Struct("<dd")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.weighted = 0.0
+        self.volume = 0.0
+
+    def update(self, close, high=None, low=None, volume=None):
+        if volume:
+            self.weighted += close * volume
+            self.volume += volume
+        return self.values().get("")
+
+    def values(self):
+        return {"": self.weighted / self.volume} if self.volume else {}
+
+    def _state(self):
+        return self._STATE.pack(self.weighted, self.volume)
+
+    @classmethod
+    def _from_state(cls, payload):
+        vwap = cls()
+        vwap.weighted, vwap.volume = cls._STATE.unpack(payload)
+        return vwap
+
+
+@register
+class OBV(Indicator):
+    """On balance volume."""
+
+    TAG = 8
+    _STATE = struct.Struct("<dd")
+
+    def __init__(self):
+        self.previous_close = None
+        self.value = 0.0
+
+    def update(self, close, high=None, low=None, volume=None):
+        volume = volume or 0.0
+        if self.previous_close is None or close > self.previous_close:
+            self.value += volume
+        elif close < self.previous_close:
+            self.value -= volume
+        self.previous_close = close
+        return self.value
+
+    def values(self):
+        return {} if self.previous_close is None else {"": self.value}
+
+    def _state(self):
+        return self._STATE.pack(_packed(self.previous_close), self.value)
+
+    @classmethod
+    def _from_state(cls, payload):
+        previous_close, value = cls._STATE.unpack(payload)
+        obv = cls()
+        obv.previous_close, obv.value = _optional(previous_close), value
+        return obv
+
+
+class IndicatorSet:
+    """Named indicators updated together from the same ticks, serialized as
+    one blob."""
+
+    def __init__(self, indicators: dict):
+        self.indicators = indicators
+
+    def update(self, close, high=None, low=None, volume=None) -> dict:
+        for indicator in self.indicators.values():
+            indicator.update(close, high, low, volume)
+        return self.values()
+
+    def values(self) -> dict:
+        result = {}
+        for name, indicator in self.indicators.items():
+            for suffix, value in indicator.values().items():
+                result[name + suffix] = value
+        return result
+
+    def to_bytes(self) -> bytes:
+        parts = []
+        for name, indicator in self.indicators.items():
+            parts.append(name.encode("utf-8"))
+            parts.append(indicator.to_bytes())
+        return _pack_parts(*parts)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "IndicatorSet":
+        parts = _unpack_parts(bytes(blob))
+        return cls({parts[i].decode("utf-8"): Indicator.from_bytes(parts[i + 1])
+                    for i in range(0, len(parts), 2)})
+
+
+def _pack_parts(*parts):
+    return b"".join(struct.pack("<I", len(part)) + part for part in parts)
+
+
+def _unpack_parts(payload):
+    parts, offset = [], 0
+    while offset < len(payload):
+        (size,) = struct.unpack_from("<I", payload, offset)
+        offset += 4
+        parts.append(payload[offset:offset + size])
+        offset += size
+    return parts
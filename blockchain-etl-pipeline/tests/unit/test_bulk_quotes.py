@@ -0,0 +1,101 @@
+import inspect
+import json
+import os
+import sys
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage import columnar  # noqa: E402
+from alpha_vantage.async_support.timeseries import TimeSeries as AsyncTimeSeries  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+from alpha_vantage.transport import TransportResponse  # noqa: E402
+
+SYMBOLS = ["S{:03}".format(number) for number in range(250)]
+
+
+class BulkTransport(object):
+    """Answers REALTIME_BULK_QUOTES with a quote of every symbol asked, except
+    the unknown ones"""
+
+    def __init__(self, unknown=()):
+        self.unknown = set(unknown)
+        self.symbols = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, proxy=None):
+        query = parse_qs(urlparse(url).query)
+        assert query["function"] == ["REALTIME_BULK_QUOTES"]
+        symbols = query["symbol"][0].split(",")
+        with self.lock:
+            self.symbols.append(symbols)
+        data = [{"symbol": symbol, "close": "{}.5".format(len(symbol))}
+                for symbol in symbols if symbol not in self.unknown]
+        return TransportResponse(200, json.dumps({"endpoint": "Realtime Bulk Quotes",
+                                                  "data": data}).encode())
+
+
+def client(output_format="json", **kwargs):
+    return TimeSeries("demo", output_format=output_format, transport=BulkTransport(**kwargs))
+
+
+def test_bulk_chunks_split_by_the_limit():
+    symbols, chunks = client()._bulk_chunks(SYMBOLS)
+
+    assert symbols == SYMBOLS
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert sum(chunks, []) == SYMBOLS
+
+
+def test_bulk_chunks_strip_and_drop_duplicates():
+    symbols, chunks = client()._bulk_chunks(" IBM,MSFT, ,IBM,AAPL ")
+
+    assert symbols == ["IBM", "MSFT", "AAPL"]
+    assert chunks == [["IBM", "MSFT", "AAPL"]]
+
+
+def test_bulk_chunks_reject_csv():
+    with pytest.raises(ValueError):
+        client("csv")._bulk_chunks(["IBM"])
+
+
+def test_merge_keeps_the_requested_order_and_lists_the_missing():
+    responses = [{"data": [{"symbol": "MSFT"}, {"symbol": "IBM"}]}, {"data": None},
+                 {"data": [{"symbol": "EXTRA"}]}]
+    data, meta_data = client()._merge_bulk_quotes(["IBM", "AAPL", "MSFT"], responses)
+
+    assert list(data) == ["IBM", "MSFT", "EXTRA"]
+    assert meta_data == {"requests": 3, "missing": ["AAPL"]}
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_get_bulk_quotes_asks_every_chunk(max_workers):
+    ts = client(unknown={"S007"})
+    data, meta_data = ts.get_bulk_quotes(SYMBOLS, max_workers=max_workers)
+
+    assert sorted(map(len, ts.transport.symbols)) == [50, 100, 100]
+    assert list(data) == [symbol for symbol in SYMBOLS if symbol != "S007"]
+    assert data["S001"] == {"symbol": "S001", "close": "4.5"}
+    assert meta_data == {"requests": 3, "missing": ["S007"]}
+
+
+def test_get_bulk_quotes_pandas_is_indexed_by_symbol():
+    data, _ = client("pandas").get_bulk_quotes(["IBM", "MSFT"])
+
+    assert list(data.index) == ["IBM", "MSFT"]
+    assert list(data["close"]) == ["3.5", "4.5"]
+
+
+def test_get_bulk_quotes_columnar_has_a_symbol_column():
+    data, _ = client("columnar").get_bulk_quotes("IBM,MSFT")
+
+    assert isinstance(data, columnar.ColumnarFrame)
+    assert list(data["symbol"]) == ["IBM", "MSFT"]
+
+
+def test_async_bulk_quotes_take_the_same_arguments():
+    assert inspect.signature(AsyncTimeSeries.get_bulk_quotes) == inspect.signature(TimeSeries.get_bulk_quotes)
@@ -0,0 +1,134 @@
+import os
+import sys
+from array import array
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+import numpy  # noqa: E402
+from alpha_vantage import columnar  # noqa: E402
+from alpha_vantage.alphaintelligence import AlphaIntelligence  # noqa: E402
+from alpha_vantage.techindicators import TechIndicators  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+from alpha_vantage.transport import ReplayTransport  # noqa: E402
+
+# Synthetic api responses saved in the cassette format of the transports
+RESPONSES = os.path.join(os.path.dirname(__file__), "responses")
+# Recorded calls of a series, by payload
+CALLS = {
+    "daily": (TimeSeries, "get_daily", {"outputsize": "full"}),
+    "intraday": (TimeSeries, "get_intraday", {"interval": "5min", "outputsize": "full"}),
+    "indicator": (TechIndicators, "get_bbands", {}),
+}
+
+
+def call(name, output_format):
+    client_class, method, kwargs = CALLS[name]
+    client = client_class(key="test", output_format=output_format, transport=ReplayTransport(RESPONSES))
+    return getattr(client, method)("IBM", **kwargs)
+
+
+@pytest.mark.parametrize("name, cleaned", [("1. open", "open"), ("5. volume", "volume"),
+                                           ("10. change percent", "change percent"),
+                                           ("Real Upper Band", "Real Upper Band")])
+def test_clean_column_name(name, cleaned):
+    assert columnar.clean_column_name(name) == cleaned
+
+
+@pytest.mark.parametrize("label, epoch", [("2024-01-02", 1704153600), ("2024-01-02 09:35", 1704188100),
+                                          ("2024-01-02 09:35:30", 1704188130)])
+def test_to_epoch(label, epoch):
+    assert columnar.to_epoch(label) == epoch
+
+
+def test_to_epoch_rejects_unknown_labels():
+    with pytest.raises(ValueError):
+        columnar.to_epoch("2024-01")
+
+
+@pytest.mark.parametrize("name", CALLS)
+def test_columns_match_the_json_output(name):
+    frame, meta_data = call(name, "columnar")
+    data, json_meta_data = call(name, "json")
+    labels = sorted(data, key=columnar.to_epoch)
+
+    assert meta_data == json_meta_data
+    assert list(frame.index) == [columnar.to_epoch(label) for label in labels]
+    fields = next(iter(data.values()))
+    assert frame.column_names == [columnar.clean_column_name(field) for field in fields]
+    for field in fields:
+        assert list(frame[columnar.clean_column_name(field)]) == [float(data[label][field]) for label in labels]
+
+
+@pytest.mark.parametrize("name", CALLS)
+def test_columns_match_the_pandas_output(name):
+    frame, _ = call(name, "columnar")
+    data_pandas, _ = call(name, "pandas")
+    data_pandas = data_pandas.sort_index()
+
+    assert list(frame.index) == data_pandas.index.astype("datetime64[s]").asi8.tolist()
+    # Pandas frames keep the field names of the api
+    assert frame.column_names == [columnar.clean_column_name(column) for column in data_pandas.columns]
+    for column in data_pandas.columns:
+        numpy.testing.assert_array_equal(frame[columnar.clean_column_name(column)], data_pandas[column].to_numpy())
+
+
+def test_records_are_indexed_by_position():
+    frame, _ = AlphaIntelligence(key="test", output_format="columnar",
+                                 transport=ReplayTransport(RESPONSES)).get_top_gainers()
+
+    assert list(frame.index) == [0, 1, 2]
+    assert frame["ticker"] == ["ABCD", "EFGH", "IJKL"]
+    assert list(frame["price"]) == [2.35, 14.10, 0.52]
+    # Percentages are not numeric, they are kept as strings
+    assert frame["change_percentage"][0] == "80.7692%"
+
+
+def test_single_quote_is_returned_as_json():
+    client = TimeSeries(key="test", output_format="columnar", transport=ReplayTransport(RESPONSES))
+
+    data, _ = client.get_quote_endpoint("IBM")
+
+    assert data["05. price"] == "230.5800"
+
+
+def test_between_shares_memory():
+    frame, _ = call("daily", "columnar")
+    start, end = frame.index[10], frame.index[19]
+    window = frame.between(start, end)
+
+    assert len(window) == 10
+    assert list(window.index) == list(frame.index[10:20])
+    assert numpy.shares_memory(window["close"], frame["close"])
+    assert len(frame.between(end=start)) == 11
+
+
+def test_view_and_nbytes():
+    frame, _ = call("daily", "columnar")
+
+    assert frame.view("close").tolist() == list(frame["close"])
+    assert frame.view().itemsize == 8
+    assert frame.nbytes == len(frame) * 8 * (1 + len(frame.column_names))
+    with pytest.raises(ValueError):
+        columnar.from_json([{"ticker": "A"}]).view("ticker")
+
+
+def test_columns_without_numpy(monkeypatch):
+    frame, _ = call("daily", "columnar")
+    monkeypatch.setattr(columnar, "_NUMPY_FOUND", False)
+    plain, _ = call("daily", "columnar")
+
+    assert isinstance(plain["close"], array)
+    assert plain.to_dict() == frame.to_dict()
+    window = plain.between(frame.index[10], frame.index[19])
+    assert list(window["close"]) == list(frame["close"][10:20])
+
+
+def test_empty_and_unsupported_data():
+    assert len(columnar.from_json([])) == 0
+    assert columnar.from_json({"a": "1"}) is None
+    assert columnar.from_json({"yesterday": {"1. open": "1"}}) is None
+    assert columnar.from_json(["IBM", "MSFT"]) is None
+    assert columnar.from_json([{"ticker": "A"}, "B"]) is None
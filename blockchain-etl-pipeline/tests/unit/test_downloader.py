@@ -0,0 +1,115 @@
+import datetime
+import json
+import os
+import sys
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage import downloader  # noqa: E402
+from alpha_vantage.downloader import HistoryDownloader, QuotaLimiter, month_slices  # noqa: E402
+from alpha_vantage.seriesstore import SeriesStore  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+from alpha_vantage.transport import TransportResponse  # noqa: E402
+
+
+class MonthTransport(object):
+    """Answers TIME_SERIES_INTRADAY with one point on each of the first days
+    of the month asked, or an error for the failing months"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.months = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, proxy=None):
+        query = parse_qs(urlparse(url).query)
+        month = query["month"][0]
+        with self.lock:
+            self.months.append((month, query["outputsize"][0]))
+        if month in self.failing:
+            body = {"Error Message": "Invalid API call"}
+        else:
+            body = {"Meta Data": {"2. Symbol": query["symbol"][0]},
+                    "Time Series (5min)": {
+                        "{}-{:02} 09:30:00".format(month, day): {"1. open": str(day),
+                                                                "4. close": str(day)}
+                        for day in range(1, 4)}}
+        return TransportResponse(200, json.dumps(body).encode())
+
+
+def download(tmp_path, transport, start="2024-01", end="2024-04", **kwargs):
+    ts = TimeSeries("demo", transport=transport)
+    store = SeriesStore(str(tmp_path))
+    fetcher = HistoryDownloader(ts, store, **kwargs)
+    return fetcher, fetcher.download("get_intraday", "IBM", start, end, interval="5min")
+
+
+def test_month_slices_cross_the_year():
+    assert month_slices("2023-11", datetime.date(2024, 2, 15)) == [
+        "2023-11", "2023-12", "2024-01", "2024-02"]
+
+
+def test_month_slices_reject_a_reversed_range():
+    with pytest.raises(ValueError):
+        month_slices("2024-02", "2024-01")
+
+
+def test_quota_limiter_waits_once_the_burst_is_spent(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(downloader.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(downloader.time, "sleep", lambda seconds: now.__setitem__(0, now[0] + seconds))
+    limiter = QuotaLimiter(60, burst=2)
+
+    assert [limiter.acquire() for _ in range(4)] == [0.0, 0.0, pytest.approx(1.0), pytest.approx(1.0)]
+
+
+def test_download_merges_every_month(tmp_path):
+    transport = MonthTransport()
+    fetcher, report = download(tmp_path, transport)
+
+    assert report.completed == ["2024-01", "2024-02", "2024-03", "2024-04"]
+    assert report.points == 12 and not report.failed
+    # The month slices are only complete with the full output size
+    assert {outputsize for _, outputsize in transport.months} == {"full"}
+    assert fetcher.completed("/".join(str(part) for part in report.key)) == dict.fromkeys(report.months, 3)
+    frame = fetcher.store.read(report.key)
+    assert len(frame.index) == 12
+    assert list(frame.index) == sorted(frame.index)
+
+
+def test_download_resumes_from_the_checkpoint(tmp_path):
+    download(tmp_path, MonthTransport(), end="2024-02")
+    transport = MonthTransport()
+    _, report = download(tmp_path, transport)
+
+    assert report.skipped == ["2024-01", "2024-02"]
+    assert sorted(month for month, _ in transport.months) == ["2024-03", "2024-04"]
+
+
+def test_failed_months_are_retried_by_the_next_run(tmp_path):
+    _, report = download(tmp_path, MonthTransport(failing={"2024-02"}))
+
+    assert list(report.failed) == ["2024-02"]
+    assert report.completed == ["2024-01", "2024-03", "2024-04"]
+
+    transport = MonthTransport()
+    fetcher, report = download(tmp_path, transport)
+
+    assert [month for month, _ in transport.months] == ["2024-02"]
+    # The month merged after the later ones is sorted by the compaction
+    frame = fetcher.store.read(report.key)
+    assert len(frame.index) == 12
+    assert list(frame.index) == sorted(frame.index)
+    assert fetcher.store.meta(report.key)["sorted"]
+
+
+def test_download_rejects_csv(tmp_path):
+    ts = TimeSeries("demo", output_format="csv", transport=MonthTransport())
+
+    with pytest.raises(ValueError):
+        HistoryDownloader(ts, SeriesStore(str(tmp_path))).download("get_intraday", "IBM", "2024-01", "2024-02")
@@ -0,0 +1,190 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage.instrumentation import ApiCall, EmfExporter, Hooks, MetricsCollector  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+from alpha_vantage.transport import TransportResponse  # noqa: E402
+
+QUOTE = {"Global Quote": {"01. symbol": "IBM", "05. price": "230.5800"}}
+
+
+class FixedTransport(object):
+    def __init__(self, body, status=200):
+        self.response = TransportResponse(status, json.dumps(body).encode())
+
+    def get(self, url, headers=None, proxy=None):
+        return self.response
+
+
+class FailingTransport(object):
+    def get(self, url, headers=None, proxy=None):
+        raise ConnectionError("unreachable")
+
+
+class RecordingHooks(Hooks):
+    def __init__(self):
+        self.events = []
+
+    def before_request(self, call):
+        self.events.append(("before_request", call.function, call.elapsed))
+
+    def after_response(self, call):
+        self.events.append(("after_response", call.status, call.rate_limit))
+
+    def on_error(self, call, error):
+        self.events.append(("on_error", type(error).__name__))
+
+
+def quote(transport, **kwargs):
+    hooks = RecordingHooks()
+    TimeSeries(key="secret", hooks=[hooks], transport=transport, **kwargs).get_quote_endpoint("IBM")
+    return hooks.events
+
+
+def test_hooks_of_a_successful_call():
+    assert quote(FixedTransport(QUOTE)) == [("before_request", "GLOBAL_QUOTE", None),
+                                            ("after_response", 200, None)]
+
+
+def test_api_error_after_the_response_fires_both_hooks():
+    hooks = RecordingHooks()
+    ts = TimeSeries(key="secret", hooks=[hooks], transport=FixedTransport({"Error Message": "Invalid API call"}))
+
+    with pytest.raises(ValueError):
+        ts.get_quote_endpoint("IBM")
+    assert hooks.events == [("before_request", "GLOBAL_QUOTE", None), ("after_response", 200, None),
+                            ("on_error", "ValueError")]
+
+
+def test_transport_error_skips_after_response():
+    hooks = RecordingHooks()
+    ts = TimeSeries(key="secret", hooks=[hooks], transport=FailingTransport())
+
+    with pytest.raises(ConnectionError):
+        ts.get_quote_endpoint("IBM")
+    assert hooks.events == [("before_request", "GLOBAL_QUOTE", None), ("on_error", "ConnectionError")]
+
+
+def test_every_hook_gets_the_calls():
+    first, second = RecordingHooks(), RecordingHooks()
+    TimeSeries(key="secret", hooks=[first, second], transport=FixedTransport(QUOTE)).get_quote_endpoint("IBM")
+
+    assert first.events == second.events
+
+
+def test_api_key_is_redacted():
+    assert ApiCall("GLOBAL_QUOTE", "https://x/query?function=A&apikey=secret&symbol=IBM").url == \
+        "https://x/query?function=A&apikey=***&symbol=IBM"
+
+
+def finished(function, milliseconds, status=200, nbytes=100, rate_limit=None):
+    call = ApiCall(function, "https://x/query?apikey=secret")
+    call.finish(status, nbytes)
+    call.elapsed = milliseconds / 1000.0
+    call.rate_limit = rate_limit
+    return call
+
+
+@pytest.mark.parametrize("milliseconds, bucket", [(0.5, 0), (25, 0), (25.1, 1), (999, 5), (1000, 5),
+                                                  (10000, 8), (10000.1, 9), (3600000, 9)])
+def test_latency_bucket(milliseconds, bucket):
+    collector = MetricsCollector()
+    collector.after_response(finished("GLOBAL_QUOTE", milliseconds))
+    stats = collector.snapshot()["GLOBAL_QUOTE"]
+
+    assert stats["latency_counts"] == [int(position == bucket) for position in range(len(collector.BUCKETS))]
+    assert stats["latency_sums"][bucket] == pytest.approx(milliseconds)
+
+
+def test_custom_buckets_without_infinity_keep_the_slow_calls_in_the_last():
+    collector = MetricsCollector(buckets=[10, 100])
+    collector.after_response(finished("GLOBAL_QUOTE", 5000))
+
+    assert collector.snapshot()["GLOBAL_QUOTE"]["latency_counts"] == [0, 1]
+
+
+def test_rate_limit_messages_are_counted():
+    collector = MetricsCollector()
+    for body in ({"Note": "Thank you for using Alpha Vantage!"}, {"Information": "Premium endpoint"},
+                 {"Note": "Our standard API rate limit is 25 requests per day"}, QUOTE):
+        # The unformatted call, a limit message has no data to format
+        ts = TimeSeries(key="secret", hooks=[collector], transport=FixedTransport(body), treat_info_as_error=False)
+        TimeSeries.get_quote_endpoint.__wrapped__(ts, "IBM")
+    stats = collector.snapshot()["GLOBAL_QUOTE"]
+
+    assert stats["calls"] == 4
+    assert stats["rate_limits"] == {"Note": 2, "Information": 1}
+    assert stats["errors"] == 0
+
+
+def test_rate_limit_errors_are_counted_once_each():
+    collector = MetricsCollector()
+    ts = TimeSeries(key="secret", hooks=[collector], transport=FixedTransport({"Note": "limit"}))
+    with pytest.raises(ValueError):
+        ts.get_quote_endpoint("IBM")
+    stats = collector.snapshot()["GLOBAL_QUOTE"]
+
+    assert (stats["calls"], stats["errors"], stats["rate_limits"]) == (1, 1, {"Note": 1})
+
+
+def test_snapshot_reset():
+    collector = MetricsCollector()
+    collector.after_response(finished("GLOBAL_QUOTE", 10))
+
+    assert collector.snapshot(reset=True)["GLOBAL_QUOTE"]["calls"] == 1
+    assert collector.snapshot() == {}
+
+
+def metric_names(document):
+    return [metric["Name"] for metric in document["_aws"]["CloudWatchMetrics"][0]["Metrics"]]
+
+
+def test_emf_document(monkeypatch):
+    collector = MetricsCollector()
+    collector.after_response(finished("GLOBAL_QUOTE", 10, nbytes=300))
+    collector.after_response(finished("GLOBAL_QUOTE", 20, nbytes=100, status=429, rate_limit="Note"))
+    collector.after_response(finished("GLOBAL_QUOTE", 400, nbytes=200))
+    collector.on_error(finished("GLOBAL_QUOTE", 400), ValueError())
+    monkeypatch.setattr("alpha_vantage.instrumentation.time.time", lambda: 1735689600.5)
+    [document] = EmfExporter(namespace="Test", dimensions={"Stage": "prod"}).lines(collector)
+
+    assert document["_aws"]["Timestamp"] == 1735689600500
+    assert document["_aws"]["CloudWatchMetrics"][0]["Namespace"] == "Test"
+    assert document["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Function", "Stage"]]
+    assert metric_names(document) == ["Calls", "Errors", "RateLimited", "Latency", "Bytes"]
+    assert {name: document[name] for name in ("Function", "Stage", "Calls", "Errors", "RateLimited",
+                                              "Bytes", "MaxBytes", "StatusCodes", "RateLimits")} == {
+        "Function": "GLOBAL_QUOTE", "Stage": "prod", "Calls": 3, "Errors": 1, "RateLimited": 1,
+        "Bytes": 600, "MaxBytes": 300, "StatusCodes": {"200": 2, "429": 1}, "RateLimits": {"Note": 1}}
+    # One value per non empty bucket, the mean of its samples
+    assert document["Latency"] == {"Values": [15.0, 400.0], "Counts": [2, 1]}
+    # The collector was reset by the export
+    assert collector.snapshot() == {}
+
+
+def test_emf_document_without_successful_call_has_no_latency():
+    collector = MetricsCollector()
+    collector.on_error(finished("GLOBAL_QUOTE", 10), ConnectionError())
+    [document] = EmfExporter().lines(collector)
+
+    assert "Latency" not in document
+    assert metric_names(document) == ["Calls", "Errors", "RateLimited", "Bytes"]
+    assert (document["Calls"], document["Errors"]) == (0, 1)
+
+
+def test_export_writes_one_line_per_function():
+    collector = MetricsCollector()
+    collector.after_response(finished("GLOBAL_QUOTE", 10))
+    collector.after_response(finished("TIME_SERIES_DAILY", 10))
+    stream = io.StringIO()
+
+    assert EmfExporter(stream=stream).export(collector) == 2
+    lines = stream.getvalue().splitlines()
+    assert sorted(json.loads(line)["Function"] for line in lines) == ["GLOBAL_QUOTE", "TIME_SERIES_DAILY"]
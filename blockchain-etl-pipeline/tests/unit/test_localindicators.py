@@ -0,0 +1,190 @@
+"""LocalTechIndicators against reference indicator responses.
+
+The responses directory holds a synthetic 120 day TIME_SERIES_DAILY response
+for IBM and indicator responses for it, with the default parameters. They
+are not reference from the api: the indicators were computed with their
+textbook definitions, written as plain loops independent of the NumPy code,
+and laid out like the api responses. Live recordings of RecordingTransport
+can replace them under the same names.
+"""
+import math
+import os
+import sys
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+import numpy  # noqa: E402
+from alpha_vantage import localindicators  # noqa: E402
+from alpha_vantage.localindicators import LocalTechIndicators  # noqa: E402
+from alpha_vantage.techindicators import TechIndicators  # noqa: E402
+from alpha_vantage.transport import ReplayTransport, TransportResponse  # noqa: E402
+
+# Synthetic api responses saved in the cassette format of the transports
+RESPONSES = os.path.join(os.path.dirname(__file__), "responses")
+INDICATORS = ["sma", "ema", "wma", "dema", "tema", "trima", "macd", "stoch", "rsi",
+              "willr", "mom", "cci", "roc", "bbands", "atr", "ad", "obv"]
+
+
+class CountingTransport(ReplayTransport):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.urls = []
+
+    def get(self, url, headers=None, proxy=None):
+        self.urls.append(url)
+        return super().get(url, headers=headers, proxy=proxy)
+
+
+def nan_list(values):
+    return [None if math.isnan(value) else value for value in values]
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+def test_local_values_match_the_reference(name):
+    transport = ReplayTransport(RESPONSES)
+    local, meta_data = getattr(LocalTechIndicators(key="test", transport=transport), "get_" + name)("IBM")
+    reference, _ = getattr(TechIndicators(key="test", transport=transport), "get_" + name)("IBM")
+
+    assert meta_data["2: Indicator"] == name.upper()
+    # Same warm up period left out, same fields
+    assert list(local) == list(reference)
+    for label, fields in reference.items():
+        assert list(local[label]) == list(fields)
+        for field, value in fields.items():
+            assert float(local[label][field]) == pytest.approx(float(value), rel=1e-6, abs=2e-4)
+
+
+def test_prices_are_fetched_once_for_every_indicator():
+    transport = CountingTransport(RESPONSES)
+    indicators = LocalTechIndicators(key="test", transport=transport)
+    for name in INDICATORS:
+        getattr(indicators, "get_" + name)("IBM")
+    indicators.clear_cache()
+    indicators.get_sma("IBM")
+
+    assert len(transport.urls) == 2
+    assert all("function=TIME_SERIES_DAILY&" in url for url in transport.urls)
+
+
+def test_api_is_called_without_numpy(monkeypatch):
+    monkeypatch.setattr(localindicators, "_NUMPY_FOUND", False)
+    transport = CountingTransport(RESPONSES)
+    indicators = LocalTechIndicators(key="test", output_format="pandas", transport=transport)
+    data, meta_data = indicators.get_rsi("IBM")
+    reference, _ = TechIndicators(key="test", output_format="pandas", transport=transport).get_rsi("IBM")
+
+    assert [url.split("&")[0] for url in transport.urls] == ["https://www.alphavantage.co/query?function=RSI"] * 2
+    assert data.equals(reference)
+    assert "Source" not in str(meta_data)
+
+
+def test_api_fallback_asks_for_the_currency_pair(monkeypatch):
+    monkeypatch.setattr(localindicators, "_NUMPY_FOUND", False)
+    urls = []
+
+    class Transport:
+        def get(self, url, headers=None, proxy=None):
+            urls.append(url)
+            return TransportResponse(200, b'{"Meta Data": {}, "Technical Analysis: SMA": {}}')
+
+    LocalTechIndicators(key="test", market="USD", transport=Transport()).get_sma("BTC", time_period=10)
+
+    assert "&symbol=BTCUSD&interval=daily&time_period=10&" in urls[0]
+
+
+class AdxTransport(object):
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, headers=None, proxy=None):
+        self.urls.append(url)
+        return TransportResponse(200, b'{"Meta Data": {"2: Indicator": "ADX"}, '
+                                      b'"Technical Analysis: ADX": {"2024-12-31": {"ADX": "21.5"}}}')
+
+
+def test_indicators_without_local_computation_are_asked_to_the_api():
+    transport = AdxTransport()
+    data, meta_data = LocalTechIndicators(key="test", transport=transport).get_adx("IBM", time_period=14)
+
+    assert data == {"2024-12-31": {"ADX": "21.5"}}
+    assert meta_data == {"2: Indicator": "ADX"}
+    assert len(transport.urls) == 1
+    assert "function=ADX&symbol=IBM&interval=daily&time_period=14&" in transport.urls[0]
+
+
+def test_api_indicators_ask_for_the_currency_pair():
+    transport = AdxTransport()
+    LocalTechIndicators(key="test", market="USD", transport=transport).get_adx("BTC")
+
+    assert "&symbol=BTCUSD&" in transport.urls[0]
+
+
+def test_every_tech_indicators_method_is_available():
+    indicators = LocalTechIndicators(key="test", transport=AdxTransport())
+
+    for name in dir(TechIndicators):
+        if name.startswith("get_"):
+            assert callable(getattr(indicators, name)), name
+    with pytest.raises(AttributeError):
+        indicators.get_unknown
+
+
+def test_sma_and_wma():
+    values = numpy.arange(1.0, 7.0)
+
+    assert nan_list(localindicators._sma(values, 3)) == [None, None, 2.0, 3.0, 4.0, 5.0]
+    # Weights 1, 2, 3 from the oldest value
+    assert nan_list(localindicators._wma(values, 3)) == pytest.approx([None, None, 14 / 6, 20 / 6, 26 / 6, 32 / 6])
+
+
+def test_ema_is_seeded_with_the_simple_average():
+    values = numpy.array([numpy.nan, 2.0, 4.0, 6.0, 8.0])
+
+    # Seed (2 + 4) / 2, then alpha 2 / 3
+    assert nan_list(localindicators._ema(values, 2)) == pytest.approx([None, None, 3.0, 5.0, 7.0])
+
+
+def test_dema_and_tema_follow_a_trend_without_lag():
+    values = numpy.arange(1.0, 41.0)
+
+    assert localindicators._dema(values, 5)[-1] == pytest.approx(40.0)
+    assert localindicators._tema(values, 5)[-1] == pytest.approx(40.0)
+    assert nan_list(localindicators._dema(values, 5))[:8] == [None] * 8
+
+
+@pytest.mark.parametrize("period, weights", [(4, [1, 2, 2, 1]), (5, [1, 2, 3, 2, 1])])
+def test_trima_is_a_triangular_average(period, weights):
+    values = numpy.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+    expected = [sum(weight * value for weight, value in zip(weights, values[end - period + 1:end + 1]))
+                / sum(weights) for end in range(period - 1, len(values))]
+
+    assert nan_list(localindicators._trima(values, period)) == pytest.approx(
+        [None] * (period - 1) + expected)
+
+
+def test_rsi_is_100_without_losses():
+    rsi = localindicators._rsi(numpy.arange(1.0, 10.0), 3)
+
+    assert nan_list(rsi) == [None] * 3 + [100.0] * 6
+
+
+def test_rsi_uses_wilder_smoothing():
+    # Changes +2, -1, +2, -1: average gain 4 / 3 and loss 1 / 3 over 3,
+    # then gain 4 / 3 * 2 / 3 and loss (1 / 3 * 2 + 1) / 3
+    rsi = localindicators._rsi(numpy.array([10.0, 12.0, 11.0, 13.0, 12.0]), 3)
+
+    assert rsi[3] == pytest.approx(80.0)
+    assert rsi[4] == pytest.approx(100.0 - 100.0 / (1.0 + (8 / 9) / (5 / 9)))
+
+
+def test_rolling_extremes():
+    high = numpy.array([1.0, 3.0, 2.0, 5.0, 4.0])
+    low = numpy.array([0.5, 2.0, 1.0, 3.0, 3.5])
+    highest, lowest = localindicators._rolling_extremes(high, low, 3)
+
+    assert nan_list(highest) == [None, None, 3.0, 5.0, 5.0]
+    assert nan_list(lowest) == [None, None, 0.5, 1.0, 1.0]
+    assert nan_list(localindicators._rolling_extremes(high, low, 6)[0]) == [None] * 5
@@ -0,0 +1,150 @@
+import datetime
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage.alphaintelligence import AlphaIntelligence  # noqa: E402
+from alpha_vantage.newsstore import NewsStore, NewsSync, url_hash  # noqa: E402
+from alpha_vantage.transport import TransportResponse  # noqa: E402
+
+START = datetime.datetime(2024, 1, 1)
+
+
+def article(number, minutes=37):
+    """An article every minutes from the start of 2024, about IBM and every
+    other one about MSFT too"""
+    published = START + datetime.timedelta(minutes=minutes * number)
+    tickers = ["IBM"] if number % 2 else ["IBM", "MSFT"]
+    return {"url": "https://news.example.com/{}".format(number), "title": "Article {}".format(number),
+            "time_published": published.strftime("%Y%m%dT%H%M%S"),
+            "ticker_sentiment": [{"ticker": ticker, "relevance_score": "0.5",
+                                  "ticker_sentiment_score": str(number % 3 - 1),
+                                  "ticker_sentiment_label": ["Bearish", "Neutral", "Bullish"][number % 3]}
+                                 for ticker in tickers]}
+
+
+class NewsTransport(object):
+    """Answers NEWS_SENTIMENT with the articles published in the minutes from
+    time_from to time_to, the earliest first, up to limit"""
+
+    def __init__(self, articles):
+        self.articles = sorted(articles, key=lambda item: item["time_published"])
+        self.windows = []
+
+    def get(self, url, headers=None, proxy=None):
+        query = parse_qs(urlparse(url).query)
+        time_from, time_to = query["time_from"][0], query["time_to"][0]
+        self.windows.append((time_from, time_to))
+        feed = [item for item in self.articles
+                if time_from <= item["time_published"][:13] <= time_to]
+        return TransportResponse(200, json.dumps({"items": str(len(feed)),
+                                                  "feed": feed[:int(query["limit"][0])]}).encode())
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NewsStore(str(tmp_path))
+
+
+def test_add_skips_the_stored_articles(store):
+    assert store.add([article(1), article(2)]) == 2
+    assert store.add([article(2), article(3), article(3)]) == 1
+
+    assert len(store) == 3
+    assert article(2)["url"] in store
+    assert url_hash(article(2)["url"]) == url_hash("https://news.example.com/2")
+
+
+def test_articles_are_read_back_in_time_order(store):
+    store.add([article(number) for number in (5, 1, 3)])
+    store.add([article(number) for number in (4, 2)])
+
+    assert [item["title"] for item in store.articles()] == ["Article {}".format(n) for n in range(1, 6)]
+    assert [item["title"] for item in store.articles("MSFT")] == ["Article 2", "Article 4"]
+
+
+def test_articles_between_times(store):
+    store.add([article(number, minutes=60) for number in range(10)])
+
+    # The end minute includes its seconds
+    titles = [item["title"] for item in store.articles(start="20240101T0200", end=START.replace(hour=4))]
+    assert titles == ["Article 2", "Article 3", "Article 4"]
+
+
+def test_sentiment_aggregates(store):
+    store.add([article(number) for number in range(6)])
+
+    assert store.tickers() == ["IBM", "MSFT"]
+    msft = store.sentiment("MSFT")
+    assert msft["articles"] == 3
+    assert msft["mean_score"] == pytest.approx((-1 + 0 + 1) / 3)
+    assert msft["mean_relevance"] == pytest.approx(0.5)
+    assert msft["labels"] == {"Bearish": 1, "Bullish": 1, "Neutral": 1}
+    assert (msft["first"], msft["last"]) == (article(0)["time_published"], article(4)["time_published"])
+    assert set(store.sentiment()) == {"IBM", "MSFT"}
+    assert store.sentiment("AAPL") is None
+
+
+def test_store_is_reopened_from_its_index(store, tmp_path):
+    store.add([article(number) for number in range(4)])
+    store.mark_synced("tickers=IBM&topics=", START.replace(hour=3))
+    reopened = NewsStore(str(tmp_path))
+
+    assert len(reopened) == 4
+    assert [item["title"] for item in reopened.articles("MSFT")] == ["Article 0", "Article 2"]
+    assert reopened.synced_until("tickers=IBM&topics=") == START.replace(hour=3)
+    assert reopened.synced_until("tickers=MSFT&topics=") is None
+
+
+def test_lines_left_by_an_interrupted_write_are_dropped(store, tmp_path):
+    store.add([article(1)])
+    with open(os.path.join(str(tmp_path), NewsStore._ARTICLES), "ab") as stream:
+        stream.write(b'{"url": "partial')
+    store.add([article(2)])
+
+    assert [item["title"] for item in NewsStore(str(tmp_path)).articles()] == ["Article 1", "Article 2"]
+
+
+def test_query_key_ignores_the_argument_order():
+    assert NewsSync.query_key("MSFT,IBM", ["b", "a"]) == NewsSync.query_key(["IBM", "MSFT"], "a,b")
+
+
+def sync_of(store, articles, **kwargs):
+    client = AlphaIntelligence("demo", transport=NewsTransport(articles))
+    return NewsSync(client, store, **kwargs)
+
+
+def test_first_sync_needs_a_since_time(store):
+    with pytest.raises(ValueError):
+        sync_of(store, []).sync(tickers="IBM")
+
+
+def test_sync_walks_the_windows_and_resumes(store):
+    articles = [article(number) for number in range(200)]
+    sync = sync_of(store, articles, window=datetime.timedelta(hours=12))
+    middle = START + datetime.timedelta(days=2)
+
+    assert sync.sync(tickers="IBM", since=START, until=middle) == len(
+        [item for item in articles if item["time_published"] <= middle.strftime("%Y%m%dT%H%M")])
+    assert sync.calls == 4
+    assert store.synced_until(NewsSync.query_key("IBM")) == middle
+
+    sync.client.transport.windows = []
+    sync.sync(tickers="IBM", until=START + datetime.timedelta(days=6))
+    assert sync.client.transport.windows[0][0] == middle.strftime("%Y%m%dT%H%M")
+    assert len(store) == 200
+
+
+def test_full_pages_are_split_until_every_article_fits(store):
+    # 40 articles in 40 minutes, 10 per call
+    articles = [article(number, minutes=1) for number in range(40)]
+    sync = sync_of(store, articles, limit=10)
+
+    assert sync.sync(tickers="IBM", since=START, until=START + datetime.timedelta(hours=1)) == 40
+    assert sync.calls > 1
@@ -0,0 +1,122 @@
+import os
+import sys
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+import pandas  # noqa: E402
+from alpha_vantage.alphaintelligence import AlphaIntelligence  # noqa: E402
+from alpha_vantage.alphavantage import AlphaVantage  # noqa: E402
+from alpha_vantage.techindicators import TechIndicators  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+from alpha_vantage.transport import ReplayTransport  # noqa: E402
+
+# Synthetic api responses saved in the cassette format of the transports
+RESPONSES = os.path.join(os.path.dirname(__file__), "responses")
+CALLS = {
+    "daily": (TimeSeries, "get_daily", ("IBM",), {"outputsize": "full"}),
+    "intraday": (TimeSeries, "get_intraday", ("IBM",), {"interval": "5min", "outputsize": "full"}),
+    "indicator": (TechIndicators, "get_bbands", ("IBM",), {}),
+}
+
+
+def call(name, output_format, **options):
+    client_class, method, args, kwargs = CALLS[name]
+    client = client_class(key="test", output_format=output_format, transport=ReplayTransport(RESPONSES),
+                          **options)
+    return getattr(client, method)(*args, **kwargs)
+
+
+def previous_conversion(data):
+    """The pandas conversion of the wrapper before the column wise one"""
+    frame = pandas.DataFrame.from_dict(data, orient="index", dtype="float")
+    frame.index.name = "date"
+    frame.index = pandas.to_datetime(frame.index)
+    return frame
+
+
+def previous_records(data, output_format):
+    """The conversion of lists of records before from_records, the pandas
+    output went on with the conversion of the index to dates"""
+    data_array = []
+    for val in data:
+        data_array.append([v for _, v in val.items()])
+    frame = pandas.DataFrame(data_array, columns=[k for k, _ in data[0].items()])
+    if output_format == "pandas":
+        frame.index.name = "date"
+        frame.index = pandas.to_datetime(frame.index)
+    return frame
+
+
+def formatted(data, output_format="pandas", **options):
+    """Output of _output_format for a call returning data"""
+    wrapped = AlphaVantage._output_format(lambda self: ({"Meta Data": {}, "data": data}, "data", "Meta Data"))
+    return wrapped(AlphaVantage(key="test", output_format=output_format, **options))[0]
+
+
+@pytest.mark.parametrize("name", CALLS)
+def test_frames_match_the_previous_conversion(name):
+    data, _ = call(name, "json")
+    frame, _ = call(name, "pandas")
+
+    pandas.testing.assert_frame_equal(frame, previous_conversion(data))
+
+
+def test_float32_frames():
+    data, _ = call("daily", "json")
+    frame, _ = call("daily", "pandas", float_dtype="float32")
+
+    assert all(dtype == "float32" for dtype in frame.dtypes)
+    pandas.testing.assert_frame_equal(frame, previous_conversion(data).astype("float32"))
+
+
+def test_integer_indexing_keeps_the_dates_as_a_column():
+    data, _ = call("daily", "json")
+    frame, _ = call("daily", "pandas", indexing_type="integer")
+
+    assert frame.index.name == "index"
+    assert list(frame.index) == list(range(len(data)))
+    assert frame["index"].tolist() == list(data)
+
+
+def test_ragged_series_are_aligned():
+    data = {"2024-01-03": {"1. open": "2.0", "2. close": "3.0"},
+            "2024-01-02": {"1. open": "1.0"}}
+
+    pandas.testing.assert_frame_equal(formatted(data), previous_conversion(data))
+
+
+def test_intraday_labels_without_seconds():
+    data = {"2024-01-02 09:40": {"1. open": "2.0"}, "2024-01-02 09:35": {"1. open": "1.0"}}
+
+    assert formatted(data).index.tolist() == [pandas.Timestamp("2024-01-02 09:40"),
+                                              pandas.Timestamp("2024-01-02 09:35")]
+
+
+def test_non_numeric_data_is_kept_as_objects():
+    client = TimeSeries(key="test", output_format="pandas", transport=ReplayTransport(RESPONSES))
+    frame, _ = client.get_quote_endpoint("IBM")
+
+    assert frame.index.tolist() == ["Global Quote"]
+    assert frame.loc["Global Quote", "10. change percent"] == "0.6109%"
+
+
+@pytest.mark.parametrize("output_format", ["json", "pandas"])
+def test_records_keep_the_columns_of_the_first_record(output_format):
+    client = AlphaIntelligence(key="test", output_format=output_format, transport=ReplayTransport(RESPONSES))
+    frame, _ = client.get_top_gainers()
+
+    assert list(frame.columns) == ["ticker", "price", "change_amount", "change_percentage", "volume"]
+    assert frame["ticker"].tolist() == ["ABCD", "EFGH", "IJKL"]
+
+
+@pytest.mark.parametrize("output_format", ["json", "pandas"])
+def test_records_match_the_previous_conversion(output_format):
+    data = [{"ticker": "A", "price": "1.5"}, {"ticker": "B", "price": "2.5"}]
+
+    pandas.testing.assert_frame_equal(formatted(data, output_format), previous_records(data, output_format))
+    assert formatted([], output_format).empty
+    # Keys missing from the first record are left out
+    assert list(formatted(data + [{"ticker": "C", "volume": "3"}], output_format).columns) == ["ticker", "price"]
@@ -0,0 +1,155 @@
+import inspect
+import os
+import sys
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage.alphaintelligence import AlphaIntelligence  # noqa: E402
+from alpha_vantage.alphavantage import AlphaVantage, _RequestBuilder  # noqa: E402
+from alpha_vantage.commodities import Commodities  # noqa: E402
+from alpha_vantage.cryptocurrencies import CryptoCurrencies  # noqa: E402
+from alpha_vantage.econindicators import EconIndicators  # noqa: E402
+from alpha_vantage.foreignexchange import ForeignExchange  # noqa: E402
+from alpha_vantage.fundamentaldata import FundamentalData  # noqa: E402
+from alpha_vantage.options import Options  # noqa: E402
+from alpha_vantage.techindicators import TechIndicators  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+
+CLIENTS = [AlphaIntelligence, Commodities, CryptoCurrencies, EconIndicators, ForeignExchange,
+           FundamentalData, Options, TechIndicators, TimeSeries]
+# Values of the required arguments
+REQUIRED = {"symbol": "IBM", "market": "EUR", "from_symbol": "EUR", "to_symbol": "USD",
+            "from_currency": "USD", "to_currency": "JPY", "interval": "5min", "keywords": "micro"}
+# Values given to every optional argument, covering lists, matype names and
+# numbers, booleans and characters to encode
+OPTIONAL = {"tickers": ["IBM", "AAPL"], "topics": "technology", "time_from": "20240101T0000",
+            "time_to": "20240201T0000", "sort": "EARLIEST", "limit": 1000, "interval": "60min",
+            "outputsize": "full", "maturity": "2year", "contract": "IBM270115C00390000",
+            "date": "2024-01-02", "time_period": 14, "series_type": "open", "month": "2024-01",
+            "entitlement": "delayed", "fastlimit": 0.02, "slowlimit": 0.1, "fastperiod": 10,
+            "slowperiod": 30, "signalperiod": 5, "fastmatype": "EMA", "slowmatype": 2,
+            "signalmatype": "T3", "fastkperiod": 7, "slowkperiod": 4, "slowdperiod": 4,
+            "slowkmatype": "WMA", "slowdmatype": "1", "fastdperiod": 2, "fastdmatype": "DEMA",
+            "matype": "KAMA", "timeperiod1": 5, "timeperiod2": 10, "timeperiod3": 20,
+            "nbdevup": 3, "nbdevdn": 1.5, "acceleration": 0.01, "maximum": 0.2,
+            "extended_hours": False, "adjusted": True}
+
+
+def previous_url(client, func, args, kwargs):
+    """The url of the decorator before the request builder"""
+    argspec = inspect.getfullargspec(func)
+    positional_count = len(argspec.args) - len(argspec.defaults or ())
+    defaults = dict(zip(argspec.args[positional_count:], argspec.defaults or ()))
+    used_kwargs = kwargs.copy()
+    used_kwargs.update(zip(argspec.args[positional_count:], args[positional_count:]))
+    used_kwargs.update({k: used_kwargs.get(k, d) for k, d in defaults.items()})
+    function_name, _, _ = func(client, *args, **kwargs)
+    url = "{}function={}".format(AlphaVantage._ALPHA_VANTAGE_API_URL, function_name)
+    for idx, arg_name in enumerate(argspec.args[1:]):
+        try:
+            arg_value = args[idx]
+        except IndexError:
+            arg_value = used_kwargs[arg_name]
+        if "matype" in arg_name and arg_value:
+            arg_value = client.map_to_matype(arg_value)
+        if arg_value:
+            if isinstance(arg_value, (tuple, list)):
+                arg_value = ",".join(arg_value)
+            url = "{}&{}={}".format(url, arg_name, arg_value)
+    url = "{}&apikey={}".format(url, client.key)
+    if client._append_type:
+        url = "{}&datatype={}".format(url, client.output_format.lower())
+    return url
+
+
+def api_methods():
+    for client_class in CLIENTS:
+        for name, method in sorted(vars(client_class).items()):
+            call = getattr(method, "__wrapped__", None)
+            if getattr(call, "request_builder", None) is not None:
+                yield pytest.param(client_class, call, id="{}.{}".format(client_class.__name__, name))
+
+
+def calls(builder):
+    """Positional required arguments only, every argument by keyword and
+    every argument by position"""
+    required = [REQUIRED[name] for name in builder.names[:builder.required]]
+    optional = {name: OPTIONAL[name] for name in builder.names[builder.required:]}
+    yield required, {}
+    yield required, optional
+    yield required + list(optional.values()), {}
+
+
+def query(url):
+    return parse_qsl(urlsplit(url).query)
+
+
+@pytest.mark.parametrize("client_class, call", list(api_methods()))
+def test_urls_match_the_previous_builder(client_class, call):
+    client = client_class(key="test")
+    sent = []
+    client._handle_api_call = lambda url, function_name=None: sent.append(url) or {}
+    for args, kwargs in calls(call.request_builder):
+        call(client, *args, **kwargs)
+
+        assert query(sent[-1]) == query(previous_url(client, call.__wrapped__, args, kwargs))
+
+
+def test_equal_values_of_other_types_are_encoded_apart():
+    client = TimeSeries(key="test")
+    sent = []
+    client._handle_api_call = lambda url, function_name=None: sent.append(url) or {}
+    call = TimeSeries.get_intraday.__wrapped__
+    for adjusted in (1, True, 1.0):
+        call(client, "IBM", adjusted=adjusted)
+
+    assert [dict(query(url))["adjusted"] for url in sent] == ["1", "True", "1.0"]
+
+
+def returns_constants(self, symbol, interval="daily"):
+    _FUNCTION_KEY = "SMA"
+    return _FUNCTION_KEY, "Technical Analysis: SMA", "Meta Data"
+
+
+def returns_arguments(self, symbol, interval="daily"):
+    return "TIME_SERIES_{}".format(interval.upper()), symbol, "Meta Data"
+
+
+def test_declared_constant_keys_are_taken_once():
+    seen = []
+
+    def recorded(self, symbol, interval="daily"):
+        seen.append(symbol)
+        return returns_constants(self, symbol, interval)
+    builder = _RequestBuilder(recorded, constant_keys=True)
+
+    # Nothing is called when the method is decorated
+    assert builder.keys is None and seen == []
+    for symbol in ("IBM", "MSFT"):
+        assert builder.call_keys(None, (symbol,), {}) == ("SMA", "Technical Analysis: SMA", "Meta Data")
+    assert seen == ["IBM"]
+    with pytest.raises(TypeError):
+        builder.call_keys(None, ("IBM",), {"month": "2024-01"})
+
+
+def test_undeclared_keys_are_asked_on_every_call():
+    builder = _RequestBuilder(returns_arguments)
+
+    assert builder.call_keys(None, ("IBM",), {"interval": "weekly"}) == ("TIME_SERIES_WEEKLY", "IBM", "Meta Data")
+    assert builder.call_keys(None, ("MSFT",), {}) == ("TIME_SERIES_DAILY", "MSFT", "Meta Data")
+    assert builder.keys is None
+
+
+@pytest.mark.parametrize("client_class, call", [param for param in api_methods()
+                                                 if param.values[1].request_builder.constant_keys])
+def test_declared_constant_keys_do_not_depend_on_the_arguments(client_class, call):
+    client = client_class(key="test")
+    builder = call.request_builder
+    required = [REQUIRED[name] for name in builder.names[:builder.required]]
+    other = {name: OPTIONAL[name] for name in builder.names[builder.required:]}
+
+    assert call.__wrapped__(client, *required) == call.__wrapped__(client, *required, **other)
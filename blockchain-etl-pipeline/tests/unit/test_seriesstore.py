@@ -0,0 +1,213 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage import seriesstore  # noqa: E402
+from alpha_vantage.seriesstore import SeriesStore  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+from alpha_vantage.transport import ReplayTransport, TransportResponse  # noqa: E402
+
+# Synthetic api responses saved in the cassette format of the transports
+RESPONSES = os.path.join(os.path.dirname(__file__), "responses")
+KEY = ("TIME_SERIES_DAILY", "IBM", None)
+DAY = 86400
+# 2024-01-01T00:00:00Z
+JANUARY = 1704067200
+
+
+def rows(*days, close=None):
+    """Api rows of the first days of January 2024"""
+    return {"2024-01-{:02}".format(day): {"1. open": "{}.5".format(day),
+                                          "4. close": str(close if close is not None else day)}
+            for day in days}
+
+
+def stored(store):
+    frame = store.read(KEY)
+    return list(frame.index), list(frame["open"]), list(frame["close"])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SeriesStore(str(tmp_path))
+
+
+def test_merge_appends_new_points(store):
+    assert store.merge(KEY, rows(3, 1, 2)) == 3
+    assert store.merge(KEY, rows(4, 5)) == 2
+
+    assert stored(store) == ([JANUARY + day * DAY for day in range(5)],
+                             [1.5, 2.5, 3.5, 4.5, 5.5], [1.0, 2.0, 3.0, 4.0, 5.0])
+    assert store.last_timestamp(KEY) == JANUARY + 4 * DAY
+    assert store.meta(KEY)["fields"] == ["1. open", "4. close"]
+
+
+def test_merging_the_same_points_twice_is_a_no_op(store):
+    store.merge(KEY, rows(1, 2, 3))
+
+    assert store.merge(KEY, rows(2, 3)) == 0
+    assert store.meta(KEY)["rows"] == 3
+
+
+def test_revised_points_replace_the_stored_ones(store):
+    store.merge(KEY, rows(1, 2, 3))
+
+    assert store.merge(KEY, rows(2, 3, close=9)) == 2
+    # Day 2 is out of order and appended, day 3 is overwritten
+    assert store.meta(KEY)["rows"] == 4
+    assert stored(store)[2] == [1.0, 9.0, 9.0]
+    assert store.meta(KEY)["rows"] == 3
+
+
+def test_revision_is_finished_after_an_interrupted_write(store, tmp_path, monkeypatch):
+    store.merge(KEY, rows(1, 2, 3))
+
+    def crash(self, key, meta):
+        raise OSError("interrupted after the commit")
+    monkeypatch.setattr(SeriesStore, "_apply_revision", crash)
+    with pytest.raises(OSError):
+        store.merge(KEY, rows(3, 4, close=9))
+    monkeypatch.undo()
+
+    # The meta committed the revision and the append, the next read writes it
+    assert stored(SeriesStore(str(tmp_path)))[2] == [1.0, 2.0, 9.0, 9.0]
+    assert "revision" not in store.meta(KEY)
+
+
+def test_revision_is_dropped_when_the_meta_is_not_committed(store, monkeypatch):
+    store.merge(KEY, rows(1, 2, 3))
+
+    def crash(self, key, meta):
+        raise OSError("interrupted before the commit")
+    monkeypatch.setattr(SeriesStore, "_write_meta", crash)
+    with pytest.raises(OSError):
+        store.merge(KEY, rows(3, 4, close=9))
+    monkeypatch.undo()
+
+    assert stored(store)[2] == [1.0, 2.0, 3.0]
+
+
+def test_merge_and_compact_close_their_maps(store, monkeypatch):
+    maps = []
+    mmap_class = seriesstore.mmap.mmap
+
+    def recording_mmap(*args, **kwargs):
+        maps.append(mmap_class(*args, **kwargs))
+        return maps[-1]
+    monkeypatch.setattr(seriesstore.mmap, "mmap", recording_mmap)
+    store.merge(KEY, rows(1, 4))
+    store.merge(KEY, rows(2, 3, 4, close=9))
+    store.compact(KEY)
+
+    # The index and two columns, mapped by the second merge and the compaction
+    assert len(maps) == 6
+    assert all(mapped.closed for mapped in maps)
+
+
+def test_to_json_gives_back_the_api_strings(store):
+    data = {"2024-01-02": {"1. open": "230.5800", "5. volume": "3918000"},
+            "2024-01-01": {"1. open": "229.1000", "5. volume": "4210517"}}
+    store.merge(KEY, data)
+
+    assert store.to_json(KEY) == data
+    # The largest number of decimals wins
+    store.merge(KEY, {"2024-01-03": {"1. open": "231.123456", "5. volume": "1"}})
+    assert store.to_json(KEY, last=2) == {"2024-01-03": {"1. open": "231.123456", "5. volume": "1"},
+                                          "2024-01-02": {"1. open": "230.580000", "5. volume": "3918000"}}
+
+
+def test_out_of_order_points_are_sorted_by_compact(store):
+    store.merge(KEY, rows(1, 4))
+    store.merge(KEY, rows(2, 3))
+    assert not store.meta(KEY)["sorted"]
+
+    assert stored(store)[0] == [JANUARY + day * DAY for day in range(4)]
+    assert store.meta(KEY)["sorted"]
+
+
+def test_interrupted_append_is_ignored(store, tmp_path):
+    store.merge(KEY, rows(1, 2))
+    # Bytes written without committing the meta
+    with open(os.path.join(store._path(KEY), store._INDEX), "ab") as index:
+        index.write(b"\0" * 16)
+
+    assert stored(store)[0] == [JANUARY, JANUARY + DAY]
+    store.merge(KEY, rows(3))
+    assert stored(store)[0] == [JANUARY + day * DAY for day in range(3)]
+
+
+def test_read_returns_the_range(store):
+    store.merge(KEY, rows(1, 2, 3, 4, 5))
+    frame = store.read(KEY, start=JANUARY + DAY, end=JANUARY + 3 * DAY)
+
+    assert list(frame.index) == [JANUARY + day * DAY for day in range(1, 4)]
+    assert list(frame["close"]) == [2.0, 3.0, 4.0]
+    assert store.read(("TIME_SERIES_DAILY", "MSFT", None)) is None
+
+
+def test_read_without_numpy_returns_memoryviews(store, monkeypatch):
+    store.merge(KEY, rows(1, 2, 3))
+    with_numpy = stored(store)
+    monkeypatch.setattr(seriesstore, "_NUMPY_FOUND", False)
+    frame = store.read(KEY)
+
+    assert isinstance(frame["close"], memoryview)
+    assert stored(store) == with_numpy
+    assert store.to_json(KEY, last=1) == {"2024-01-03": {"1. open": "3.5", "4. close": "3"}}
+
+
+def test_to_json_is_newest_first(store):
+    store.merge(KEY, rows(1, 2, 3))
+
+    assert list(store.to_json(KEY)) == ["2024-01-03", "2024-01-02", "2024-01-01"]
+    assert list(store.to_json(KEY, last=2)) == ["2024-01-03", "2024-01-02"]
+
+
+def test_is_fresh(store):
+    assert not store.is_fresh(KEY, DAY)
+    store.merge(KEY, rows(1))
+
+    assert store.is_fresh(KEY, DAY, now=JANUARY + 49 * DAY)
+    assert not store.is_fresh(KEY, DAY, now=JANUARY + 51 * DAY)
+
+
+class CompactTransport(object):
+    """Replays the synthetic full series, compact calls get its last 100
+    points with the newest one revised and one more point"""
+
+    def __init__(self):
+        self.replay = ReplayTransport(RESPONSES)
+        self.urls = []
+
+    def get(self, url, headers=None, proxy=None):
+        self.urls.append(url)
+        if "outputsize=compact" not in url:
+            return self.replay.get(url)
+        full = self.replay.get(url.replace("outputsize=compact", "outputsize=full")).json()
+        series = full["Time Series (Daily)"]
+        compact = dict(list(series.items())[:100])
+        compact["2024-12-31"] = dict(compact["2024-12-31"], **{"4. close": "1.5"})
+        compact = dict({"2025-01-02": compact["2024-12-31"]}, **compact)
+        full["Meta Data"]["4. Output Size"] = "Compact"
+        full["Time Series (Daily)"] = compact
+        return TransportResponse(200, json.dumps(full).encode())
+
+
+def test_full_calls_download_compact_once_the_history_is_stored(store, monkeypatch):
+    transport = CompactTransport()
+    client = TimeSeries(key="test", store=store, transport=transport)
+    full, _ = client.get_daily("IBM", outputsize="full")
+    monkeypatch.setattr(seriesstore.time, "time", lambda: JANUARY + 366 * DAY)
+    merged, _ = client.get_daily("IBM", outputsize="full")
+
+    assert ["outputsize=full" in url for url in transport.urls] == [True, False]
+    assert list(merged) == ["2025-01-02"] + list(full)
+    assert float(merged["2024-12-31"]["4. close"]) == 1.5
+    # The points served from the store keep the api strings
+    assert {label: row for label, row in merged.items() if label < "2024-12-31"} == \
+        {label: row for label, row in full.items() if label < "2024-12-31"}
@@ -0,0 +1,134 @@
+import io
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage.fundamentaldata import FundamentalData  # noqa: E402
+from alpha_vantage.snapshots import LocalBackend, S3Backend, SnapshotStore  # noqa: E402
+from alpha_vantage.transport import TransportResponse  # noqa: E402
+
+DAY = 86400
+URL = "https://www.alphavantage.co/query?function=INCOME_STATEMENT&symbol=IBM&apikey=secret"
+# 2024-11-01T00:00:00Z
+NOVEMBER = 1730419200
+# 2024-09-30T00:00:00Z
+SEPTEMBER_30 = 1727654400
+REPORTS = {"symbol": "IBM",
+           "annualReports": [{"fiscalDateEnding": "2023-12-31", "totalRevenue": "61860000000"}],
+           "quarterlyReports": [{"fiscalDateEnding": "2024-06-30", "totalRevenue": "15770000000"},
+                                {"fiscalDateEnding": "2024-09-30", "totalRevenue": "14968000000"}]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path))
+
+
+def test_local_backend_round_trip(tmp_path):
+    backend = LocalBackend(str(tmp_path))
+    backend.put("OVERVIEW/key.json", b"{}")
+
+    assert backend.get("OVERVIEW/key.json") == b"{}"
+    assert backend.get("OVERVIEW/missing.json") is None
+
+
+def test_s3_backend_round_trip():
+    client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="test",
+                          aws_secret_access_key="test")
+    backend = S3Backend("bucket", prefix="/snapshots/", client=client)
+    with Stubber(client) as stubber:
+        stubber.add_response("put_object", {}, {"Bucket": "bucket", "Key": "snapshots/OVERVIEW/key.json",
+                                                "Body": b"{}", "ContentType": "application/json"})
+        stubber.add_response("get_object", {"Body": io.BytesIO(b"{}")},
+                             {"Bucket": "bucket", "Key": "snapshots/OVERVIEW/key.json"})
+        stubber.add_client_error("get_object", service_error_code="NoSuchKey", http_status_code=404)
+        backend.put("OVERVIEW/key.json", b"{}")
+
+        assert backend.get("OVERVIEW/key.json") == b"{}"
+        assert backend.get("OVERVIEW/missing.json") is None
+        stubber.assert_no_pending_responses()
+
+
+def test_other_functions_are_not_kept(store):
+    assert store.put("TIME_SERIES_DAILY", URL, {"data": []}) is None
+    assert store.get("TIME_SERIES_DAILY", URL) is None
+
+
+@pytest.mark.parametrize("message", ["Note", "Information", "Error Message"])
+def test_messages_are_not_kept(store, message):
+    assert store.put("OVERVIEW", URL, {message: "Thank you for using Alpha Vantage!"}, now=NOVEMBER) is None
+    assert store.get("OVERVIEW", URL, now=NOVEMBER) is None
+
+
+def test_rate_limit_note_is_not_kept_without_treat_info_as_error(store):
+    class LimitedTransport(object):
+        def __init__(self):
+            self.bodies = [{"Note": "Our standard API rate limit is 25 requests per day"}, REPORTS]
+
+        def get(self, url, headers=None, proxy=None):
+            return TransportResponse(200, json.dumps(self.bodies.pop(0)).encode())
+
+    fd = FundamentalData("demo", snapshots=store, transport=LimitedTransport(), treat_info_as_error=False)
+    # The unformatted call, a limit message has no data to format
+    call = FundamentalData.get_income_statement_quarterly.__wrapped__
+    call(fd, "IBM")
+
+    assert call(fd, "IBM")[0] == REPORTS
+    assert fd.transport.bodies == []
+
+
+def test_reports_expire_after_the_next_quarter_and_its_lag(store):
+    expires_at = store.put("INCOME_STATEMENT", URL, REPORTS, now=NOVEMBER)
+
+    # The quarters are 92 days apart, the next one is published 30 days later
+    assert expires_at == SEPTEMBER_30 + 92 * DAY + 30 * DAY
+    assert store.get("INCOME_STATEMENT", URL, now=expires_at - 1) == REPORTS
+    assert store.get("INCOME_STATEMENT", URL, now=expires_at) is None
+
+
+def test_overdue_reports_are_checked_every_min_ttl(store):
+    assert store.put("INCOME_STATEMENT", URL, REPORTS, now=NOVEMBER + 365 * DAY) == NOVEMBER + 366 * DAY
+
+
+def test_series_expire_once_the_next_period_is_over(store):
+    series = {"data": [{"date": "2024-09-01", "value": "1"}, {"date": "2024-10-01", "value": "2"}]}
+
+    # Points 30 days apart: the November point is published 30 days after it starts
+    assert store.put("CPI", URL, series, now=NOVEMBER) == NOVEMBER + 29 * DAY
+
+
+def test_overview_is_kept_min_ttl(store):
+    assert store.put("OVERVIEW", URL, {"Symbol": "IBM"}, now=NOVEMBER) == NOVEMBER + DAY
+
+
+def test_snapshots_are_read_back_from_the_backend(store, tmp_path):
+    store.put("INCOME_STATEMENT", URL, REPORTS, now=NOVEMBER)
+    reopened = SnapshotStore(str(tmp_path))
+
+    assert reopened.get("INCOME_STATEMENT", URL.replace("secret", "other"), now=NOVEMBER) == REPORTS
+    with open(os.path.join(str(tmp_path), SnapshotStore._name("INCOME_STATEMENT", URL))) as snapshot:
+        assert "secret" not in snapshot.read()
+
+
+def test_annual_and_quarterly_views_share_one_call(store):
+    class ReportsTransport(object):
+        calls = 0
+
+        def get(self, url, headers=None, proxy=None):
+            self.calls += 1
+            return TransportResponse(200, json.dumps(REPORTS).encode())
+
+    fd = FundamentalData("demo", snapshots=store, transport=ReportsTransport())
+    quarterly, _ = fd.get_income_statement_quarterly("IBM")
+    annual, _ = fd.get_income_statement_annual("IBM")
+
+    assert fd.transport.calls == 1
+    assert list(quarterly["fiscalDateEnding"]) == ["2024-06-30", "2024-09-30"]
+    assert list(annual["fiscalDateEnding"]) == ["2023-12-31"]
@@ -0,0 +1,201 @@
+import math
+import os
+import random
+import sys
+from decimal import Decimal
+
+import pytest
+from botocore.stub import ANY, Stubber
+
+# The Lambda modules live in the lambda asset directory and the alpha_vantage
+# package in the Lambda layer, neither is on the path
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, "..", "..", "lambda"))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "Layers", "alpha_vantage_layer", "python"))
+# The consumer reads its settings and creates its table when imported
+os.environ.setdefault("DYNAMODB_TABLE_NAME", "ticks")
+os.environ.setdefault("INDICATOR_TABLE_NAME", "indicators")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import data_consumer_lambda  # noqa: E402
+import numpy  # noqa: E402
+import streaming_indicators as si  # noqa: E402
+from alpha_vantage import localindicators  # noqa: E402
+
+
+def ticks(count=300, seed=11):
+    """Close, high, low and volume of a random walk"""
+    rng = random.Random(seed)
+    price = 100.0
+    result = []
+    for _ in range(count):
+        price *= 1 + rng.gauss(0, 0.01)
+        result.append((price, price * (1 + rng.uniform(0, 0.01)), price * (1 - rng.uniform(0, 0.01)),
+                       float(rng.randint(1000, 100000))))
+    return result
+
+
+def stream(indicator, data):
+    """The values of an indicator after every tick"""
+    outputs = []
+    for close, high, low, volume in data:
+        indicator.update(close, high, low, volume)
+        outputs.append(indicator.values())
+    return outputs
+
+
+def column(outputs, suffix=""):
+    return numpy.array([values.get(suffix, numpy.nan) for values in outputs])
+
+
+def assert_same(streamed, batch):
+    assert numpy.array_equal(numpy.isnan(streamed), numpy.isnan(batch))
+    numpy.testing.assert_allclose(streamed[~numpy.isnan(batch)], batch[~numpy.isnan(batch)], rtol=1e-9)
+
+
+DATA = ticks()
+CLOSE = numpy.array([tick[0] for tick in DATA])
+HIGH = numpy.array([tick[1] for tick in DATA])
+LOW = numpy.array([tick[2] for tick in DATA])
+VOLUME = numpy.array([tick[3] for tick in DATA])
+
+
+@pytest.mark.parametrize("period", [1, 5, 26])
+def test_ema_matches_the_batch_computation(period):
+    assert_same(column(stream(si.EMA(period), DATA)), localindicators._ema(CLOSE, period))
+
+
+@pytest.mark.parametrize("period", [1, 7, 20])
+def test_sma_matches_the_batch_computation(period):
+    # Several laps of the ring buffer, where the sums are rebuilt
+    assert_same(column(stream(si.SMA(period), DATA)), localindicators._sma(CLOSE, period))
+
+
+def test_rsi_matches_the_batch_computation():
+    assert_same(column(stream(si.RSI(14), DATA)), localindicators._rsi(CLOSE, 14))
+
+
+def test_macd_matches_the_batch_computation():
+    outputs = stream(si.MACD(), DATA)
+    macd = localindicators._ema(CLOSE, 12) - localindicators._ema(CLOSE, 26)
+    signal = localindicators._ema(macd, 9)
+    # The streamed values start with the signal line
+    macd[numpy.isnan(signal)] = numpy.nan
+
+    assert_same(column(outputs), macd)
+    assert_same(column(outputs, "_signal"), signal)
+    assert_same(column(outputs, "_hist"), macd - signal)
+
+
+def test_bollinger_bands_match_the_batch_computation():
+    outputs = stream(si.BollingerBands(20, 2.0), DATA)
+    middle = localindicators._sma(CLOSE, 20)
+    deviation = numpy.array([numpy.nan] * 19 + [CLOSE[end - 19:end + 1].std() for end in range(19, len(CLOSE))])
+
+    assert_same(column(outputs, "_middle"), middle)
+    assert_same(column(outputs, "_upper"), middle + 2.0 * deviation)
+    assert_same(column(outputs, "_lower"), middle - 2.0 * deviation)
+
+
+def test_atr_matches_the_batch_computation():
+    previous = numpy.concatenate([[numpy.nan], CLOSE[:-1]])
+    true_range = numpy.fmax(HIGH - LOW, numpy.maximum(numpy.abs(HIGH - previous), numpy.abs(LOW - previous)))
+    true_range[0] = numpy.nan
+
+    assert_same(column(stream(si.ATR(14), DATA)),
+                localindicators._ema(true_range, 14, alpha=1.0 / 14))
+
+
+def test_obv_and_vwap_match_the_batch_computation():
+    direction = numpy.sign(numpy.diff(CLOSE, prepend=numpy.nan))
+    direction[0] = 1.0
+
+    assert_same(column(stream(si.OBV(), DATA)), numpy.cumsum(direction * VOLUME))
+    assert_same(column(stream(si.VWAP(), DATA)), numpy.cumsum(CLOSE * VOLUME) / numpy.cumsum(VOLUME))
+
+
+def new_set():
+    return si.IndicatorSet({"ema": si.EMA(12), "sma": si.SMA(20), "rsi": si.RSI(14), "macd": si.MACD(),
+                            "bbands": si.BollingerBands(20), "atr": si.ATR(14), "vwap": si.VWAP(),
+                            "obv": si.OBV()})
+
+
+@pytest.mark.parametrize("split", [0, 1, 10, 33, 150])
+def test_restored_state_continues_like_the_original(split):
+    uninterrupted = new_set()
+    for tick in DATA:
+        uninterrupted.update(*tick)
+    restored = new_set()
+    for tick in DATA[:split]:
+        restored.update(*tick)
+    restored = si.IndicatorSet.from_bytes(restored.to_bytes())
+    for tick in DATA[split:]:
+        restored.update(*tick)
+
+    assert restored.values() == uninterrupted.values()
+    assert set(restored.values()) == {"ema", "sma", "rsi", "macd", "macd_signal", "macd_hist", "bbands_upper",
+                                      "bbands_middle", "bbands_lower", "atr", "vwap", "obv"}
+
+
+def test_warming_up_indicators_have_no_values():
+    indicators = new_set()
+    indicators.update(1.0, volume=10.0)
+
+    assert indicators.values() == {"vwap": 1.0, "obv": 10.0}
+
+
+def test_state_of_another_version_is_rejected():
+    blob = bytearray(si.EMA(5).to_bytes())
+    blob[1] = si._VERSION + 1
+
+    with pytest.raises(ValueError):
+        si.Indicator.from_bytes(bytes(blob))
+
+
+def test_window_sums_do_not_drift():
+    sma = si.SMA(3)
+    for value in [1e12, 1.0, 1.0, 1.0, 0.1, 0.2, 0.3] * 100:
+        sma.update(value)
+
+    assert math.isclose(sma.values()[""], 0.2, rel_tol=1e-12)
+
+
+def quote(rate, last_refreshed):
+    return {"ticker": "BTCUSD", "exchange_rate": str(rate), "bid_price": str(rate - 1),
+            "ask_price": str(rate + 1), "last_refreshed": last_refreshed}
+
+
+def test_consumer_resumes_from_the_stored_state():
+    stored = data_consumer_lambda.new_indicator_set()
+    for rate in range(100, 140):
+        stored.update(float(rate))
+    key = {"ticker": "BTCUSD"}
+    states = {}
+    with Stubber(data_consumer_lambda.indicator_table.meta.client) as stubber:
+        stubber.add_response("get_item", {"Item": {"state": {"B": stored.to_bytes()},
+                                                   "last_refreshed": {"S": "2025-01-01 10:00:00"}}},
+                             {"TableName": "indicators", "Key": key, "ConsistentRead": True})
+        values = data_consumer_lambda.update_indicators(states, quote(140, "2025-01-01 10:01:00"))
+        # Same tick again, from a Kinesis retry
+        again = data_consumer_lambda.update_indicators(states, quote(140, "2025-01-01 10:01:00"))
+        stubber.add_response("put_item", {}, {"TableName": "indicators", "Item": dict(
+            key, state=ANY, last_refreshed="2025-01-01 10:01:00")})
+        data_consumer_lambda.save_indicator_state("BTCUSD", *states["BTCUSD"])
+        stubber.assert_no_pending_responses()
+
+    stored.update(140.0)
+    assert values == again
+    # The bid and ask spread is not a bar range, no ATR is kept
+    assert not any(name.startswith("atr") for name in values)
+    assert values == {name: Decimal(str(round(value, 8)))
+                      for name, value in stored.values().items()}
+
+
+def test_consumer_starts_new_tickers_from_scratch():
+    with Stubber(data_consumer_lambda.indicator_table.meta.client) as stubber:
+        stubber.add_response("get_item", {}, {"TableName": "indicators", "Key": ANY, "ConsistentRead": True})
+        values = data_consumer_lambda.update_indicators({}, quote(100, "2025-01-01 10:00:00"))
+
+    assert values == {}
@@ -0,0 +1,128 @@
+import os
+import sys
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage import symbols  # noqa: E402
+from alpha_vantage.foreignexchange import ForeignExchange  # noqa: E402
+from alpha_vantage.symbols import SymbolIndex  # noqa: E402
+from alpha_vantage.transport import TransportResponse  # noqa: E402
+
+LISTS = {
+    "physical_currency_list": b"currency code,currency name\nUSD,United States Dollar\nEUR,Euro\n",
+    "digital_currency_list": b"currency code,currency name\nBTC,Bitcoin\nETH,Ethereum\n",
+    "LISTING_STATUS": (b"symbol,name,exchange,assetType,ipoDate,delistingDate,status\n"
+                       b"IBM,International Business Machines Corp,NYSE,Stock,1962-01-02,null,Active\n"
+                       b"IBMN,iShares iBonds Dec 2026 Term Muni Bond ETF,BATS,ETF,2019-04-02,null,Active\n"
+                       b"MSFT,Microsoft Corporation,NASDAQ,Stock,1986-03-13,null,Active\n"
+                       b"AAPL,Apple Inc,NASDAQ,Stock,1980-12-12,null,Active\n"),
+}
+
+
+class ListTransport(object):
+    """Answers the list downloads, or fails them all once down"""
+
+    def __init__(self):
+        self.urls = []
+        self.down = False
+
+    def get(self, url, headers=None, proxy=None):
+        self.urls.append(url)
+        if self.down:
+            return TransportResponse(503, b"")
+        return TransportResponse(200, next(body for name, body in LISTS.items() if name in url))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SymbolIndex("demo", cache_dir=str(tmp_path), transport=ListTransport())
+
+
+def test_trigrams_pad_every_word():
+    assert symbols._trigrams("Ab c") == {" ab", "ab ", " c "}
+
+
+def test_currencies_are_case_insensitive(index):
+    assert index.is_physical_currency("usd")
+    assert index.is_digital_currency("BTC")
+    assert not index.is_physical_currency("BTC")
+    assert index.is_known("eth", "currency")
+    assert not index.is_known("XYZ", "currency")
+
+
+def test_unknown_kind_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.is_known("USD", "bond")
+
+
+def test_lists_are_downloaded_once_and_cached_on_disk(index, tmp_path):
+    index.is_physical_currency("USD")
+    index.is_physical_currency("EUR")
+    assert len(index.transport.urls) == 1
+
+    # A new index reads the fresh cache
+    other = SymbolIndex("demo", cache_dir=str(tmp_path), transport=ListTransport())
+    assert other.is_physical_currency("EUR")
+    assert other.transport.urls == []
+
+
+def test_stale_cache_is_used_when_the_download_fails(index, tmp_path):
+    index.is_physical_currency("USD")
+    other = SymbolIndex("demo", cache_dir=str(tmp_path), ttl=-1, transport=ListTransport())
+    other.transport.down = True
+
+    assert other.is_physical_currency("USD")
+    assert len(other.transport.urls) == 1
+
+
+def test_failed_download_without_cache_raises(index):
+    index.transport.down = True
+
+    with pytest.raises(ValueError):
+        index.physical_currencies()
+
+
+def test_is_symbol(index):
+    assert index.is_symbol("ibm")
+    assert not index.is_symbol("IB")
+    assert not index.is_symbol("ZZZZ")
+
+
+def test_listing_needs_a_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("ALPHAVANTAGE_API_KEY", raising=False)
+
+    with pytest.raises(ValueError):
+        SymbolIndex(cache_dir=str(tmp_path), transport=ListTransport()).is_symbol("IBM")
+
+
+def test_search_ranks_the_symbol_prefixes(index):
+    matches = index.search("IBM")
+
+    assert [match["symbol"] for match in matches[:2]] == ["IBM", "IBMN"]
+    assert matches[0] == {"symbol": "IBM", "name": "International Business Machines Corp",
+                          "exchange": "NYSE", "assetType": "Stock", "matchScore": "1.0000"}
+
+
+def test_search_matches_the_names(index):
+    matches = index.search("microsoft", limit=1)
+
+    assert [match["symbol"] for match in matches] == ["MSFT"]
+    assert 0 < float(matches[0]["matchScore"]) < 1
+
+
+def test_search_of_blank_keywords(index):
+    assert index.search("  ") == []
+
+
+def test_client_rejects_unknown_currencies_before_calling(index):
+    class NoCallTransport(object):
+        def get(self, url, headers=None, proxy=None):
+            raise AssertionError("the api was called")
+
+    fx = ForeignExchange("demo", symbols=index, transport=NoCallTransport())
+
+    with pytest.raises(ValueError, match="from_currency=XYZ"):
+        fx.get_currency_exchange_rate("XYZ", "USD")
@@ -0,0 +1,130 @@
+import os
+import sys
+
+import pytest
+
+# The alpha_vantage package lives in the Lambda layer, not on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Layers", "alpha_vantage_layer", "python"))
+
+from alpha_vantage import transport  # noqa: E402
+from alpha_vantage.timeseries import TimeSeries  # noqa: E402
+from alpha_vantage.transport import (HttpTransport, RecordingTransport, ReplayTransport,  # noqa: E402
+                                     TransportResponse)
+
+URL = "https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol=IBM&apikey=secret&datatype=json"
+QUOTE = b'{"Global Quote": {"01. symbol": "IBM", "05. price": "230.5800"}}'
+
+
+class FixedTransport(object):
+    def __init__(self, response):
+        self.response = response
+        self.urls = []
+
+    def get(self, url, headers=None, proxy=None):
+        self.urls.append(url)
+        return self.response
+
+
+def test_cassette_key_ignores_the_api_key():
+    assert transport.cassette_key(URL) == transport.cassette_key(URL.replace("secret", "other"))
+    assert transport.cassette_key(URL) != transport.cassette_key(URL.replace("IBM", "MSFT"))
+
+
+@pytest.mark.parametrize("content", [QUOTE, b"\xff\xfe not utf-8"])
+def test_cassette_round_trip(tmp_path, content):
+    transport.write_cassette(str(tmp_path), URL, TransportResponse(
+        200, content, {"Content-Type": "application/json", "Set-Cookie": "session"}))
+    response = transport.read_cassette(str(tmp_path), URL.replace("secret", "other"))
+
+    assert response.status_code == 200
+    assert response.content == content
+    # Only the content type is kept
+    assert response.headers == {"Content-Type": "application/json"}
+
+
+def test_cassettes_do_not_keep_the_api_key(tmp_path):
+    transport.write_cassette(str(tmp_path), URL, TransportResponse(200, QUOTE))
+    (cassette,) = os.listdir(str(tmp_path))
+
+    assert "secret" not in (tmp_path / cassette).read_text()
+
+
+def test_missing_recording_is_a_value_error(tmp_path):
+    with pytest.raises(ValueError, match="apikey=\\*\\*\\*"):
+        transport.read_cassette(str(tmp_path), URL)
+
+
+def test_recorded_calls_are_replayed(tmp_path):
+    live = FixedTransport(TransportResponse(200, QUOTE))
+    recorded, _ = TimeSeries(key="live", transport=RecordingTransport(str(tmp_path / "calls"), live)) \
+        .get_quote_endpoint("IBM")
+    replayed, _ = TimeSeries(key="other", transport=ReplayTransport(str(tmp_path / "calls"))) \
+        .get_quote_endpoint("IBM")
+
+    assert len(live.urls) == 1
+    assert replayed == recorded == {"01. symbol": "IBM", "05. price": "230.5800"}
+
+
+def test_replay_injects_latency(tmp_path, monkeypatch):
+    transport.write_cassette(str(tmp_path), URL, TransportResponse(200, QUOTE))
+    sleeps = []
+    monkeypatch.setattr(transport.time, "sleep", sleeps.append)
+    replay = ReplayTransport(str(tmp_path), latency=0.5, jitter=0.25, seed=1)
+    for _ in range(20):
+        replay.get(URL)
+
+    assert all(0.5 <= sleep <= 0.75 for sleep in sleeps)
+    assert len(set(sleeps)) > 1
+
+
+@pytest.mark.parametrize("error", [ConnectionError, TimeoutError("slow")])
+def test_replay_raises_the_injected_errors(tmp_path, error):
+    replay = ReplayTransport(str(tmp_path), error_rate=1.0, errors=[error])
+
+    with pytest.raises(error if isinstance(error, type) else type(error)):
+        replay.get(URL)
+
+
+def test_replay_returns_injected_responses(tmp_path):
+    throttled = TransportResponse(200, b'{"Note": "Thank you for using Alpha Vantage!"}')
+    client = TimeSeries(key="test", transport=ReplayTransport(str(tmp_path), error_rate=1.0, errors=[throttled]))
+
+    with pytest.raises(ValueError, match="Thank you"):
+        client.get_quote_endpoint("IBM")
+
+
+def test_seeded_replays_inject_the_same_errors(tmp_path):
+    transport.write_cassette(str(tmp_path), URL, TransportResponse(200, QUOTE))
+
+    def outcomes():
+        replay = ReplayTransport(str(tmp_path), error_rate=0.5, seed=7)
+        results = []
+        for _ in range(30):
+            try:
+                replay.get(URL)
+                results.append(True)
+            except ConnectionError:
+                results.append(False)
+        return results
+
+    assert outcomes() == outcomes()
+    assert True in outcomes() and False in outcomes()
+
+
+def test_http_transport_uses_the_session():
+    class Response(object):
+        status_code = 200
+        content = QUOTE
+        headers = {"Content-Type": "application/json"}
+
+    class Session(object):
+        def get(self, url, proxies=None, headers=None):
+            self.call = (url, proxies, headers)
+            return Response()
+
+    session = Session()
+    response = HttpTransport(session).get(URL, headers={"a": "b"}, proxy={"https": "proxy"})
+
+    assert session.call == (URL, {"https": "proxy"}, {"a": "b"})
+    assert response.json() == {"Global Quote": {"01. symbol": "IBM", "05. price": "230.5800"}}
+    assert response.text == QUOTE.decode()
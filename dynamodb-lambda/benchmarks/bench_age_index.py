@@ -0,0 +1,89 @@
+"""Benchmark of scan_by_age: consumed capacity and time per age range.
+
+Seeds DynamoDB Local with users having several versions and their LATEST
+items, then reads every user within a few age ranges with:
+
+* the scan of the whole table filtered on age, the scan_by_age of the start
+* the scan of latest-index filtered on age
+* parallel queries over the age-index buckets overlapping the range
+
+Every call passes ReturnConsumedCapacity=TOTAL and the capacity units of
+the responses are summed. All three must find the same users.
+
+    python benchmarks/bench_age_index.py [--users N] [--versions N] [--ranges 25-35,40-42,0-200]
+"""
+import argparse
+
+from boto3.dynamodb.conditions import Attr
+
+import local_dynamodb
+
+import index_query
+import user_store
+from scan_engine import ScanEngine
+
+
+def table_scan(table, min_age, max_age):
+    latest = ScanEngine(table).latest(
+        FilterExpression=Attr("age").between(min_age, max_age) & Attr("timestamp").lt(user_store.LATEST),
+        ReturnConsumedCapacity="TOTAL")
+    return set(latest)
+
+
+def latest_index_scan(table, min_age, max_age):
+    return {item["user_id"] for item in ScanEngine(table).items(
+        IndexName=user_store.LATEST_INDEX, FilterExpression=Attr("age").between(min_age, max_age),
+        ReturnConsumedCapacity="TOTAL")}
+
+
+def age_index_queries(table, min_age, max_age):
+    found = set()
+    conditions = user_store.age_conditions(min_age, max_age)
+    positions = None
+    while True:
+        items, positions = index_query.query_buckets(
+            table, conditions, 1000, positions,
+            IndexName=user_store.AGE_INDEX, ReturnConsumedCapacity="TOTAL")
+        found.update(item["user_id"] for item in items)
+        if not positions:
+            return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    local_dynamodb.add_arguments(parser)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--versions", type=int, default=4)
+    parser.add_argument("--ranges", default="25-35,40-42,0-200")
+    args = parser.parse_args()
+
+    resource = local_dynamodb.connect(args.endpoint)
+    table = local_dynamodb.create_table(resource, args.table, indexes=[
+        (user_store.LATEST_INDEX, user_store.LATEST_INDEX_KEY, None),
+        (user_store.AGE_INDEX, user_store.AGE_BUCKET_KEY, "age"),
+    ])
+    try:
+        latest = {}
+        for version in local_dynamodb.user_versions(args.users, args.versions):
+            latest[version["user_id"]] = version
+        written = local_dynamodb.seed(table, local_dynamodb.user_versions(args.users, args.versions))
+        local_dynamodb.seed(table, (user_store.latest_item(version) for version in latest.values()))
+        print("seeded {} versions of {} users".format(written, args.users))
+
+        meter = local_dynamodb.CapacityMeter(table.meta.client)
+        for age_range in args.ranges.split(","):
+            min_age, max_age = (int(value) for value in age_range.split("-"))
+            expected = {user_id for user_id, version in latest.items() if min_age <= version["age"] <= max_age}
+            print("ages {}-{}: {} users".format(min_age, max_age, len(expected)))
+            for name, read in [("table scan", table_scan), ("latest-index scan", latest_index_scan),
+                               ("age-index queries", age_index_queries)]:
+                found, seconds, units = meter.measure(read, table, min_age, max_age)
+                assert found == expected, name
+                print("  {:<18} {:10.1f} RCU  {:7.2f} s".format(name, units, seconds))
+    finally:
+        if not args.keep:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark of batch_read_users at several request sizes.
+
+Seeds DynamoDB Local with users having several versions and their LATEST
+items, then reads 10, 100 and 1000 random users with:
+
+* the loop of batch_read_users before, one Query after the other
+* one Query per user on a thread pool (the fallback for users without a
+  LATEST item)
+* BatchGetItem on the LATEST items, 100 keys per call, calls in parallel
+
+All three must return the same latest versions.
+
+    python benchmarks/bench_batch_read.py [--users N] [--sizes 10,100,1000] [--workers N]
+"""
+import argparse
+import random
+import time
+
+import boto3
+from botocore.config import Config
+
+import local_dynamodb
+
+import user_store
+
+
+def serial_latest(table, user_ids):
+    """The loop of batch_read_users before"""
+    found = {}
+    for user_id in user_ids:
+        response = table.query(KeyConditionExpression=user_store.versions_condition(user_id),
+                               ScanIndexForward=False, Limit=1)
+        if response["Items"]:
+            found[user_id] = response["Items"][0]
+    return found
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    local_dynamodb.add_arguments(parser)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--versions", type=int, default=3)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--workers", type=int, default=user_store.READ_WORKERS)
+    args = parser.parse_args()
+
+    local_dynamodb.connect(args.endpoint)
+    # The pooled client of batch_handler
+    resource = boto3.resource(
+        "dynamodb", endpoint_url=args.endpoint, config=Config(max_pool_connections=args.workers))
+    table = local_dynamodb.create_table(resource, args.table)
+    try:
+        latest = {}
+        for version in local_dynamodb.user_versions(args.users, args.versions):
+            latest[version["user_id"]] = version
+        written = local_dynamodb.seed(table, local_dynamodb.user_versions(args.users, args.versions))
+        local_dynamodb.seed(table, (user_store.latest_item(version) for version in latest.values()))
+        print("seeded {} versions of {} users".format(written, args.users))
+
+        rng = random.Random(3)
+        for size in [int(value) for value in args.sizes.split(",")]:
+            user_ids = ["user-{:07d}".format(number)
+                        for number in rng.sample(range(args.users), min(size, args.users))]
+            expected, serial = timed(serial_latest, table, user_ids)
+            queried, pooled = timed(user_store.query_latest, table, user_ids, args.workers)
+            batched, batch = timed(user_store.batch_get_latest, table, user_ids, args.workers)
+            assert queried == expected and batched == expected
+            print("{:>5} ids  serial {:7.3f} s  pooled queries {:7.3f} s ({:4.1f}x)"
+                  "  BatchGetItem {:7.3f} s ({:4.1f}x)".format(
+                      len(user_ids), serial, pooled, serial / pooled, batch, serial / batch))
+    finally:
+        if not args.keep:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark of the deletion of a user version history.
+
+Seeds DynamoDB Local with one user having a long history and deletes it
+with the loop of delete_user before (one delete_item per version, one after
+the other) and with key-only pages fed to parallel batch_writers at several
+worker counts, reseeding before every run. Reports versions/sec.
+
+    python benchmarks/bench_delete_user.py [--versions N] [--workers 1,4,8,16]
+"""
+import argparse
+import time
+
+from boto3.dynamodb.conditions import Key
+
+import local_dynamodb
+
+import user_store
+
+USER_ID = "user-0000000"
+
+
+def serial_delete(table, user_id):
+    """The loop of delete_user before, with the query paginated so that it
+    is at least complete"""
+    deleted = 0
+    kwargs = {"KeyConditionExpression": Key("user_id").eq(user_id)}
+    while True:
+        response = table.query(**kwargs)
+        for item in response["Items"]:
+            table.delete_item(Key={"user_id": item["user_id"], "timestamp": item["timestamp"]})
+            deleted += 1
+        if "LastEvaluatedKey" not in response:
+            return deleted
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def batched_delete(table, user_id, workers):
+    deleted = 0
+    for page in user_store.item_keys(table, user_id, page_size=5000):
+        deleted += user_store.delete_keys(table, page, workers=workers)
+    return deleted
+
+
+def run(table, versions, name, delete, *args):
+    local_dynamodb.seed(table, local_dynamodb.user_versions(1, versions))
+    start = time.perf_counter()
+    deleted = delete(table, USER_ID, *args)
+    seconds = time.perf_counter() - start
+    assert deleted == versions
+    assert not table.query(KeyConditionExpression=Key("user_id").eq(USER_ID))["Items"]
+    print("{:<12} {:8.2f} s  {:9.0f} versions/s".format(name, seconds, versions / seconds))
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    local_dynamodb.add_arguments(parser)
+    parser.add_argument("--versions", type=int, default=20000)
+    parser.add_argument("--workers", default="1,4,8,16")
+    args = parser.parse_args()
+
+    resource = local_dynamodb.connect(args.endpoint)
+    table = local_dynamodb.create_table(resource, args.table)
+    try:
+        serial = run(table, args.versions, "serial", serial_delete)
+        for workers in [int(value) for value in args.workers.split(",")]:
+            seconds = run(table, args.versions, "workers={}".format(workers), batched_delete, workers)
+            print("{:<12} speedup={:.1f}x".format("", serial / seconds))
+    finally:
+        if not args.keep:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""CPU benchmark of the response path of list and scan results.
+
+No DynamoDB needed: users shaped like the ones create_user writes are put
+in wire format, as the client returns them, and turned into the JSON body
+of a response with:
+
+* the Table resource path: TypeDeserializer on every attribute, then
+  json.dumps calling DecimalEncoder for every number
+* fast_dynamo.to_json_items in one pass, then json.dumps
+* the same with a projection of three attributes
+
+Reports the CPU time of each at several result sizes.
+
+    python benchmarks/bench_fast_dynamo.py [--sizes 1000,10000,100000] [--repeat N]
+"""
+import argparse
+import json
+import time
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+import local_dynamodb
+
+import fast_dynamo
+from pagination import DecimalEncoder
+
+PROJECTION = ["user_id", "name", "age"]
+
+
+def resource_body(items):
+    deserializer = TypeDeserializer()
+    users = [{name: deserializer.deserialize(value) for name, value in item.items()} for item in items]
+    return json.dumps({"users": users}, cls=DecimalEncoder)
+
+
+def fast_body(items):
+    return json.dumps({"users": fast_dynamo.to_json_items(items)}, cls=DecimalEncoder)
+
+
+def projected_body(items):
+    return json.dumps({"users": fast_dynamo.to_json_items(items, PROJECTION)}, cls=DecimalEncoder)
+
+
+def cpu_seconds(function, items, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        function(items)
+        seconds = time.process_time() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    serializer = TypeSerializer()
+    sizes = [int(value) for value in args.sizes.split(",")]
+    wire = [{name: serializer.serialize(value) for name, value in dict(item, version=1).items()}
+            for item in local_dynamodb.user_versions(max(sizes))]
+    assert json.loads(fast_body(wire[:100])) == json.loads(resource_body(wire[:100]))
+
+    for size in sizes:
+        items = wire[:size]
+        resource = cpu_seconds(resource_body, items, args.repeat)
+        fast = cpu_seconds(fast_body, items, args.repeat)
+        projected = cpu_seconds(projected_body, items, args.repeat)
+        print("{:>7} items  resource {:7.3f} s  fast {:7.3f} s ({:.1f}x)  projected {:7.3f} s ({:.1f}x)".format(
+            size, resource, fast, resource / fast, projected, resource / projected))
+
+
+if __name__ == "__main__":
+    main()
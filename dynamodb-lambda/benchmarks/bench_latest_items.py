@@ -0,0 +1,91 @@
+"""Benchmark of the LATEST items against the version queries they replace.
+
+Seeds DynamoDB Local with users having several versions, writes their
+LATEST items with the backfill and compares:
+
+* one user: Query Limit=1 on the versions vs GetItem on the LATEST item
+* many users: one Query per user vs BatchGetItem on the LATEST items
+* listing: parallel scan of every version merged per user vs parallel scan
+  of latest-index
+
+Every pair must return the same latest versions.
+
+    python benchmarks/bench_latest_items.py [--users N] [--versions N] [--reads N]
+"""
+import argparse
+import random
+import time
+
+from boto3.dynamodb.conditions import Attr
+
+import local_dynamodb
+
+import user_store
+from scan_engine import ScanEngine
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def query_latest(table, user_id):
+    """The lookup of get_user before the LATEST items, minus the LATEST item"""
+    response = table.query(KeyConditionExpression=user_store.versions_condition(user_id),
+                           ScanIndexForward=False, Limit=1)
+    return response["Items"][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    local_dynamodb.add_arguments(parser)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--versions", type=int, default=5)
+    parser.add_argument("--reads", type=int, default=1000)
+    parser.add_argument("--segments", type=int, default=8)
+    args = parser.parse_args()
+
+    resource = local_dynamodb.connect(args.endpoint)
+    table = local_dynamodb.create_table(resource, args.table,
+                                        indexes=[("latest-index", "latest_of", None)])
+    try:
+        # Imported once TABLE_NAME points at the benchmark table
+        import backfill_latest
+
+        written = local_dynamodb.seed(table, local_dynamodb.user_versions(args.users, args.versions))
+        result, seconds = timed(backfill_latest.lambda_handler, {"segments": args.segments}, None)
+        print("seeded {} versions, backfilled {} LATEST items in {:.1f} s".format(
+            written, result["written"], seconds))
+
+        user_ids = ["user-{:07d}".format(number)
+                    for number in random.Random(2).sample(range(args.users), min(args.reads, args.users))]
+
+        queried, query_seconds = timed(lambda: [query_latest(table, user_id) for user_id in user_ids])
+        got, get_seconds = timed(lambda: [user_store.get_latest(table, user_id) for user_id in user_ids])
+        assert got == queried
+        print("single user   query Limit=1 {:7.2f} ms  GetItem {:7.2f} ms  speedup={:.1f}x".format(
+            1000 * query_seconds / len(user_ids), 1000 * get_seconds / len(user_ids),
+            query_seconds / get_seconds))
+
+        batch, batch_seconds = timed(user_store.batch_get_latest, table, user_ids)
+        assert batch == {item["user_id"]: item for item in queried}
+        print("{} users    queries    {:7.2f} s   BatchGetItem {:5.2f} s  speedup={:.1f}x".format(
+            len(user_ids), query_seconds, batch_seconds, query_seconds / batch_seconds))
+
+        engine = ScanEngine(table, segments=args.segments)
+        merged, merge_seconds = timed(
+            engine.latest, FilterExpression=Attr("timestamp").lt(user_store.LATEST))
+        listed, index_seconds = timed(lambda: {
+            item["user_id"]: user_store.from_latest(item)
+            for item in engine.items(IndexName=user_store.LATEST_INDEX)})
+        assert listed == merged
+        print("listing       scan+merge {:7.2f} s   latest-index {:5.2f} s  speedup={:.1f}x".format(
+            merge_seconds, index_seconds, merge_seconds / index_seconds))
+    finally:
+        if not args.keep:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark of query_recent_users on a large table.
+
+Seeds DynamoDB Local with 1M items (users with several versions created
+over a year, and their LATEST items), then reads the newest limit users
+created in windows of a few hours to a month before the end of the year:
+
+* the scan of latest-index filtered on created_at and sorted, what
+  query_recent_users did before, which has to read every user to know the
+  newest ones
+* created-index read newest day first, stopping once limit users are found
+
+Both must return the same creation times in the same order. Reports time and the
+capacity units of ReturnConsumedCapacity=TOTAL.
+
+    python benchmarks/bench_recent_users.py [--items N] [--versions N] [--limit N] [--hours 24,168,720]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from boto3.dynamodb.conditions import Attr
+
+import local_dynamodb
+
+import index_query
+import user_store
+from scan_engine import ScanEngine
+
+START = datetime(2025, 1, 1)
+SPAN_DAYS = 365
+
+
+def scan_newest(table, since, until, limit):
+    items = ScanEngine(table, segments=8).items(
+        IndexName=user_store.LATEST_INDEX,
+        FilterExpression=Attr("created_at").between(since.isoformat(), until.isoformat()),
+        ReturnConsumedCapacity="TOTAL")
+    newest = sorted(items, key=lambda item: item["created_at"], reverse=True)[:limit]
+    return [item["created_at"] for item in newest]
+
+
+def index_newest(table, since, until, limit):
+    items, _ = index_query.query_in_order(
+        table, user_store.created_conditions(since, until), limit, user_store.CREATED_INDEX_KEYS,
+        IndexName=user_store.CREATED_INDEX, ScanIndexForward=False, ReturnConsumedCapacity="TOTAL")
+    return [item["created_at"] for item in items]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    local_dynamodb.add_arguments(parser)
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--versions", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--hours", default="24,168,720")
+    args = parser.parse_args()
+
+    resource = local_dynamodb.connect(args.endpoint)
+    table = local_dynamodb.create_table(resource, args.table, indexes=[
+        (user_store.LATEST_INDEX, user_store.LATEST_INDEX_KEY, None),
+        (user_store.CREATED_INDEX, user_store.CREATED_DAY_KEY, "created_at"),
+    ])
+    try:
+        users = args.items // (args.versions + 1)
+        latest = {}
+        for version in local_dynamodb.user_versions(users, args.versions, start=START, span_days=SPAN_DAYS):
+            latest[version["user_id"]] = version
+        written = local_dynamodb.seed(table, local_dynamodb.user_versions(
+            users, args.versions, start=START, span_days=SPAN_DAYS))
+        written += local_dynamodb.seed(table, (user_store.latest_item(version) for version in latest.values()))
+        print("seeded {} items, {} users".format(written, users))
+
+        # The window ends just after the last user created
+        until = max(version["created_at"] for version in latest.values())
+        until = datetime.fromisoformat(until) + timedelta(seconds=1)
+        meter = local_dynamodb.CapacityMeter(table.meta.client)
+        for hours in [int(value) for value in args.hours.split(",")]:
+            since = until - timedelta(hours=hours)
+            scanned, scan_seconds, scan_units = meter.measure(scan_newest, table, since, until, args.limit)
+            queried, index_seconds, index_units = meter.measure(index_newest, table, since, until, args.limit)
+            assert queried == scanned
+            print("last {:>4} h  scan {:7.2f} s {:9.1f} RCU   created-index {:6.3f} s {:7.1f} RCU"
+                  "  speedup={:.0f}x".format(hours, scan_seconds, scan_units, index_seconds,
+                                             index_units, scan_seconds / index_seconds))
+    finally:
+        if not args.keep:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark of the parallel scan engine against a serial paginated scan.
+
+Seeds DynamoDB Local with 100k items (users with several versions) and
+compares the latest-version listing done by list_users before (one scan
+call after the other, following LastEvaluatedKey) with ScanEngine at
+several segment counts. Both must find the same latest versions.
+
+    python benchmarks/bench_scan_engine.py [--items N] [--versions N] [--segments 1,4,8,16]
+"""
+import argparse
+import time
+
+import local_dynamodb
+
+from scan_engine import ScanEngine
+
+
+def serial_latest(table, **scan_kwargs):
+    """The listing before the engine, with pagination added so that it is
+    at least complete"""
+    latest = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response["Items"]:
+            current = latest.get(item["user_id"])
+            if current is None or item["timestamp"] > current["timestamp"]:
+                latest[item["user_id"]] = item
+        if "LastEvaluatedKey" not in response:
+            return latest
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    local_dynamodb.add_arguments(parser)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--versions", type=int, default=4)
+    parser.add_argument("--segments", default="1,4,8,16")
+    args = parser.parse_args()
+
+    resource = local_dynamodb.connect(args.endpoint)
+    table = local_dynamodb.create_table(resource, args.table)
+    try:
+        start = time.perf_counter()
+        written = local_dynamodb.seed(
+            table, local_dynamodb.user_versions(args.items // args.versions, args.versions))
+        print("seeded {} items in {:.1f} s".format(written, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        expected = serial_latest(table)
+        serial = time.perf_counter() - start
+        print("serial scan     {:8.2f} s  {} users".format(serial, len(expected)))
+
+        for segments in [int(value) for value in args.segments.split(",")]:
+            start = time.perf_counter()
+            latest = ScanEngine(table, segments=segments).latest()
+            seconds = time.perf_counter() - start
+            assert latest == expected
+            print("segments={:<4}   {:8.2f} s  speedup={:.1f}x".format(segments, seconds, serial / seconds))
+
+        start = time.perf_counter()
+        projected = ScanEngine(table, segments=8).latest(projection=["age"])
+        print("segments=8 projected on age {:8.2f} s  {} users".format(
+            time.perf_counter() - start, len(projected)))
+    finally:
+        if not args.keep:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark of update_user latency.
+
+Seeds DynamoDB Local with users and their LATEST items, then updates the
+age of random users with:
+
+* the read-modify-write of update_user before: Query Limit=1 for the latest
+  version, then put_item of the whole new version
+* a consistent GetItem on the LATEST item, then one TransactWriteItems
+  writing the new version and updating the changed fields of LATEST
+
+and reports the mean, p50 and p99 latency of each. A last run has threads
+updating the same user at once: every update either lands or gets a
+VersionConflict, none is lost.
+
+    python benchmarks/bench_update_user.py [--users N] [--updates N] [--threads N]
+"""
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import local_dynamodb
+
+import user_store
+
+
+def read_modify_write(table, user_id, age):
+    """The update_user before"""
+    current = table.query(KeyConditionExpression=user_store.versions_condition(user_id),
+                          ScanIndexForward=False, Limit=1)["Items"][0]
+    updated = dict(current, age=age, timestamp=datetime.utcnow().isoformat())
+    table.put_item(Item=updated)
+
+
+def transactional(table, user_id, age):
+    current = user_store.get_latest(table, user_id, consistent=True)
+    user_store.update_version(table, current, {"age": age},
+                              datetime.utcnow().isoformat())
+
+
+def latencies(function, table, user_ids, rng):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        function(table, user_id, rng.randint(18, 90))
+        samples.append(1000 * (time.perf_counter() - start))
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    print("{:<18} mean {:6.2f} ms  p50 {:6.2f} ms  p99 {:6.2f} ms".format(
+        name, statistics.mean(samples), samples[len(samples) // 2],
+        samples[min(len(samples) - 1, int(len(samples) * 0.99))]))
+
+
+def contended(table, user_id, threads, attempts):
+    """threads updating one user, attempts each; returns landed, conflicts"""
+    def worker(number):
+        landed = conflicts = 0
+        for attempt in range(attempts):
+            try:
+                transactional(table, user_id, 18 + (number * attempts + attempt) % 70)
+                landed += 1
+            except user_store.VersionConflict:
+                conflicts += 1
+        return landed, conflicts
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(worker, range(threads)))
+    return sum(landed for landed, _ in results), sum(conflicts for _, conflicts in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    local_dynamodb.add_arguments(parser)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    resource = local_dynamodb.connect(args.endpoint)
+    table = local_dynamodb.create_table(resource, args.table)
+    try:
+        versions = [dict(version, version=1) for version in local_dynamodb.user_versions(args.users)]
+        local_dynamodb.seed(table, versions)
+        local_dynamodb.seed(table, (user_store.latest_item(version) for version in versions))
+
+        rng = random.Random(4)
+        user_ids = [rng.choice(versions)["user_id"] for _ in range(args.updates)]
+        report("read-modify-write", latencies(read_modify_write, table, user_ids, rng))
+        report("transactional", latencies(transactional, table, user_ids, rng))
+
+        user_id = versions[0]["user_id"]
+        before = user_store.get_latest(table, user_id, consistent=True)["version"]
+        landed, conflicts = contended(table, user_id, args.threads, 20)
+        after = user_store.get_latest(table, user_id, consistent=True)["version"]
+        assert after - before == landed
+        print("{} threads on one user: {} updates landed, {} conflicts, version {} -> {}".format(
+            args.threads, landed, conflicts, before, after))
+    finally:
+        if not args.keep:
+            table.delete()
+
+
+if __name__ == "__main__":
+    main()
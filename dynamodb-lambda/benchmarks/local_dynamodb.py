@@ -0,0 +1,133 @@
+"""DynamoDB Local helpers for the benchmarks.
+
+The benchmarks run against DynamoDB Local, started for instance with
+
+    docker run -p 8000:8000 amazon/dynamodb-local -jar DynamoDBLocal.jar -inMemory
+
+They create a throwaway table with the schema of users-learning-table,
+seed it with deterministic users and import the Lambda modules from the
+lambda directory, with TABLE_NAME pointing at that table.
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import boto3
+
+# The handlers and their helpers live in the Lambda asset, not on the path
+LAMBDA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda")
+if LAMBDA_PATH not in sys.path:
+    sys.path.insert(0, LAMBDA_PATH)
+
+DEFAULT_ENDPOINT = "http://localhost:8000"
+# Key attributes declared as numbers, the others are strings
+NUMBER_KEYS = {"age", "age_bucket"}
+
+
+def add_arguments(parser):
+    """Add the DynamoDB Local arguments shared by the benchmarks"""
+    parser.add_argument("--endpoint", default=os.environ.get("DYNAMODB_ENDPOINT", DEFAULT_ENDPOINT))
+    parser.add_argument("--table", default="users-benchmark-{}".format(uuid.uuid4().hex[:8]))
+    parser.add_argument("--keep", action="store_true", help="keep the table after the run")
+
+
+def connect(endpoint):
+    """Point boto3, and the handlers imported afterwards, at DynamoDB Local"""
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = endpoint
+    return boto3.resource("dynamodb", endpoint_url=endpoint)
+
+
+def create_table(resource, name, indexes=()):
+    """Create a table with the users-learning-table keys and email-index.
+
+    indexes: extra GSIs as (index name, partition key, sort key or None),
+    every key attribute is declared as a string unless it is in NUMBER_KEYS
+    """
+    attributes = {"user_id": "S", "timestamp": "S", "email": "S"}
+    gsis = [{
+        "IndexName": "email-index",
+        "KeySchema": [{"AttributeName": "email", "KeyType": "HASH"}],
+        "Projection": {"ProjectionType": "ALL"},
+    }]
+    for index_name, partition_key, sort_key in indexes:
+        key_schema = [{"AttributeName": partition_key, "KeyType": "HASH"}]
+        attributes[partition_key] = "N" if partition_key in NUMBER_KEYS else "S"
+        if sort_key:
+            key_schema.append({"AttributeName": sort_key, "KeyType": "RANGE"})
+            attributes[sort_key] = "N" if sort_key in NUMBER_KEYS else "S"
+        gsis.append({"IndexName": index_name, "KeySchema": key_schema,
+                     "Projection": {"ProjectionType": "ALL"}})
+    table = resource.create_table(
+        TableName=name,
+        KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"},
+                   {"AttributeName": "timestamp", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": attribute, "AttributeType": kind}
+                              for attribute, kind in attributes.items()],
+        GlobalSecondaryIndexes=gsis,
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table.wait_until_exists()
+    os.environ["TABLE_NAME"] = name
+    return table
+
+
+def user_versions(users, versions=1, seed=1, start=datetime(2025, 1, 1), span_days=365):
+    """Yield deterministic user items, versions items per user with
+    increasing timestamps, shaped like the ones create_user writes"""
+    rng = random.Random(seed)
+    for number in range(users):
+        user_id = "user-{:07d}".format(number)
+        created = start + timedelta(seconds=rng.randint(0, span_days * 86400))
+        item = {
+            "user_id": user_id,
+            "name": "User {}".format(number),
+            "email": "user{}@example.com".format(number),
+            "age": rng.randint(18, 90),
+            "phone": "+1{:010d}".format(rng.randint(0, 10 ** 10 - 1)),
+            "address": "{} Main St".format(rng.randint(1, 9999)),
+            "created_at": created.isoformat(),
+        }
+        stamp = created
+        for _ in range(versions):
+            version = dict(item, timestamp=stamp.isoformat(), updated_at=stamp.isoformat())
+            yield version
+            stamp += timedelta(seconds=rng.randint(60, 86400))
+
+
+def seed(table, items):
+    """Write the items with batch_writer and return how many were written"""
+    count = 0
+    with table.batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+            count += 1
+    return count
+
+
+class CapacityMeter:
+    """Sums the ConsumedCapacity of every response of a client"""
+
+    def __init__(self, client):
+        self.units = 0.0
+        self.lock = threading.Lock()
+        client.meta.events.register("after-call.dynamodb", self.record)
+
+    def record(self, parsed, **kwargs):
+        consumed = parsed.get("ConsumedCapacity")
+        if consumed:
+            with self.lock:
+                self.units += consumed.get("CapacityUnits", 0)
+
+    def measure(self, function, *args, **kwargs):
+        """Run function, returns its result, the seconds and the capacity units"""
+        self.units = 0.0
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        return result, time.perf_counter() - start, self.units
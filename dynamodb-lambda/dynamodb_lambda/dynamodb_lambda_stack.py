@@ -2,17 +2,32 @@ from aws_cdk import (
     Stack,
     aws_dynamodb as dynamodb,
     aws_lambda as _lambda,
+    aws_lambda_event_sources as event_sources,
     aws_apigateway as apigateway,
+    aws_secretsmanager as secretsmanager,
+    aws_iam as iam,
+    ArnFormat,
     RemovalPolicy,
     Duration
 )
 from constructs import Construct
 
+# Changes of the users table after its first release, in deployment order.
+# CloudFormation creates at most one GSI per update of a table, so an
+# existing table gets them one deployment at a time with the context value
+# users_table_stage: cdk deploy -c users_table_stage=N deploys the first N.
+# Without it they are all deployed, which a new table takes at once.
+USERS_TABLE_STAGES = ("stream", "latest-index", "age-index", "created-index")
+
 class DynamodbLambdaStack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        stage = self.node.try_get_context("users_table_stage")
+        stage = len(USERS_TABLE_STAGES) if stage is None else int(stage)
+        users_table_changes = USERS_TABLE_STAGES[:stage]
+
         # Create DynamoDB Table
         self.users_table = dynamodb.Table(
             self, "UsersTable",
@@ -30,7 +45,10 @@ class DynamodbLambdaStack(Stack):
             # Enable point-in-time recovery (good practice)
             point_in_time_recovery=True,
             # Billing mode - on-demand for learning (no capacity planning needed)
-            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            # Feeds the invalidations of the lookup caches of the Lambdas
+            stream=(dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
+                    if "stream" in users_table_changes else None)
         )
 
         # Add Global Secondary Index for querying by email
@@ -43,6 +61,76 @@ class DynamodbLambdaStack(Stack):
             # No sort key for this GSI - allows simple email lookups
         )
 
+        # Sparse GSI holding only the LATEST item of every user, so listings
+        # read one item per user instead of every version
+        if "latest-index" in users_table_changes:
+            self.users_table.add_global_secondary_index(
+                index_name="latest-index",
+                partition_key=dynamodb.Attribute(
+                    name="latest_of",
+                    type=dynamodb.AttributeType.STRING
+                )
+            )
+
+        # GSI of the LATEST items by age: one partition per decade, sorted by
+        # age, so an age range reads only the users in it
+        if "age-index" in users_table_changes:
+            self.users_table.add_global_secondary_index(
+                index_name="age-index",
+                partition_key=dynamodb.Attribute(
+                    name="age_bucket",
+                    type=dynamodb.AttributeType.NUMBER
+                ),
+                sort_key=dynamodb.Attribute(
+                    name="age",
+                    type=dynamodb.AttributeType.NUMBER
+                )
+            )
+
+        # GSI of the LATEST items by creation day, sorted by created_at, so
+        # the newest users are read a day at a time
+        if "created-index" in users_table_changes:
+            self.users_table.add_global_secondary_index(
+                index_name="created-index",
+                partition_key=dynamodb.Attribute(
+                    name="created_day",
+                    type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name="created_at",
+                    type=dynamodb.AttributeType.STRING
+                )
+            )
+
+        # Invalidations of the cached user lookups, recorded from the stream
+        # of the users table by minute and polled by the warm Lambdas
+        self.invalidation_table = dynamodb.Table(
+            self, "CacheInvalidationTable",
+            table_name="users-cache-invalidations",
+            partition_key=dynamodb.Attribute(
+                name="bucket",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="sk",
+                type=dynamodb.AttributeType.STRING
+            ),
+            time_to_live_attribute="expires_at",
+            removal_policy=RemovalPolicy.DESTROY,
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST
+        )
+
+        # Secret signing the pagination cursors, so clients cannot forge
+        # or alter the position of a page
+        self.cursor_secret = secretsmanager.Secret(
+            self, "CursorSigningSecret",
+            description="HMAC key of the query API continuation tokens",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                exclude_punctuation=True,
+                password_length=64
+            )
+        )
+
         # Lambda function for basic CRUD operations
         self.crud_lambda = _lambda.Function(
             self, "DynamoDbCrudLambda",
@@ -51,7 +139,9 @@ class DynamodbLambdaStack(Stack):
             code=_lambda.Code.from_asset("lambda"),
             timeout=Duration.seconds(30),
             environment={
-                "TABLE_NAME": self.users_table.table_name
+                "TABLE_NAME": self.users_table.table_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn,
+                "INVALIDATION_TABLE_NAME": self.invalidation_table.table_name
             }
         )
 
@@ -74,15 +164,95 @@ class DynamodbLambdaStack(Stack):
             handler="query_handler.lambda_handler",
             code=_lambda.Code.from_asset("lambda"),
             timeout=Duration.seconds(30),
+            environment={
+                "TABLE_NAME": self.users_table.table_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn,
+                "INVALIDATION_TABLE_NAME": self.invalidation_table.table_name
+            }
+        )
+
+        # One-off Lambda writing the LATEST items of the users created before
+        # them, it re-invokes itself until the whole table is scanned
+        self.backfill_lambda = _lambda.Function(
+            self, "DynamoDbBackfillLatestLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="backfill_latest.lambda_handler",
+            code=_lambda.Code.from_asset("lambda"),
+            function_name="users-latest-backfill",
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            environment={
+                "TABLE_NAME": self.users_table.table_name
+            }
+        )
+
+        # Lambda deleting the versions of users with long histories, invoked
+        # asynchronously by delete_user, it re-invokes itself until done
+        self.purge_lambda = _lambda.Function(
+            self, "DynamoDbPurgeLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="purge_worker.lambda_handler",
+            code=_lambda.Code.from_asset("lambda"),
+            function_name="users-history-purge",
+            timeout=Duration.minutes(15),
+            memory_size=1024,
             environment={
                 "TABLE_NAME": self.users_table.table_name
             }
         )
+        self.crud_lambda.add_environment("PURGE_FUNCTION_NAME", self.purge_lambda.function_name)
+
+        # Lambda recording the cache invalidations of the writes to the users table
+        self.invalidator_lambda = _lambda.Function(
+            self, "DynamoDbCacheInvalidatorLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="cache_invalidator.lambda_handler",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.seconds(30),
+            environment={
+                "INVALIDATION_TABLE_NAME": self.invalidation_table.table_name
+            }
+        )
+        if "stream" in users_table_changes:
+            self.invalidator_lambda.add_event_source(event_sources.DynamoEventSource(
+                self.users_table,
+                starting_position=_lambda.StartingPosition.LATEST,
+                batch_size=100,
+                retry_attempts=3
+            ))
 
         # Grant permissions to Lambda functions
         self.users_table.grant_full_access(self.crud_lambda)
         self.users_table.grant_full_access(self.batch_lambda)
         self.users_table.grant_full_access(self.query_lambda)
+        self.cursor_secret.grant_read(self.crud_lambda)
+        self.cursor_secret.grant_read(self.query_lambda)
+        self.users_table.grant_read_write_data(self.backfill_lambda)
+        # By name, granting on the function itself would be a circular dependency
+        self.backfill_lambda.add_to_role_policy(iam.PolicyStatement(
+            actions=["lambda:InvokeFunction"],
+            resources=[self.format_arn(
+                service="lambda",
+                resource="function",
+                resource_name="users-latest-backfill",
+                arn_format=ArnFormat.COLON_RESOURCE_NAME
+            )]
+        ))
+        self.users_table.grant_read_write_data(self.purge_lambda)
+        self.purge_lambda.grant_invoke(self.crud_lambda)
+        self.purge_lambda.add_to_role_policy(iam.PolicyStatement(
+            actions=["lambda:InvokeFunction"],
+            resources=[self.format_arn(
+                service="lambda",
+                resource="function",
+                resource_name="users-history-purge",
+                arn_format=ArnFormat.COLON_RESOURCE_NAME
+            )]
+        ))
+
+        self.invalidation_table.grant_write_data(self.invalidator_lambda)
+        self.invalidation_table.grant_read_data(self.crud_lambda)
+        self.invalidation_table.grant_read_data(self.query_lambda)
 
         # Create API Gateway for testing
         api = apigateway.RestApi(
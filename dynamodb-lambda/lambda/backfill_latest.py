@@ -0,0 +1,87 @@
+import json
+import boto3
+import os
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+import pagination
+import user_store
+from scan_engine import ScanEngine
+
+# Initialize DynamoDB resource
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(os.environ['TABLE_NAME'])
+lambda_client = boto3.client('lambda')
+
+# Versions read per scan round and threads writing the LATEST items
+PAGE_SIZE = int(os.environ.get('BACKFILL_PAGE_SIZE', '1000'))
+WRITERS = int(os.environ.get('BACKFILL_WRITERS', '16'))
+# Hand over to a new invocation when less time than this is left
+RESERVE_MILLIS = int(os.environ.get('BACKFILL_RESERVE_MILLIS', '60000'))
+
+
+def lambda_handler(event, context):
+    """
+    Writes the LATEST item of every user that has versions, for the users
+    written before the LATEST items existed, and refreshes the keys of the
+    GSIs on the LATEST items for the ones written before those GSIs.
+    The scan is resumable: when the invocation runs out of time it invokes
+    itself asynchronously with the positions of the scan segments. Running it
+    again is harmless, a LATEST item is only written over one mirroring the
+    same version or an older one.
+    """
+    event = event or {}
+    engine = ScanEngine(table, segments=event.get('segments'))
+    positions = None
+    if event.get('positions'):
+        positions = {int(segment): pagination.deserialize_key(key) if key else None
+                     for segment, key in event['positions'].items()}
+    written = event.get('written', 0)
+    scanned = event.get('scanned', 0)
+
+    while True:
+        # The trailing user of a segment page is held back, so every page
+        # holds all the versions of its users
+        latest, positions = engine.latest_page(
+            PAGE_SIZE, positions, FilterExpression=Attr('timestamp').lt(user_store.LATEST))
+        scanned += len(latest)
+        with ThreadPoolExecutor(max_workers=WRITERS) as executor:
+            written += sum(executor.map(put_latest, latest))
+
+        if not positions:
+            print(f"Backfill done: {scanned} users scanned, {written} LATEST items written")
+            return {'scanned': scanned, 'written': written, 'done': True}
+
+        if context is not None and context.get_remaining_time_in_millis() < RESERVE_MILLIS:
+            state = {
+                'segments': engine.segments,
+                'positions': {str(segment): pagination.serialize_key(key) if key else None
+                              for segment, key in positions.items()},
+                'scanned': scanned,
+                'written': written
+            }
+            lambda_client.invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps(state)
+            )
+            print(f"Backfill continues in a new invocation after {scanned} users")
+            return {'scanned': scanned, 'written': written, 'done': False}
+
+
+def put_latest(version):
+    """Write the LATEST item of a version unless a newer one is there,
+    returns 1 when it was written"""
+    item = user_store.latest_item(version)
+    try:
+        table.put_item(
+            Item=item,
+            ConditionExpression='attribute_not_exists(version_timestamp) OR version_timestamp <= :ts',
+            ExpressionAttributeValues={':ts': version['timestamp']}
+        )
+        return 1
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return 0
+        raise
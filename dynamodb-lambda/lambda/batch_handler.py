@@ -1,13 +1,21 @@
 import json
 import boto3
 import os
+from botocore.config import Config
 from datetime import datetime
 from decimal import Decimal
 import uuid
+import fast_dynamo
+import user_store
 
 # Initialize DynamoDB resource
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
+# Batch reads go through a plain low-level client, straight to JSON-ready
+# items, with one connection per reader thread. Not the client of the
+# resource, which would serialize the keys and deserialize the responses again.
+fast_table = fast_dynamo.FastTable(os.environ['TABLE_NAME'], boto3.client(
+    'dynamodb', config=Config(max_pool_connections=user_store.READ_WORKERS)))
 
 class DecimalEncoder(json.JSONEncoder):
     """Helper class to handle Decimal serialization"""
@@ -55,32 +63,32 @@ def batch_write_users(users_data):
                 'body': json.dumps({'error': 'No users data provided'})
             }
         
-        # DynamoDB batch_writer handles batching automatically (max 25 items per batch)
-        with table.batch_writer() as batch:
-            created_users = []
+        created_users = []
+        for user_data in users_data:
+            # Generate user_id if not provided
+            user_id = user_data.get('user_id', str(uuid.uuid4()))
             
-            for user_data in users_data:
-                # Generate user_id if not provided
-                user_id = user_data.get('user_id', str(uuid.uuid4()))
-                
-                user_item = {
-                    'user_id': user_id,
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'name': user_data['name'],
-                    'email': user_data['email'],
-                    'age': user_data.get('age', 0),
-                    'created_at': datetime.utcnow().isoformat(),
-                    'updated_at': datetime.utcnow().isoformat()
-                }
-                
-                # Add optional fields
-                if 'phone' in user_data:
-                    user_item['phone'] = user_data['phone']
-                if 'address' in user_data:
-                    user_item['address'] = user_data['address']
-                
-                batch.put_item(Item=user_item)
-                created_users.append(user_item)
+            user_item = {
+                'user_id': user_id,
+                'timestamp': datetime.utcnow().isoformat(),
+                'name': user_data['name'],
+                'email': user_data['email'],
+                'age': user_store.parse_age(user_data.get('age', 0)),
+                'version': 1,
+                'created_at': datetime.utcnow().isoformat(),
+                'updated_at': datetime.utcnow().isoformat()
+            }
+            
+            # Add optional fields
+            if 'phone' in user_data:
+                user_item['phone'] = user_data['phone']
+            if 'address' in user_data:
+                user_item['address'] = user_data['address']
+            
+            created_users.append(user_item)
+        
+        # Versions are written with their LATEST items, 50 users per transaction
+        user_store.put_versions(table, created_users)
         
         return {
             'statusCode': 201,
@@ -90,6 +98,11 @@ def batch_write_users(users_data):
             }, cls=DecimalEncoder)
         }
         
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
@@ -105,20 +118,15 @@ def batch_read_users(user_ids):
                 'body': json.dumps({'error': 'No user IDs provided'})
             }
         
-        # For batch reads, we need to specify exact keys (partition + sort key)
-        # Since we want the latest version, we'll query each user individually
+        # Parallel BatchGetItem calls on the LATEST items, 100 keys per call,
+        # and parallel queries for the users without one
+        latest = user_store.get_latest_many(fast_table, user_ids)
         found_users = []
         not_found_users = []
         
-        for user_id in user_ids:
-            response = table.query(
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('user_id').eq(user_id),
-                ScanIndexForward=False,  # Latest first
-                Limit=1
-            )
-            
-            if response['Items']:
-                found_users.append(response['Items'][0])
+        for user_id, user in zip(user_ids, latest):
+            if user:
+                found_users.append(user)
             else:
                 not_found_users.append(user_id)
         
@@ -200,25 +208,24 @@ def populate_sample_data():
             }
         ]
         
-        # Use batch write to insert sample data
-        with table.batch_writer() as batch:
-            created_users = []
-            
-            for user_data in sample_users:
-                user_item = {
-                    'user_id': str(uuid.uuid4()),
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'name': user_data['name'],
-                    'email': user_data['email'],
-                    'age': user_data['age'],
-                    'phone': user_data['phone'],
-                    'address': user_data['address'],
-                    'created_at': datetime.utcnow().isoformat(),
-                    'updated_at': datetime.utcnow().isoformat()
-                }
-                
-                batch.put_item(Item=user_item)
-                created_users.append(user_item)
+        created_users = []
+        for user_data in sample_users:
+            user_item = {
+                'user_id': str(uuid.uuid4()),
+                'timestamp': datetime.utcnow().isoformat(),
+                'name': user_data['name'],
+                'email': user_data['email'],
+                'age': user_data['age'],
+                'phone': user_data['phone'],
+                'address': user_data['address'],
+                'version': 1,
+                'created_at': datetime.utcnow().isoformat(),
+                'updated_at': datetime.utcnow().isoformat()
+            }
+            created_users.append(user_item)
+        
+        # Write the sample users with their LATEST items
+        user_store.put_versions(table, created_users)
         
         return {
             'statusCode': 201,
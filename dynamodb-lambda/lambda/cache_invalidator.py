@@ -0,0 +1,25 @@
+import boto3
+import os
+from datetime import datetime
+
+import user_cache
+
+# Initialize DynamoDB resource
+dynamodb = boto3.resource('dynamodb')
+invalidation_table = dynamodb.Table(os.environ['INVALIDATION_TABLE_NAME'])
+
+
+def lambda_handler(event, context):
+    """
+    Reads the DynamoDB stream of the users table and records the lookups the
+    writes make stale: the user of every LATEST item written or deleted, with
+    its new version, and the emails before and after every write.
+    Lambda containers cannot be sent messages, so the warm containers of the
+    API poll these records (see user_cache.InvalidationChannel).
+    """
+    records = user_cache.invalidation_records(event['Records'], datetime.utcnow())
+    with invalidation_table.batch_writer() as batch:
+        for record in records:
+            batch.put_item(Item=record)
+    print(f"Recorded {len(records)} invalidations for {len(event['Records'])} stream records")
+    return {'recorded': len(records)}
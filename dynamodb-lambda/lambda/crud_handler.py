@@ -1,14 +1,30 @@
 import json     # For handling JSON serialization/deserialization
 import boto3    # AWS SDK to interact with DynamoDB
 import os       # For accessing environment variables
+from botocore.config import Config
 from datetime import datetime
 from decimal import Decimal 
-from boto3.dynamodb.conditions import Key
 import uuid    # For generating unique user IDs
+from scan_engine import DEFAULT_SEGMENTS, ScanEngine
+import fast_dynamo
+import pagination
+import user_cache
+import user_store
 
 # Initialize DynamoDB resource using environment variable for table name
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
+# Reads returned as they are go through a plain low-level client, one
+# connection per scan segment. Not the client of the resource, which would
+# serialize the keys and deserialize the responses again.
+fast_table = fast_dynamo.FastTable(os.environ['TABLE_NAME'], boto3.client(
+    'dynamodb', config=Config(max_pool_connections=DEFAULT_SEGMENTS)))
+# Lookups of a user by id go through the cache of the container
+cached_table = user_cache.make_table(fast_table)
+lambda_client = boto3.client('lambda')
+
+# Users with at least this many items are deleted by the purge worker
+PURGE_THRESHOLD = int(os.environ.get('PURGE_THRESHOLD', '1000'))
 
 class DecimalEncoder(json.JSONEncoder):
     """Custom JSONEncoder to convert Decimal types to float.
@@ -37,7 +53,7 @@ def lambda_handler(event, context):
             if path_parameters and 'user_id' in path_parameters:
                 return get_user(path_parameters['user_id'])
             else:
-                return list_users()
+                return list_users(event.get('queryStringParameters') or {})
         elif http_method == 'PUT':
             return update_user(event, path_parameters['user_id'])
         elif http_method == 'DELETE':
@@ -54,6 +70,8 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
+    finally:
+        user_cache.emit_metrics()
 
 def create_user(event):
     """Create a new user. Generates a user_id if not provided, supports optional fields."""
@@ -70,7 +88,8 @@ def create_user(event):
             'timestamp': datetime.utcnow().isoformat(),
             'name': body['name'],
             'email': body['email'],
-            'age': body.get('age', 0),
+            'age': user_store.parse_age(body.get('age', 0)),
+            'version': 1,
             'created_at': datetime.utcnow().isoformat(),
             'updated_at': datetime.utcnow().isoformat()
         }
@@ -81,8 +100,8 @@ def create_user(event):
         if 'address' in body:
             user_item['address'] = body['address']
         
-        # Put item in DynamoDB
-        table.put_item(Item=user_item)
+        # Put the version and the LATEST item of the user in one transaction
+        user_store.put_version(table, user_item)
         
         return {
             'statusCode': 201,
@@ -98,22 +117,23 @@ def create_user(event):
             'statusCode': 400,
             'body': json.dumps({'error': f'Missing required field: {str(e)}'})
         }
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
 
 def get_user(user_id):
     """Get a specific user by user_id record by ID, returns the most recent version."""
     try:
-        # Query for the user (we need to get the latest timestamp)
-        response = table.query(
-            KeyConditionExpression=Key('user_id').eq(user_id),
-            ScanIndexForward=False,  # Sort in descending order (latest first)
-            Limit=1
-        )
-        
-        if response['Items']:
+        # One GetItem on the LATEST item of the user, unless the cache has it
+        user = user_store.get_latest(cached_table, user_id)
+        
+        if user:
             return {
                 'statusCode': 200,
                 'body': json.dumps({
-                    'user': response['Items'][0]
+                    'user': user
                 }, cls=DecimalEncoder)
             }
         else:
@@ -128,29 +148,28 @@ def get_user(user_id):
             'body': json.dumps({'error': str(e)})
         }
 
-def list_users():
-    """Retrieves the latest version of all user records. Uses naive in-memory filtering; not scalable for large datasets."""
+def list_users(query_params=None):
+    """Retrieves one page of the latest version of the user records with parallel segment scans.
+    Pass limit, the next_cursor of the previous page as cursor and format=ndjson as query parameters."""
     try:
-        # Scan the table (not efficient for large tables, but good for learning)
-        response = table.scan()
+        query_params = query_params or {}
+        limit = pagination.parse_limit(query_params.get('limit'))
+        state = pagination.decode_cursor(query_params.get('cursor'), 'list_users')
         
-        # Group by user_id and keep only the latest timestamp
-        users_dict = {}
-        for item in response['Items']:
-            user_id = item['user_id']
-            if user_id not in users_dict or item['timestamp'] > users_dict[user_id]['timestamp']:
-                users_dict[user_id] = item
+        # Segments scan the sparse latest-index in parallel, one item per user
+        latest_items, next_cursor = pagination.scan_page(
+            ScanEngine(fast_table), 'list_users', state, limit, merge_versions=False,
+            IndexName=user_store.LATEST_INDEX)
+        users_list = [user_store.from_latest(item) for item in latest_items]
         
-        users_list = list(users_dict.values())
+        return pagination.page_response('users', users_list, next_cursor,
+                                        ndjson=pagination.wants_ndjson(query_params))
         
+    except ValueError as e:
         return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'users': users_list,
-                'count': len(users_list)
-            }, cls=DecimalEncoder)
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
         }
-        
     except Exception as e:
         return {
             'statusCode': 500,
@@ -159,39 +178,54 @@ def list_users():
 
 def update_user(event, user_id):
     """Update an existing user. Creates a new version (with new timestamp).
+    The body may hold expected_version, the version the client last read;
+    the update is refused with 409 when the user is no longer at it.
     """
     try:
         # Parse request body
         body = json.loads(event['body'])
+        if 'age' in body:
+            body['age'] = user_store.parse_age(body['age'])
         
-        # First, get the current user to check if it exists
-        current_response = table.query(
-            KeyConditionExpression=Key('user_id').eq(user_id),
-            ScanIndexForward=False,
-            Limit=1
-        )
+        # The one read of the update: the new version item is a full copy of
+        # the current one, which DynamoDB cannot copy inside a transaction.
+        # It is strongly consistent so a version number the client just got
+        # back from a write is found, the transaction below checks it again.
+        current_user = user_store.get_latest(table, user_id, consistent=True)
         
-        if not current_response['Items']:
+        if not current_user:
             return {
                 'statusCode': 404,
                 'body': json.dumps({'error': 'User not found'})
             }
         
-        current_user = current_response['Items'][0]
-        
-        # Create updated user item with new timestamp
-        updated_user = current_user.copy()
-        updated_user['timestamp'] = datetime.utcnow().isoformat()
-        updated_user['updated_at'] = datetime.utcnow().isoformat()
+        current_version = current_user.get('version', 0)
+        expected_version = body.get('expected_version', current_version)
+        if expected_version != current_version:
+            return version_conflict(user_id, expected_version, current_version)
         
-        # Update fields from request body
+        # Only the fields that change are sent to the LATEST item
         allowed_fields = ['name', 'email', 'age', 'phone', 'address']
-        for field in allowed_fields:
-            if field in body:
-                updated_user[field] = body[field]
+        changes = {field: body[field] for field in allowed_fields
+                   if field in body and body[field] != current_user.get(field)}
+        
+        if not changes:
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': 'No changes',
+                    'user': current_user
+                }, cls=DecimalEncoder)
+            }
         
-        # Put the updated item
-        table.put_item(Item=updated_user)
+        # Write the new version and update the LATEST item in one transaction,
+        # conditional on the user still being at the version read above
+        try:
+            updated_user = user_store.update_version(
+                table, current_user, changes, datetime.utcnow().isoformat())
+        except user_store.VersionConflict:
+            return version_conflict(user_id, expected_version)
+        user_cache.invalidate_user(user_id, updated_user['version'])
         
         return {
             'statusCode': 200,
@@ -201,36 +235,66 @@ def update_user(event, user_id):
             }, cls=DecimalEncoder)
         }
         
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
 
+def version_conflict(user_id, expected_version, current_version=None):
+    """409 response of an update based on an outdated version"""
+    body = {
+        'error': 'Version conflict',
+        'user_id': user_id,
+        'expected_version': expected_version
+    }
+    if current_version is not None:
+        body['current_version'] = current_version
+    return {
+        'statusCode': 409,
+        'body': json.dumps(body, cls=DecimalEncoder)
+    }
+
 def delete_user(user_id):
     """Deletes all versions of a user record from DynamoDB."""
     try:
-        # First, get all versions of the user
-        response = table.query(
-            KeyConditionExpression=Key('user_id').eq(user_id)
-        )
+        # Keys of the versions of the user and its LATEST item, page by page
+        pages = user_store.item_keys(table, user_id, page_size=PURGE_THRESHOLD)
+        first_page = next(pages, None)
         
-        if not response['Items']:
+        if not first_page:
             return {
                 'statusCode': 404,
                 'body': json.dumps({'error': 'User not found'})
             }
         
-        # Delete all versions
-        deleted_count = 0
-        for item in response['Items']:
-            table.delete_item(
-                Key={
-                    'user_id': item['user_id'],
-                    'timestamp': item['timestamp']
-                }
+        if len(first_page) >= PURGE_THRESHOLD:
+            # Long history: the LATEST item goes now, so the user leaves the
+            # listings, and the purge worker deletes the versions
+            table.delete_item(Key={'user_id': user_id, 'timestamp': user_store.LATEST})
+            user_cache.invalidate_user(user_id)
+            lambda_client.invoke(
+                FunctionName=os.environ['PURGE_FUNCTION_NAME'],
+                InvocationType='Event',
+                Payload=json.dumps({'user_id': user_id})
             )
-            deleted_count += 1
+            return {
+                'statusCode': 202,
+                'body': json.dumps({
+                    'message': 'User deletion started. Its versions are removed in the background.'
+                })
+            }
+        
+        # Delete all versions, in parallel batches
+        deleted_count = user_store.delete_keys(table, first_page)
+        for page in pages:
+            deleted_count += user_store.delete_keys(table, page)
+        user_cache.invalidate_user(user_id)
         
         return {
             'statusCode': 200,
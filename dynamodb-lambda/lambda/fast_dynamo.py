@@ -0,0 +1,184 @@
+import base64
+from types import SimpleNamespace
+
+import boto3
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def _number(text):
+    # Integers stay exact, the rest becomes a float like DecimalEncoder does
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def to_json_value(value):
+    """A DynamoDB wire-format attribute value to a JSON-ready value: strings
+    and numbers, lists for L and the sets, dicts for M, base64 text for
+    binaries"""
+    if 'S' in value:
+        return value['S']
+    if 'N' in value:
+        return _number(value['N'])
+    if 'BOOL' in value:
+        return value['BOOL']
+    if 'NULL' in value:
+        return None
+    if 'M' in value:
+        return to_json_item(value['M'])
+    if 'L' in value:
+        return [to_json_value(element) for element in value['L']]
+    if 'SS' in value:
+        return list(value['SS'])
+    if 'NS' in value:
+        return [_number(element) for element in value['NS']]
+    if 'B' in value:
+        return base64.b64encode(value['B']).decode('ascii')
+    if 'BS' in value:
+        return [base64.b64encode(element).decode('ascii') for element in value['BS']]
+    raise TypeError('Unknown DynamoDB attribute value {}'.format(value))
+
+
+def to_json_item(item, projection=None):
+    """A wire-format item to a dict of JSON-ready values in one pass.
+
+    projection: the attributes to keep (default None, all); the other
+        attributes are skipped without being converted
+    Strings, the bulk of the users, are taken as they are.
+    """
+    result = {}
+    if projection is None:
+        for name, value in item.items():
+            string = value.get('S')
+            result[name] = string if string is not None else to_json_value(value)
+    else:
+        for name in projection:
+            value = item.get(name)
+            if value is not None:
+                string = value.get('S')
+                result[name] = string if string is not None else to_json_value(value)
+    return result
+
+
+def to_json_items(items, projection=None):
+    return [to_json_item(item, projection) for item in items]
+
+
+def _serialize_key(key):
+    return {name: _serializer.serialize(value) for name, value in key.items()}
+
+
+def _deserialize_key(key):
+    return {name: _deserializer.deserialize(value) for name, value in key.items()}
+
+
+def _projected_names(kwargs):
+    """Top level attributes of the ProjectionExpression of a request, None
+    when there is none or it reaches into nested attributes"""
+    expression = kwargs.get('ProjectionExpression')
+    if not expression:
+        return None
+    names = kwargs.get('ExpressionAttributeNames', {})
+    attributes = [names.get(token.strip(), token.strip()) for token in expression.split(',')]
+    if any('.' in attribute or '[' in attribute for attribute in attributes):
+        return None
+    return attributes
+
+
+class FastTable:
+    """Read side of a boto3 Table on the low-level client.
+
+    get_item, query and scan take the arguments of the Table methods
+    (condition objects, Python values in keys and ExpressionAttributeValues)
+    and return the same responses, except that items hold JSON-ready values
+    made in one pass by to_json_item instead of TypeDeserializer Decimals,
+    so json.dumps never calls DecimalEncoder for them. Items of a projected
+    request only have the projected attributes converted.
+    LastEvaluatedKey stays a Python key with Decimal numbers, so it can be
+    passed back as ExclusiveStartKey or to pagination.serialize_key. Writes
+    keep going through the Table: JSON-ready floats are not DynamoDB numbers.
+    """
+
+    def __init__(self, name, client=None):
+        """
+        name: table name
+        client: low-level DynamoDB client (default a new one). Not the
+            client of a Table resource: that one serializes the keys and
+            deserializes the responses again
+        """
+        self.name = name
+        self.client = client or boto3.client('dynamodb')
+        # Like Table.meta.client, for the helpers using the client directly
+        self.meta = SimpleNamespace(client=self.client)
+
+    def _request(self, kwargs):
+        """Table-style arguments to client arguments"""
+        kwargs = dict(kwargs)
+        builder = ConditionExpressionBuilder()
+        names = dict(kwargs.pop('ExpressionAttributeNames', {}))
+        values = dict(kwargs.pop('ExpressionAttributeValues', {}))
+        for argument, is_key_condition in (('KeyConditionExpression', True),
+                                           ('FilterExpression', False)):
+            condition = kwargs.get(argument)
+            if isinstance(condition, ConditionBase):
+                built = builder.build_expression(condition, is_key_condition=is_key_condition)
+                kwargs[argument] = built.condition_expression
+                names.update(built.attribute_name_placeholders)
+                values.update(built.attribute_value_placeholders)
+        if names:
+            kwargs['ExpressionAttributeNames'] = names
+        if values:
+            kwargs['ExpressionAttributeValues'] = {
+                placeholder: _serializer.serialize(value) for placeholder, value in values.items()}
+        for argument in ('Key', 'ExclusiveStartKey'):
+            if argument in kwargs:
+                kwargs[argument] = _serialize_key(kwargs[argument])
+        kwargs['TableName'] = self.name
+        return kwargs
+
+    def _items_response(self, response, projection):
+        response['Items'] = to_json_items(response.get('Items', []), projection)
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = _deserialize_key(response['LastEvaluatedKey'])
+        return response
+
+    def get_item(self, **kwargs):
+        request = self._request(kwargs)
+        response = self.client.get_item(**request)
+        if 'Item' in response:
+            response['Item'] = to_json_item(response['Item'], _projected_names(request))
+        return response
+
+    def query(self, **kwargs):
+        request = self._request(kwargs)
+        return self._items_response(self.client.query(**request), _projected_names(request))
+
+    def scan(self, **kwargs):
+        request = self._request(kwargs)
+        return self._items_response(self.client.scan(**request), _projected_names(request))
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        """BatchGetItem taking Python keys like the one of the Table resource's
+        client. Items of the responses are JSON-ready, the UnprocessedKeys
+        Python keys that can be sent again."""
+        request = {}
+        for name, table_request in RequestItems.items():
+            table_request = dict(table_request)
+            table_request['Keys'] = [_serialize_key(key) for key in table_request['Keys']]
+            request[name] = table_request
+        response = self.client.batch_get_item(RequestItems=request, **kwargs)
+        response['Responses'] = {
+            name: to_json_items(items, _projected_names(request[name]))
+            for name, items in response.get('Responses', {}).items()}
+        unprocessed = {}
+        for name, table_request in (response.get('UnprocessedKeys') or {}).items():
+            table_request = dict(table_request)
+            table_request['Keys'] = [_deserialize_key(key) for key in table_request['Keys']]
+            unprocessed[name] = table_request
+        response['UnprocessedKeys'] = unprocessed
+        return response
@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads querying the buckets of an index in parallel
+DEFAULT_WORKERS = int(os.environ.get('INDEX_QUERY_WORKERS', '8'))
+
+
+def _query_bucket(table, condition, start_key, limit, kwargs):
+    """One Query page of a bucket from start_key"""
+    kwargs = dict(kwargs, KeyConditionExpression=condition, Limit=limit)
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+    response = table.query(**kwargs)
+    return response['Items'], response.get('LastEvaluatedKey')
+
+
+def query_buckets(table, conditions, limit, positions=None, max_workers=None, **query_kwargs):
+    """Read one page of a bucketed GSI with a round of parallel queries.
+
+    conditions: bucket -> KeyConditionExpression of the bucket
+    limit: number of items read over all the buckets left, split evenly,
+        at least one per bucket
+    positions: bucket -> key to resume from (None for its start) of the
+        buckets left, as returned by the previous page (default None, every
+        bucket from the start)
+    query_kwargs: other Query arguments, like IndexName
+    Returns the items, in no particular order, and the positions of the next
+    page, None when every bucket is exhausted.
+    """
+    if positions is None:
+        positions = dict.fromkeys(conditions)
+    if not positions:
+        return [], None
+    # The first limit % len(positions) buckets read one more item
+    share, extra = divmod(limit, len(positions))
+    items = []
+    next_positions = {}
+    workers = min(max_workers or DEFAULT_WORKERS, len(positions))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {bucket: executor.submit(_query_bucket, table, conditions[bucket], key,
+                                           max(share + (number < extra), 1), query_kwargs)
+                   for number, (bucket, key) in enumerate(positions.items())}
+        for bucket, future in futures.items():
+            bucket_items, last_key = future.result()
+            items.extend(bucket_items)
+            if last_key:
+                next_positions[bucket] = last_key
+    return items, next_positions or None
+
+
+def query_in_order(table, conditions, limit, key_names, start=None, max_workers=None, **query_kwargs):
+    """Read the first limit items of buckets read one after the other, for
+    indexes whose buckets are consecutive ranges of the sort key.
+
+    The first bucket is queried alone. While the page is short, the next
+    buckets are queried in rounds of parallel queries, twice as many buckets
+    each round up to max_workers, sharing the items still needed like
+    query_buckets, so a page reads about limit items whatever the number of
+    buckets. The reading stops as soon as limit items are gathered, the
+    buckets after that are never queried.
+
+    conditions: (bucket name, KeyConditionExpression) pairs in reading order
+    key_names: the key attributes of the index and of the table, the position
+        of the next page is the key of the last item returned
+    start: (bucket name, key or None) to resume from, as returned by the
+        previous page (default None, the first bucket from its start)
+    query_kwargs: other Query arguments, like IndexName and ScanIndexForward
+    Returns the items in bucket order and the position of the next page, None
+    when the last bucket is exhausted.
+    """
+    order = [bucket for bucket, _ in conditions]
+    conditions = dict(conditions)
+    start_key = None
+    if start is not None:
+        order = order[order.index(start[0]):]
+        start_key = start[1]
+    max_workers = max(max_workers or DEFAULT_WORKERS, 1)
+    items = []
+    futures = []
+    # Index in order of the first bucket of the round, and its bucket count
+    first = 0
+    window = 1
+    with ThreadPoolExecutor(max_workers=max(min(max_workers, len(order)), 1)) as executor:
+        try:
+            while first < len(order):
+                batch = order[first:first + window]
+                # The items still needed are split over the buckets of the round
+                share, extra = divmod(limit - len(items), len(batch))
+                futures = [executor.submit(_query_bucket, table, conditions[bucket],
+                                           start_key if first + number == 0 else None,
+                                           max(share + (number < extra), 1), query_kwargs)
+                           for number, bucket in enumerate(batch)]
+                for number, bucket in enumerate(batch, first):
+                    bucket_items, last_key = futures[number - first].result()
+                    while True:
+                        needed = limit - len(items)
+                        if len(bucket_items) >= needed:
+                            items.extend(bucket_items[:needed])
+                            if len(bucket_items) > needed or last_key:
+                                return items, (bucket, {name: items[-1][name] for name in key_names})
+                            if number + 1 < len(order):
+                                return items, (order[number + 1], None)
+                            return items, None
+                        items.extend(bucket_items)
+                        if not last_key:
+                            break
+                        # The rest of the bucket comes before the next ones
+                        bucket_items, last_key = _query_bucket(
+                            table, conditions[bucket], last_key, limit - len(items), query_kwargs)
+                first += len(batch)
+                window = min(window * 2, max_workers)
+            return items, None
+        finally:
+            # Buckets of the last round that were not needed
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,222 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+import index_query
+
+# Page size used when the caller does not pass limit, and the largest allowed
+DEFAULT_LIMIT = int(os.environ.get('DEFAULT_PAGE_SIZE', '100'))
+MAX_LIMIT = int(os.environ.get('MAX_PAGE_SIZE', '1000'))
+# Seconds a continuation token stays valid
+CURSOR_TTL = int(os.environ.get('CURSOR_TTL', '3600'))
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+_secret = None
+
+
+class CursorError(ValueError):
+    """Raised for a continuation token that was altered, expired or issued
+    for another operation"""
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """Helper class to handle Decimal serialization"""
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def _signing_secret():
+    """Secret signing the tokens: CURSOR_SECRET for local runs, otherwise the
+    Secrets Manager secret of CURSOR_SECRET_ARN, read once per container"""
+    global _secret
+    if _secret is None:
+        secret = os.environ.get('CURSOR_SECRET')
+        if not secret:
+            response = boto3.client('secretsmanager').get_secret_value(
+                SecretId=os.environ['CURSOR_SECRET_ARN'])
+            secret = response['SecretString']
+        _secret = secret.encode('utf-8')
+    return _secret
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(payload):
+    return _b64encode(hmac.new(_signing_secret(), payload.encode('ascii'),
+                               hashlib.sha256).digest())
+
+
+def serialize_key(key):
+    """DynamoDB key to its JSON-safe wire format, numbers stay exact"""
+    return {name: _serializer.serialize(value) for name, value in key.items()}
+
+
+def deserialize_key(key):
+    return {name: _deserializer.deserialize(value) for name, value in key.items()}
+
+
+def encode_cursor(operation, state):
+    """Return the opaque continuation token of a page, None when there is no
+    next page.
+
+    operation: name of the operation the token belongs to, a token is only
+        accepted by the same operation
+    state: JSON-serializable position, built with serialize_key
+    """
+    if state is None:
+        return None
+    payload = _b64encode(json.dumps(
+        {'op': operation, 'iat': int(time.time()), 'state': state},
+        separators=(',', ':')).encode('utf-8'))
+    return '{}.{}'.format(payload, _signature(payload))
+
+
+def decode_cursor(token, operation):
+    """Return the position of a token, None for no token. Raises CursorError
+    when the token is not one this API issued for the operation."""
+    if not token:
+        return None
+    try:
+        payload, signature = token.split('.')
+    except ValueError:
+        raise CursorError('Malformed cursor')
+    if not hmac.compare_digest(signature, _signature(payload)):
+        raise CursorError('Invalid cursor signature')
+    cursor = json.loads(_b64decode(payload))
+    if cursor['op'] != operation:
+        raise CursorError('Cursor issued for operation {}'.format(cursor['op']))
+    if time.time() - cursor['iat'] > CURSOR_TTL:
+        raise CursorError('Cursor expired')
+    return cursor['state']
+
+
+def parse_limit(value):
+    """Page size asked by the caller, DEFAULT_LIMIT when missing"""
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    limit = int(value)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError('limit must be between 1 and {}'.format(MAX_LIMIT))
+    return limit
+
+
+def wants_ndjson(params):
+    return (params.get('format') or '').lower() == 'ndjson'
+
+
+def page_response(items_key, items, next_cursor, extra=None, ndjson=False, status_code=200):
+    """API Gateway response of one page.
+
+    JSON bodies hold the items under items_key with count and next_cursor.
+    NDJSON bodies hold one item per line followed by a line with the other
+    fields, so clients can process a page line by line.
+    """
+    fields = dict(extra or {}, count=len(items), next_cursor=next_cursor)
+    if ndjson:
+        lines = [json.dumps(item, cls=DecimalEncoder) for item in items]
+        lines.append(json.dumps(fields, cls=DecimalEncoder))
+        return {
+            'statusCode': status_code,
+            'headers': {'Content-Type': 'application/x-ndjson'},
+            'body': '\n'.join(lines) + '\n'
+        }
+    return {
+        'statusCode': status_code,
+        'body': json.dumps(dict(fields, **{items_key: items}), cls=DecimalEncoder)
+    }
+
+
+def query_page(table, operation, state, limit, **query_kwargs):
+    """Run one Query page from the position of a decoded token and return
+    the items and the token of the next page"""
+    if state is not None:
+        query_kwargs['ExclusiveStartKey'] = deserialize_key(state['key'])
+    response = table.query(Limit=limit, **query_kwargs)
+    last_key = response.get('LastEvaluatedKey')
+    return response['Items'], encode_cursor(
+        operation, {'key': serialize_key(last_key)} if last_key else None)
+
+
+def scan_page(engine, operation, state, limit, context=None, merge_versions=True, **scan_kwargs):
+    """Run one parallel scan page from the position of a decoded token and
+    return the items with the token of the next page.
+
+    context: JSON-serializable values the request depends on, like a cutoff
+        time, carried by the token so every page uses the same ones
+    merge_versions: keep the latest version of every user, for scans of the
+        version items (default True); scans of the latest-index have one
+        item per user already
+    """
+    positions = None
+    if state is not None:
+        if state['segments'] != engine.segments:
+            raise CursorError('Cursor issued for {} scan segments'.format(state['segments']))
+        positions = {int(segment): deserialize_key(key) if key else None
+                     for segment, key in state['positions'].items()}
+    read_page = engine.latest_page if merge_versions else engine.page
+    items, positions = read_page(limit, positions, **scan_kwargs)
+    next_state = None
+    if positions:
+        next_state = {'segments': engine.segments, 'context': context,
+                      'positions': {str(segment): serialize_key(key) if key else None
+                                    for segment, key in positions.items()}}
+    return items, encode_cursor(operation, next_state)
+
+
+def bucket_page(table, operation, state, conditions, limit, context=None, **query_kwargs):
+    """Run one page of parallel queries over the buckets of an index from
+    the position of a decoded token and return the items with the token of
+    the next page.
+
+    conditions: bucket name (a string) -> KeyConditionExpression
+    context: carried by the token, like in scan_page
+    """
+    positions = None
+    if state is not None:
+        positions = {bucket: deserialize_key(key) if key else None
+                     for bucket, key in state['buckets'].items()}
+    items, positions = index_query.query_buckets(table, conditions, limit, positions, **query_kwargs)
+    next_state = None
+    if positions:
+        next_state = {'context': context,
+                      'buckets': {bucket: serialize_key(key) if key else None
+                                  for bucket, key in positions.items()}}
+    return items, encode_cursor(operation, next_state)
+
+
+def ordered_page(table, operation, state, conditions, limit, key_names, context=None, **query_kwargs):
+    """Run one page of a bucketed index read bucket after bucket from the
+    position of a decoded token and return the items with the token of the
+    next page.
+
+    conditions: (bucket name, KeyConditionExpression) pairs in reading order
+    key_names: key attributes of the index and of the table
+    context: carried by the token, like in scan_page
+    """
+    start = None
+    if state is not None:
+        start = (state['bucket'], deserialize_key(state['key']) if state['key'] else None)
+    items, position = index_query.query_in_order(table, conditions, limit, key_names, start,
+                                                 **query_kwargs)
+    next_state = None
+    if position:
+        bucket, key = position
+        next_state = {'context': context, 'bucket': bucket,
+                      'key': serialize_key(key) if key else None}
+    return items, encode_cursor(operation, next_state)
@@ -0,0 +1,42 @@
+import json
+import boto3
+import os
+
+import user_store
+
+# Initialize DynamoDB resource
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(os.environ['TABLE_NAME'])
+lambda_client = boto3.client('lambda')
+
+# Keys read per query page, deleted in parallel batches
+PAGE_SIZE = int(os.environ.get('PURGE_PAGE_SIZE', '5000'))
+# Hand over to a new invocation when less time than this is left
+RESERVE_MILLIS = int(os.environ.get('PURGE_RESERVE_MILLIS', '60000'))
+
+
+def lambda_handler(event, context):
+    """
+    Deletes every item of a user, for the users whose history is too long to
+    delete within an API request. Invoked asynchronously by delete_user with
+    {"user_id": ...}.
+    Deleted items are not read again, so when the invocation runs out of time
+    it invokes itself with the same user and the next one carries on.
+    """
+    user_id = event['user_id']
+    deleted = event.get('deleted', 0)
+
+    for page in user_store.item_keys(table, user_id, page_size=PAGE_SIZE):
+        deleted += user_store.delete_keys(table, page)
+
+        if context is not None and context.get_remaining_time_in_millis() < RESERVE_MILLIS:
+            lambda_client.invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({'user_id': user_id, 'deleted': deleted})
+            )
+            print(f"Purge of {user_id} continues in a new invocation after {deleted} items")
+            return {'user_id': user_id, 'deleted': deleted, 'done': False}
+
+    print(f"Purge of {user_id} done: {deleted} items deleted")
+    return {'user_id': user_id, 'deleted': deleted, 'done': True}
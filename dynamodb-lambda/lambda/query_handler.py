@@ -1,14 +1,21 @@
 import json
-import boto3
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+from scan_engine import ScanEngine
+import fast_dynamo
+import pagination
+import user_cache
+import user_store
 
-# Initialize DynamoDB resource
+# Initialize DynamoDB client
 # Pull table name from Lambda environment variable which is injected by CDK
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['TABLE_NAME'])
+# Queries only read, straight from the low-level client to JSON-ready items
+table = fast_dynamo.FastTable(os.environ['TABLE_NAME'])
+# Lookups by user_id and email go through the cache of the container
+cached_table = user_cache.make_table(table)
 
 class DecimalEncoder(json.JSONEncoder):
     """Helper class to handle Decimal serialization"""
@@ -27,26 +34,38 @@ def lambda_handler(event, context):
     try:
         query_params = event.get('queryStringParameters', {}) or {}
         operation = query_params.get('operation')
+        # Every listing operation is paged: limit, cursor and format=ndjson
+        limit = pagination.parse_limit(query_params.get('limit'))
+        cursor = query_params.get('cursor')
+        ndjson = pagination.wants_ndjson(query_params)
         
         if operation == 'query_by_user':
             return query_by_user(query_params.get('user_id'))
         elif operation == 'query_by_email':
-            return query_by_email(query_params.get('email'))
+            return query_by_email(query_params.get('email'), limit, cursor, ndjson)
         elif operation == 'scan_by_age':
-            return scan_by_age(query_params.get('min_age'), query_params.get('max_age'))
+            return scan_by_age(query_params.get('min_age'), query_params.get('max_age'), limit, cursor, ndjson)
         elif operation == 'query_user_history':
-            return query_user_history(query_params.get('user_id'))
+            return query_user_history(query_params.get('user_id'), limit, cursor, ndjson)
         elif operation == 'query_recent_users':
-            return query_recent_users(query_params.get('hours', '24'))
+            return query_recent_users(query_params.get('hours', '24'), limit, cursor, ndjson)
         else:
             return get_available_operations()
     
+    except ValueError as e:
+        # Bad limit, cursor or numeric parameter
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         print(f"Error: {str(e)}")
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
+    finally:
+        user_cache.emit_metrics()
 
 def get_available_operations():
     """Return available query operations for client introspection, making the endpoint self-documenting."""
@@ -54,6 +73,14 @@ def get_available_operations():
         'statusCode': 200,
         'body': json.dumps({
             'message': 'Available query operations',
+            'pagination': {
+                'description': 'Listing operations return at most limit items and a next_cursor, '
+                               'pass it back as cursor to get the next page. format=ndjson returns '
+                               'one item per line followed by a line with count and next_cursor',
+                'parameters': 'limit (default: {}, max: {}), cursor, format'.format(
+                    pagination.DEFAULT_LIMIT, pagination.MAX_LIMIT),
+                'example': '/query?operation=scan_by_age&min_age=25&limit=100&format=ndjson'
+            },
             'operations': {
                 'query_by_user': {
                     'description': 'Query specific user (latest version)',
@@ -66,7 +93,7 @@ def get_available_operations():
                     'example': '/query?operation=query_by_email&email=john@example.com'
                 },
                 'scan_by_age': {
-                    'description': 'Scan users by age range',
+                    'description': 'Users by age range, parallel queries on the age-index GSI',
                     'parameters': 'min_age, max_age (optional)',
                     'example': '/query?operation=scan_by_age&min_age=25&max_age=35'
                 },
@@ -76,7 +103,7 @@ def get_available_operations():
                     'example': '/query?operation=query_user_history&user_id=12345'
                 },
                 'query_recent_users': {
-                    'description': 'Get users created in recent hours',
+                    'description': 'Get users created in recent hours, newest first',
                     'parameters': 'hours (default: 24)',
                     'example': '/query?operation=query_recent_users&hours=12'
                 }
@@ -93,17 +120,14 @@ def query_by_user(user_id):
                 'body': json.dumps({'error': 'user_id parameter is required'})
             }
         
-        response = table.query(
-            KeyConditionExpression=Key('user_id').eq(user_id),
-            ScanIndexForward=False,  # Latest first
-            Limit=1
-        )
+        # One GetItem on the LATEST item of the user, unless the cache has it
+        user = user_store.get_latest(cached_table, user_id)
         
-        if response['Items']:
+        if user:
             return {
                 'statusCode': 200,
                 'body': json.dumps({
-                    'user': response['Items'][0],
+                    'user': user,
                     'query_type': 'Primary Key Query'
                 }, cls=DecimalEncoder)
             }
@@ -120,8 +144,8 @@ def query_by_user(user_id):
         }
 
 # This Query handler lookup user(s) by email via GSI 
-def query_by_email(email):
-    """Query user by email using Global Secondary Index"""
+def query_by_email(email, limit=pagination.DEFAULT_LIMIT, cursor=None, ndjson=False):
+    """Query user by email using Global Secondary Index, one page at a time"""
     try:
         if not email:
             return {
@@ -129,73 +153,92 @@ def query_by_email(email):
                 'body': json.dumps({'error': 'email parameter is required'})
             }
         
-        response = table.query(
+        # The cursor is bound to the email it was issued for
+        operation = 'query_by_email:' + email
+        state = pagination.decode_cursor(cursor, operation)
+        items, next_cursor = pagination.query_page(
+            cached_table, operation, state, limit,
             IndexName='email-index',
-            KeyConditionExpression=Key('email').eq(email)
+            KeyConditionExpression=Key('email').eq(email),
+            # The LATEST items are copies of versions already listed
+            FilterExpression=Attr('timestamp').ne(user_store.LATEST)
         )
         
-        if response['Items']:
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'users': response['Items'],
-                    'count': len(response['Items']),
-                    'query_type': 'Global Secondary Index Query'
-                }, cls=DecimalEncoder)
-            }
+        if items or state is not None:
+            return pagination.page_response('users', items, next_cursor, {
+                'query_type': 'Global Secondary Index Query'
+            }, ndjson)
         else:
             return {
                 'statusCode': 404,
                 'body': json.dumps({'error': 'No users found with that email'})
             }
             
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
-# This scan handler retrieve users within an age range
-def scan_by_age(min_age, max_age):
-    """Scan table filtering by age range"""
+# This handler retrieves users within an age range
+def scan_by_age(min_age, max_age, limit=pagination.DEFAULT_LIMIT, cursor=None, ndjson=False):
+    """Users within an age range, one page of parallel queries over the
+    age-index buckets overlapping the range at a time. Falls back to parallel
+    segment scans when the index is not there (yet)."""
     try:
         # Convert to integers
         min_age = int(min_age) if min_age else 0
         max_age = int(max_age) if max_age else 200
         
-        # Build filter expression
-        filter_expression = Attr('age').between(min_age, max_age)
+        operation = f'scan_by_age:{min_age}-{max_age}'
+        state = pagination.decode_cursor(cursor, operation)
         
-        response = table.scan(
-            FilterExpression=filter_expression
-        )
+        latest_items = next_cursor = None
+        if state is None or 'buckets' in state:
+            try:
+                latest_items, next_cursor = pagination.bucket_page(
+                    table, operation, state, user_store.age_conditions(min_age, max_age), limit,
+                    IndexName=user_store.AGE_INDEX
+                )
+                query_type = 'Parallel Query on age-index'
+            except ClientError as e:
+                # A missing or still backfilling index is a ValidationException
+                if state is not None or e.response['Error']['Code'] not in (
+                        'ValidationException', 'ResourceNotFoundException'):
+                    raise
         
-        # Group by user_id to get latest version of each user
-        users_dict = {}
-        for item in response['Items']:
-            user_id = item['user_id']
-            if user_id not in users_dict or item['timestamp'] > users_dict[user_id]['timestamp']:
-                users_dict[user_id] = item
+        if latest_items is None:
+            # Scan only the latest version of each user, on the sparse latest-index
+            latest_items, next_cursor = pagination.scan_page(
+                ScanEngine(table), operation, state, limit, merge_versions=False,
+                IndexName=user_store.LATEST_INDEX,
+                FilterExpression=Attr('age').between(min_age, max_age)
+            )
+            query_type = 'Scan with Filter Expression'
+        users_list = [user_store.from_latest(item) for item in latest_items]
         
-        users_list = list(users_dict.values())
+        return pagination.page_response('users', users_list, next_cursor, {
+            'age_range': f'{min_age}-{max_age}',
+            'query_type': query_type
+        }, ndjson)
         
+    except ValueError as e:
         return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'users': users_list,
-                'count': len(users_list),
-                'age_range': f'{min_age}-{max_age}',
-                'query_type': 'Scan with Filter Expression'
-            }, cls=DecimalEncoder)
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
         }
-        
     except Exception as e:
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
 # This handler gets full history (versions) for a user
-def query_user_history(user_id):
-    """Get all versions/history of a specific user"""
+def query_user_history(user_id, limit=pagination.DEFAULT_LIMIT, cursor=None, ndjson=False):
+    """Get all versions/history of a specific user, one page at a time"""
     try:
         if not user_id:
             return {
@@ -203,27 +246,31 @@ def query_user_history(user_id):
                 'body': json.dumps({'error': 'user_id parameter is required'})
             }
         
-        response = table.query(
-            KeyConditionExpression=Key('user_id').eq(user_id),
+        operation = 'query_user_history:' + user_id
+        state = pagination.decode_cursor(cursor, operation)
+        items, next_cursor = pagination.query_page(
+            table, operation, state, limit,
+            KeyConditionExpression=user_store.versions_condition(user_id),
             ScanIndexForward=False  # Latest first
         )
         
-        if response['Items']:
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'user_id': user_id,
-                    'versions': response['Items'],
-                    'version_count': len(response['Items']),
-                    'query_type': 'User History Query'
-                }, cls=DecimalEncoder)
-            }
+        if items or state is not None:
+            return pagination.page_response('versions', items, next_cursor, {
+                'user_id': user_id,
+                'version_count': len(items),
+                'query_type': 'User History Query'
+            }, ndjson)
         else:
             return {
                 'statusCode': 404,
                 'body': json.dumps({'error': 'User not found'})
             }
             
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
@@ -231,40 +278,57 @@ def query_user_history(user_id):
         }
 
 # This handler gets users created in the last N hours
-def query_recent_users(hours):
-  
+def query_recent_users(hours, limit=pagination.DEFAULT_LIMIT, cursor=None, ndjson=False):
+    """Users created in the last hours, newest first: parallel queries of the
+    created-index days in the window, stopping once limit users are found.
+    Falls back to parallel segment scans when the index is not there (yet)."""
     try:
         hours = int(hours) if hours else 24
         
-        # Calculate cutoff time
-        from datetime import timedelta
-        cutoff_time = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
-        
-        # Scan with filter for recent users
-        response = table.scan(
-            FilterExpression=Attr('created_at').gt(cutoff_time)
-        )
-        
-        # Group by user_id to get unique users
-        users_dict = {}
-        for item in response['Items']:
-            user_id = item['user_id']
-            if user_id not in users_dict or item['timestamp'] > users_dict[user_id]['timestamp']:
-                users_dict[user_id] = item
+        # Calculate cutoff time, the next pages keep the one of the first page
+        operation = f'query_recent_users:{hours}'
+        state = pagination.decode_cursor(cursor, operation)
+        if state is not None:
+            cutoff_time = state['context']
+        else:
+            cutoff_time = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+        since = datetime.fromisoformat(cutoff_time)
         
-        users_list = list(users_dict.values())
+        latest_items = next_cursor = None
+        if state is None or 'bucket' in state:
+            try:
+                latest_items, next_cursor = pagination.ordered_page(
+                    table, operation, state,
+                    user_store.created_conditions(since, since + timedelta(hours=hours)),
+                    limit, user_store.CREATED_INDEX_KEYS, context=cutoff_time,
+                    IndexName=user_store.CREATED_INDEX,
+                    ScanIndexForward=False  # Newest first
+                )
+            except ClientError as e:
+                # A missing or still backfilling index is a ValidationException
+                if state is not None or e.response['Error']['Code'] not in (
+                        'ValidationException', 'ResourceNotFoundException'):
+                    raise
         
-        # Sort by creation time
-        users_list.sort(key=lambda x: x['created_at'], reverse=True)
+        if latest_items is None:
+            # Parallel scan page of the latest-index with filter for recent users
+            latest_items, next_cursor = pagination.scan_page(
+                ScanEngine(table), operation, state, limit, context=cutoff_time,
+                merge_versions=False, IndexName=user_store.LATEST_INDEX,
+                FilterExpression=Attr('created_at').gt(cutoff_time)
+            )
+            # Sort by creation time, within the page
+            latest_items.sort(key=lambda x: x['created_at'], reverse=True)
+        users_list = [user_store.from_latest(item) for item in latest_items]
         
+        return pagination.page_response('users', users_list, next_cursor, {
+            'timeframe': f'Last {hours} hours',
+            'cutoff_time': cutoff_time,
+        }, ndjson)
+    except ValueError as e:
         return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'users': users_list,
-                'count': len(users_list),
-                'timeframe': f'Last {hours} hours',
-                'cutoff_time': cutoff_time,
-            }, cls=DecimalEncoder)
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
         }
     except Exception as e:
         return {
@@ -0,0 +1,216 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of parallel scan segments, tunable per function without a deploy
+DEFAULT_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '4'))
+
+
+def projection_expression(attributes):
+    """Build a ProjectionExpression and its ExpressionAttributeNames.
+    Every attribute gets a placeholder, so reserved words like name or
+    timestamp can be projected."""
+    names = {'#p{}'.format(i): attribute for i, attribute in enumerate(attributes)}
+    return ', '.join(names), names
+
+
+class ScanEngine:
+    """Parallel scan of a DynamoDB table.
+
+    The table is split into Segment/TotalSegments scans that run on a thread
+    pool. Every segment follows LastEvaluatedKey until it is exhausted or
+    until the caller's limit is reached, and pages are handed to the caller
+    as soon as any segment returns them.
+    """
+
+    def __init__(self, table, segments=None, max_workers=None, page_size=None):
+        """
+        table: boto3 Table resource
+        segments: number of scan segments (default SCAN_SEGMENTS or 4)
+        max_workers: threads running the segments (default one per segment)
+        page_size: Limit of every Scan call (default None, 1 MB pages)
+        """
+        self.table = table
+        self.segments = max(int(segments or DEFAULT_SEGMENTS), 1)
+        self.max_workers = max_workers or self.segments
+        self.page_size = page_size
+
+    def _scan_kwargs(self, projection, scan_kwargs):
+        kwargs = dict(scan_kwargs)
+        if projection:
+            expression, names = projection_expression(projection)
+            kwargs['ProjectionExpression'] = expression
+            kwargs['ExpressionAttributeNames'] = dict(
+                kwargs.get('ExpressionAttributeNames', {}), **names)
+        if self.page_size:
+            kwargs['Limit'] = self.page_size
+        return kwargs
+
+    def _scan_segment(self, segment, kwargs, pages, stop):
+        """Scan one segment page by page, putting every page on the queue"""
+        try:
+            kwargs = dict(kwargs, Segment=segment, TotalSegments=self.segments)
+            while not stop.is_set():
+                response = self.table.scan(**kwargs)
+                pages.put(('page', response))
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    break
+                kwargs['ExclusiveStartKey'] = last_key
+            pages.put(('done', None))
+        except Exception as error:
+            pages.put(('error', error))
+
+    def pages(self, limit=None, projection=None, **scan_kwargs):
+        """Yield the Scan responses of all the segments as they arrive.
+
+        limit: stop once this many items were returned (default None, scan
+            the whole table); the last page is trimmed to the limit
+        projection: list of the attributes to read (default None, all)
+        scan_kwargs: other Scan arguments, like FilterExpression
+        """
+        kwargs = self._scan_kwargs(projection, scan_kwargs)
+        pages = queue.Queue()
+        stop = threading.Event()
+        remaining = self.segments
+        returned = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for segment in range(self.segments):
+                executor.submit(self._scan_segment, segment, kwargs, pages, stop)
+            try:
+                while remaining:
+                    kind, response = pages.get()
+                    if kind == 'done':
+                        remaining -= 1
+                        continue
+                    if kind == 'error':
+                        raise response
+                    if limit is not None and returned + len(response['Items']) >= limit:
+                        response['Items'] = response['Items'][:limit - returned]
+                        stop.set()
+                        yield response
+                        return
+                    returned += len(response['Items'])
+                    yield response
+            finally:
+                # Let the segments still running finish their current page
+                stop.set()
+
+    def items(self, limit=None, projection=None, **scan_kwargs):
+        """Yield the scanned items, in no particular order"""
+        for response in self.pages(limit=limit, projection=projection, **scan_kwargs):
+            yield from response['Items']
+
+    def _segment_page(self, segment, start_key, limit, partition_key, sort_key, kwargs):
+        """Read about limit items of a segment from start_key.
+
+        Scan returns the versions of a user one after the other, so the
+        trailing user of a page may continue on the next one. Its items are
+        held back and the segment resumes after the last complete user, the
+        same user is never split over two pages. Returns the items and the
+        key to resume from, None when the segment is exhausted.
+        """
+        kwargs = dict(kwargs, Segment=segment, TotalSegments=self.segments, Limit=limit)
+        items = []
+        while True:
+            if start_key:
+                kwargs['ExclusiveStartKey'] = start_key
+            response = self.table.scan(**kwargs)
+            items.extend(response['Items'])
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return items, None
+            if not items:
+                return items, last_key
+            tail = items[-1][partition_key]
+            complete = [item for item in items if item[partition_key] != tail]
+            if complete:
+                last = complete[-1]
+                return complete, {partition_key: last[partition_key], sort_key: last[sort_key]}
+            # Only versions of one user so far, keep reading until it ends
+            start_key = last_key
+
+    def latest_page(self, limit, positions=None, partition_key='user_id', sort_key='timestamp',
+                    projection=None, **scan_kwargs):
+        """Read one page of latest versions with a round of parallel scans.
+
+        limit: number of items read over all the segments, the page holds
+            at most one item per user
+        positions: segment -> key to resume from (None for its start) of the
+            segments left, as returned by the previous page (default None,
+            every segment from the start)
+        Returns the latest versions and the positions of the next page, None
+        when the scan is over.
+        """
+        if positions is None:
+            positions = dict.fromkeys(range(self.segments))
+        if projection:
+            projection = list(projection) + [name for name in (partition_key, sort_key)
+                                             if name not in projection]
+        kwargs = self._scan_kwargs(projection, scan_kwargs)
+        kwargs.pop('Limit', None)
+        per_segment = max(-(-limit // max(len(positions), 1)), 1)
+        latest = {}
+        next_positions = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(positions), 1))) as executor:
+            futures = {segment: executor.submit(self._segment_page, segment, key, per_segment,
+                                                partition_key, sort_key, kwargs)
+                       for segment, key in positions.items()}
+            for segment, future in futures.items():
+                items, last_key = future.result()
+                for item in items:
+                    current = latest.get(item[partition_key])
+                    if current is None or item[sort_key] > current[sort_key]:
+                        latest[item[partition_key]] = item
+                if last_key:
+                    next_positions[segment] = last_key
+        return list(latest.values()), next_positions or None
+
+    def _segment_next(self, segment, start_key, limit, kwargs):
+        """One Scan call on a segment from start_key"""
+        kwargs = dict(kwargs, Segment=segment, TotalSegments=self.segments, Limit=limit)
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        response = self.table.scan(**kwargs)
+        return response['Items'], response.get('LastEvaluatedKey')
+
+    def page(self, limit, positions=None, projection=None, **scan_kwargs):
+        """Read one page with a round of parallel scans, one Scan call per
+        segment left, resuming every segment from its LastEvaluatedKey.
+        Returns the items and the positions of the next page, None when the
+        scan is over, like latest_page.
+        """
+        if positions is None:
+            positions = dict.fromkeys(range(self.segments))
+        kwargs = self._scan_kwargs(projection, scan_kwargs)
+        kwargs.pop('Limit', None)
+        per_segment = max(-(-limit // max(len(positions), 1)), 1)
+        items = []
+        next_positions = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(positions), 1))) as executor:
+            futures = {segment: executor.submit(self._segment_next, segment, key, per_segment, kwargs)
+                       for segment, key in positions.items()}
+            for segment, future in futures.items():
+                segment_items, last_key = future.result()
+                items.extend(segment_items)
+                if last_key:
+                    next_positions[segment] = last_key
+        return items, next_positions or None
+
+    def latest(self, partition_key='user_id', sort_key='timestamp', limit=None,
+               projection=None, **scan_kwargs):
+        """Return the item with the greatest sort key of every partition,
+        merged page by page as the segments return them, so only one item per
+        partition is ever held in memory.
+        """
+        if projection:
+            projection = list(projection) + [name for name in (partition_key, sort_key)
+                                             if name not in projection]
+        latest = {}
+        for item in self.items(limit=limit, projection=projection, **scan_kwargs):
+            key = item[partition_key]
+            current = latest.get(key)
+            if current is None or item[sort_key] > current[sort_key]:
+                latest[key] = item
+        return latest
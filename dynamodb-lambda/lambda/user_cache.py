@@ -0,0 +1,387 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+try:
+    from amazondax import AmazonDaxClient
+    _DAX_FOUND = True
+except ImportError:
+    _DAX_FOUND = False
+
+import pagination
+import user_store
+
+# memory: LRU cache in the container, dax: a DAX cluster, none: no cache
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_SIZE = int(os.environ.get('CACHE_SIZE', '1024'))
+# Seconds an entry is served, the staleness bound when invalidations stop
+CACHE_TTL = float(os.environ.get('CACHE_TTL', '60'))
+# Seconds between two reads of the invalidation records
+POLL_INTERVAL = float(os.environ.get('CACHE_POLL_INTERVAL', '1'))
+# Seconds the invalidation records are kept, and re-read by every poll
+INVALIDATION_TTL = 3600
+POLL_OVERLAP = 5
+METRICS_NAMESPACE = os.environ.get('CACHE_METRICS_NAMESPACE', 'DynamoDbLearningApi/Cache')
+EMAIL_INDEX = 'email-index'
+
+_MISS = object()
+
+
+def read_units(items):
+    """Read capacity an eventually consistent read of items costs: half a
+    unit per 4 KB, at least half a unit"""
+    size = sum(len(json.dumps(item, cls=pagination.DecimalEncoder)) for item in items)
+    return max(math.ceil(size / 4096), 1) * 0.5
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a TTL, a size bound and per-key versions.
+
+    Every entry remembers the version of the data it holds. invalidate drops
+    an entry unless it already holds the invalidated version or a newer one,
+    and put refuses data whose read started before an invalidation of its
+    key, so a read racing an update never puts the old data back.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        # key -> (value, version, expiry, read units)
+        self._entries = OrderedDict()
+        # key -> epoch of its last invalidation, the oldest ones are forgotten
+        self._invalidated = OrderedDict()
+        self._forgotten = 0
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_units = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached value of key, _MISS when there is none"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return _MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_units += entry[3]
+            return entry[0]
+
+    def begin_fill(self):
+        """Token to take before reading the data put in the cache"""
+        with self._lock:
+            return self._epoch
+
+    def put(self, key, value, version=None, token=None, units=0.0):
+        """Cache the value of key read since token was taken, unless key
+        was invalidated since or already holds a newer version. Returns
+        whether the value was cached."""
+        with self._lock:
+            # Keys whose invalidation was forgotten may have had one since
+            if token is not None and self._invalidated.get(key, self._forgotten) > token:
+                return False
+            entry = self._entries.get(key)
+            if (entry is not None and entry[2] > self.clock() and version is not None
+                    and entry[1] is not None and entry[1] > version):
+                return False
+            self._entries[key] = (value, version, self.clock() + self.ttl, units)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, key, version=None):
+        """Drop the entry of key unless it holds version or a newer one"""
+        with self._lock:
+            self._epoch += 1
+            self._invalidated[key] = self._epoch
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > 4 * self.max_size:
+                _, epoch = self._invalidated.popitem(last=False)
+                self._forgotten = max(self._forgotten, epoch)
+            entry = self._entries.get(key)
+            if entry is not None and not (version is not None and entry[1] is not None
+                                          and entry[1] >= version):
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._forgotten = self._epoch
+            self._invalidated.clear()
+            self._entries.clear()
+
+    def take_stats(self):
+        """hits, misses and saved read units since the last call"""
+        with self._lock:
+            stats = (self.hits, self.misses, self.saved_units)
+            self.hits = self.misses = 0
+            self.saved_units = 0.0
+            return stats
+
+
+def invalidation_records(stream_records, now):
+    """The invalidation records of DynamoDB stream records: the user of a
+    LATEST item or of a deleted item, and the emails before and after"""
+    records = {}
+    recorded_at = now.isoformat(timespec='microseconds')
+    for record in stream_records:
+        change = record['dynamodb']
+        keys = change['Keys']
+        new_image = change.get('NewImage', {})
+        old_image = change.get('OldImage', {})
+        targets = []
+        if keys['timestamp']['S'] == user_store.LATEST or record['eventName'] == 'REMOVE':
+            version = new_image.get('version', {}).get('N')
+            targets.append(('user', keys['user_id']['S'], int(version) if version else None))
+        for image in (old_image, new_image):
+            if 'email' in image:
+                targets.append(('email', image['email']['S'], None))
+        for number, (kind, value, version) in enumerate(targets):
+            record_key = (kind, value)
+            # Records of a shard come in order, an unversioned one drops any version
+            if record_key in records and records[record_key].get('version') is None:
+                continue
+            item = {
+                'bucket': recorded_at[:16],
+                'sk': '{}#{}#{}'.format(recorded_at, record['eventID'], number),
+                'kind': kind,
+                'value': value,
+                'expires_at': int(time.time()) + INVALIDATION_TTL
+            }
+            if version is not None:
+                item['version'] = version
+            records[record_key] = item
+    return list(records.values())
+
+
+class InvalidationChannel:
+    """Applies the invalidations the stream handler records to a cache.
+
+    The records live in a table partitioned by minute and sorted by the time
+    they were recorded. poll reads the new ones at most every poll_interval
+    seconds, one or two queries however many lookups the container serves.
+    It re-reads the last POLL_OVERLAP seconds, as the stream shards record
+    slightly out of order, and skips the records already applied.
+    """
+
+    def __init__(self, table, poll_interval=POLL_INTERVAL, clock=time.monotonic, now=datetime.utcnow):
+        self.table = table
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.now = now
+        # Records older than the container do not matter, its cache was empty
+        self._since = now()
+        self._applied = {}
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+
+    def _records(self, start, end):
+        minute = start.replace(second=0, microsecond=0)
+        while minute <= end:
+            kwargs = {
+                'KeyConditionExpression': Key('bucket').eq(minute.isoformat()[:16]) &
+                                          Key('sk').gt(start.isoformat(timespec='microseconds')),
+                'ConsistentRead': True
+            }
+            while True:
+                response = self.table.query(**kwargs)
+                yield from response['Items']
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            minute += timedelta(minutes=1)
+
+    def poll(self, cache):
+        """Apply the records written since the last poll when it is due.
+        Returns the number applied."""
+        if self.clock() < self._next_poll or not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            applied = 0
+            end = self.now()
+            start = self._since - timedelta(seconds=POLL_OVERLAP)
+            for record in self._records(start, end):
+                if record['sk'] in self._applied:
+                    continue
+                self._applied[record['sk']] = record['sk'][:26]
+                version = record.get('version')
+                cache.invalidate((record['kind'], record['value']),
+                                 int(version) if version is not None else None)
+                applied += 1
+            # Only the records of the next overlap can be read again
+            self._applied = {sk: at for sk, at in self._applied.items()
+                             if at > (end - timedelta(seconds=POLL_OVERLAP)).isoformat(timespec='microseconds')}
+            self._since = end
+            self._next_poll = self.clock() + self.poll_interval
+            return applied
+        finally:
+            self._lock.release()
+
+
+class CachedTable:
+    """Read-through cache in front of a Table for the user lookups.
+
+    It has the read interface of a boto3 Table, the one DAX implements too,
+    so the callers stay the same whatever the backend (see make_table).
+    Cached are eventually consistent GetItems of LATEST items, and the first
+    page of email-index queries of email_limit items; everything else goes
+    straight to the backend.
+    """
+
+    def __init__(self, backend, cache=None, channel=None, email_limit=pagination.DEFAULT_LIMIT):
+        """
+        backend: Table-like object reads are sent to, like a FastTable
+        cache: LRUCache (default a new one)
+        channel: InvalidationChannel keeping the cache coherent (default
+            None, entries are only bounded by the TTL)
+        """
+        self.backend = backend
+        self.cache = cache if cache is not None else LRUCache()
+        self.channel = channel
+        self.email_limit = email_limit
+
+    def __getattr__(self, name):
+        # name, meta, scan and the rest of the Table interface
+        return getattr(self.backend, name)
+
+    def _poll(self):
+        if self.channel is None:
+            return
+        try:
+            self.channel.poll(self.cache)
+        except Exception as e:
+            # Without the invalidations the entries can no longer be trusted
+            print(f"Cache invalidation poll failed, clearing the cache: {str(e)}")
+            self.cache.clear()
+
+    def get_item(self, **kwargs):
+        key = kwargs.get('Key', {})
+        if (kwargs.get('ConsistentRead') or 'ProjectionExpression' in kwargs
+                or key.get('timestamp') != user_store.LATEST):
+            return self.backend.get_item(**kwargs)
+        self._poll()
+        cache_key = ('user', key['user_id'])
+        item = self.cache.get(cache_key)
+        if item is not _MISS:
+            return {'Item': dict(item)}
+        token = self.cache.begin_fill()
+        response = self.backend.get_item(**kwargs)
+        item = response.get('Item')
+        if item is not None:
+            self.cache.put(cache_key, dict(item), item.get('version'), token, read_units([item]))
+        return response
+
+    def _email_of(self, kwargs):
+        """Email of a first page email-index query of email_limit items"""
+        if (kwargs.get('IndexName') != EMAIL_INDEX or 'ExclusiveStartKey' in kwargs
+                or kwargs.get('Limit') != self.email_limit):
+            return None
+        condition = kwargs.get('KeyConditionExpression')
+        expression = condition.get_expression() if hasattr(condition, 'get_expression') else {}
+        values = expression.get('values', ())
+        if (expression.get('operator') == '=' and isinstance(values[0], Key)
+                and values[0].name == 'email'):
+            return values[1]
+        return None
+
+    def query(self, **kwargs):
+        email = self._email_of(kwargs)
+        if email is None:
+            return self.backend.query(**kwargs)
+        self._poll()
+        cache_key = ('email', email)
+        cached = self.cache.get(cache_key)
+        if cached is not _MISS:
+            items, last_key = cached
+            response = {'Items': [dict(item) for item in items], 'Count': len(items)}
+            if last_key:
+                response['LastEvaluatedKey'] = last_key
+            return response
+        token = self.cache.begin_fill()
+        response = self.backend.query(**kwargs)
+        items = [dict(item) for item in response['Items']]
+        self.cache.put(cache_key, (items, response.get('LastEvaluatedKey')), None, token,
+                       read_units(items))
+        return response
+
+
+# One cache per container, shared by the invocations it serves
+cache = LRUCache()
+_channel = None
+
+
+def invalidate_user(user_id, version=None):
+    """Drop the cached lookup of a user this container just wrote, without
+    waiting for its invalidation record"""
+    cache.invalidate(('user', user_id), version)
+
+
+def make_table(backend):
+    """The table the cached lookups read, according to CACHE_BACKEND.
+
+    memory: a CachedTable over backend, kept coherent by the invalidation
+        records of INVALIDATION_TABLE_NAME when it is set
+    dax: the DAX cluster of DAX_ENDPOINT, which caches for every container
+        and is kept coherent by writing through it
+    none: backend itself
+    """
+    global _channel
+    if CACHE_BACKEND == 'none':
+        return backend
+    if CACHE_BACKEND == 'dax':
+        if not _DAX_FOUND:
+            raise ImportError('CACHE_BACKEND=dax needs the amazondax package')
+        dax = AmazonDaxClient.resource(endpoint_url=os.environ['DAX_ENDPOINT'])
+        return dax.Table(backend.name)
+    if _channel is None and os.environ.get('INVALIDATION_TABLE_NAME'):
+        _channel = InvalidationChannel(
+            boto3.resource('dynamodb').Table(os.environ['INVALIDATION_TABLE_NAME']))
+    return CachedTable(backend, cache, _channel)
+
+
+def emit_metrics(cache=cache, namespace=METRICS_NAMESPACE):
+    """Print the hits, misses, hit ratio and saved read units since the last
+    call as a CloudWatch embedded metric format line, nothing when the cache
+    was not used"""
+    hits, misses, saved_units = cache.take_stats()
+    if not hits and not misses:
+        return None
+    metrics = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [['FunctionName']],
+                'Metrics': [
+                    {'Name': 'CacheHits', 'Unit': 'Count'},
+                    {'Name': 'CacheMisses', 'Unit': 'Count'},
+                    {'Name': 'CacheHitRatio', 'Unit': 'Percent'},
+                    {'Name': 'SavedReadCapacityUnits', 'Unit': 'Count'}
+                ]
+            }]
+        },
+        'FunctionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        'CacheHits': hits,
+        'CacheMisses': misses,
+        'CacheHitRatio': 100.0 * hits / (hits + misses),
+        'SavedReadCapacityUnits': saved_units
+    }
+    print(json.dumps(metrics))
+    return metrics
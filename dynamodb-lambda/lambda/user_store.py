@@ -0,0 +1,377 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from scan_engine import projection_expression
+
+# Sort key of the item holding the latest version of a user. ISO timestamps
+# start with a digit, so 'LATEST' sorts after every version.
+LATEST = 'LATEST'
+# Sparse GSI keyed by an attribute only the LATEST items have
+LATEST_INDEX = 'latest-index'
+LATEST_INDEX_KEY = 'latest_of'
+# Largest number of actions of one TransactWriteItems call
+TRANSACT_LIMIT = 100
+# GSI of the LATEST items by age: decade bucket partitions sorted by age
+AGE_INDEX = 'age-index'
+AGE_BUCKET_KEY = 'age_bucket'
+AGE_BUCKET_WIDTH = 10
+# GSI of the LATEST items by creation: one partition per day sorted by
+# created_at, and the keys of its items
+CREATED_INDEX = 'created-index'
+CREATED_DAY_KEY = 'created_day'
+CREATED_INDEX_KEYS = (CREATED_DAY_KEY, 'created_at', 'user_id', 'timestamp')
+# Largest number of keys of one BatchGetItem call
+BATCH_GET_LIMIT = 100
+# Threads reading in parallel, the client pool should have as many connections
+READ_WORKERS = int(os.environ.get('READ_WORKERS', '16'))
+# Retries of UnprocessedKeys: full jitter backoff from BACKOFF_BASE seconds,
+# capped at BACKOFF_MAX, giving up after BATCH_GET_ATTEMPTS calls
+BACKOFF_BASE = 0.05
+BACKOFF_MAX = 2.0
+BATCH_GET_ATTEMPTS = 8
+# Keys deleted per batch_writer, and batch_writers running in parallel
+DELETE_CHUNK = int(os.environ.get('DELETE_CHUNK', '250'))
+DELETE_WORKERS = int(os.environ.get('DELETE_WORKERS', '4'))
+
+class VersionConflict(Exception):
+    """Raised when a user changed since the version an update was based on"""
+
+    def __init__(self, user_id, expected_version):
+        super().__init__('User {} is no longer at version {}'.format(user_id, expected_version))
+        self.user_id = user_id
+        self.expected_version = expected_version
+
+
+def parse_age(value):
+    """Age of a write request as an int. age is a number key of age-index,
+    so numeric strings like "30" are accepted and converted; raises
+    ValueError for anything else than a whole number from 0."""
+    if isinstance(value, bool):
+        raise ValueError('age must be a whole number, got {!r}'.format(value))
+    try:
+        number = Decimal(value.strip() if isinstance(value, str) else value)
+    except (ArithmeticError, TypeError, ValueError):
+        raise ValueError('age must be a whole number, got {!r}'.format(value))
+    if not number.is_finite() or number != number.to_integral_value() or number < 0:
+        raise ValueError('age must be a whole number from 0, got {!r}'.format(value))
+    return int(number)
+
+
+def age_bucket(age):
+    """Partition of age-index holding an age, the start of its decade"""
+    return int(age) // AGE_BUCKET_WIDTH * AGE_BUCKET_WIDTH
+
+
+def age_conditions(min_age, max_age):
+    """Key conditions of the age-index buckets overlapping an age range, by
+    bucket name"""
+    conditions = {}
+    for bucket in range(age_bucket(min_age), max_age + 1, AGE_BUCKET_WIDTH):
+        conditions[str(bucket)] = (
+            Key(AGE_BUCKET_KEY).eq(bucket) &
+            Key('age').between(max(min_age, bucket), min(max_age, bucket + AGE_BUCKET_WIDTH - 1)))
+    return conditions
+
+
+def created_conditions(since, until):
+    """Key conditions of the created-index buckets of the users created after
+    since up to until (datetimes), by bucket name, newest bucket first"""
+    conditions = []
+    day = until.date()
+    while day >= since.date():
+        name = day.isoformat()
+        conditions.append((name, Key(CREATED_DAY_KEY).eq(name) & Key('created_at').gt(since.isoformat())))
+        day -= timedelta(days=1)
+    return conditions
+
+
+def index_keys(fields):
+    """Key attributes of the GSIs on the LATEST items derived from fields,
+    for the fields that are there"""
+    keys = {}
+    if isinstance(fields.get('age'), (int, Decimal)):
+        keys[AGE_BUCKET_KEY] = age_bucket(fields['age'])
+    if isinstance(fields.get('created_at'), str):
+        # ISO timestamps start with the day
+        keys[CREATED_DAY_KEY] = fields['created_at'][:10]
+    return keys
+
+
+def latest_item(version):
+    """The LATEST item of a version item: a copy under the LATEST sort key,
+    remembering the timestamp of the version it mirrors, with the keys of
+    the GSIs on the LATEST items"""
+    item = dict(version)
+    item['timestamp'] = LATEST
+    item['version_timestamp'] = version['timestamp']
+    item[LATEST_INDEX_KEY] = version['user_id']
+    item.update(index_keys(version))
+    return item
+
+
+def from_latest(item):
+    """Back from a LATEST item to the version item it mirrors"""
+    if item is None or item.get('timestamp') != LATEST:
+        return item
+    version = dict(item)
+    version['timestamp'] = version.pop('version_timestamp')
+    version.pop(LATEST_INDEX_KEY, None)
+    for name in index_keys(version):
+        version.pop(name, None)
+    return version
+
+
+# The transactions go through the client of the Table resource, which
+# serializes the Python values of the items and expression values itself
+
+def _put_actions(table_name, version):
+    """The two Put actions writing a version and moving the LATEST item to
+    it, unless the LATEST item already mirrors a newer version"""
+    return [
+        {'Put': {'TableName': table_name, 'Item': version}},
+        {'Put': {
+            'TableName': table_name,
+            'Item': latest_item(version),
+            'ConditionExpression': 'attribute_not_exists(version_timestamp) OR version_timestamp < :ts',
+            'ExpressionAttributeValues': {':ts': version['timestamp']}
+        }}
+    ]
+
+
+def put_version(table, version):
+    """Write a version item and the LATEST item of its user in one transaction.
+    table: Table resource"""
+    table.meta.client.transact_write_items(
+        TransactItems=_put_actions(table.name, version))
+
+
+def _latest_update(table_name, current, version, changes):
+    """The action moving the LATEST item from current to version.
+
+    An Update setting only the changed fields when the LATEST item has a
+    version number, conditional on it being the one of current. Users
+    written before the version numbers may have no LATEST item at all, theirs
+    is put whole, conditional on still mirroring current.
+    """
+    key = {'user_id': version['user_id'], 'timestamp': LATEST}
+    if 'version' not in current:
+        return {'Put': {
+            'TableName': table_name,
+            'Item': latest_item(version),
+            'ConditionExpression': 'attribute_not_exists(#v) AND '
+                                   '(attribute_not_exists(version_timestamp) OR version_timestamp = :current)',
+            'ExpressionAttributeNames': {'#v': 'version'},
+            'ExpressionAttributeValues': {':current': current['timestamp']}
+        }}
+    fields = dict(changes, version=version['version'], updated_at=version['updated_at'],
+                  version_timestamp=version['timestamp'], **index_keys(changes))
+    names = {'#v': 'version'}
+    values = {':expected': current['version']}
+    assignments = []
+    for number, (field, value) in enumerate(fields.items()):
+        names['#f{}'.format(number)] = field
+        values[':f{}'.format(number)] = value
+        assignments.append('#f{0} = :f{0}'.format(number))
+    return {'Update': {
+        'TableName': table_name,
+        'Key': key,
+        'UpdateExpression': 'SET ' + ', '.join(assignments),
+        'ConditionExpression': '#v = :expected',
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }}
+
+
+def update_version(table, current, changes, timestamp):
+    """Write the next version of a user in one TransactWriteItems call.
+
+    table: Table resource
+    current: the latest version the update is based on
+    changes: field -> new value, only the fields that changed
+    timestamp: ISO timestamp of the new version
+    The new version item is a full copy of current with the changes, the
+    LATEST item only gets the changed fields. Raises VersionConflict when the
+    LATEST item moved past current in the meantime. Returns the new version.
+    """
+    version = dict(current, **changes)
+    version.update(timestamp=timestamp, updated_at=timestamp,
+                   version=current.get('version', 0) + 1)
+    try:
+        table.meta.client.transact_write_items(TransactItems=[
+            {'Put': {
+                'TableName': table.name,
+                'Item': version,
+                'ConditionExpression': 'attribute_not_exists(user_id)'
+            }},
+            _latest_update(table.name, current, version, changes)
+        ])
+    except ClientError as e:
+        reasons = e.response.get('CancellationReasons') or []
+        if any(reason.get('Code') == 'ConditionalCheckFailed' for reason in reasons):
+            raise VersionConflict(current['user_id'], current.get('version', 0))
+        raise
+    return version
+
+
+def put_versions(table, versions):
+    """Write version items with their LATEST items, TRANSACT_LIMIT actions per
+    transaction. A transaction cannot touch an item twice, so versions of a
+    user already in the current transaction start the next one.
+    table: Table resource"""
+    actions = []
+    users = set()
+    for version in versions:
+        if len(actions) + 2 > TRANSACT_LIMIT or version['user_id'] in users:
+            table.meta.client.transact_write_items(TransactItems=actions)
+            actions = []
+            users = set()
+        actions.extend(_put_actions(table.name, version))
+        users.add(version['user_id'])
+    if actions:
+        table.meta.client.transact_write_items(TransactItems=actions)
+
+
+def get_latest(table, user_id, consistent=False):
+    """Latest version of a user with one GetItem, None when it does not exist.
+    Users written before the LATEST items existed fall back to a query."""
+    response = table.get_item(Key={'user_id': user_id, 'timestamp': LATEST},
+                              ConsistentRead=consistent)
+    if 'Item' in response:
+        return from_latest(response['Item'])
+    return _query_latest(table, user_id, consistent)
+
+
+def _query_latest(table, user_id, consistent=False):
+    response = table.query(
+        KeyConditionExpression=versions_condition(user_id),
+        ScanIndexForward=False,
+        Limit=1,
+        ConsistentRead=consistent
+    )
+    return response['Items'][0] if response['Items'] else None
+
+
+def versions_condition(user_id):
+    """Key condition of the versions of a user, without the LATEST item"""
+    return Key('user_id').eq(user_id) & Key('timestamp').lt(LATEST)
+
+
+def _batch_get_chunk(table, user_ids):
+    """BatchGetItem on the LATEST items of at most BATCH_GET_LIMIT users,
+    retrying the unprocessed keys with backoff. Gives up after
+    BATCH_GET_ATTEMPTS calls in a row that processed no key."""
+    found = {}
+    # The client of a Table resource and a FastTable both take Python keys,
+    # a FastTable returns JSON-ready items
+    batch_get_item = getattr(table, 'batch_get_item', None) or table.meta.client.batch_get_item
+    keys = [{'user_id': user_id, 'timestamp': LATEST} for user_id in user_ids]
+    request = {table.name: {'Keys': keys}}
+    attempts = 0
+    while request:
+        if attempts == BATCH_GET_ATTEMPTS:
+            raise RuntimeError('{} keys still unprocessed after {} BatchGetItem calls'.format(
+                len(request[table.name]['Keys']), attempts))
+        if attempts:
+            time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempts)))
+        response = batch_get_item(RequestItems=request)
+        for item in response['Responses'].get(table.name, []):
+            version = from_latest(item)
+            found[version['user_id']] = version
+        unprocessed = response.get('UnprocessedKeys') or {}
+        left = len(unprocessed.get(table.name, {}).get('Keys', []))
+        # Back off harder only while throttled calls make no progress
+        attempts = attempts + 1 if left == len(request[table.name]['Keys']) else 1
+        request = unprocessed if left else None
+    return found
+
+
+def _map(function, values, workers):
+    """function over values on a thread pool of at most workers threads,
+    in the calling thread when there is only one value"""
+    if len(values) <= 1:
+        return [function(value) for value in values]
+    with ThreadPoolExecutor(max_workers=min(workers or READ_WORKERS, len(values))) as executor:
+        return list(executor.map(function, values))
+
+
+def batch_get_latest(table, user_ids, workers=None):
+    """Latest versions of users with BatchGetItem on their LATEST items,
+    BATCH_GET_LIMIT keys per call and the calls running in parallel. Returns
+    a dict user_id -> version, users without a LATEST item are left out."""
+    unique_ids = list(dict.fromkeys(user_ids))
+    chunks = [unique_ids[start:start + BATCH_GET_LIMIT]
+              for start in range(0, len(unique_ids), BATCH_GET_LIMIT)]
+    found = {}
+    for chunk_found in _map(lambda chunk: _batch_get_chunk(table, chunk), chunks, workers):
+        found.update(chunk_found)
+    return found
+
+
+def query_latest(table, user_ids, workers=None):
+    """Latest versions of users with one Query per user, the queries running
+    in parallel. Returns a dict like batch_get_latest."""
+    unique_ids = list(dict.fromkeys(user_ids))
+    versions = _map(lambda user_id: _query_latest(table, user_id), unique_ids, workers)
+    return {user_id: version for user_id, version in zip(unique_ids, versions) if version}
+
+
+def get_latest_many(table, user_ids, workers=None):
+    """Latest versions of users in the order of user_ids, None for the users
+    not found. Users without a LATEST item, written before them, fall back
+    to parallel queries."""
+    found = batch_get_latest(table, user_ids, workers)
+    missing = [user_id for user_id in user_ids if user_id not in found]
+    if missing:
+        found.update(query_latest(table, missing, workers))
+    return [found.get(user_id) for user_id in user_ids]
+
+
+def item_keys(table, user_id, page_size=None):
+    """Yield the keys of every item of a user, LATEST item included, one
+    query page at a time. Only the key attributes are read."""
+    expression, names = projection_expression(['user_id', 'timestamp'])
+    kwargs = {
+        'KeyConditionExpression': Key('user_id').eq(user_id),
+        'ProjectionExpression': expression,
+        'ExpressionAttributeNames': names
+    }
+    if page_size:
+        kwargs['Limit'] = page_size
+    while True:
+        response = table.query(**kwargs)
+        if response['Items']:
+            yield response['Items']
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+def _delete_chunk(table, keys):
+    # batch_writer sends 25 deletes per BatchWriteItem and resends the
+    # unprocessed ones until they are all through
+    with table.batch_writer() as batch:
+        for key in keys:
+            batch.delete_item(Key=key)
+
+
+def delete_keys(table, keys, workers=None, chunk_size=None):
+    """Delete items by key, chunk_size keys per batch_writer with up to
+    workers of them running in parallel. Returns the number of keys."""
+    chunk_size = chunk_size or DELETE_CHUNK
+    chunks = [keys[start:start + chunk_size] for start in range(0, len(keys), chunk_size)]
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            _delete_chunk(table, chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers or DELETE_WORKERS, len(chunks))) as executor:
+            # list() raises the first error of a chunk
+            list(executor.map(lambda chunk: _delete_chunk(table, chunk), chunks))
+    return len(keys)
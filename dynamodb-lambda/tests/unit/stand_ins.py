@@ -0,0 +1,174 @@
+"""In-memory stand-ins for the DynamoDB tables the Lambda modules read,
+answering Scan and Query calls the way DynamoDB pages them, and for the
+Lambda client they invoke other functions with"""
+import json
+import threading
+import zlib
+
+from boto3.dynamodb.conditions import AttributeBase
+from boto3.dynamodb.table import BatchWriter
+
+
+def _value(operand, item):
+    return item.get(operand.name) if isinstance(operand, AttributeBase) else operand
+
+
+def matches(condition, item):
+    """Whether an item satisfies a boto3 key or filter condition"""
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator == "AND":
+        return all(matches(value, item) for value in values)
+    if operator == "OR":
+        return any(matches(value, item) for value in values)
+    operands = [_value(value, item) for value in values]
+    if operands[0] is None:
+        return False
+    if operator == "=":
+        return operands[0] == operands[1]
+    if operator == "<>":
+        return operands[0] != operands[1]
+    if operator == "<":
+        return operands[0] < operands[1]
+    if operator == "<=":
+        return operands[0] <= operands[1]
+    if operator == ">":
+        return operands[0] > operands[1]
+    if operator == ">=":
+        return operands[0] >= operands[1]
+    if operator == "BETWEEN":
+        return operands[1] <= operands[0] <= operands[2]
+    raise NotImplementedError(operator)
+
+
+class ScanTable:
+    """Items of a table keyed by user_id and timestamp. Scan splits them in
+    segments by a hash of the partition key, returns a segment in key order
+    and stops at Limit with a LastEvaluatedKey, like DynamoDB."""
+
+    def __init__(self, items, partition_key="user_id", sort_key="timestamp"):
+        self.partition_key = partition_key
+        self.sort_key = sort_key
+        self.items = sorted(items, key=self._key)
+        self.calls = []
+
+    def _key(self, item):
+        return item[self.partition_key], item[self.sort_key]
+
+    def scan(self, Segment=0, TotalSegments=1, Limit=None, ExclusiveStartKey=None,
+             FilterExpression=None, **kwargs):
+        self.calls.append(dict(kwargs, Segment=Segment, Limit=Limit, ExclusiveStartKey=ExclusiveStartKey))
+        segment = [item for item in self.items
+                   if zlib.crc32(str(item[self.partition_key]).encode()) % TotalSegments == Segment]
+        if ExclusiveStartKey:
+            start = self._key(ExclusiveStartKey)
+            segment = [item for item in segment if self._key(item) > start]
+        read = segment[:Limit] if Limit else segment
+        response = {"Items": [dict(item) for item in read
+                              if FilterExpression is None or matches(FilterExpression, item)]}
+        if Limit and len(read) == Limit:
+            response["LastEvaluatedKey"] = {self.partition_key: read[-1][self.partition_key],
+                                            self.sort_key: read[-1][self.sort_key]}
+        return response
+
+
+class IndexTable:
+    """Items of a GSI keyed by hash_key and range_key. Query returns the
+    items of the key condition in range key order, ScanIndexForward=False
+    reversing it, and stops at Limit with a LastEvaluatedKey holding the
+    index and table keys, like DynamoDB."""
+
+    def __init__(self, items, hash_key, range_key, table_keys=("user_id", "timestamp")):
+        self.key_names = (hash_key, range_key) + tuple(table_keys)
+        self.items = sorted(items, key=self._key)
+        self.calls = []
+
+    def _key(self, item):
+        return tuple(item[name] for name in self.key_names[1:])
+
+    def query(self, KeyConditionExpression, Limit=None, ExclusiveStartKey=None,
+              ScanIndexForward=True, **kwargs):
+        self.calls.append(dict(kwargs, KeyConditionExpression=KeyConditionExpression, Limit=Limit,
+                               ExclusiveStartKey=ExclusiveStartKey))
+        found = [item for item in self.items if matches(KeyConditionExpression, item)]
+        if not ScanIndexForward:
+            found.reverse()
+        if ExclusiveStartKey:
+            start = self._key(ExclusiveStartKey)
+            found = [item for item in found
+                     if (self._key(item) > start if ScanIndexForward else self._key(item) < start)]
+        read = found[:Limit] if Limit else found
+        response = {"Items": [dict(item) for item in read]}
+        if Limit and len(read) == Limit:
+            response["LastEvaluatedKey"] = {name: read[-1][name] for name in self.key_names}
+        return response
+
+
+class ItemTable(IndexTable):
+    """Items of a table keyed by user_id and timestamp. Query pages the items
+    of a user like IndexTable, a page holding at most page_items items like
+    the 1 MB limit of DynamoDB, and reads only the projected attributes. Items
+    are deleted by delete_item and by the BatchWriteItem calls of a boto3
+    batch_writer, which leave the last request of a call unprocessed the
+    first time it is sent, like a throttled table, so the writer resends
+    it."""
+
+    name = "users"
+
+    def __init__(self, items, page_items=None):
+        super().__init__(items, "user_id", "timestamp", table_keys=())
+        self.page_items = page_items
+        self.lock = threading.Lock()
+        # Number of requests of every BatchWriteItem call
+        self.batches = []
+        self.unprocessed = []
+
+    def query(self, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        if self.page_items:
+            kwargs["Limit"] = min(kwargs.get("Limit") or self.page_items, self.page_items)
+        with self.lock:
+            response = super().query(**kwargs)
+        if ProjectionExpression:
+            names = [ExpressionAttributeNames.get(name.strip(), name.strip())
+                     for name in ProjectionExpression.split(",")]
+            response["Items"] = [{name: item[name] for name in names if name in item}
+                                 for item in response["Items"]]
+        return response
+
+    def _delete(self, key):
+        self.items = [item for item in self.items
+                      if (item["user_id"], item["timestamp"]) != (key["user_id"], key["timestamp"])]
+
+    def delete_item(self, Key):
+        with self.lock:
+            self._delete(Key)
+        return {}
+
+    def batch_writer(self):
+        return BatchWriter(self.name, self)
+
+    def batch_write_item(self, RequestItems):
+        requests = RequestItems[self.name]
+        assert len(requests) <= 25
+        with self.lock:
+            self.batches.append(len(requests))
+            last_key = requests[-1]["DeleteRequest"]["Key"]
+            if last_key in self.unprocessed:
+                unprocessed = []
+            else:
+                self.unprocessed.append(last_key)
+                unprocessed, requests = requests[-1:], requests[:-1]
+            for request in requests:
+                self._delete(request["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": {self.name: unprocessed} if unprocessed else {}}
+
+
+class RecordingLambda:
+    """Lambda client keeping the asynchronous invocations"""
+
+    def __init__(self):
+        self.invocations = []
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        self.invocations.append((FunctionName, InvocationType, json.loads(Payload)))
+        return {"StatusCode": 202}
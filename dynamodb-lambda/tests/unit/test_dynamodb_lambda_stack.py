@@ -1,7 +1,7 @@
 import aws_cdk as core
 import aws_cdk.assertions as assertions
 
-from dynamodb_lambda.dynamodb_lambda_stack import DynamodbLambdaStack
+from dynamodb_lambda.dynamodb_lambda_stack import USERS_TABLE_STAGES, DynamodbLambdaStack
 
 # example tests. To run these tests, uncomment this file along with the example
 # resource in dynamodb_lambda/dynamodb_lambda_stack.py
@@ -13,3 +13,93 @@ def test_sqs_queue_created():
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+def test_age_index_created():
+    app = core.App()
+    stack = DynamodbLambdaStack(app, "dynamodb-lambda")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "GlobalSecondaryIndexes": assertions.Match.array_with([
+            assertions.Match.object_like({
+                "IndexName": "age-index",
+                "KeySchema": [
+                    {"AttributeName": "age_bucket", "KeyType": "HASH"},
+                    {"AttributeName": "age", "KeyType": "RANGE"}
+                ]
+            })
+        ]),
+        "AttributeDefinitions": assertions.Match.array_with([
+            {"AttributeName": "age_bucket", "AttributeType": "N"},
+            {"AttributeName": "age", "AttributeType": "N"}
+        ])
+    })
+
+
+def test_created_index_created():
+    app = core.App()
+    stack = DynamodbLambdaStack(app, "dynamodb-lambda")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "GlobalSecondaryIndexes": assertions.Match.array_with([
+            assertions.Match.object_like({
+                "IndexName": "created-index",
+                "KeySchema": [
+                    {"AttributeName": "created_day", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            })
+        ])
+    })
+
+
+def test_cache_invalidation_stream():
+    app = core.App()
+    stack = DynamodbLambdaStack(app, "dynamodb-lambda")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "TableName": "users-learning-table",
+        "StreamSpecification": {"StreamViewType": "NEW_AND_OLD_IMAGES"}
+    })
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "TableName": "users-cache-invalidations",
+        "TimeToLiveSpecification": {"AttributeName": "expires_at", "Enabled": True}
+    })
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "StartingPosition": "LATEST"
+    })
+
+
+def users_table(stage=None):
+    context = {} if stage is None else {"users_table_stage": str(stage)}
+    stack = DynamodbLambdaStack(core.App(context=context), "dynamodb-lambda")
+    template = assertions.Template.from_stack(stack)
+    [table] = [resource["Properties"] for resource in template.find_resources("AWS::DynamoDB::Table").values()
+               if resource["Properties"].get("TableName") == "users-learning-table"]
+    return template, table
+
+
+def changes(table):
+    indexes = [index["IndexName"] for index in table.get("GlobalSecondaryIndexes", [])]
+    return (["stream"] if "StreamSpecification" in table else []) + [
+        name for name in indexes if name != "email-index"]
+
+
+def test_users_table_changes_are_deployed_one_per_stage():
+    stages = [changes(users_table(stage)[1]) for stage in range(len(USERS_TABLE_STAGES) + 1)]
+
+    # Every deployment adds one change, so at most one GSI, to the table of
+    # the previous one
+    assert stages == [list(USERS_TABLE_STAGES[:stage]) for stage in range(len(USERS_TABLE_STAGES) + 1)]
+    assert changes(users_table()[1]) == list(USERS_TABLE_STAGES)
+
+
+def test_stream_consumer_waits_for_the_stream():
+    template, _ = users_table(0)
+
+    template.resource_count_is("AWS::Lambda::EventSourceMapping", 0)
+    users_table(1)[0].resource_count_is("AWS::Lambda::EventSourceMapping", 1)
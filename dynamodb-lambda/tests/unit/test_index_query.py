@@ -0,0 +1,147 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from .stand_ins import IndexTable
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+import index_query  # noqa: E402
+import pagination  # noqa: E402
+import user_store  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setattr(pagination, "_secret", b"test-secret")
+
+
+def aged_users(count=60):
+    return [dict({"user_id": "u{:02}".format(user), "timestamp": user_store.LATEST,
+                  "age": user % 50}, **user_store.index_keys({"age": user % 50}))
+            for user in range(count)]
+
+
+def test_age_conditions_cover_the_overlapping_buckets():
+    conditions = user_store.age_conditions(25, 44)
+
+    assert list(conditions) == ["20", "30", "40"]
+
+
+@pytest.mark.parametrize("limit", [1, 4, 25, 100])
+def test_bucket_pages_follow_their_cursors(limit):
+    users = aged_users()
+    table = IndexTable(users, user_store.AGE_BUCKET_KEY, "age")
+    conditions = user_store.age_conditions(25, 44)
+    seen = []
+    cursor = None
+    while True:
+        state = pagination.decode_cursor(cursor, "scan_by_age")
+        page, cursor = pagination.bucket_page(table, "scan_by_age", state, conditions, limit)
+        assert len(page) <= max(limit, len(conditions))
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert sorted(item["user_id"] for item in seen) == [
+        user["user_id"] for user in users if 25 <= user["age"] <= 44]
+
+
+def test_query_buckets_only_queries_the_buckets_left():
+    table = IndexTable(aged_users(), user_store.AGE_BUCKET_KEY, "age")
+    conditions = user_store.age_conditions(0, 49)
+    _, positions = index_query.query_buckets(table, conditions, 10)
+    table.calls.clear()
+    index_query.query_buckets(table, conditions, 10, {"20": positions["20"]})
+
+    assert len(table.calls) == 1
+    assert table.calls[0]["ExclusiveStartKey"] == positions["20"]
+
+
+def created_users(count=40):
+    """Users created every 5 hours from the start of 2025"""
+    users = []
+    for user in range(count):
+        created_at = (datetime(2025, 1, 1) + timedelta(hours=5 * user)).isoformat()
+        users.append(dict({"user_id": "u{:02}".format(user), "timestamp": user_store.LATEST,
+                           "created_at": created_at}, **user_store.index_keys({"created_at": created_at})))
+    return users
+
+
+def test_created_conditions_are_newest_day_first():
+    conditions = user_store.created_conditions(datetime(2025, 1, 1, 12), datetime(2025, 1, 3, 1))
+
+    assert [day for day, _ in conditions] == ["2025-01-03", "2025-01-02", "2025-01-01"]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 50])
+def test_ordered_pages_return_the_newest_users_in_order(limit):
+    users = created_users()
+    table = IndexTable(users, user_store.CREATED_DAY_KEY, "created_at")
+    since, until = datetime(2025, 1, 2, 3), datetime(2025, 1, 8)
+    conditions = user_store.created_conditions(since, until)
+    seen = []
+    cursor = None
+    while True:
+        state = pagination.decode_cursor(cursor, "query_recent_users")
+        page, cursor = pagination.ordered_page(
+            table, "query_recent_users", state, conditions, limit, user_store.CREATED_INDEX_KEYS,
+            ScanIndexForward=False)
+        assert len(page) <= limit
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    # The buckets end with the day of until
+    expected = sorted((user["created_at"] for user in users
+                       if since.isoformat() < user["created_at"] and user["created_day"] <= "2025-01-08"),
+                      reverse=True)
+    assert [item["created_at"] for item in seen] == expected
+
+
+def test_query_in_order_stops_once_limit_users_are_found():
+    table = IndexTable(created_users(), user_store.CREATED_DAY_KEY, "created_at")
+    conditions = user_store.created_conditions(datetime(2025, 1, 1), datetime(2025, 1, 8))
+    items, position = index_query.query_in_order(
+        table, conditions, 2, user_store.CREATED_INDEX_KEYS, max_workers=1, ScanIndexForward=False)
+
+    # 2025-01-08 holds the newest users, the older days are never read
+    assert [item["created_at"] for item in items] == ["2025-01-08T22:00:00", "2025-01-08T17:00:00"]
+    assert len(table.calls) == 1
+    assert position == ("2025-01-08", {name: items[-1][name] for name in user_store.CREATED_INDEX_KEYS})
+
+
+def test_query_in_order_resumes_at_the_start_of_the_next_bucket():
+    table = IndexTable(created_users(), user_store.CREATED_DAY_KEY, "created_at")
+    conditions = user_store.created_conditions(datetime(2025, 1, 1), datetime(2025, 1, 9))
+    items, _ = index_query.query_in_order(
+        table, conditions, 3, user_store.CREATED_INDEX_KEYS, start=("2025-01-05", None),
+        ScanIndexForward=False)
+
+    assert [item["created_at"] for item in items] == [
+        "2025-01-05T19:00:00", "2025-01-05T14:00:00", "2025-01-05T09:00:00"]
+
+
+@pytest.mark.parametrize("limit", [3, 12, 40])
+def test_query_in_order_reads_about_limit_items(limit):
+    # A day holds 4 or 5 users, most pages need several days
+    table = IndexTable(created_users(200), user_store.CREATED_DAY_KEY, "created_at")
+    read = []
+    query = table.query
+
+    def counted_query(**kwargs):
+        response = query(**kwargs)
+        read.extend(response["Items"])
+        return response
+    table.query = counted_query
+    conditions = user_store.created_conditions(datetime(2025, 1, 1), datetime(2025, 2, 11))
+    items, _ = index_query.query_in_order(
+        table, conditions, limit, user_store.CREATED_INDEX_KEYS, max_workers=8, ScanIndexForward=False)
+
+    assert len(items) == limit
+    # Only the last round reads ahead, at most one item a bucket more
+    assert len(read) <= limit + 8
+    assert table.calls[0]["Limit"] == limit
@@ -0,0 +1,141 @@
+import json
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+from .stand_ins import ScanTable
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+import pagination  # noqa: E402
+from scan_engine import ScanEngine  # noqa: E402
+
+KEY = {"user_id": "u1", "timestamp": "2025-01-01T00:00:00", "age": Decimal("30.5")}
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setattr(pagination, "_secret", b"test-secret")
+
+
+def cursor_of(key, operation="list_users"):
+    return pagination.encode_cursor(operation, {"key": pagination.serialize_key(key)})
+
+
+def test_cursor_round_trip_keeps_numbers_exact():
+    state = pagination.decode_cursor(cursor_of(KEY), "list_users")
+
+    assert pagination.deserialize_key(state["key"]) == KEY
+
+
+def test_no_cursor_for_the_last_page():
+    assert pagination.encode_cursor("list_users", None) is None
+    assert pagination.decode_cursor(None, "list_users") is None
+    assert pagination.decode_cursor("", "list_users") is None
+
+
+def test_altered_payload_is_rejected():
+    payload, signature = cursor_of(KEY).split(".")
+    forged = json.loads(pagination._b64decode(payload))
+    forged["state"]["key"]["user_id"] = {"S": "u2"}
+    forged_payload = pagination._b64encode(json.dumps(forged).encode())
+
+    with pytest.raises(pagination.CursorError):
+        pagination.decode_cursor(forged_payload + "." + signature, "list_users")
+
+
+def test_cursor_signed_with_another_secret_is_rejected(monkeypatch):
+    cursor = cursor_of(KEY)
+    monkeypatch.setattr(pagination, "_secret", b"other-secret")
+
+    with pytest.raises(pagination.CursorError):
+        pagination.decode_cursor(cursor, "list_users")
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "a.b.c", "."])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(pagination.CursorError):
+        pagination.decode_cursor(cursor, "list_users")
+
+
+def test_cursor_of_another_operation_is_rejected():
+    with pytest.raises(pagination.CursorError):
+        pagination.decode_cursor(cursor_of(KEY, "query_by_email:a@example.com"),
+                                 "query_by_email:b@example.com")
+
+
+def test_expired_cursor_is_rejected(monkeypatch):
+    cursor = cursor_of(KEY)
+    now = pagination.time.time()
+    monkeypatch.setattr(pagination.time, "time", lambda: now + pagination.CURSOR_TTL + 1)
+
+    with pytest.raises(pagination.CursorError):
+        pagination.decode_cursor(cursor, "list_users")
+
+
+def test_cursor_errors_are_value_errors():
+    # The handlers answer ValueError with a 400
+    assert issubclass(pagination.CursorError, ValueError)
+
+
+@pytest.mark.parametrize("value, limit", [(None, pagination.DEFAULT_LIMIT), ("", pagination.DEFAULT_LIMIT),
+                                          ("1", 1), (str(pagination.MAX_LIMIT), pagination.MAX_LIMIT)])
+def test_parse_limit(value, limit):
+    assert pagination.parse_limit(value) == limit
+
+
+@pytest.mark.parametrize("value", ["0", str(pagination.MAX_LIMIT + 1), "ten"])
+def test_parse_limit_rejects_out_of_range(value):
+    with pytest.raises(ValueError):
+        pagination.parse_limit(value)
+
+
+def test_ndjson_page_ends_with_the_page_fields():
+    response = pagination.page_response("users", [{"age": Decimal(30)}, {"age": Decimal(31)}],
+                                        "next", ndjson=True)
+    lines = response["body"].splitlines()
+
+    assert response["headers"]["Content-Type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in lines] == [
+        {"age": 30.0}, {"age": 31.0}, {"count": 2, "next_cursor": "next"}]
+
+
+def test_query_page_resumes_from_the_cursor():
+    class Table:
+        def query(self, **kwargs):
+            self.kwargs = kwargs
+            return {"Items": [KEY], "LastEvaluatedKey": KEY}
+
+    table = Table()
+    items, cursor = pagination.query_page(table, "history", None, 1)
+    pagination.query_page(table, "history", pagination.decode_cursor(cursor, "history"), 1)
+
+    assert items == [KEY]
+    assert table.kwargs["ExclusiveStartKey"] == KEY
+
+
+def test_scan_pages_follow_their_cursors():
+    items = [{"user_id": "u{:02}".format(user), "timestamp": "2025-01-01"} for user in range(30)]
+    engine = ScanEngine(ScanTable(items), segments=3)
+    seen = []
+    cursor = None
+    while True:
+        state = pagination.decode_cursor(cursor, "list_users")
+        page, cursor = pagination.scan_page(engine, "list_users", state, 4, merge_versions=False)
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert sorted(item["user_id"] for item in seen) == [item["user_id"] for item in items]
+
+
+def test_scan_cursor_of_another_segment_count_is_rejected():
+    items = [{"user_id": "u{:02}".format(user), "timestamp": "2025-01-01"} for user in range(30)]
+    _, cursor = pagination.scan_page(ScanEngine(ScanTable(items), segments=3), "list_users", None, 4)
+    state = pagination.decode_cursor(cursor, "list_users")
+
+    with pytest.raises(pagination.CursorError):
+        pagination.scan_page(ScanEngine(ScanTable(items), segments=4), "list_users", state, 4)
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import pytest
+
+from .stand_ins import ItemTable, RecordingLambda
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+# The worker reads its settings and creates its clients when imported
+os.environ.setdefault("TABLE_NAME", "users")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import purge_worker  # noqa: E402
+
+
+class Context:
+    """Lambda context losing millis_per_call of its time at every check"""
+    function_name = "purge"
+
+    def __init__(self, remaining_millis, millis_per_call):
+        self.remaining_millis = remaining_millis
+        self.millis_per_call = millis_per_call
+
+    def get_remaining_time_in_millis(self):
+        self.remaining_millis -= self.millis_per_call
+        return self.remaining_millis
+
+
+@pytest.fixture
+def table(monkeypatch):
+    """Versions of u1 and u2, deleted 5 keys per page"""
+    table = ItemTable([{"user_id": user_id, "timestamp": "2025-01-01T00:00:{:02}".format(second)}
+                       for user_id in ("u1", "u2") for second in range(12)])
+    monkeypatch.setattr(purge_worker, "table", table)
+    monkeypatch.setattr(purge_worker, "lambda_client", RecordingLambda())
+    monkeypatch.setattr(purge_worker, "PAGE_SIZE", 5)
+    monkeypatch.setattr(purge_worker, "RESERVE_MILLIS", 1000)
+    return table
+
+
+def remaining(table, user_id):
+    return len([item for item in table.items if item["user_id"] == user_id])
+
+
+def test_purge_deletes_every_page(table):
+    result = purge_worker.lambda_handler({"user_id": "u1"}, Context(900000, 1000))
+
+    assert result == {"user_id": "u1", "deleted": 12, "done": True}
+    assert (remaining(table, "u1"), remaining(table, "u2")) == (0, 12)
+    assert purge_worker.lambda_client.invocations == []
+
+
+def test_purge_invokes_itself_when_the_reserve_is_reached(table):
+    # The second page leaves less than RESERVE_MILLIS
+    result = purge_worker.lambda_handler({"user_id": "u1"}, Context(2500, 1000))
+
+    assert result == {"user_id": "u1", "deleted": 10, "done": False}
+    assert remaining(table, "u1") == 2
+    assert purge_worker.lambda_client.invocations == [("purge", "Event", {"user_id": "u1", "deleted": 10})]
+
+    # The next invocation carries on with the count of the previous ones
+    event = purge_worker.lambda_client.invocations[0][2]
+    assert purge_worker.lambda_handler(event, Context(900000, 1000)) == {
+        "user_id": "u1", "deleted": 12, "done": True}
+    assert remaining(table, "u1") == 0
@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+
+import pytest
+from botocore.stub import Stubber
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+# The handlers read their settings and create their clients when imported
+os.environ.setdefault("TABLE_NAME", "users")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import batch_handler  # noqa: E402
+import crud_handler  # noqa: E402
+import user_cache  # noqa: E402
+import user_store  # noqa: E402
+
+NOW = "2025-01-01T00:00:00"
+
+
+def latest_key(user_id):
+    return {"user_id": {"S": user_id}, "timestamp": {"S": user_store.LATEST}}
+
+
+def latest_item(user_id):
+    return dict(latest_key(user_id), version_timestamp={"S": NOW}, latest_of={"S": user_id},
+                name={"S": "Ann"}, age={"N": "30"}, age_bucket={"N": "30"}, version={"N": "1"})
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache.cache.clear()
+
+
+def test_get_user_reads_through_fast_table():
+    with Stubber(crud_handler.fast_table.client) as stubber:
+        stubber.add_response("get_item", {"Item": latest_item("u1")},
+                             {"TableName": "users", "Key": latest_key("u1"), "ConsistentRead": False})
+        response = crud_handler.get_user("u1")
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["user"] == {
+        "user_id": "u1", "timestamp": NOW, "name": "Ann", "age": 30, "version": 1}
+
+
+def test_list_users_scans_through_fast_table():
+    with Stubber(crud_handler.fast_table.client) as stubber:
+        for _ in range(crud_handler.DEFAULT_SEGMENTS):
+            stubber.add_response("scan", {"Items": [latest_item("u1")]})
+        response = crud_handler.list_users({})
+
+    assert response["statusCode"] == 200
+    users = json.loads(response["body"])["users"]
+    assert len(users) == crud_handler.DEFAULT_SEGMENTS
+    assert users[0]["timestamp"] == NOW and "latest_of" not in users[0]
+
+
+def test_batch_read_users_reads_through_fast_table():
+    with Stubber(batch_handler.fast_table.client) as stubber:
+        stubber.add_response(
+            "batch_get_item", {"Responses": {"users": [latest_item("u1")]}},
+            {"RequestItems": {"users": {"Keys": [latest_key("u1"), latest_key("u2")]}}})
+        # u2 has no LATEST item and no version either
+        stubber.add_response("query", {"Items": []})
+        response = batch_handler.batch_read_users(["u1", "u2"])
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert [user["user_id"] for user in body["found_users"]] == ["u1"]
+    assert body["not_found_users"] == ["u2"]
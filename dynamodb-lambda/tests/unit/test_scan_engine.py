@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+from .stand_ins import ScanTable
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+from scan_engine import ScanEngine, projection_expression  # noqa: E402
+
+
+def versions(users=20, per_user=5):
+    """Users with a growing number of versions, up to per_user"""
+    return [{"user_id": "u{:02}".format(user), "timestamp": "2025-01-{:02}".format(day + 1),
+             "age": user}
+            for user in range(users) for day in range(user % per_user + 1)]
+
+
+def expected_latest(items):
+    latest = {}
+    for item in items:
+        if item["timestamp"] > latest.get(item["user_id"], {"timestamp": ""})["timestamp"]:
+            latest[item["user_id"]] = item
+    return latest
+
+
+def test_projection_expression_uses_placeholders():
+    expression, names = projection_expression(["name", "timestamp"])
+
+    assert expression == "#p0, #p1"
+    assert names == {"#p0": "name", "#p1": "timestamp"}
+
+
+def test_items_reads_every_segment():
+    items = versions()
+    engine = ScanEngine(ScanTable(items), segments=4, page_size=3)
+
+    assert sorted(engine.items(), key=lambda item: (item["user_id"], item["timestamp"])) == items
+
+
+def test_items_stops_at_limit():
+    engine = ScanEngine(ScanTable(versions()), segments=4, page_size=2)
+
+    assert len(list(engine.items(limit=7))) == 7
+
+
+def test_latest_merges_the_versions_of_every_segment():
+    items = versions()
+    engine = ScanEngine(ScanTable(items), segments=3, page_size=2)
+
+    assert engine.latest() == expected_latest(items)
+
+
+def test_segment_errors_are_raised():
+    class FailingTable:
+        def scan(self, **kwargs):
+            raise RuntimeError("throttled")
+
+    with pytest.raises(RuntimeError):
+        list(ScanEngine(FailingTable(), segments=2).items())
+
+
+@pytest.mark.parametrize("limit", [1, 4, 9, 100])
+def test_latest_pages_never_split_a_user(limit):
+    items = versions()
+    engine = ScanEngine(ScanTable(items), segments=3)
+    seen = []
+    positions = None
+    while True:
+        page, positions = engine.latest_page(limit, positions)
+        seen.extend(page)
+        if positions is None:
+            break
+
+    # Every user once, with its latest version
+    assert len(seen) == len({item["user_id"] for item in seen})
+    assert {item["user_id"]: item for item in seen} == expected_latest(items)
+
+
+@pytest.mark.parametrize("limit", [1, 5, 100])
+def test_pages_return_every_item_once(limit):
+    items = versions()
+    engine = ScanEngine(ScanTable(items), segments=4)
+    seen = []
+    positions = None
+    while True:
+        page, positions = engine.page(limit, positions)
+        seen.extend(page)
+        if positions is None:
+            break
+
+    assert sorted(seen, key=lambda item: (item["user_id"], item["timestamp"])) == items
@@ -0,0 +1,228 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from boto3.dynamodb.conditions import Key
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+import user_cache  # noqa: E402
+import user_store  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class UsersTable:
+    """Stand-in for the users table: LATEST items by user_id, versioned
+    writes, counts the reads that reach it"""
+
+    def __init__(self, latency=0.0):
+        self.items = {}
+        self.reads = 0
+        self.latency = latency
+        self.lock = threading.Lock()
+
+    def write(self, user_id, version):
+        with self.lock:
+            self.items[user_id] = user_store.latest_item({
+                "user_id": user_id, "timestamp": "2025-01-01T00:00:00", "age": 30,
+                "created_at": "2025-01-01T00:00:00", "email": user_id + "@example.com",
+                "version": version})
+
+    def get_item(self, Key, ConsistentRead=False):
+        with self.lock:
+            self.reads += 1
+            item = self.items.get(Key["user_id"])
+        # The response travels back while writers go on
+        time.sleep(self.latency)
+        return {"Item": dict(item)} if item else {}
+
+    def query(self, **kwargs):
+        with self.lock:
+            self.reads += 1
+            email = kwargs["KeyConditionExpression"].get_expression()["values"][1]
+            return {"Items": [dict(item) for item in self.items.values() if item["email"] == email]}
+
+
+class InvalidationTable:
+    """Stand-in for the invalidation table, answers the queries of
+    InvalidationChannel on bucket and sk"""
+
+    def __init__(self):
+        self.items = []
+
+    def query(self, KeyConditionExpression, ConsistentRead):
+        bucket_condition, sk_condition = KeyConditionExpression.get_expression()["values"]
+        bucket = bucket_condition.get_expression()["values"][1]
+        after = sk_condition.get_expression()["values"][1]
+        return {"Items": sorted((item for item in self.items
+                                 if item["bucket"] == bucket and item["sk"] > after),
+                                key=lambda item: item["sk"])}
+
+
+def stream_record(event_id, user_id, version, event_name="MODIFY"):
+    image = {"user_id": {"S": user_id}, "timestamp": {"S": user_store.LATEST},
+             "email": {"S": user_id + "@example.com"}, "version": {"N": str(version)}}
+    change = {"Keys": {"user_id": image["user_id"], "timestamp": image["timestamp"]},
+              "OldImage": image}
+    if event_name != "REMOVE":
+        change["NewImage"] = image
+    return {"eventID": event_id, "eventName": event_name, "dynamodb": change}
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = user_cache.LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is user_cache._MISS
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = user_cache.LRUCache(ttl=60, clock=clock)
+    cache.put("a", 1)
+    clock.now = 59
+    assert cache.get("a") == 1
+    clock.now = 60
+    assert cache.get("a") is user_cache._MISS
+
+
+def test_fill_started_before_an_invalidation_is_refused():
+    cache = user_cache.LRUCache()
+    token = cache.begin_fill()
+    cache.invalidate(("user", "u1"), 2)
+
+    assert not cache.put(("user", "u1"), {"version": 1}, 1, token)
+    assert cache.put(("user", "u1"), {"version": 2}, 2, cache.begin_fill())
+
+
+def test_invalidation_keeps_an_entry_at_or_past_its_version():
+    cache = user_cache.LRUCache()
+    cache.put(("user", "u1"), {"version": 3}, 3)
+    cache.invalidate(("user", "u1"), 3)
+    assert cache.get(("user", "u1")) == {"version": 3}
+
+    cache.invalidate(("user", "u1"), 4)
+    assert cache.get(("user", "u1")) is user_cache._MISS
+
+
+def test_cached_table_serves_repeated_lookups():
+    users = UsersTable()
+    users.write("u1", 1)
+    cached = user_cache.CachedTable(users, user_cache.LRUCache())
+
+    for _ in range(5):
+        assert user_store.get_latest(cached, "u1")["version"] == 1
+    response = cached.query(IndexName="email-index", Limit=cached.email_limit,
+                            KeyConditionExpression=Key("email").eq("u1@example.com"))
+    cached.query(IndexName="email-index", Limit=cached.email_limit,
+                 KeyConditionExpression=Key("email").eq("u1@example.com"))
+
+    assert users.reads == 2
+    assert response["Items"][0]["user_id"] == "u1"
+    hits, misses, saved_units = cached.cache.take_stats()
+    assert (hits, misses) == (5, 2)
+    assert saved_units == 2.5
+
+
+def test_consistent_reads_bypass_the_cache():
+    users = UsersTable()
+    users.write("u1", 1)
+    cached = user_cache.CachedTable(users, user_cache.LRUCache())
+
+    user_store.get_latest(cached, "u1")
+    users.write("u1", 2)
+
+    assert user_store.get_latest(cached, "u1", consistent=True)["version"] == 2
+    assert users.reads == 2
+
+
+def test_channel_applies_each_record_once():
+    now = datetime(2025, 1, 1, 12, 0, 59)
+    invalidations = InvalidationTable()
+    channel = user_cache.InvalidationChannel(invalidations, poll_interval=0, now=lambda: now)
+    cache = user_cache.LRUCache()
+    cache.put(("user", "u1"), {"version": 1}, 1)
+    cache.put(("email", "u1@example.com"), ([], None))
+
+    now += timedelta(seconds=2)
+    invalidations.items = user_cache.invalidation_records([stream_record("e1", "u1", 2)], now)
+
+    assert channel.poll(cache) == 2
+    assert channel.poll(cache) == 0
+    assert cache.get(("user", "u1")) is user_cache._MISS
+    assert cache.get(("email", "u1@example.com")) is user_cache._MISS
+
+
+def test_removed_users_are_invalidated_whatever_their_version():
+    records = user_cache.invalidation_records(
+        [stream_record("e1", "u1", 2), stream_record("e2", "u1", 2, "REMOVE")], datetime(2025, 1, 1))
+    user_records = [record for record in records if record["kind"] == "user"]
+
+    assert len(user_records) == 1
+    assert "version" not in user_records[0]
+
+
+def test_lookups_never_go_back_to_an_invalidated_version():
+    """Writers publish versions to the table then invalidate, as the stream
+    handler does; readers must never see a version older than one already
+    invalidated when their lookup started"""
+    users = UsersTable(latency=0.0005)
+    users.write("u1", 0)
+    cached = user_cache.CachedTable(users, user_cache.LRUCache())
+    published = [0]
+    errors = []
+
+    def writer():
+        for version in range(1, 300):
+            users.write("u1", version)
+            cached.cache.invalidate(("user", "u1"), version)
+            published[0] = version
+            time.sleep(0.0002)
+
+    def reader():
+        for _ in range(500):
+            floor = published[0]
+            version = user_store.get_latest(cached, "u1")["version"]
+            if version < floor:
+                errors.append((version, floor))
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert user_store.get_latest(cached, "u1")["version"] == 299
+
+
+def test_metrics_are_emitted_in_embedded_metric_format(capsys):
+    cache = user_cache.LRUCache()
+    cache.put("a", 1, units=0.5)
+    cache.get("a")
+    cache.get("b")
+
+    user_cache.emit_metrics(cache)
+    metrics = json.loads(capsys.readouterr().out)
+
+    assert metrics["CacheHits"] == 1
+    assert metrics["CacheMisses"] == 1
+    assert metrics["CacheHitRatio"] == 50.0
+    assert metrics["SavedReadCapacityUnits"] == 0.5
+    assert user_cache.emit_metrics(cache) is None
@@ -0,0 +1,279 @@
+import os
+import sys
+from decimal import Decimal
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from .stand_ins import ItemTable
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+import fast_dynamo  # noqa: E402
+import user_store  # noqa: E402
+
+CURRENT = {
+    "user_id": "u1",
+    "timestamp": "2025-01-01T00:00:00",
+    "name": "Ann",
+    "email": "ann@example.com",
+    "age": Decimal(30),
+    "version": Decimal(3),
+    "created_at": "2025-01-01T00:00:00",
+    "updated_at": "2025-01-01T00:00:00",
+}
+NOW = "2025-02-01T00:00:00"
+
+
+@pytest.fixture
+def table():
+    resource = boto3.resource("dynamodb", region_name="us-east-1",
+                              aws_access_key_id="test", aws_secret_access_key="test")
+    return resource.Table("users")
+
+
+@pytest.fixture
+def client():
+    return boto3.client("dynamodb", region_name="us-east-1",
+                        aws_access_key_id="test", aws_secret_access_key="test")
+
+
+def sent_params(table, operation):
+    """Parameters of the calls of an operation as the client sends them,
+    after the Table resource's client serialized the Python values"""
+    sent = []
+    table.meta.client.meta.events.register(
+        "before-parameter-build.dynamodb." + operation,
+        lambda params, **kwargs: sent.append(params))
+    return sent
+
+
+def cancelled(stubber, *codes):
+    stubber.add_client_error(
+        "transact_write_items",
+        service_error_code="TransactionCanceledException",
+        modeled_fields={"CancellationReasons": [{"Code": code} for code in codes]},
+    )
+
+
+def test_update_version_writes_in_one_transaction(table):
+    with Stubber(table.meta.client) as stubber:
+        stubber.add_response("transact_write_items", {})
+        version = user_store.update_version(table, CURRENT, {"age": 31}, NOW)
+        stubber.assert_no_pending_responses()
+
+    assert version["version"] == 4
+    assert version["timestamp"] == version["updated_at"] == NOW
+    assert version["name"] == "Ann" and version["age"] == 31
+
+
+def test_update_version_sets_only_changed_fields(table):
+    sent = []
+    table.meta.client.meta.events.register(
+        "before-parameter-build.dynamodb.TransactWriteItems",
+        lambda params, **kwargs: sent.append(params["TransactItems"]))
+    with Stubber(table.meta.client) as stubber:
+        stubber.add_response("transact_write_items", {})
+        user_store.update_version(table, CURRENT, {"age": 31}, NOW)
+
+    put, update = sent[0]
+    assert put["Put"]["ConditionExpression"] == "attribute_not_exists(user_id)"
+    update = update["Update"]
+    assert update["Key"] == {"user_id": {"S": "u1"}, "timestamp": {"S": user_store.LATEST}}
+    assert update["ConditionExpression"] == "#v = :expected"
+    assert update["ExpressionAttributeValues"][":expected"] == {"N": "3"}
+    assert set(update["ExpressionAttributeNames"].values()) == {
+        "version", "age", "age_bucket", "updated_at", "version_timestamp"}
+    assert "name" not in update["ExpressionAttributeNames"].values()
+
+
+def test_update_version_conflict_on_latest(table):
+    with Stubber(table.meta.client) as stubber:
+        cancelled(stubber, "None", "ConditionalCheckFailed")
+        with pytest.raises(user_store.VersionConflict) as error:
+            user_store.update_version(table, CURRENT, {"age": 31}, NOW)
+
+    assert error.value.user_id == "u1"
+    assert error.value.expected_version == 3
+
+
+def test_update_version_conflict_on_existing_version_item(table):
+    with Stubber(table.meta.client) as stubber:
+        cancelled(stubber, "ConditionalCheckFailed", "None")
+        with pytest.raises(user_store.VersionConflict):
+            user_store.update_version(table, CURRENT, {"age": 31}, NOW)
+
+
+def test_update_version_other_cancellations_are_raised(table):
+    with Stubber(table.meta.client) as stubber:
+        cancelled(stubber, "None", "ThrottlingError")
+        with pytest.raises(table.meta.client.exceptions.TransactionCanceledException):
+            user_store.update_version(table, CURRENT, {"age": 31}, NOW)
+
+
+def test_update_version_without_version_number_puts_latest(table):
+    legacy = {name: value for name, value in CURRENT.items() if name != "version"}
+    action = user_store._latest_update("users", legacy, dict(legacy, version=1, timestamp=NOW), {})
+
+    put = action["Put"]
+    assert put["Item"]["timestamp"] == user_store.LATEST
+    assert put["Item"]["version_timestamp"] == NOW
+    assert put["ExpressionAttributeValues"][":current"] == CURRENT["timestamp"]
+
+
+def test_update_version_without_version_number_sends_wire_format_once(table):
+    legacy = {name: value for name, value in CURRENT.items() if name != "version"}
+    sent = sent_params(table, "TransactWriteItems")
+    with Stubber(table.meta.client) as stubber:
+        stubber.add_response("transact_write_items", {})
+        user_store.update_version(table, legacy, {"age": 31}, NOW)
+
+    put = sent[0]["TransactItems"][1]["Put"]
+    assert put["Item"]["timestamp"] == {"S": user_store.LATEST}
+    assert put["Item"]["age"] == {"N": "31"}
+    assert put["ExpressionAttributeValues"] == {":current": {"S": CURRENT["timestamp"]}}
+
+
+def test_put_version_sends_wire_format_once(table):
+    version = {"user_id": "u1", "timestamp": NOW, "age": 30, "version": 1, "created_at": NOW}
+    sent = sent_params(table, "TransactWriteItems")
+    with Stubber(table.meta.client) as stubber:
+        stubber.add_response("transact_write_items", {})
+        user_store.put_version(table, version)
+
+    put, latest = sent[0]["TransactItems"]
+    assert put == {"Put": {"TableName": "users", "Item": {
+        "user_id": {"S": "u1"}, "timestamp": {"S": NOW}, "age": {"N": "30"},
+        "version": {"N": "1"}, "created_at": {"S": NOW}}}}
+    assert latest == {"Put": {
+        "TableName": "users",
+        "Item": {"user_id": {"S": "u1"}, "timestamp": {"S": user_store.LATEST}, "age": {"N": "30"},
+                 "version": {"N": "1"}, "created_at": {"S": NOW}, "version_timestamp": {"S": NOW},
+                 "latest_of": {"S": "u1"}, "age_bucket": {"N": "30"}, "created_day": {"S": NOW[:10]}},
+        "ConditionExpression": "attribute_not_exists(version_timestamp) OR version_timestamp < :ts",
+        "ExpressionAttributeValues": {":ts": {"S": NOW}}}}
+
+
+def test_put_versions_starts_a_transaction_per_repeated_user(table):
+    versions = [{"user_id": user_id, "timestamp": timestamp}
+                for user_id, timestamp in [("u1", "1"), ("u2", "1"), ("u1", "2")]]
+    sent = sent_params(table, "TransactWriteItems")
+    with Stubber(table.meta.client) as stubber:
+        stubber.add_response("transact_write_items", {})
+        stubber.add_response("transact_write_items", {})
+        user_store.put_versions(table, versions)
+        stubber.assert_no_pending_responses()
+
+    assert [len(params["TransactItems"]) for params in sent] == [4, 2]
+    assert sent[1]["TransactItems"][0]["Put"]["Item"] == {"user_id": {"S": "u1"}, "timestamp": {"S": "2"}}
+
+
+def latest_keys(user_ids):
+    return [{"user_id": {"S": user_id}, "timestamp": {"S": user_store.LATEST}} for user_id in user_ids]
+
+
+def latest_items(user_ids):
+    return [dict(key, version_timestamp={"S": NOW}, latest_of=key["user_id"], version={"N": "2"})
+            for key in latest_keys(user_ids)]
+
+
+def test_get_latest_many_batches_and_retries_unprocessed_keys(client, monkeypatch):
+    monkeypatch.setattr(user_store.time, "sleep", lambda seconds: None)
+    table = fast_dynamo.FastTable("users", client)
+    user_ids = ["u{:03}".format(number) for number in range(150)]
+    first, second = user_ids[:user_store.BATCH_GET_LIMIT], user_ids[user_store.BATCH_GET_LIMIT:]
+    with Stubber(client) as stubber:
+        # One worker, so the chunks are read in order
+        stubber.add_response(
+            "batch_get_item",
+            {"Responses": {"users": latest_items(first[:90])},
+             "UnprocessedKeys": {"users": {"Keys": latest_keys(first[90:])}}},
+            {"RequestItems": {"users": {"Keys": latest_keys(first)}}})
+        stubber.add_response(
+            "batch_get_item", {"Responses": {"users": latest_items(first[90:])}},
+            {"RequestItems": {"users": {"Keys": latest_keys(first[90:])}}})
+        stubber.add_response(
+            "batch_get_item", {"Responses": {"users": latest_items(second[:-1])}},
+            {"RequestItems": {"users": {"Keys": latest_keys(second)}}})
+        # The last user has no LATEST item, it falls back to a query
+        stubber.add_response("query", {"Items": []})
+        latest = user_store.get_latest_many(table, user_ids + ["u000"], workers=1)
+        stubber.assert_no_pending_responses()
+
+    assert [version and version["user_id"] for version in latest] == user_ids[:-1] + [None, "u000"]
+    assert latest[0] == {"user_id": "u000", "timestamp": NOW, "version": 2}
+
+
+def test_get_latest_many_through_the_table_resource(table):
+    sent = sent_params(table, "BatchGetItem")
+    with Stubber(table.meta.client) as stubber:
+        stubber.add_response("batch_get_item", {"Responses": {"users": latest_items(["u1"])}})
+        latest = user_store.get_latest_many(table, ["u1"])
+
+    assert sent[0]["RequestItems"] == {"users": {"Keys": latest_keys(["u1"])}}
+    assert latest == [{"user_id": "u1", "timestamp": NOW, "version": Decimal(2)}]
+
+
+def test_batch_get_gives_up_without_progress(client, monkeypatch):
+    monkeypatch.setattr(user_store.time, "sleep", lambda seconds: None)
+    table = fast_dynamo.FastTable("users", client)
+    with Stubber(client) as stubber:
+        for _ in range(user_store.BATCH_GET_ATTEMPTS):
+            stubber.add_response("batch_get_item", {
+                "Responses": {}, "UnprocessedKeys": {"users": {"Keys": latest_keys(["u1"])}}})
+        with pytest.raises(RuntimeError):
+            user_store.batch_get_latest(table, ["u1"])
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.parametrize("value, age", [(30, 30), ("30", 30), (" 7 ", 7), (31.0, 31), (Decimal(0), 0)])
+def test_parse_age_accepts_whole_numbers(value, age):
+    assert user_store.parse_age(value) == age
+    assert type(user_store.parse_age(value)) is int
+
+
+@pytest.mark.parametrize("value", ["thirty", "", None, True, 30.5, "3e1.5", -1, "NaN", [30]])
+def test_parse_age_rejects_the_rest(value):
+    with pytest.raises(ValueError):
+        user_store.parse_age(value)
+
+
+def user_items(user_id, versions):
+    """Versions of a user, a day apart, and its LATEST item"""
+    items = [{"user_id": user_id, "timestamp": "2025-01-{:02}T00:00:00".format(day + 1), "name": "Ann"}
+             for day in range(versions)]
+    return items + [{"user_id": user_id, "timestamp": user_store.LATEST, "name": "Ann"}]
+
+
+def test_item_keys_pages_the_keys_of_a_user():
+    table = ItemTable(user_items("u1", 9) + user_items("u2", 3))
+    pages = list(user_store.item_keys(table, "u1", page_size=4))
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert pages[-1][-1] == {"user_id": "u1", "timestamp": user_store.LATEST}
+    assert all(set(key) == {"user_id", "timestamp"} for page in pages for key in page)
+    assert table.calls[1]["ExclusiveStartKey"] == {"user_id": "u1", "timestamp": "2025-01-04T00:00:00"}
+
+
+def test_item_keys_of_an_unknown_user():
+    assert list(user_store.item_keys(ItemTable(user_items("u1", 2)), "u2")) == []
+
+
+def test_delete_keys_resends_the_unprocessed_keys_of_parallel_chunks():
+    table = ItemTable(user_items("u1", 99) + user_items("u2", 1))
+    keys = [key for page in user_store.item_keys(table, "u1") for key in page]
+
+    assert user_store.delete_keys(table, keys, workers=4, chunk_size=30) == 100
+    assert [item["user_id"] for item in table.items] == ["u2", "u2"]
+    # 4 chunks, each call leaving one key to the next one of its writer
+    assert len(table.unprocessed) >= 4
+    assert sum(table.batches) == 100 + len(table.unprocessed)
+
+
+def test_delete_keys_of_one_chunk():
+    table = ItemTable(user_items("u1", 2))
+
+    assert user_store.delete_keys(table, list(next(user_store.item_keys(table, "u1")))) == 3
+    assert table.items == []
@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+
+import pytest
+from botocore.stub import Stubber
+
+from .stand_ins import ItemTable, RecordingLambda
+
+# The Lambda modules live in the lambda asset directory, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+# The handlers read their settings and create their clients when imported
+os.environ.setdefault("TABLE_NAME", "users")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import batch_handler  # noqa: E402
+import crud_handler  # noqa: E402
+import user_store  # noqa: E402
+
+
+def sent_items(client):
+    """Items of the TransactWriteItems calls of a client as they are sent"""
+    sent = []
+    client.meta.events.register(
+        "before-parameter-build.dynamodb.TransactWriteItems",
+        lambda params, **kwargs: sent.extend(action["Put"]["Item"] for action in params["TransactItems"]
+                                            if "Put" in action))
+    return sent
+
+
+def test_create_user_stores_a_numeric_string_age_as_a_number():
+    sent = sent_items(crud_handler.table.meta.client)
+    with Stubber(crud_handler.table.meta.client) as stubber:
+        stubber.add_response("transact_write_items", {})
+        response = crud_handler.create_user({"body": json.dumps(
+            {"user_id": "u1", "name": "Ann", "email": "ann@example.com", "age": "30"})})
+
+    assert response["statusCode"] == 201
+    assert json.loads(response["body"])["user"]["age"] == 30
+    assert [item["age"] for item in sent] == [{"N": "30"}, {"N": "30"}]
+    assert sent[1]["age_bucket"] == {"N": "30"}
+
+
+def test_create_user_rejects_a_bad_age():
+    with Stubber(crud_handler.table.meta.client) as stubber:
+        response = crud_handler.create_user({"body": json.dumps(
+            {"name": "Ann", "email": "ann@example.com", "age": "thirty"})})
+        stubber.assert_no_pending_responses()
+
+    assert response["statusCode"] == 400
+    assert "age" in json.loads(response["body"])["error"]
+
+
+def test_update_user_rejects_a_bad_age_before_reading():
+    # No stubbed response: reaching DynamoDB would be a 500
+    with Stubber(crud_handler.table.meta.client):
+        response = crud_handler.update_user({"body": json.dumps({"age": -3})}, "u1")
+
+    assert response["statusCode"] == 400
+
+
+def test_update_user_reads_once_and_writes_in_one_transaction():
+    table_name = crud_handler.table.name
+    key = {"user_id": "u1", "timestamp": user_store.LATEST}
+    with Stubber(crud_handler.table.meta.client) as stubber:
+        stubber.add_response("get_item", {"Item": {
+            "user_id": {"S": "u1"}, "timestamp": {"S": "LATEST"}, "version_timestamp": {"S": "2025-01-01T00:00:00"},
+            "name": {"S": "Ann"}, "version": {"N": "3"}}},
+            {"TableName": table_name, "Key": key, "ConsistentRead": True})
+        stubber.add_response("transact_write_items", {})
+        response = crud_handler.update_user({"body": json.dumps({"name": "Anna", "expected_version": 3})}, "u1")
+        stubber.assert_no_pending_responses()
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["user"]["version"] == 4
+
+
+def test_update_user_refuses_an_outdated_expected_version_without_writing():
+    with Stubber(crud_handler.table.meta.client) as stubber:
+        stubber.add_response("get_item", {"Item": {
+            "user_id": {"S": "u1"}, "timestamp": {"S": "LATEST"}, "version_timestamp": {"S": "2025-01-01T00:00:00"},
+            "name": {"S": "Ann"}, "version": {"N": "3"}}})
+        response = crud_handler.update_user({"body": json.dumps({"name": "Anna", "expected_version": 2})}, "u1")
+
+    assert response["statusCode"] == 409
+    assert json.loads(response["body"])["current_version"] == 3
+
+
+def test_batch_write_users_rejects_a_bad_age():
+    with Stubber(batch_handler.table.meta.client):
+        response = batch_handler.batch_write_users([
+            {"name": "Ann", "email": "ann@example.com", "age": 30},
+            {"name": "Bob", "email": "bob@example.com", "age": "x"}])
+
+    assert response["statusCode"] == 400
+
+
+def user_items(user_id, versions):
+    items = [{"user_id": user_id, "timestamp": "2025-01-01T00:00:{:02}".format(second)}
+             for second in range(versions)]
+    return items + [{"user_id": user_id, "timestamp": user_store.LATEST}]
+
+
+@pytest.fixture
+def deleting(monkeypatch):
+    """crud_handler on a stand-in table of 4 items per page, deleting the
+    users of 10 items and more through the purge worker"""
+    table = ItemTable(user_items("u1", 24) + user_items("u2", 8), page_items=4)
+    monkeypatch.setattr(crud_handler, "table", table)
+    monkeypatch.setattr(crud_handler, "lambda_client", RecordingLambda())
+    monkeypatch.setattr(crud_handler, "PURGE_THRESHOLD", 10)
+    monkeypatch.setenv("PURGE_FUNCTION_NAME", "purge")
+    return table
+
+
+def test_delete_user_deletes_every_page(deleting):
+    # The first page is cut short of the threshold, the next ones are read
+    # and deleted in turn
+    response = crud_handler.delete_user("u2")
+
+    assert response["statusCode"] == 200
+    assert "Removed 9 versions" in json.loads(response["body"])["message"]
+    assert len(deleting.calls) == 3
+    assert {item["user_id"] for item in deleting.items} == {"u1"}
+    assert crud_handler.lambda_client.invocations == []
+
+
+def test_delete_user_of_an_unknown_user(deleting):
+    assert crud_handler.delete_user("u9")["statusCode"] == 404
+
+
+def test_long_history_is_handed_to_the_purge_worker(deleting):
+    deleting.page_items = None
+    response = crud_handler.delete_user("u1")
+
+    assert response["statusCode"] == 202
+    assert crud_handler.lambda_client.invocations == [("purge", "Event", {"user_id": "u1"})]
+    # Only the LATEST item is gone, the versions are left to the worker
+    remaining = [item["timestamp"] for item in deleting.items if item["user_id"] == "u1"]
+    assert len(remaining) == 24 and user_store.LATEST not in remaining